@@ -50,6 +50,8 @@ from dbcollection.core.api.add import add
 from dbcollection.core.api.remove import remove
 from dbcollection.core.api.cache import cache
 from dbcollection.core.api.info import info
+from dbcollection.core.api.export import export
+from dbcollection.core.api.verify import verify
 from dbcollection.core.api.metadata import fetch_list_datasets
 
 # load the cache file
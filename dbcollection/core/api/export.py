@@ -0,0 +1,192 @@
+"""
+Export API class.
+"""
+
+
+from __future__ import print_function
+import os
+
+from dbcollection.core.manager import CacheManager
+from dbcollection.core.exporter import EXPORT_FORMATS, export_hdf5_file
+
+from .process import process
+from .metadata import MetadataConstructor
+
+
+def export(name, task='default', format='parquet', output_dir='', batch_size=65536, verbose=True):
+    """Exports the metadata of a dataset's task to columnar files.
+
+    The fields of each set are streamed out of the task's HDF5 metadata file
+    in batches of rows, so large sets can be exported without loading them
+    fully into memory. If the task has not been processed yet, it is
+    processed before being exported.
+
+    Parameters
+    ----------
+    name : str
+        Name of the dataset.
+    task : str, optional
+        Name of the task to export.
+    format : str, optional
+        Format of the exported files: 'parquet' or 'arrow' (one file per
+        field, requires the pyarrow package) or 'npz' (one file per set).
+    output_dir : str, optional
+        Directory to store the exported files. If empty, the files are
+        stored in the dataset's cache directory (in 'export/<task>/<format>').
+    batch_size : int, optional
+        Number of rows read and written at once.
+    verbose : bool, optional
+        Displays text information (if true).
+
+    Returns
+    -------
+    list
+        File names + paths of the exported files.
+
+    Raises
+    ------
+    KeyError
+        If the export format is invalid.
+    ImportError
+        If the pyarrow package is not installed (for the 'parquet'/'arrow' formats).
+
+    Examples
+    --------
+    Export the MNIST dataset to Parquet files (one per field of each set).
+
+    >>> import dbcollection as dbc
+    >>> filenames = dbc.export('mnist', format='parquet', output_dir='/tmp/mnist')
+    >>> import pyarrow.parquet as pq
+    >>> pq.read_table('/tmp/mnist/train/classes.parquet').column('classes').to_pylist()
+    ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
+
+    Export the MNIST dataset to .npz files (one per set).
+
+    >>> filenames = dbc.export('mnist', format='npz', output_dir='/tmp/mnist')
+
+    """
+    assert name, 'Must input a valid dataset name.'
+
+    exporter = ExportAPI(name=name,
+                         task=task,
+                         format=format,
+                         output_dir=output_dir,
+                         batch_size=batch_size,
+                         verbose=verbose)
+
+    return exporter.run()
+
+
+class ExportAPI(object):
+    """Dataset metadata export API class.
+
+    This class contains methods to export the metadata
+    of a dataset's task to columnar file formats.
+
+    Parameters
+    ----------
+    name : str
+        Name of the dataset.
+    task : str
+        Name of the task to export.
+    format : str
+        Format of the exported files.
+    output_dir : str
+        Directory to store the exported files.
+    batch_size : int
+        Number of rows read and written at once.
+    verbose : bool
+        Displays text information (if true).
+
+    Attributes
+    ----------
+    name : str
+        Name of the dataset.
+    task : str
+        Name of the task to export.
+    format : str
+        Format of the exported files.
+    output_dir : str
+        Directory to store the exported files.
+    batch_size : int
+        Number of rows read and written at once.
+    verbose : bool
+        Displays text information (if true).
+    cache_manager : CacheManager
+        Cache manager object.
+
+    Raises
+    ------
+    KeyError
+        If the export format is invalid.
+
+    """
+
+    def __init__(self, name, task, format, output_dir, batch_size, verbose):
+        """Initialize class."""
+        assert isinstance(name, str), 'Must input a valid dataset name.'
+        assert isinstance(task, str), 'Must input a valid task name.'
+        assert isinstance(output_dir, str), 'Must input a valid directory.'
+        assert isinstance(batch_size, int) and batch_size > 0, 'Must input a positive batch size.'
+        assert isinstance(verbose, bool), "Must input a valid boolean for verbose."
+        if format not in EXPORT_FORMATS:
+            raise KeyError("Invalid export format: '{}'. Valid formats: {}"
+                           .format(format, EXPORT_FORMATS))
+
+        self.name = name
+        self.format = format
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.cache_manager = self.get_cache_manager()
+        self.task = self.parse_task_name(task)
+
+    def get_cache_manager(self):
+        return CacheManager()
+
+    def parse_task_name(self, task):
+        """Validate the task name."""
+        db_metadata = self.get_dataset_metadata_obj(self.name)
+        return db_metadata.parse_task_name(task)
+
+    def get_dataset_metadata_obj(self, name):
+        return MetadataConstructor(name)
+
+    def run(self):
+        """Main method."""
+        if not self.dataset_task_metadata_exists_in_cache():
+            if self.verbose:
+                print('==> Processed metadata not found for dataset \'{}\', task \'{}\'.'
+                      .format(self.name, self.task))
+                print('Proceeding to process the metadata for this task...')
+            self.process_dataset_task_metadata()
+
+        hdf5_filepath = self.get_hdf5_file_path_from_cache()
+        output_dir = self.get_output_dir(hdf5_filepath)
+        if self.verbose:
+            print('==> Export \'{}\' ({}) metadata to: {}'.format(self.name, self.task, output_dir))
+        filenames = export_hdf5_file(hdf5_filepath, output_dir,
+                                     file_format=self.format,
+                                     batch_size=self.batch_size,
+                                     verbose=self.verbose)
+
+        if self.verbose:
+            print('==> Dataset export complete.')
+        return filenames
+
+    def dataset_task_metadata_exists_in_cache(self):
+        return self.cache_manager.task.exists(task=self.task, name=self.name)
+
+    def process_dataset_task_metadata(self):
+        process(name=self.name, task=self.task, verbose=self.verbose)
+        self.cache_manager.manager.reload_cache()
+
+    def get_hdf5_file_path_from_cache(self):
+        task_metadata = self.cache_manager.task.get(self.name, self.task)
+        return task_metadata["filename"]
+
+    def get_output_dir(self, hdf5_filepath):
+        """Returns the directory to store the exported files."""
+        if self.output_dir:
+            return self.output_dir
+        return os.path.join(os.path.dirname(hdf5_filepath), 'export', self.task, self.format)
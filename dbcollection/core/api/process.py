@@ -11,7 +11,7 @@ from dbcollection.core.manager import CacheManager
 from .metadata import MetadataConstructor
 
 
-def process(name, task='default', verbose=True):
+def process(name, task='default', verbose=True, **kwargs):
     """Process a dataset's metadata and stores it to file.
 
     The data is stored a a HSF5 file for each task composing the dataset's tasks.
@@ -20,10 +20,28 @@ def process(name, task='default', verbose=True):
     ----------
     name : str
         Name of the dataset.
-    task : str, optional
-        Name of the task to process.
+    task : str/list/tuple, optional
+        Name of the task to process. Several tasks can be processed in one
+        call by passing a list of task names, in which case the annotation
+        files shared by the tasks (e.g., the 'instances_*2014.json' files of
+        COCO's 'detection_2015' and 'detection_2016' tasks) are loaded only once.
     verbose : bool, optional
         Displays text information (if true).
+    storage_profiles : dict, optional
+        Storage profile (name or dictionary of options) of the data fields,
+        overriding the ones defined by the task (see dbcollection.utils.hdf5).
+    string_format : str, optional
+        Encoding of the string fields: 'ascii' (zero-padded uint8 arrays),
+        'fixed' (fixed-length strings) or 'vlen' (variable-length strings).
+        If None, uses the encoding defined by the task.
+    list_format : str, optional
+        Layout of the list fields (e.g., 'list_boxes_per_image'): 'padded'
+        (2D arrays padded with -1) or 'ragged' (values + row offsets).
+        If None, uses the layout defined by the task.
+    workers : int, optional
+        Number of processes used to load and store the sets of a task
+        (e.g., 'train' and 'val') in parallel. If None, uses the number
+        of workers defined by the task (one by default).
 
     Raises
     ------
@@ -38,12 +56,30 @@ def process(name, task='default', verbose=True):
 
     >>> dbc.process('cifar10', task='classification', verbose=False)
 
+    Store the images uncompressed with chunks of 256 images.
+
+    >>> dbc.process('cifar10', storage_profiles={'images': {'compression': None, 'chunk_rows': 256}})
+
+    Store the string fields as variable-length strings.
+
+    >>> dbc.process('cifar10', string_format='vlen')
+
+    Store the list fields without padding.
+
+    >>> dbc.process('cifar10', list_format='ragged')
+
+    Process two tasks of COCO (which share their train/val annotation files), with the
+    sets of each task processed in parallel.
+
+    >>> dbc.process('coco', task=['detection_2015', 'detection_2016'], workers=4)
+
     """
     assert name, 'Must input a valid dataset name.'
 
     processer = ProcessAPI(name=name,
                            task=task,
-                           verbose=verbose)
+                           verbose=verbose,
+                           **kwargs)
 
     processer.run()
 
@@ -59,19 +95,35 @@ class ProcessAPI(object):
     ----------
     name : str
         Name of the dataset.
-    task : str
-        Name of the task to process.
+    task : str/list/tuple
+        Name of the task(s) to process.
     verbose : bool
         Displays text information (if true).
+    storage_profiles : dict, optional
+        Storage profile of the data fields overriding the ones of the task.
+    string_format : str, optional
+        Encoding of the string fields overriding the one of the task.
+    list_format : str, optional
+        Layout of the list fields overriding the one of the task.
+    workers : int, optional
+        Number of processes used to process the sets of a task.
 
     Attributes
     ----------
     name : str
         Name of the dataset.
-    task : str
-        Name of the task to process.
+    task : str/list/tuple
+        Name of the task(s) to process.
     verbose : bool
         Displays text information (if true).
+    storage_profiles : dict
+        Storage profile of the data fields overriding the ones of the task.
+    string_format : str
+        Encoding of the string fields overriding the one of the task.
+    list_format : str
+        Layout of the list fields overriding the one of the task.
+    workers : int
+        Number of processes used to process the sets of a task.
     extract_data : bool
         Flag to extract data (if True).
     cache_manager : CacheManager
@@ -84,15 +136,30 @@ class ProcessAPI(object):
 
     """
 
-    def __init__(self, name, task, verbose):
+    def __init__(self, name, task, verbose, **kwargs):
         """Initialize class."""
         assert isinstance(name, str), 'Must input a valid dataset name.'
-        assert isinstance(task, str), 'Must input a valid task name.'
+        assert isinstance(task, str) or (isinstance(task, (list, tuple)) and any(task) and
+                                         all(isinstance(t, str) for t in task)), \
+            'Must input a valid task name.'
         assert isinstance(verbose, bool), "Must input a valid boolean for verbose."
 
         self.name = name
         self.task = task
         self.verbose = verbose
+        self.storage_profiles = kwargs.pop('storage_profiles', None) or {}
+        self.string_format = kwargs.pop('string_format', None)
+        self.list_format = kwargs.pop('list_format', None)
+        self.workers = kwargs.pop('workers', None)
+        if any(kwargs):
+            raise TypeError('Invalid keyword arguments: {}'.format(sorted(kwargs)))
+        assert isinstance(self.storage_profiles, dict), 'Must input a valid dictionary of storage profiles.'
+        assert self.string_format is None or isinstance(self.string_format, str), \
+            'Must input a valid string format.'
+        assert self.list_format is None or isinstance(self.list_format, str), \
+            'Must input a valid list format.'
+        assert self.workers is None or (isinstance(self.workers, int) and self.workers > 0), \
+            'Must input a valid number of workers.'
         self.extract_data = False
         self.cache_manager = self.get_cache_manager()
 
@@ -136,8 +203,13 @@ class ProcessAPI(object):
         """Process the dataset's metadata."""
         data_dir = self.get_dataset_data_dir_path()
         cache_dir = self.get_dataset_cache_dir_path()
-        task = self.parse_task_name(self.task)
-        self.check_if_task_exists_in_database(task)
+        if isinstance(self.task, (list, tuple)):
+            task = [self.parse_task_name(task_name) for task_name in self.task]
+            for task_name in task:
+                self.check_if_task_exists_in_database(task_name)
+        else:
+            task = self.parse_task_name(self.task)
+            self.check_if_task_exists_in_database(task)
         return self.process_dataset_metadata(data_dir, cache_dir, task)
 
     def get_dataset_constructor(self):
@@ -176,7 +248,7 @@ class ProcessAPI(object):
         """Check if task exists in the list of available tasks for processing."""
         if not self.exists_task(task):
             raise KeyError('The task \'{}\' does not exists for loading/processing.'
-                           .format(self.task))
+                           .format(task))
 
     def exists_task(self, task):
         """Checks if a task exists for a dataset."""
@@ -189,6 +261,14 @@ class ProcessAPI(object):
                          cache_path=cache_dir,
                          extract_data=self.extract_data,
                          verbose=self.verbose)
+        if any(self.storage_profiles):
+            db.storage_profiles = self.storage_profiles
+        if self.string_format is not None:
+            db.string_format = self.string_format
+        if self.list_format is not None:
+            db.list_format = self.list_format
+        if self.workers is not None:
+            db.workers = self.workers
         task_info = db.process(task)
         return task_info
 
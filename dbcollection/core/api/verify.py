@@ -0,0 +1,148 @@
+"""
+Verify API class.
+"""
+
+
+from __future__ import print_function
+import os
+
+from dbcollection.core.manager import CacheManager
+from dbcollection.utils.url import verify_url_files
+
+from .metadata import MetadataConstructor
+
+
+def verify(name, data_dir='', workers=4, verbose=True):
+    """Verifies the checksums of a dataset's downloaded data files.
+
+    The downloaded files are hashed from scratch (several files at the same
+    time) and compared with the checksums of the dataset's urls or, if the
+    urls have none, with the checksums computed when the files were
+    downloaded (stored in the 'checksums.json' manifest of the data
+    directory).
+
+    Parameters
+    ----------
+    name : str
+        Name of the dataset.
+    data_dir : str, optional
+        Directory path of the downloaded data. If empty, the dataset's data
+        directory is retrieved from the cache.
+    workers : int, optional
+        Number of files hashed at the same time.
+    verbose : bool, optional
+        Displays text information (if true).
+
+    Returns
+    -------
+    OrderedDict
+        Status of each file (by file name + path): 'ok' (checksums match),
+        'invalid' (checksums do not match), 'missing' (the file does not
+        exist) or 'unverified' (no checksums to compare with).
+
+    Raises
+    ------
+    KeyError
+        If the dataset was not downloaded and no data directory was given.
+
+    Examples
+    --------
+    Verify the downloaded files of the CIFAR10 dataset.
+
+    >>> import dbcollection as dbc
+    >>> status = dbc.verify('cifar10')
+    >>> [filename for filename, file_status in status.items() if file_status != 'ok']
+    []
+
+    """
+    assert name, 'Must input a valid dataset name.'
+
+    verifier = VerifyAPI(name=name,
+                         data_dir=data_dir,
+                         workers=workers,
+                         verbose=verbose)
+
+    return verifier.run()
+
+
+class VerifyAPI(object):
+    """Dataset data files verification API class.
+
+    This class contains methods to verify the checksums
+    of a dataset's downloaded data files.
+
+    Parameters
+    ----------
+    name : str
+        Name of the dataset.
+    data_dir : str
+        Directory path of the downloaded data.
+    workers : int
+        Number of files hashed at the same time.
+    verbose : bool
+        Displays text information (if true).
+
+    Attributes
+    ----------
+    name : str
+        Name of the dataset.
+    data_dir : str
+        Directory path of the downloaded data.
+    workers : int
+        Number of files hashed at the same time.
+    verbose : bool
+        Displays text information (if true).
+    cache_manager : CacheManager
+        Cache manager object.
+
+    """
+
+    def __init__(self, name, data_dir, workers, verbose):
+        """Initialize class."""
+        assert isinstance(name, str), 'Must input a valid dataset name.'
+        assert isinstance(data_dir, str), 'Must input a valid directory.'
+        assert isinstance(workers, int) and workers > 0, 'Must input a positive number of workers.'
+        assert isinstance(verbose, bool), "Must input a valid boolean for verbose."
+
+        self.name = name
+        self.data_dir = data_dir
+        self.workers = workers
+        self.verbose = verbose
+        self.cache_manager = self.get_cache_manager()
+
+    def get_cache_manager(self):
+        return CacheManager()
+
+    def run(self):
+        """Main method."""
+        data_dir = self.get_data_dir()
+        urls = self.get_dataset_urls()
+        if self.verbose:
+            print('==> Verify {} data files in: {}'.format(self.name, data_dir))
+        status = verify_url_files(urls, data_dir, workers=self.workers, verbose=self.verbose)
+        if self.verbose:
+            num_ok = sum(file_status == 'ok' for file_status in status.values())
+            print('==> Dataset verification complete: {}/{} files ok.'.format(num_ok, len(status)))
+        return status
+
+    def get_data_dir(self):
+        """Returns the directory of the downloaded data."""
+        if self.data_dir:
+            data_dir = self.data_dir
+            if not self.name == os.path.basename(data_dir):
+                data_dir = os.path.join(data_dir, self.name)
+            return data_dir
+        if not self.exists_dataset_in_cache():
+            raise KeyError('Dataset \'{}\' was not downloaded. Input the directory of its data files.'
+                           .format(self.name))
+        return self.cache_manager.dataset.get(self.name)["data_dir"]
+
+    def exists_dataset_in_cache(self):
+        return self.cache_manager.dataset.exists(self.name)
+
+    def get_dataset_urls(self):
+        constructor = self.get_dataset_metadata_obj(self.name).get_constructor()
+        return constructor.urls
+
+    def get_dataset_metadata_obj(self, name):
+        return MetadataConstructor(name)
@@ -0,0 +1,133 @@
+"""
+Chunk cache for the dataset's metadata loaders.
+"""
+
+
+import threading
+from collections import OrderedDict
+
+
+class ChunkCache(object):
+    """Byte-bounded LRU cache of decompressed blocks of rows of hdf5 fields.
+
+    Fields stored with chunks + compression decompress a whole chunk for every
+    read, even when only a single row is requested. This cache keeps the most
+    recently used blocks of rows (aligned to the chunk boundaries of a field)
+    in memory, so neighbouring or repeated reads of the same chunk are served
+    from memory instead of being decompressed again.
+
+    A single cache can be shared by several fields (and sets). The total size
+    of the cached blocks never exceeds the maximum number of bytes.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximum size (in bytes) of the cached data.
+
+    Attributes
+    ----------
+    max_bytes : int
+        Maximum size (in bytes) of the cached data.
+    nbytes : int
+        Current size (in bytes) of the cached data.
+    hits : int
+        Number of block reads served from the cache.
+    misses : int
+        Number of block reads fetched from disk.
+    evictions : int
+        Number of blocks removed from the cache to free space.
+
+    """
+
+    def __init__(self, max_bytes):
+        """Initialize class."""
+        assert isinstance(max_bytes, int), 'Must input a valid integer for max_bytes.'
+        assert max_bytes > 0, 'Must input a positive number of bytes.'
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, read_fn):
+        """Returns the data of a block, reading it from disk on a cache miss.
+
+        Parameters
+        ----------
+        key : tuple
+            Unique identifier of the block.
+        read_fn : function
+            Function that reads the block from disk. Must return a np.ndarray.
+
+        Returns
+        -------
+        np.ndarray
+            Data of the block.
+
+        """
+        with self._lock:
+            try:
+                block = self._blocks.pop(key)
+            except KeyError:
+                pass
+            else:
+                self._blocks[key] = block
+                self.hits += 1
+                return block
+
+        block = read_fn()
+
+        with self._lock:
+            self.misses += 1
+            if block.nbytes <= self.max_bytes and key not in self._blocks:
+                self._blocks[key] = block
+                self.nbytes += block.nbytes
+                self._evict()
+        return block
+
+    def _evict(self):
+        """Removes the least recently used blocks until the cache fits its maximum size."""
+        while self.nbytes > self.max_bytes:
+            _, block = self._blocks.popitem(last=False)
+            self.nbytes -= block.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        """Removes all blocks from the cache and resets the counters."""
+        with self._lock:
+            self._blocks.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self):
+        """Returns the usage statistics of the cache.
+
+        Returns
+        -------
+        dict
+            Number of hits, misses and evictions, as well as the current
+            and maximum size of the cache.
+
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "blocks": len(self._blocks),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def __str__(self):
+        return 'ChunkCache: {}/{} bytes, hits<{}>, misses<{}>, evictions<{}>' \
+            .format(self.nbytes, self.max_bytes, self.hits, self.misses, self.evictions)
+
+    def __repr__(self):
+        return str(self)
@@ -8,6 +8,11 @@ class MD5HashNotEqual(Exception):
     pass
 
 
+class SHA256HashNotEqual(Exception):
+    """The SHA-256 hashes are not equal."""
+    pass
+
+
 class URLDoesNotExist(Exception):
     """URL path does not exist."""
     pass
@@ -0,0 +1,249 @@
+"""
+Export the metadata of a processed task to columnar file formats.
+"""
+
+
+import os
+import json
+import zipfile
+import h5py
+import numpy as np
+
+from dbcollection.utils.hdf5 import (
+    decode_strings,
+    get_ragged_offsets_field,
+    is_ascii_field,
+    is_string_dtype
+)
+from dbcollection.utils.query_index import QUERY_INDEX_GROUP
+from dbcollection.utils.string_ascii import convert_ascii_to_str
+
+
+# Formats of the exported files:
+# - 'parquet': one Apache Parquet file per field (requires pyarrow).
+# - 'arrow': one Apache Arrow IPC file per field (requires pyarrow).
+# - 'npz': one numpy .npz file per set (fields stored as they are in the HDF5
+#   file, except for strings which are stored as fixed-length byte strings).
+EXPORT_FORMATS = ('parquet', 'arrow', 'npz')
+
+
+def import_pyarrow():
+    """Imports the (optional) pyarrow package required by the 'parquet'/'arrow' formats."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Exporting to the 'parquet' or 'arrow' formats requires the pyarrow "
+                          "package (pip install pyarrow).")
+    return pyarrow
+
+
+def is_list_field(field, h5_field):
+    """Checks if a field stores lists (padded 'list_*' fields or ragged fields)."""
+    if get_ragged_offsets_field(h5_field) is not None:
+        return True
+    return field.startswith('list_') and h5_field.ndim == 2
+
+
+def get_list_batches(h5_group, h5_field, batch_size):
+    """Yields batches of (values, offsets) of the lists of a field."""
+    offsets_field = get_ragged_offsets_field(h5_field)
+    if offsets_field is not None:
+        h5_offsets = h5_group[offsets_field]
+        for start in range(0, h5_offsets.shape[0] - 1, batch_size):
+            offsets = h5_offsets[start:start + batch_size + 1]
+            values = h5_field[offsets[0]:offsets[-1]]
+            yield values, offsets - offsets[0]
+    else:
+        for start in range(0, h5_field.shape[0], batch_size):
+            data = h5_field[start:start + batch_size]
+            # padded lists: remove the trailing fill values of each row
+            is_value = data != h5_field.fillvalue
+            lengths = np.where(is_value.any(axis=1), data.shape[1] - np.argmax(is_value[:, ::-1], axis=1), 0)
+            values = data[np.arange(data.shape[1]) < lengths[:, None]]
+            yield values, np.concatenate(([0], np.cumsum(lengths)))
+
+
+def get_string_batches(h5_field, batch_size):
+    """Yields batches of strings (lists of str) of a field."""
+    is_ascii = not is_string_dtype(h5_field.dtype)
+    for start in range(0, h5_field.shape[0], batch_size):
+        data = h5_field[start:start + batch_size]
+        strings = convert_ascii_to_str(data) if is_ascii else decode_strings(data)
+        yield [strings] if isinstance(strings, str) else strings
+
+
+def get_array_batches(h5_field, batch_size):
+    """Yields batches of rows (numpy arrays) of a field."""
+    if h5_field.ndim == 0:
+        yield np.atleast_1d(h5_field[()])
+        return
+    for start in range(0, h5_field.shape[0], batch_size):
+        yield h5_field[start:start + batch_size]
+
+
+def export_field_arrow(h5_group, field, filename, file_format='parquet', batch_size=65536):
+    """Exports a field to an Apache Parquet/Arrow file in record batches.
+
+    The field is stored in a single column with the name of the field.
+    String fields are stored as string columns, list fields as list
+    columns and multi-dimensional fields as fixed-size list columns
+    (with the shape of the rows stored in the field's metadata).
+
+    Parameters
+    ----------
+    h5_group : h5py._hl.group.Group
+        Handler for an HDF5 group object.
+    field : str
+        Name of the field (h5 dataset).
+    filename : str
+        File name + path of the exported file.
+    file_format : str, optional
+        Format of the file ('parquet' or 'arrow').
+    batch_size : int, optional
+        Number of rows read from the HDF5 file and written at once.
+
+    """
+    pa = import_pyarrow()
+    h5_field = h5_group[field]
+    metadata = None
+    if is_list_field(field, h5_field):
+        arrow_type = pa.list_(pa.from_numpy_dtype(h5_field.dtype))
+        batches = (pa.ListArray.from_arrays(pa.array(offsets.astype(np.int32)), pa.array(values))
+                   for values, offsets in get_list_batches(h5_group, h5_field, batch_size))
+    elif is_string_dtype(h5_field.dtype) or is_ascii_field(h5_field):
+        arrow_type = pa.string()
+        batches = (pa.array(strings, type=arrow_type)
+                   for strings in get_string_batches(h5_field, batch_size))
+    elif h5_field.ndim > 1:
+        row_shape = h5_field.shape[1:]
+        row_size = int(np.prod(row_shape))
+        arrow_type = pa.list_(pa.from_numpy_dtype(h5_field.dtype), row_size)
+        metadata = {b'shape': json.dumps(list(row_shape)).encode('utf-8')}
+        batches = (pa.FixedSizeListArray.from_arrays(pa.array(data.reshape(-1)), row_size)
+                   for data in get_array_batches(h5_field, batch_size))
+    else:
+        arrow_type = pa.from_numpy_dtype(h5_field.dtype)
+        batches = (pa.array(data) for data in get_array_batches(h5_field, batch_size))
+
+    schema = pa.schema([pa.field(field, arrow_type, metadata=metadata)])
+    if file_format == 'parquet':
+        writer = pa.parquet.ParquetWriter(filename, schema)
+    else:
+        writer = pa.ipc.new_file(filename, schema)
+    try:
+        for array in batches:
+            writer.write_batch(pa.record_batch([array], schema=schema))
+    finally:
+        writer.close()
+
+
+def export_field_npy(zip_file, h5_group, field, batch_size=65536):
+    """Writes a field as a .npy file into an (open) .npz file in batches.
+
+    String fields are stored as fixed-length byte strings. The remaining
+    fields are stored as they are in the HDF5 file.
+
+    Parameters
+    ----------
+    zip_file : zipfile.ZipFile
+        Handler of the .npz file.
+    h5_group : h5py._hl.group.Group
+        Handler for an HDF5 group object.
+    field : str
+        Name of the field (h5 dataset).
+    batch_size : int, optional
+        Number of rows read from the HDF5 file and written at once.
+
+    """
+    h5_field = h5_group[field]
+    shape = h5_field.shape if h5_field.ndim > 0 else (1,)
+    dtype = h5_field.dtype
+    batches = get_array_batches(h5_field, batch_size)
+    if h5_field.dtype.kind == 'O':
+        # variable-length strings are stored with the length of the longest one
+        max_length = 1
+        for strings in get_string_batches(h5_field, batch_size):
+            max_length = max([max_length] + [len(string.encode('utf-8')) for string in strings])
+        dtype = np.dtype('S{}'.format(max_length))
+        batches = (np.char.encode(np.array(strings, dtype=np.str_), 'utf-8').astype(dtype)
+                   for strings in get_string_batches(h5_field, batch_size))
+    elif not is_list_field(field, h5_field) and is_ascii_field(h5_field):
+        dtype, shape = np.dtype('S{}'.format(h5_field.shape[1])), shape[:1]
+        batches = (data.view(dtype).reshape(-1) for data in batches)
+
+    header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': tuple(shape)}
+    with zip_file.open(field + '.npy', 'w', force_zip64=True) as f:
+        np.lib.format.write_array_header_1_0(f, header)
+        for data in batches:
+            f.write(np.ascontiguousarray(data, dtype=dtype).tobytes())
+
+
+def export_hdf5_file(hdf5_filepath, output_dir, file_format='parquet', batch_size=65536, verbose=True):
+    """Exports the sets of a task's HDF5 metadata file to columnar files.
+
+    The fields are read from the HDF5 file and written to disk in batches of
+    rows, so the data of a set is never fully loaded into memory.
+
+    Parameters
+    ----------
+    hdf5_filepath : str
+        File name + path of the task's HDF5 metadata file.
+    output_dir : str
+        Directory to store the exported files.
+    file_format : str, optional
+        Format of the exported files (see EXPORT_FORMATS).
+    batch_size : int, optional
+        Number of rows read from the HDF5 file and written at once.
+    verbose : bool, optional
+        Displays text information (if true).
+
+    Returns
+    -------
+    list
+        File names + paths of the exported files.
+
+    Raises
+    ------
+    KeyError
+        If the file format is invalid.
+    ImportError
+        If the pyarrow package is not installed (for the 'parquet'/'arrow' formats).
+
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise KeyError("Invalid export format: '{}'. Valid formats: {}"
+                       .format(file_format, EXPORT_FORMATS))
+    assert isinstance(batch_size, int) and batch_size > 0, 'Must input a positive batch size.'
+    if file_format != 'npz':
+        import_pyarrow()
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    filenames = []
+    with h5py.File(hdf5_filepath, 'r') as h5_file:
+        for set_name in h5_file:
+            if set_name == QUERY_INDEX_GROUP:
+                continue
+            h5_group = h5_file[set_name]
+            fields = [field for field in h5_group if isinstance(h5_group[field], h5py.Dataset)]
+            if verbose:
+                print('==> Exporting set \'{}\' ({} fields)'.format(set_name, len(fields)))
+            if file_format == 'npz':
+                filename = os.path.join(output_dir, set_name + '.npz')
+                with zipfile.ZipFile(filename, 'w', allowZip64=True) as zip_file:
+                    for field in fields:
+                        export_field_npy(zip_file, h5_group, field, batch_size)
+                filenames.append(filename)
+            else:
+                set_dir = os.path.join(output_dir, set_name)
+                if not os.path.exists(set_dir):
+                    os.makedirs(set_dir)
+                offsets_fields = set(get_ragged_offsets_field(h5_group[field]) for field in fields)
+                for field in fields:
+                    if field in offsets_fields:
+                        continue  # stored with the lists of the ragged field
+                    filename = os.path.join(set_dir, '{}.{}'.format(field, file_format))
+                    export_field_arrow(h5_group, field, filename, file_format, batch_size)
+                    filenames.append(filename)
+    return filenames
@@ -3,10 +3,96 @@ Dataset's metadata loader classes.
 """
 
 
+import os
+import time
 import h5py
+import numpy as np
+from collections import OrderedDict
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from dbcollection.core.chunk_cache import ChunkCache
+from dbcollection.utils.image import load_images
+from dbcollection.utils.prefetch import prefetch_map
+from dbcollection.utils.hdf5 import (
+    HDF5Manager,
+    RAGGED_ROW_LENGTH_ATTR,
+    STRING_FORMAT_ATTR,
+    decode_strings,
+    get_field_string_format,
+    get_ragged_offsets_field,
+    is_ascii_field,
+    is_string_dtype,
+    load_fields_index,
+    read_strings
+)
+from dbcollection.utils.query_index import (
+    QUERY_INDEX_GROUP,
+    QUERY_OPERATORS,
+    QueryIndex,
+    get_query_index,
+    get_string_ids,
+    is_string_field,
+    is_value_field,
+    load_query_index,
+    write_query_indexes
+)
 from dbcollection.utils.string_ascii import convert_ascii_to_str
 
 
+class LazyLoaderDict(Mapping):
+    """Read-only dictionary of loaders which are only created on first access.
+
+    Creating a loader requires reading metadata from the hdf5 file. Deferring
+    it until a loader is actually used keeps the cost of loading a dataset
+    independent of its number of sets and fields.
+
+    Parameters
+    ----------
+    keys : tuple
+        Names of the loaders.
+    constructor : function
+        Function that creates the loader of a given name.
+
+    """
+
+    def __init__(self, keys, constructor):
+        """Initialize class."""
+        self._keys = tuple(keys)
+        self._keys_set = frozenset(self._keys)
+        self._constructor = constructor
+        self._loaders = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._loaders[key]
+        except KeyError:
+            if key not in self._keys_set:
+                raise
+        loader = self._constructor(key)
+        self._loaders[key] = loader
+        return loader
+
+    def __contains__(self, key):
+        return key in self._keys_set
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def loaded(self):
+        """Returns the list of loaders created so far."""
+        return list(self._loaders.values())
+
+    def __repr__(self):
+        return 'LazyLoaderDict({})'.format(list(self._keys))
+
+
 class FieldLoader(object):
     """Field metadata loader class.
 
@@ -20,6 +106,9 @@ class FieldLoader(object):
         hdf5 field object handler.
     obj_id : int, optional
         Position of the field in 'object_fields'.
+    chunk_cache : ChunkCache, optional
+        Cache of decompressed chunks shared between fields. If None, all
+        disk reads go directly to the hdf5 file.
 
     Attributes
     ----------
@@ -37,30 +126,60 @@ class FieldLoader(object):
         Value used to pad arrays when storing the data in the hdf5 file.
     obj_id : int
         Identifier of the field if contained in the 'object_ids' list.
+    chunk_cache : ChunkCache
+        Cache of decompressed chunks used for disk reads.
+    is_string : bool
+        True if the field is stored as (fixed or variable-length) strings.
+        The data of these fields is returned as Python strings.
+    is_ragged : bool
+        True if the field is a list field stored in the 'ragged' format
+        (values + offsets). Its rows are padded with the fill value when
+        fetched with get() or get_batch(); use get_row() to fetch a single
+        row without padding.
 
     """
 
-    def __init__(self, hdf5_field, obj_id=None):
+    def __init__(self, hdf5_field, obj_id=None, chunk_cache=None):
         """Initialize class."""
         assert hdf5_field, 'Must input a valid hdf5 dataset.'
 
         self.data = hdf5_field
         self.hdf5_handler = hdf5_field
         self._in_memory = False
-        self.set = self._get_set_name()
-        self.name = self._get_field_name()
+        self._in_mmap = False
+        hdf5_object_str = self._get_hdf5_object_str()
+        self.set = hdf5_object_str[1]
+        self.name = hdf5_object_str[-1]
         self.shape = hdf5_field.shape
         self.type = hdf5_field.dtype
         self.fillvalue = hdf5_field.fillvalue
         self.obj_id = obj_id
+        self.chunk_cache = chunk_cache
+        self.is_string = is_string_dtype(self.type)
+        self._offsets = None
+        self._offsets_field = get_ragged_offsets_field(hdf5_field)
+        self.is_ragged = self._offsets_field is not None
+        if self.is_ragged:
+            self.shape = self._get_ragged_shape()
+        self._block_rows = self._get_block_rows()
+
+    def _get_block_rows(self):
+        """Returns the number of rows per chunk or None if the field is not chunked."""
+        chunks = self.hdf5_handler.chunks
+        if chunks is None or len(self.shape) == 0 or self.is_ragged:
+            return None
+        return chunks[0]
 
-    def _get_set_name(self):
-        hdf5_object_str = self._get_hdf5_object_str()
-        return hdf5_object_str[1]
+    def _get_ragged_shape(self):
+        """Returns the shape of a 'ragged' list field as if it were padded."""
+        nrows = self.hdf5_handler.parent[self._offsets_field].shape[0] - 1
+        return (nrows, int(self.hdf5_handler.attrs[RAGGED_ROW_LENGTH_ATTR]))
 
-    def _get_field_name(self):
-        hdf5_object_str = self._get_hdf5_object_str()
-        return hdf5_object_str[-1]
+    def _get_offsets(self):
+        """Returns the offsets of the rows of a 'ragged' list field (loaded once)."""
+        if self._offsets is None:
+            self._offsets = self.hdf5_handler.parent[self._offsets_field][()]
+        return self._offsets
 
     def _get_hdf5_object_str(self):
         return self.hdf5_handler.name.split('/')
@@ -85,46 +204,221 @@ class FieldLoader(object):
         -------
         np.ndarray/list/str
             Numpy array containing the field's data.
-            If convert_to_str is set to True, it returns a string
-            or list of strings.
+            If convert_to_str is set to True (or the field stores strings),
+            it returns a string or list of strings.
 
         Note
         ----
         When using lists/tuples of indexes, this method sorts the list
         and removes duplicate values. This is because the h5py
         api requires the indexing elements to be in increasing order when
-        retrieving data.
+        retrieving data. Use get_batch() to preserve the order of the indexes.
 
         """
         if index is None:
             data = self._get_all_idx()
         else:
             data = self._get_range_idx(index)
-        if convert_to_str:
-            data = convert_ascii_to_str(data)
+        return self._convert_data(data, convert_to_str)
+
+    def _convert_data(self, data, convert_to_str=False):
+        """Converts the data of string fields into Python strings."""
+        if self.is_string:
+            return decode_strings(data)
+        elif convert_to_str:
+            return convert_ascii_to_str(data)
         return data
 
     def _get_all_idx(self):
         """Return the full data array."""
+        if self.is_ragged:
+            return self._read_ragged_rows(np.arange(self.shape[0]))
         if self._in_memory:
             return self.data
         else:
-            return self.data.value
+            return self.data[()]
 
     def _get_range_idx(self, idx):
         """Return a slice of the data array."""
         assert idx is not None
         if isinstance(idx, int):
-            return self.data[idx]
+            return self._get_row(idx)
         else:
             size = len(idx)
             if size > 1:
-                return self.data[sorted(set(idx))]
+                return self._get_rows(sorted(set(idx)))
             elif size == 1:
-                return self.data[idx[0]]
+                return self._get_row(idx[0])
             else:
                 return self._get_all_idx()
 
+    def _is_cached(self):
+        return self.chunk_cache is not None and self._block_rows is not None \
+            and not self._in_memory
+
+    def _get_row(self, idx):
+        """Return a single row of the data array."""
+        if self.is_ragged:
+            return self._read_ragged_rows(self._parse_batch_index([idx]))[0]
+        if self._is_cached():
+            return self._read_rows_cached(self._parse_batch_index([idx]))[0]
+        return self.data[idx]
+
+    def _get_rows(self, idx):
+        """Return the rows of a sorted list of unique indexes."""
+        if self.is_ragged:
+            return self._read_ragged_rows(self._parse_batch_index(idx))
+        if self._is_cached():
+            return self._read_rows_cached(self._parse_batch_index(idx))
+        return self.data[idx]
+
+    def get_batch(self, index, convert_to_str=False):
+        """Retrieves a batch of rows of the field in the same order as the input indexes.
+
+        Unlike get(), the output preserves the order of the input indexes and
+        any repeated values. The rows are read from disk only once for each
+        unique index and then rearranged in memory into the requested order.
+
+        Parameters
+        ----------
+        index : list/tuple/np.ndarray
+            Index numbers of the rows of the field to fetch. Negative values
+            index from the end of the field.
+        convert_to_str : bool, optional
+            Convert the output data into a list of strings.
+            Warning: output must be of type np.uint8
+
+        Returns
+        -------
+        np.ndarray/list
+            Contiguous numpy array with one row per input index.
+            If convert_to_str is set to True (or the field stores strings),
+            it returns a list of strings.
+
+        Raises
+        ------
+        IndexError
+            If an index is out of the field's bounds.
+
+        """
+        idx = self._parse_batch_index(index)
+        unique_idx, inverse_idx = np.unique(idx, return_inverse=True)
+        data = self._read_rows(unique_idx)
+        data = np.take(data, inverse_idx, axis=0)
+        return self._convert_data(data, convert_to_str)
+
+    def _parse_batch_index(self, index):
+        """Converts the input indexes into a 1D array of positive row numbers."""
+        assert index is not None, 'Must input a valid index.'
+        idx = np.array(index, dtype=np.int64).reshape(-1)
+        nrows = self.shape[0]
+        if np.any((idx < -nrows) | (idx >= nrows)):
+            raise IndexError('Index out of range for field \'{}\' with {} rows.'
+                             .format(self.name, nrows))
+        idx[idx < 0] += nrows
+        return idx
+
+    def _read_rows(self, idx):
+        """Reads the rows of a sorted array of unique indexes.
+
+        If the indexes are dense enough, a single contiguous slice is read
+        from disk and the rows are selected in memory instead, which avoids
+        h5py's slower point-selection path and decompresses each chunk once.
+        """
+        if self.is_ragged:
+            return self._read_ragged_rows(idx)
+        if self._in_memory:
+            return self.data[idx]
+        if len(idx) == 0:
+            return np.empty((0,) + self.shape[1:], dtype=self.type)
+        if self._is_cached():
+            return self._read_rows_cached(idx)
+        start, stop = int(idx[0]), int(idx[-1]) + 1
+        if stop - start <= 2 * len(idx):
+            return self.data[start:stop][idx - start]
+        return self.data[idx]
+
+    def _read_rows_cached(self, idx):
+        """Reads the rows of a sorted array of indexes through the chunk cache.
+
+        Rows are grouped by the chunk they belong to, so each chunk is fetched
+        (and decompressed) at most once per call.
+        """
+        if len(idx) == 0:
+            return np.empty((0,) + self.shape[1:], dtype=self.type)
+        blocks = idx // self._block_rows
+        splits = np.flatnonzero(np.diff(blocks)) + 1
+        out = []
+        for block_idx in np.split(idx, splits):
+            block_id = int(block_idx[0]) // self._block_rows
+            block = self._read_block(block_id)
+            out.append(block[block_idx - block_id * self._block_rows])
+        return np.concatenate(out)
+
+    def _read_ragged_rows(self, idx):
+        """Reads rows of a 'ragged' list field into a padded array.
+
+        The values of all rows are read from disk at once (as a single slice
+        if the rows are close enough) and then scattered into the output.
+        """
+        offsets = self._get_offsets()
+        starts, stops = offsets[idx], offsets[idx + 1]
+        lengths = stops - starts
+        out = np.full((len(idx),) + self.shape[1:], self.fillvalue, dtype=self.type)
+        total = int(lengths.sum())
+        if total == 0:
+            return out
+        # position of every value of the rows in the values array
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        start, stop = int(starts.min()), int(stops.max())
+        if stop - start <= 2 * total:
+            values = self.data[start:stop][positions - start]
+        else:
+            values = np.concatenate([self.data[int(i):int(j)] for i, j in zip(starts, stops)])
+        out[np.arange(self.shape[1]) < lengths[:, None]] = values
+        return out
+
+    def get_row(self, index):
+        """Retrieves a single row of a list field without its padding.
+
+        For fields stored in the 'ragged' format, the row is a slice of the
+        values array given by the row's offsets. For padded fields, the
+        trailing fill values are removed from the row.
+
+        Parameters
+        ----------
+        index : int
+            Index number of the row. Negative values index from the end
+            of the field.
+
+        Returns
+        -------
+        np.ndarray
+            Values of the row.
+
+        Raises
+        ------
+        IndexError
+            If the index is out of the field's bounds.
+
+        """
+        idx = int(self._parse_batch_index([index])[0])
+        if self.is_ragged:
+            offsets = self._get_offsets()
+            return self.data[int(offsets[idx]):int(offsets[idx + 1])]
+        row = self._get_row(idx)
+        if row.ndim != 1:
+            return row
+        not_padded = np.flatnonzero(row != self.fillvalue)
+        return row[:not_padded[-1] + 1] if len(not_padded) > 0 else row[:0]
+
+    def _read_block(self, block_id):
+        """Returns the rows of a chunk from the cache or from disk."""
+        start = block_id * self._block_rows
+        stop = min(start + self._block_rows, self.shape[0])
+        key = (self.hdf5_handler.file.filename, self.hdf5_handler.name, block_id)
+        return self.chunk_cache.get(key, lambda: self.hdf5_handler[start:stop])
+
     def size(self):
         """Size of the field.
 
@@ -182,10 +476,11 @@ class FieldLoader(object):
         """
         assert isinstance(is_in_memory, bool), 'Invalid input. Must insert a boolean type.'
         if is_in_memory:
-            self.data = self.hdf5_handler.value
+            self.data = self.hdf5_handler[()]
         else:
             self.data = self.hdf5_handler
         self._in_memory = is_in_memory
+        self._in_mmap = False
 
     def _get_to_memory(self):
         """Modifies how data is accessed and stored.
@@ -201,6 +496,52 @@ class FieldLoader(object):
 
     to_memory = property(_get_to_memory, _set_to_memory)
 
+    def _set_to_mmap(self, is_in_mmap):
+        """Memory-maps the contents of the field (read-only) if True.
+
+        Parameters
+        ----------
+        is_in_mmap : bool
+            Memory-map the data (if True).
+
+        Raises
+        ------
+        ValueError
+            If the field is not stored uncompressed and contiguous in the hdf5 file.
+
+        """
+        assert isinstance(is_in_mmap, bool), 'Invalid input. Must insert a boolean type.'
+        if is_in_mmap:
+            self.data = self._get_memmap()
+        else:
+            self.data = self.hdf5_handler
+        self._in_memory = is_in_mmap
+        self._in_mmap = is_in_mmap
+
+    def _get_memmap(self):
+        """Returns a read-only np.memmap view of the field's data in the hdf5 file."""
+        offset = self.hdf5_handler.id.get_offset()
+        shape = self.hdf5_handler.shape
+        if self.hdf5_handler.chunks is not None or offset is None \
+                or self.type.hasobject or np.prod(shape) == 0:
+            raise ValueError('Field \'{}\' cannot be memory-mapped: it must be stored '
+                             'uncompressed and contiguous in the hdf5 file.'.format(self.name))
+        return np.memmap(self.hdf5_handler.file.filename, dtype=self.type, mode='r',
+                         offset=offset, shape=shape)
+
+    def _get_to_mmap(self):
+        """Accesses the data through a memory-mapped array.
+
+        Fields stored uncompressed and contiguous in the hdf5 file can be
+        accessed as a read-only np.memmap array. Unlike to_memory, the data
+        is not copied: reads are served by the OS page cache, which is shared
+        by all processes that map the same file.
+
+        """
+        return self._in_mmap
+
+    to_mmap = property(_get_to_mmap, _set_to_mmap)
+
     def __getitem__(self, index):
         """
         Parameters
@@ -210,11 +551,27 @@ class FieldLoader(object):
 
         Returns
         -------
-        np.ndarray
-            Numpy data array.
+        np.ndarray/str/list
+            Numpy data array (string or list of strings for string fields).
 
         """
-        return self.data[index]
+        if isinstance(index, (int, np.integer)):
+            return self._convert_data(self._get_row(index))
+        if self.is_ragged:
+            return self._convert_data(self._get_ragged_item(index))
+        return self._convert_data(self.data[index])
+
+    def _get_ragged_item(self, index):
+        """Indexes the rows of a 'ragged' list field as if it were padded (numpy indexing)."""
+        if isinstance(index, tuple):
+            row_index, col_index = (index[0], index[1:]) if index else (slice(None), ())
+        else:
+            row_index, col_index = index, ()
+        rows = np.arange(self.shape[0])[row_index]
+        if np.ndim(rows) == 0:
+            return self._read_ragged_rows(np.array([rows]))[0][col_index]
+        data = self._read_ragged_rows(rows.reshape(-1)).reshape(rows.shape + self.shape[1:])
+        return data[(Ellipsis,) + col_index] if col_index else data
 
     def __len__(self):
         """
@@ -227,7 +584,10 @@ class FieldLoader(object):
         return self.shape[0]
 
     def __str__(self):
-        if self._in_memory:
+        if self._in_mmap:
+            s = 'FieldLoader: <numpy.memmap "{}": shape {}, type "{}">' \
+                .format(self.name, self.data.shape, self.data.dtype)
+        elif self._in_memory:
             s = 'FieldLoader: <numpy.ndarray "{}": shape {}, type "{}">' \
                 .format(self.name, self.data.shape, self.data.dtype)
         else:
@@ -249,15 +609,19 @@ class SetLoader(object):
     ----------
     hdf5_group : h5py._hl.group.Group
         hdf5 group object handler.
+    chunk_cache : ChunkCache, optional
+        Cache of decompressed chunks shared by all fields of the set.
 
     Attributes
     ----------
     hdf5_group : h5py._hl.group.Group
         hdf5 group object handler.
+    chunk_cache : ChunkCache
+        Cache of decompressed chunks shared by all fields of the set.
     set : str
         Name of the set.
-    fields : tuple
-        List of all field names of the set.
+    fields : LazyLoaderDict
+        Field loaders of the set (created on first access).
     object_fields : tuple
         List of all field names of the set contained by the 'object_ids' list.
     nelems : int
@@ -265,44 +629,64 @@ class SetLoader(object):
 
     """
 
-    def __init__(self, hdf5_group):
+    def __init__(self, hdf5_group, chunk_cache=None):
         """Initialize class."""
         assert hdf5_group, 'Must input a valid hdf5 group'
 
         self.hdf5_group = hdf5_group
+        self.chunk_cache = chunk_cache
         self.set = self._get_set_name()
-        self.object_fields = self._get_object_fields()
-        self.nelems = self._get_num_elements()
+        self._index = load_fields_index(hdf5_group)
         self._fields = self._get_field_names()
-        self.fields = self._load_hdf5_fields()  # add all hdf5 datasets as data fields
+        self.fields = LazyLoaderDict(self._fields, self._get_field_loader)  # data fields are loaded on first access
+        self._object_fields = None
+        self._nelems = None
+        self._query_indexes = {}
 
         self._fields_info = []
         self._lists_info = []
 
+    @property
+    def object_fields(self):
+        if self._object_fields is None:
+            self._object_fields = self._get_object_fields()
+        return self._object_fields
+
+    @property
+    def nelems(self):
+        if self._nelems is None:
+            self._nelems = self._get_num_elements()
+        return self._nelems
+
     def _get_set_name(self):
         hdf5_object_str = self.hdf5_group.name
         str_split = hdf5_object_str.split('/')
         return str_split[-1]
 
     def _get_object_fields(self):
-        object_fields_data = self.hdf5_group['object_fields'].value
-        output = convert_ascii_to_str(object_fields_data)
+        if self._index is not None:
+            return self._index["object_fields"]
+        output = read_strings(self.hdf5_group['object_fields'])
         if type(output) == 'string':
             output = (output,)
         return output
 
     def _get_field_names(self):
+        if self._index is not None:
+            return tuple(sorted(self._index["fields"]))
         return tuple(self.hdf5_group.keys())
 
     def _get_num_elements(self):
-        return len(self.hdf5_group['object_ids'])
+        return self._get_field_shape('object_ids')[0]
 
-    def _load_hdf5_fields(self):
-        fields = {}
-        for field in self._fields:
-            obj_id = self._get_obj_id_field(field)
-            fields[field] = FieldLoader(self.hdf5_group[field], obj_id)
-        return fields
+    def _get_field_shape(self, field):
+        if self._index is not None:
+            return tuple(self._index["fields"][field]["shape"])
+        return self.fields[field].shape
+
+    def _get_field_loader(self, field):
+        obj_id = self._get_obj_id_field(field)
+        return FieldLoader(self.hdf5_group[field], obj_id, self.chunk_cache)
 
     def _get_obj_id_field(self, field):
         if field in self.object_fields:
@@ -310,6 +694,19 @@ class SetLoader(object):
         else:
             return None
 
+    def set_chunk_cache(self, chunk_cache):
+        """Sets the cache of decompressed chunks used by all fields of the set.
+
+        Parameters
+        ----------
+        chunk_cache : ChunkCache
+            Cache of decompressed chunks. If None, the cache is disabled.
+
+        """
+        self.chunk_cache = chunk_cache
+        for field_loader in self.fields.loaded():
+            field_loader.chunk_cache = chunk_cache
+
     def get(self, field, index=None, convert_to_str=False):
         """Retrieves data from the dataset's hdf5 metadata file.
 
@@ -347,6 +744,39 @@ class SetLoader(object):
         except KeyError:
             raise KeyError('\'{}\' does not exist in the \'{}\' set.'.format(field, self.set))
 
+    def get_batch(self, field, index, convert_to_str=False):
+        """Retrieves a batch of rows of a field in the same order as the input indexes.
+
+        Parameters
+        ----------
+        field : str
+            Field name.
+        index : list/tuple/np.ndarray
+            Index numbers of the rows of the field to fetch. The output
+            preserves the order and duplicates of the indexes.
+        convert_to_str : bool, optional
+            Convert the output data into a list of strings.
+            Warning: output must be of type np.uint8
+
+        Returns
+        -------
+        np.ndarray/list
+            Numpy array with one row per input index.
+            If convert_to_str is set to True, it returns a list of strings.
+
+        Raises
+        ------
+        KeyError
+            If the field does not exist in the list.
+
+        """
+        assert field, 'Must input a valid field name.'
+        try:
+            field_loader = self.fields[field]
+        except KeyError:
+            raise KeyError('\'{}\' does not exist in the \'{}\' set.'.format(field, self.set))
+        return field_loader.get_batch(index, convert_to_str=convert_to_str)
+
     def object(self, index=None, convert_to_value=False):
         """Retrieves a list of all fields' indexes/values of an object composition.
 
@@ -408,9 +838,7 @@ class SetLoader(object):
         if isinstance(index[0], int):
             output = self._convert_to_value_single_object(index)
         elif isinstance(index[0], list):
-            output = []
-            for idx in index:
-                output.append(self._convert_to_value_single_object(idx))
+            output = self._convert_to_value_objects(index)
         else:
             raise TypeError("Invalid input index format.")
         return output
@@ -424,6 +852,580 @@ class SetLoader(object):
                 data.append([])  # undefined index retrieves an empty list
         return data
 
+    def _convert_to_value_objects(self, index):
+        """Fetches the values of several objects with a single batched read per field."""
+        object_ids = np.array(index, dtype=np.int64).reshape(len(index), -1)
+        columns = []
+        for i, field in enumerate(self.object_fields):
+            valid = object_ids[:, i] >= 0
+            values = iter(self.get_batch(field, object_ids[valid, i]) if valid.any() else [])
+            columns.append([next(values) if is_valid else [] for is_valid in valid])
+        return [list(data) for data in zip(*columns)]
+
+    def object_batch(self, index, fields=None):
+        """Retrieves the values of the fields of a batch of objects as arrays.
+
+        Each field referenced by the objects is fetched with a single batched
+        read for all objects, instead of one read per object and field as in
+        object(convert_to_value=True). The output is a struct of arrays: one
+        array per field, with one row per object.
+
+        Parameters
+        ----------
+        index : int/list/tuple/np.ndarray
+            Index numbers of the objects (rows of 'object_ids'). The output
+            preserves the order and duplicates of the indexes.
+        fields : list/tuple, optional
+            Names of the fields of 'object_fields' to fetch. If None, all
+            fields are fetched.
+
+        Returns
+        -------
+        OrderedDict
+            Masked arrays (np.ma.MaskedArray) of the values of each field.
+            The rows of objects with an undefined id (-1) for a field are
+            masked. String fields are returned as arrays of Python strings.
+
+        Raises
+        ------
+        KeyError
+            If a field is not contained in 'object_fields'.
+
+        Examples
+        --------
+        >>> import dbcollection as dbc
+        >>> coco = dbc.load('coco', 'detection_2015')
+        >>> batch = coco.sets['train'].object_batch(range(256), fields=['boxes', 'category'])
+        >>> batch['boxes'].shape
+        (256, 4)
+
+        """
+        if fields is None:
+            fields = self.object_fields
+        for field in fields:
+            if field not in self.object_fields:
+                raise KeyError('\'{}\' is not contained in \'object_fields\'.'.format(field))
+        object_ids = self.get_batch('object_ids', index)
+        batch = OrderedDict()
+        for field in fields:
+            ids = object_ids[:, self.object_fields.index(field)]
+            batch[field] = self._get_field_batch(field, ids)
+        return batch
+
+    def _get_field_batch(self, field, ids):
+        """Returns the rows of a field for the objects' ids as a masked array."""
+        field_loader = self.fields[field]
+        valid = ids >= 0
+        if field_loader.is_string:
+            data = np.empty(len(ids), dtype=object)
+            if valid.any():
+                data[valid] = field_loader.get_batch(ids[valid])
+        else:
+            data = self._take_field_rows(field_loader, ids, valid)
+        mask = np.broadcast_to(~valid.reshape((-1,) + (1,) * (data.ndim - 1)), data.shape)
+        return np.ma.masked_array(data, mask=mask)
+
+    def image_batch(self, index, data_dir, size=None, crop_field=None, mode='RGB', pool=None):
+        """Loads the images of a batch of objects into a numpy array.
+
+        The image file names of the objects are fetched from the
+        'image_filenames' field (relative to the dataset's data directory)
+        and decoded into a single array. If an output size is given, JPEG
+        images are decoded at a reduced scale when possible (PIL's draft mode).
+
+        Parameters
+        ----------
+        index : int/list/tuple/np.ndarray
+            Index numbers of the objects (rows of 'object_ids').
+        data_dir : str
+            Directory of the dataset's files.
+        size : tuple, optional
+            Size (width, height) of the output images. If None, all images
+            must have the same size (after cropping).
+        crop_field : str, optional
+            Name of a bounding box field of 'object_fields' (e.g., 'boxes' or
+            'head_bbox') to crop from the images. If None, the images are not
+            cropped.
+        mode : str, optional
+            PIL mode of the output images (e.g., 'RGB' or 'L').
+        pool : multiprocessing.pool.Pool/multiprocessing.pool.ThreadPool, optional
+            Pool of workers to decode the images. If None, the images are
+            decoded sequentially.
+
+        Returns
+        -------
+        OrderedDict
+            Batch with the 'index' of the objects, their 'image_filenames'
+            (full paths), the boxes of the 'crop_field' (if any), the decoded
+            'images' (uint8 array) and the 'timings' (in seconds) of the
+            'metadata' and 'decode' stages.
+
+        Raises
+        ------
+        KeyError
+            If 'image_filenames' or the crop field are not contained in 'object_fields'.
+
+        Examples
+        --------
+        >>> from multiprocessing.pool import ThreadPool
+        >>> import dbcollection as dbc
+        >>> pascal = dbc.load('pascal_voc_2007')
+        >>> batch = pascal.sets['train'].image_batch(range(32), pascal.data_dir, size=(224, 224),
+        ...                                          crop_field='boxes', pool=ThreadPool(8))
+        >>> batch['images'].shape
+        (32, 224, 224, 3)
+
+        """
+        assert data_dir is not None, 'Must input a valid data directory.'
+        start = time.time()
+        fields = ['image_filenames'] if crop_field is None else ['image_filenames', crop_field]
+        for field in fields:
+            if field not in self.object_fields:
+                raise KeyError('\'{}\' is not contained in \'object_fields\'.'.format(field))
+        index = np.atleast_1d(np.asarray(index, dtype=np.int64))
+        object_ids = self.get_batch('object_ids', index)
+        filename_ids = object_ids[:, self.object_fields.index('image_filenames')]
+        assert (filename_ids >= 0).all(), 'All objects must have an image file name.'
+        filenames = self.get_batch('image_filenames', filename_ids, convert_to_str=True)
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        batch = OrderedDict()
+        batch['index'] = index
+        batch['image_filenames'] = [os.path.join(data_dir, filename) for filename in filenames]
+        boxes = None
+        if crop_field is not None:
+            boxes = self._get_field_batch(crop_field, object_ids[:, self.object_fields.index(crop_field)])
+            batch[crop_field] = boxes
+        metadata_time = time.time()
+        batch['images'] = load_images(batch['image_filenames'], size, boxes, mode, pool)
+        batch['timings'] = OrderedDict([('metadata', metadata_time - start),
+                                        ('decode', time.time() - metadata_time)])
+        return batch
+
+    def to_dataframe(self, fields=None, rows=None, categorical_threshold=0.5):
+        """Returns the objects of the set as a pandas DataFrame.
+
+        Each row of the DataFrame corresponds to a row of 'object_ids' and
+        each column to a field of 'object_fields', with the same values as
+        object(convert_to_value=True). The values are joined against the
+        'object_ids' with vectorized array indexing, so each referenced row
+        of a field is read from disk only once.
+
+        Numeric fields are stored in numeric columns (fields with 2D rows are
+        split into one column per element, named '<field>_<i>'). Fields that
+        are in memory (to_memory/to_mmap) and whose rows match the objects'
+        rows one-to-one are wrapped without being copied. String fields are
+        decoded in bulk into categorical columns if they have a low number of
+        distinct values (e.g., classes) or into string columns otherwise.
+        List fields and fields with higher dimensional rows are stored as
+        columns of arrays. Undefined ids (-1) are stored as missing values.
+
+        Parameters
+        ----------
+        fields : list/tuple, optional
+            Names of the fields of 'object_fields' to fetch. If None, all
+            fields are fetched.
+        rows : int/list/tuple/np.ndarray/slice, optional
+            Rows of 'object_ids' to fetch. If None, all rows are fetched.
+        categorical_threshold : float, optional
+            String fields are stored as categorical columns if their number of
+            distinct values is at most this fraction of the number of rows.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Objects of the set (indexed by their row in 'object_ids').
+
+        Raises
+        ------
+        KeyError
+            If a field is not contained in 'object_fields'.
+
+        Examples
+        --------
+        >>> import dbcollection as dbc
+        >>> mnist = dbc.load('mnist')
+        >>> df = mnist.sets['train'].to_dataframe(fields=['labels', 'classes'])
+        >>> df['classes'].value_counts()
+
+        """
+        import pandas as pd
+        if fields is None:
+            fields = self.object_fields
+        for field in fields:
+            if field not in self.object_fields:
+                raise KeyError('\'{}\' is not contained in \'object_fields\'.'.format(field))
+        row_idx, object_ids = self._get_dataframe_rows(rows)
+        columns = OrderedDict()
+        for field in fields:
+            ids = object_ids[:, self.object_fields.index(field)]
+            columns.update(self._get_dataframe_columns(pd, field, ids, categorical_threshold))
+        return pd.DataFrame(columns, index=row_idx, copy=False)
+
+    def _get_dataframe_rows(self, rows):
+        """Returns the row numbers and ids of the objects selected by 'rows'."""
+        object_ids_loader = self.fields['object_ids']
+        if rows is None:
+            rows = slice(None)
+        if isinstance(rows, slice):
+            row_idx = np.arange(*rows.indices(self.nelems))
+            if len(row_idx) > 0 and rows.step in (None, 1):
+                return row_idx, object_ids_loader.data[int(row_idx[0]):int(row_idx[-1]) + 1]
+        else:
+            row_idx = object_ids_loader._parse_batch_index(rows)
+        if len(row_idx) == 0:
+            return row_idx, np.empty((0, len(self.object_fields)), dtype=np.int64)
+        return row_idx, object_ids_loader.get_batch(row_idx)
+
+    def _get_dataframe_columns(self, pd, field, ids, categorical_threshold):
+        """Returns the column(s) of a field for the objects' ids."""
+        field_loader = self.fields[field]
+        valid = ids >= 0
+        if field_loader.is_string or is_ascii_field(field_loader.hdf5_handler):
+            column = self._get_string_column(pd, field_loader, ids, valid, categorical_threshold)
+            return {field: column}
+        data = self._take_field_rows(field_loader, ids, valid)
+        if data.ndim == 1:
+            return {field: self._mask_missing_values(pd, data, valid)}
+        if data.ndim == 2 and not field_loader.is_ragged and not field.startswith('list_'):
+            return OrderedDict(('{}_{}'.format(field, i), self._mask_missing_values(pd, data[:, i], valid))
+                               for i in range(data.shape[1]))
+        column = np.empty(len(ids), dtype=object)
+        column[valid] = list(data[valid])
+        return {field: column}
+
+    def _get_string_column(self, pd, field_loader, ids, valid, categorical_threshold):
+        """Decodes the distinct strings of the ids once and maps them to the rows."""
+        unique_ids, inverse = np.unique(ids[valid], return_inverse=True)
+        strings = []
+        if len(unique_ids) > 0:
+            strings = field_loader.get_batch(unique_ids, convert_to_str=True)
+            if not isinstance(strings, list):
+                strings = [strings]
+        categories, codes = np.unique(np.array(strings, dtype=object), return_inverse=True)
+        all_codes = np.full(len(ids), -1, dtype=np.int64)
+        all_codes[valid] = codes[inverse]
+        if len(categories) <= categorical_threshold * len(ids):
+            return pd.Categorical.from_codes(all_codes, categories)
+        column = np.empty(len(ids), dtype=object)
+        column[valid] = categories[all_codes[valid]]
+        return column
+
+    def _take_field_rows(self, field_loader, ids, valid):
+        """Returns the rows of a field for the objects' ids (undefined ids are set to row 0)."""
+        nrows = len(ids)
+        if nrows > 0 and field_loader.to_memory and valid.all() \
+                and ids[-1] - ids[0] == nrows - 1 and np.all(np.diff(ids) == 1):
+            return field_loader.data[int(ids[0]):int(ids[-1]) + 1]  # view of the in-memory data
+        if not valid.any():
+            return np.zeros((nrows,) + field_loader.shape[1:], dtype=field_loader.type)
+        return field_loader.get_batch(np.where(valid, ids, 0))
+
+    def _mask_missing_values(self, pd, values, valid):
+        """Marks the values of undefined ids as missing values."""
+        if valid.all():
+            return values
+        if values.dtype.kind == 'f':
+            return np.where(valid, values, np.nan)
+        elif values.dtype.kind in 'iu':
+            return pd.arrays.IntegerArray(np.ascontiguousarray(values), ~valid)
+        elif values.dtype.kind == 'b':
+            return pd.arrays.BooleanArray(np.ascontiguousarray(values), ~valid)
+        column = values.astype(object)
+        column[~valid] = None
+        return column
+
+    def iter_batches(self, fields=None, batch_size=32, shuffle=False, seed=None, drop_last=False, prefetch=1):
+        """Iterates over the objects of the set in minibatches.
+
+        Each batch is built with a single batched read per field (see
+        object_batch()) and the next 'prefetch' batches are read by a pool of
+        threads while the current one is being consumed. The order of the
+        objects is deterministic for a given seed, so epochs can be
+        reproduced by using the same seeds.
+
+        Parameters
+        ----------
+        fields : list/tuple, optional
+            Names of the fields to fetch. Fields of 'object_fields' are
+            fetched through the ids of the objects, while other fields must
+            have one row per object. If None, all fields of 'object_fields'
+            are fetched.
+        batch_size : int, optional
+            Number of objects per batch.
+        shuffle : bool, optional
+            Iterate over the objects in a random order (if True).
+        seed : int, optional
+            Seed of the random order of the objects.
+        drop_last : bool, optional
+            Drop the last batch if it has fewer than 'batch_size' objects.
+        prefetch : int, optional
+            Number of batches read ahead of the consumer. If 0, the batches
+            are read when requested.
+
+        Returns
+        -------
+        generator
+            Batches as OrderedDicts of arrays (one row per object) of each
+            field, plus the rows of the objects in 'object_ids' ('index').
+            The rows of undefined ids (-1) of the object fields are masked.
+
+        Raises
+        ------
+        KeyError
+            If a field does not exist in the set.
+
+        Examples
+        --------
+        >>> import dbcollection as dbc
+        >>> mnist = dbc.load('mnist')
+        >>> for epoch in range(10):
+        ...     for batch in mnist.sets['train'].iter_batches(['images', 'labels'], batch_size=128,
+        ...                                                   shuffle=True, seed=epoch, prefetch=2):
+        ...         train_step(batch['images'], batch['labels'])
+
+        """
+        return self._iter_batches(np.arange(self.nelems), fields, batch_size, shuffle, seed, drop_last, prefetch)
+
+    def _iter_batches(self, rows, fields, batch_size, shuffle, seed, drop_last, prefetch):
+        """Iterates over the objects of a list of rows of 'object_ids' in minibatches."""
+        assert isinstance(batch_size, int) and batch_size > 0, 'Must input a positive batch size.'
+        assert isinstance(prefetch, int) and prefetch >= 0, 'Must input a non-negative number of batches.'
+        if fields is None:
+            fields = self.object_fields
+        for field in list(fields) + ['object_ids']:
+            if field not in self.fields:
+                raise KeyError('\'{}\' does not exist in the \'{}\' set.'.format(field, self.set))
+            self.fields[field]  # create the field loaders before they are used by other threads
+            if field not in self.object_fields:
+                assert self._get_field_shape(field)[0] == self.nelems, \
+                    'Field \'{}\' must have one row per object.'.format(field)
+        order = np.random.RandomState(seed).permutation(rows) if shuffle else rows
+        batches = [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+        if drop_last and len(batches) > 0 and len(batches[-1]) < batch_size:
+            batches.pop()
+
+        def read_batch(index):
+            return self._read_batch(fields, index)
+
+        if prefetch > 0:
+            return prefetch_map(read_batch, batches, size=prefetch)
+        return (read_batch(index) for index in batches)
+
+    def _read_batch(self, fields, index):
+        """Reads the rows of the fields of a batch of objects."""
+        object_ids = self.get_batch('object_ids', index)
+        batch = OrderedDict()
+        for field in fields:
+            if field in self.object_fields:
+                batch[field] = self._get_field_batch(field, object_ids[:, self.object_fields.index(field)])
+            else:
+                data = self.get_batch(field, index)
+                batch[field] = np.array(data, dtype=object) if isinstance(data, list) else data
+        batch['index'] = index
+        return batch
+
+    def shard(self, num_shards, shard_id, shuffle_seed=None, epoch=0):
+        """Returns a view of the objects of one shard of the set.
+
+        The objects (rows of 'object_ids') are split into blocks aligned with
+        the chunks of the fields with one row per object (the blocks' size is
+        the least common multiple of the fields' chunk rows), and the blocks
+        are split evenly between the shards (the shards' sizes differ by at
+        most one block). This way, no two shards read the same compressed
+        chunks of these fields. If the fields' chunk rows have no common
+        multiple small enough for the number of shards, only the fields with
+        the largest chunks are aligned. The shards of all ranks are disjoint
+        and cover all objects if the ranks use the same arguments (except for
+        'shard_id').
+
+        Parameters
+        ----------
+        num_shards : int
+            Number of shards (e.g., number of ranks of a distributed job).
+        shard_id : int
+            Index of the shard (in the range [0, num_shards)).
+        shuffle_seed : int, optional
+            Seed to shuffle the blocks before assigning them to the shards.
+            If None, each shard gets a contiguous range of objects.
+        epoch : int, optional
+            Epoch number. Combined with 'shuffle_seed' to assign different
+            blocks to the shards in each epoch.
+
+        Returns
+        -------
+        SetShard
+            View of the objects of the shard.
+
+        Examples
+        --------
+        >>> import dbcollection as dbc
+        >>> coco = dbc.load('coco', 'detection_2015')
+        >>> shard = coco.sets['train'].shard(num_shards=8, shard_id=rank, shuffle_seed=0, epoch=epoch)
+        >>> for batch in shard.iter_batches(['boxes', 'category'], batch_size=32):
+        ...     train_step(batch)
+
+        """
+        assert isinstance(num_shards, int) and num_shards > 0, 'Must input a positive number of shards.'
+        assert isinstance(shard_id, int) and 0 <= shard_id < num_shards, \
+            'Must input a shard id in the range [0, {}).'.format(num_shards)
+        assert isinstance(epoch, int), 'Must input a valid integer for epoch.'
+        block_rows = self._get_shard_block_rows(num_shards)
+        num_blocks = -(-self.nelems // block_rows)
+        blocks = np.arange(num_blocks)
+        if shuffle_seed is not None:
+            blocks = np.random.RandomState([shuffle_seed, epoch]).permutation(blocks)
+        shard_blocks = np.array_split(blocks, num_shards)[shard_id]
+        rows = (shard_blocks[:, None] * block_rows + np.arange(block_rows)).reshape(-1)
+        return SetShard(self, rows[rows < self.nelems], num_shards, shard_id)
+
+    def _get_shard_block_rows(self, num_shards):
+        """Returns the number of rows of the blocks of objects assigned to the shards.
+
+        The blocks have the least common multiple of the chunk rows of the
+        fields with one row per object, so no compressed chunk is read by two
+        shards. If that multiple is too large to give some objects to every
+        shard, only the largest chunks are aligned with the blocks (and the
+        blocks are never larger than the number of objects per shard).
+        """
+        chunk_rows = [1]
+        for field in list(self.object_fields) + ['object_ids']:
+            if field not in self.fields or self._get_field_shape(field)[0] != self.nelems:
+                continue
+            chunks = self.hdf5_group[field].chunks
+            if chunks is not None:
+                chunk_rows.append(chunks[0])
+        max_rows = max(1, -(-self.nelems // num_shards))
+        block_rows = int(np.lcm.reduce(chunk_rows))
+        if block_rows > max_rows:
+            block_rows = max(chunk_rows)
+        return min(block_rows, max_rows)
+
+    def where(self, field, op, value):
+        """Returns the rows of the objects whose field satisfies a predicate.
+
+        The predicate is evaluated on the values of the field referenced by
+        the objects (e.g., the width of an object's image) with the field's
+        inverted index, which maps each value to the rows of 'object_ids'
+        that reference it. The indexes are built when processing the task
+        and stored in the metadata file. For files without stored indexes,
+        the index of a field is built in memory on its first query.
+
+        Parameters
+        ----------
+        field : str
+            Name of a field of 'object_fields' with scalar numeric rows or
+            strings.
+        op : str
+            Predicate operator: '==', '<', '<=', '>', '>=', 'in' (the value
+            is a list of values) or 'between' (the value is an inclusive
+            (min, max) range). String fields support only '==' and 'in'.
+        value : int/float/str/list/tuple
+            Value of the predicate.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted rows of 'object_ids' of the objects that satisfy the predicate.
+
+        Raises
+        ------
+        KeyError
+            If the field is not contained in 'object_fields' or the operator
+            does not exist.
+        TypeError
+            If the field cannot be queried with the operator.
+
+        Examples
+        --------
+        >>> import dbcollection as dbc
+        >>> coco = dbc.load('coco', 'detection_2015')
+        >>> rows = coco.sets['train'].where('category', '==', 'person')
+
+        """
+        if field not in self.object_fields:
+            raise KeyError('\'{}\' is not contained in \'object_fields\'.'.format(field))
+        if op not in QUERY_OPERATORS:
+            raise KeyError('Invalid query operator \'{}\'. Available operators: {}'
+                           .format(op, list(QUERY_OPERATORS)))
+        query_index = self._get_query_index(field)
+        if query_index.by_value:
+            return query_index.lookup(op, value)
+        if op not in ('==', 'in'):
+            raise TypeError('\'{}\' stores strings: only the \'==\' and \'in\' operators are supported.'
+                            .format(field))
+        values = [value] if op == '==' else value
+        return query_index.lookup('in', self._get_string_ids(field, values))
+
+    def query(self, *predicates):
+        """Returns the rows of the objects that satisfy all of a list of predicates.
+
+        Each predicate is answered by a field's inverted index (see where())
+        and the sorted rows of all predicates are intersected, starting with
+        the predicate with the fewest rows.
+
+        Parameters
+        ----------
+        *predicates : tuple
+            Predicates as (field, op, value) tuples (see where()).
+
+        Returns
+        -------
+        np.ndarray
+            Sorted rows of 'object_ids' of the objects that satisfy all predicates.
+
+        Raises
+        ------
+        KeyError
+            If a field is not contained in 'object_fields' or an operator
+            does not exist.
+        TypeError
+            If a field cannot be queried with its operator.
+
+        Examples
+        --------
+        All objects of class 'person' not labeled as a crowd in images wider
+        than 640 pixels:
+
+        >>> import dbcollection as dbc
+        >>> coco = dbc.load('coco', 'detection_2015')
+        >>> rows = coco.sets['train'].query(('category', '==', 'person'),
+        ...                                 ('iscrowd', '==', 0),
+        ...                                 ('width', '>', 640))
+        >>> boxes = coco.sets['train'].object_batch(rows, fields=['boxes'])['boxes']
+
+        """
+        assert predicates, 'Must input at least one predicate.'
+        results = sorted((self.where(*predicate) for predicate in predicates), key=len)
+        rows = results[0]
+        for other_rows in results[1:]:
+            rows = np.intersect1d(rows, other_rows, assume_unique=True)
+        return rows
+
+    def _get_query_index(self, field):
+        """Returns the query index of a field (loaded or built once)."""
+        if field not in self._query_indexes:
+            query_index = load_query_index(self.hdf5_group, field)
+            if query_index is None:
+                query_index = self._build_query_index(field)
+            self._query_indexes[field] = query_index
+        return self._query_indexes[field]
+
+    def _build_query_index(self, field):
+        """Builds the query index of a field in memory."""
+        h5_field = self.hdf5_group[field]
+        ids = self.fields['object_ids'].get()[:, self.object_fields.index(field)]
+        if is_value_field(h5_field):
+            return QueryIndex(*get_query_index(ids, h5_field[()]), by_value=True)
+        elif is_string_field(h5_field):
+            return QueryIndex(*get_query_index(ids), by_value=False)
+        raise TypeError('\'{}\' cannot be queried: only fields with scalar numeric rows '
+                        'or strings are supported.'.format(field))
+
+    def _get_string_ids(self, field, values):
+        """Returns the ids of the rows of a string field equal to any of the values."""
+        return get_string_ids(self.hdf5_group[field], values)
+
     def size(self, field='object_ids'):
         """Size of a field.
 
@@ -446,7 +1448,7 @@ class SetLoader(object):
 
         """
         try:
-            return self.fields[field].shape
+            return self._get_field_shape(field)
         except KeyError:
             raise KeyError('\'{}\' does not exist in the \'{}\' set.'.format(field, self.set))
 
@@ -591,82 +1593,398 @@ class SetLoader(object):
         return str(self)
 
 
-class DataLoader(object):
-    """Dataset metadata loader class.
+class SetShard(object):
+    """View of the objects of a shard of a set.
 
-    This class contains several methods to fetch data from a hdf5 file
-    by using simple, easy to use functions for (meta)data handling.
+    The methods of this class fetch data only for the objects (rows of
+    'object_ids') of the shard. Indexes refer to the position of the objects
+    in the shard.
 
     Parameters
     ----------
-    name : str
-        Name of the dataset.
-    task : str
-        Name of the task.
-    data_dir : str
-        Path of the dataset's data directory on disk.
-    hdf5_filepath : str
-        Path of the metadata cache file stored on disk.
+    set_loader : SetLoader
+        Loader of the set.
+    rows : np.ndarray
+        Rows of 'object_ids' of the objects of the shard.
+    num_shards : int
+        Number of shards of the set.
+    shard_id : int
+        Index of the shard.
 
     Attributes
     ----------
-    db_name : str
-        Name of the dataset.
-    task : str
-        Name of the task.
-    data_dir : str
-        Path of the dataset's data directory on disk.
-    hdf5_filepath : str
-        Path of the hdf5 metadata file stored on disk.
-    hdf5_file : h5py._hl.files.File
-        hdf5 file object handler.
-    root_path : str
-        Default data group of the hdf5 file.
-    sets : tuple
-        List of names of set splits (e.g. train, test, val, etc.)
-    object_fields : dict
-        Data field names for each set split.
+    set_loader : SetLoader
+        Loader of the set.
+    set : str
+        Name of the set.
+    rows : np.ndarray
+        Rows of 'object_ids' of the objects of the shard.
+    object_fields : tuple
+        List of all field names of the set contained by the 'object_ids' list.
+    nelems : int
+        Number of objects of the shard.
+    num_shards : int
+        Number of shards of the set.
+    shard_id : int
+        Index of the shard.
 
     """
 
-    def __init__(self, name, task, data_dir, hdf5_filepath):
+    def __init__(self, set_loader, rows, num_shards, shard_id):
         """Initialize class."""
-        assert name, 'Must input a valid dataset name.'
-        assert task, 'Must input a valid task name.'
-        assert data_dir, 'Must input a valid path for the data directory.'
-        assert hdf5_filepath, 'Must input a valid path for the cache file.'
+        assert set_loader, 'Must input a valid set loader.'
+        self.set_loader = set_loader
+        self.set = set_loader.set
+        self.rows = rows
+        self.object_fields = set_loader.object_fields
+        self.nelems = len(rows)
+        self.num_shards = num_shards
+        self.shard_id = shard_id
+
+    def _get_rows(self, index):
+        if index is None:
+            return self.rows
+        return self.rows[np.array(index, dtype=np.int64)]
 
-        self.db_name = name
-        self.task = task
-        self.data_dir = data_dir
+    def get(self, field, index=None, convert_to_str=False):
+        """Retrieves the data of a field for the objects of the shard.
+
+        Fields of 'object_fields' are fetched through the ids of the objects.
+        Other fields must have one row per object.
+
+        Parameters
+        ----------
+        field : str
+            Field name.
+        index : int/list/tuple/np.ndarray, optional
+            Positions of the objects in the shard. If None, the data of all
+            objects of the shard is returned.
+        convert_to_str : bool, optional
+            Convert the output data into a string.
+            Warning: output must be of type np.uint8
+
+        Returns
+        -------
+        np.ndarray/list/str
+            Data of the field for each object (in the order of the indexes).
+
+        Raises
+        ------
+        KeyError
+            If the field does not exist in the set.
+
+        """
+        assert field, 'Must input a valid field name.'
+        rows = self._get_rows(index)
+        if field in self.object_fields:
+            ids = self.set_loader.get_batch('object_ids', np.atleast_1d(rows))[:, self.object_fields.index(field)]
+            data = self.set_loader.get_batch(field, ids, convert_to_str=convert_to_str)
+        else:
+            data = self.set_loader.get_batch(field, np.atleast_1d(rows), convert_to_str=convert_to_str)
+        return data[0] if np.ndim(rows) == 0 else data
+
+    def object(self, index=None, convert_to_value=False):
+        """Retrieves the indexes/values of all fields of objects of the shard.
+
+        Parameters
+        ----------
+        index : int/list/tuple/np.ndarray, optional
+            Positions of the objects in the shard. If None, all objects of
+            the shard are returned.
+        convert_to_value : bool, optional
+            If False, outputs a list of indexes. If True,
+            it outputs a list of arrays/values instead of indexes.
+
+        Returns
+        -------
+        np.ndarray/list
+            Returns the indexes or, if convert_to_value is True,
+            a list of data arrays/values.
+
+        """
+        rows = self._get_rows(index)
+        indexes = self.set_loader.get_batch('object_ids', np.atleast_1d(rows))
+        if np.ndim(rows) == 0:
+            indexes = indexes[0]
+        if convert_to_value:
+            return self.set_loader._convert(indexes.tolist())
+        return indexes
+
+    def object_batch(self, index, fields=None):
+        """Retrieves the values of the fields of a batch of objects of the shard as arrays.
+
+        See SetLoader.object_batch() for details.
+
+        Parameters
+        ----------
+        index : int/list/tuple/np.ndarray
+            Positions of the objects in the shard.
+        fields : list/tuple, optional
+            Names of the fields of 'object_fields' to fetch. If None, all
+            fields are fetched.
+
+        Returns
+        -------
+        OrderedDict
+            Masked arrays of the values of each field (one row per object).
+
+        """
+        return self.set_loader.object_batch(self._get_rows(index), fields)
+
+    def iter_batches(self, fields=None, batch_size=32, shuffle=False, seed=None, drop_last=False, prefetch=1):
+        """Iterates over the objects of the shard in minibatches.
+
+        See SetLoader.iter_batches() for details. The 'index' of each batch
+        contains the rows of the objects in 'object_ids' of the set.
+
+        Parameters
+        ----------
+        fields : list/tuple, optional
+            Names of the fields to fetch. If None, all fields of
+            'object_fields' are fetched.
+        batch_size : int, optional
+            Number of objects per batch.
+        shuffle : bool, optional
+            Iterate over the objects in a random order (if True).
+        seed : int, optional
+            Seed of the random order of the objects.
+        drop_last : bool, optional
+            Drop the last batch if it has fewer than 'batch_size' objects.
+        prefetch : int, optional
+            Number of batches read ahead of the consumer.
+
+        Returns
+        -------
+        generator
+            Batches as OrderedDicts of arrays of each field.
+
+        """
+        return self.set_loader._iter_batches(self.rows, fields, batch_size, shuffle, seed, drop_last, prefetch)
+
+    def save(self, filename):
+        """Stores the objects of the shard into a new HDF5 metadata file.
+
+        The file contains a group with the name of the set, with the
+        'object_ids' of the shard and the rows of the fields of
+        'object_fields' referenced by them (the ids are remapped to the rows
+        of the new fields). Fields not contained in 'object_fields' (e.g.,
+        pre-ordered lists) are not stored. The file can be loaded with a
+        DataLoader, for example on nodes without shared storage.
+
+        Parameters
+        ----------
+        filename : str
+            File name + path of the HDF5 file.
+
+        Returns
+        -------
+        str
+            File name + path of the HDF5 file.
+
+        """
+        assert filename, 'Must input a valid file name.'
+        object_ids = self.set_loader.get_batch('object_ids', self.rows)
+        hdf5_manager = HDF5Manager(filename)
+        try:
+            for i, field in enumerate(self.object_fields):
+                ids = object_ids[:, i]
+                valid = ids >= 0
+                unique_ids, inverse = np.unique(ids[valid], return_inverse=True)
+                field_loader = self.set_loader.fields[field]
+                h5_field = hdf5_manager.add_field_to_group(self.set, field, field_loader._read_rows(unique_ids),
+                                                           dtype=field_loader.type,
+                                                           fillvalue=field_loader.fillvalue)
+                string_format = get_field_string_format(field_loader.hdf5_handler)
+                if string_format is not None:
+                    h5_field.attrs[STRING_FORMAT_ATTR] = string_format
+                object_ids[valid, i] = inverse
+            string_format = get_field_string_format(self.set_loader.hdf5_group['object_fields'])
+            hdf5_manager.add_strings_to_group(self.set, 'object_fields', list(self.object_fields),
+                                              string_format=string_format)
+            hdf5_manager.add_field_to_group(self.set, 'object_ids', object_ids, dtype=object_ids.dtype)
+            write_query_indexes(hdf5_manager.file[self.set])
+        finally:
+            hdf5_manager.close()
+        return filename
+
+    def __len__(self):
+        return self.nelems
+
+    def __str__(self):
+        s = 'SetShard: set<{}>, shard<{}/{}>, len<{}>'.format(self.set, self.shard_id, self.num_shards, self.nelems)
+        return s
+
+    def __repr__(self):
+        return str(self)
+
+
+class DataLoader(object):
+    """Dataset metadata loader class.
+
+    This class contains several methods to fetch data from a hdf5 file
+    by using simple, easy to use functions for (meta)data handling.
+
+    Parameters
+    ----------
+    name : str
+        Name of the dataset.
+    task : str
+        Name of the task.
+    data_dir : str
+        Path of the dataset's data directory on disk.
+    hdf5_filepath : str
+        Path of the metadata cache file stored on disk.
+    cache_size : int, optional
+        Maximum size (in bytes) of the cache of decompressed chunks shared
+        by all fields. If 0, the chunk cache is disabled.
+    swmr : bool, optional
+        Open the hdf5 file in single-writer multiple-reader (SWMR) read mode.
+        This allows reading the file while another process writes to it.
+
+    Attributes
+    ----------
+    db_name : str
+        Name of the dataset.
+    task : str
+        Name of the task.
+    data_dir : str
+        Path of the dataset's data directory on disk.
+    hdf5_filepath : str
+        Path of the hdf5 metadata file stored on disk.
+    hdf5_file : h5py._hl.files.File
+        hdf5 file object handler.
+    root_path : str
+        Default data group of the hdf5 file.
+    sets : LazyLoaderDict
+        Set loaders of the set splits (e.g. train, test, val, etc.),
+        created on first access.
+    object_fields : LazyLoaderDict
+        Data field names for each set split.
+    chunk_cache : ChunkCache
+        Cache of decompressed chunks shared by all fields (None if disabled).
+    swmr : bool
+        True if the hdf5 file is opened in SWMR read mode.
+
+    Note
+    ----
+    The loader can be shared with worker processes. The hdf5 file is
+    reopened (and the set loaders rebuilt) the first time the loader is
+    used in a process other than the one that opened it (e.g., after a
+    fork), since hdf5 file handles must not be shared between processes.
+    When pickled, only the paths and options of the loader are stored and
+    the file is reopened when unpickled. Set and field loaders fetched
+    before a fork are bound to the parent's file handle and must be fetched
+    again from the loader in the child process.
+
+    """
+
+    def __init__(self, name, task, data_dir, hdf5_filepath, cache_size=0, swmr=False):
+        """Initialize class."""
+        assert name, 'Must input a valid dataset name.'
+        assert task, 'Must input a valid task name.'
+        assert data_dir, 'Must input a valid path for the data directory.'
+        assert hdf5_filepath, 'Must input a valid path for the cache file.'
+        assert isinstance(swmr, bool), 'Must input a valid boolean for swmr.'
+
+        self.db_name = name
+        self.task = task
+        self.data_dir = data_dir
         self.hdf5_filepath = hdf5_filepath
-        self.hdf5_file = self._load_hdf5_file()
+        self.swmr = swmr
+        self.chunk_cache = None
+        self._pid = os.getpid()
+        self._hdf5_file = self._load_hdf5_file()
         self.root_path = '/'
         self._sets = self._get_sets()
         self.object_fields = self._get_object_fields()
 
-        self.sets = self._get_set_loaders()
+        self._set_loaders = self._get_set_loaders()  # set loaders are loaded on first access
+        self.set_chunk_cache(cache_size)
+
+    @property
+    def hdf5_file(self):
+        """hdf5 file object handler (reopened in a new process)."""
+        self._reopen_if_new_process()
+        return self._hdf5_file
+
+    @property
+    def sets(self):
+        """Set loaders of the set splits (rebuilt in a new process)."""
+        self._reopen_if_new_process()
+        return self._set_loaders
+
+    def _reopen_if_new_process(self):
+        """Reopens the hdf5 file if the loader is used by a different process than the one that opened it."""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._hdf5_file = self._load_hdf5_file()
+        self._set_loaders = self._get_set_loaders()
+        if self.chunk_cache is not None:
+            # the parent's cache (and its lock) must not be shared by the processes
+            self.chunk_cache = ChunkCache(self.chunk_cache.max_bytes)
 
     def _load_hdf5_file(self):
-        return h5py.File(self.hdf5_filepath, 'r', libver='latest')
+        return h5py.File(self.hdf5_filepath, 'r', libver='latest', swmr=self.swmr)
 
     def _get_sets(self):
-        return tuple(sorted(self.hdf5_file['/'].keys()))
+        return tuple(sorted(set_name for set_name in self.hdf5_file['/'].keys()
+                            if set_name != QUERY_INDEX_GROUP))
 
     def _get_object_fields(self):
         """# fetch list of field names that compose the object list."""
-        object_fields = {}
-        for set_name in self._sets:
-            data = self.hdf5_file['/{}/object_fields'.format(set_name)].value
-            object_fields[set_name] = tuple(convert_ascii_to_str(data))
-        return object_fields
+        return LazyLoaderDict(self._sets, lambda set_name: tuple(self.sets[set_name].object_fields))
 
     def _get_set_loaders(self):
         """Return a dictionary with list of set loaders."""
-        sets = {}
-        for set_name in self._sets:
-            sets[set_name] = SetLoader(self.hdf5_file[set_name])
-        return sets
+        return LazyLoaderDict(self._sets, self._get_set_loader)
+
+    def _get_set_loader(self, set_name):
+        return SetLoader(self.hdf5_file[set_name], self.chunk_cache)
+
+    def set_chunk_cache(self, cache_size):
+        """Sets the size of the cache of decompressed chunks shared by all fields.
+
+        Replaces the current cache (if any) by a new, empty one.
+
+        Parameters
+        ----------
+        cache_size : int
+            Maximum size (in bytes) of the cache. If 0, the cache is disabled.
+
+        Examples
+        --------
+        >>> import dbcollection as dbc
+        >>> coco = dbc.load('coco')
+        >>> coco.set_chunk_cache(256 * 1024 ** 2)  # 256 MB
+        >>> coco.get('train', 'image_filenames', 0)
+        >>> coco.cache_info()
+        {'hits': 0, 'misses': 1, 'evictions': 0, 'blocks': 1, 'nbytes': ..., 'max_bytes': 268435456}
+
+        """
+        assert isinstance(cache_size, int), 'Must input a valid integer for the cache size.'
+        assert cache_size >= 0, 'Must input a non-negative cache size.'
+        if cache_size > 0:
+            self.chunk_cache = ChunkCache(cache_size)
+        else:
+            self.chunk_cache = None
+        for set_loader in self.sets.loaded():
+            set_loader.set_chunk_cache(self.chunk_cache)
+
+    def cache_info(self):
+        """Returns the usage statistics of the cache of decompressed chunks.
+
+        Returns
+        -------
+        dict
+            Number of hits, misses and evictions, as well as the current
+            and maximum size (in bytes) of the cache. Returns None if the
+            cache is disabled.
+
+        """
+        if self.chunk_cache is None:
+            return None
+        return self.chunk_cache.info()
 
     def get(self, set_name, field, index=None, convert_to_str=False):
         """Retrieves data from the dataset's hdf5 metadata file.
@@ -708,6 +2026,45 @@ class DataLoader(object):
         except KeyError:
             self._raise_error_invalid_set_name(set_name)
 
+    def get_batch(self, set_name, field, index, convert_to_str=False):
+        """Retrieves a batch of rows of a field in the same order as the input indexes.
+
+        This is the preferred read method for random access (e.g., shuffled
+        minibatches), since it preserves the order and duplicates of the input
+        indexes while reading each row from disk only once.
+
+        Parameters
+        ----------
+        set_name : str
+            Name of the set.
+        field : str
+            Name of the data field.
+        index : list/tuple/np.ndarray
+            Index numbers of the rows of the field to fetch.
+        convert_to_str : bool, optional
+            Convert the output data into a list of strings.
+            Warning: output must be of type np.uint8
+
+        Returns
+        -------
+        np.ndarray/list
+            Numpy array with one row per input index.
+            If convert_to_str is set to True, it returns a list of strings.
+
+        Raises
+        ------
+        KeyError
+            If set name is not valid or does not exist.
+
+        """
+        assert set_name, 'Must input a set name.'
+        assert field, 'Must input a field name.'
+        try:
+            set_loader = self.sets[set_name]
+        except KeyError:
+            self._raise_error_invalid_set_name(set_name)
+        return set_loader.get_batch(field, index, convert_to_str=convert_to_str)
+
     def _raise_error_invalid_set_name(self, set_name):
         raise KeyError("'{}' does not exist in the sets list: {}".format(set_name, self._sets))
 
@@ -751,6 +2108,260 @@ class DataLoader(object):
         except KeyError:
             self._raise_error_invalid_set_name(set_name)
 
+    def object_batch(self, set_name, index, fields=None):
+        """Retrieves the values of the fields of a batch of objects as arrays.
+
+        Each field referenced by the objects is fetched with a single batched
+        read for all objects. See SetLoader.object_batch() for details.
+
+        Parameters
+        ----------
+        set_name : str
+            Name of the set.
+        index : int/list/tuple/np.ndarray
+            Index numbers of the objects (rows of 'object_ids').
+        fields : list/tuple, optional
+            Names of the fields of 'object_fields' to fetch. If None, all
+            fields are fetched.
+
+        Returns
+        -------
+        OrderedDict
+            Masked arrays of the values of each field (one row per object).
+
+        Raises
+        ------
+        KeyError
+            If set name is not valid or does not exist.
+
+        """
+        assert set_name, 'Must input a valid set name.'
+        try:
+            set_loader = self.sets[set_name]
+        except KeyError:
+            self._raise_error_invalid_set_name(set_name)
+        return set_loader.object_batch(index, fields)
+
+    def image_batch(self, set_name, index, size=None, crop_field=None, mode='RGB', pool=None):
+        """Loads the images of a batch of objects into a numpy array.
+
+        The image file names are resolved relative to the dataset's data
+        directory. See SetLoader.image_batch() for details.
+
+        Parameters
+        ----------
+        set_name : str
+            Name of the set.
+        index : int/list/tuple/np.ndarray
+            Index numbers of the objects (rows of 'object_ids').
+        size : tuple, optional
+            Size (width, height) of the output images.
+        crop_field : str, optional
+            Name of a bounding box field of 'object_fields' to crop from the images.
+        mode : str, optional
+            PIL mode of the output images (e.g., 'RGB' or 'L').
+        pool : multiprocessing.pool.Pool/multiprocessing.pool.ThreadPool, optional
+            Pool of workers to decode the images.
+
+        Returns
+        -------
+        OrderedDict
+            Batch with the 'index', 'image_filenames', crop boxes, 'images'
+            and 'timings' of the objects.
+
+        Raises
+        ------
+        KeyError
+            If set name is not valid or does not exist.
+
+        """
+        assert set_name, 'Must input a valid set name.'
+        try:
+            set_loader = self.sets[set_name]
+        except KeyError:
+            self._raise_error_invalid_set_name(set_name)
+        return set_loader.image_batch(index, self.data_dir, size, crop_field, mode, pool)
+
+    def iter_batches(self, set_name, fields=None, batch_size=32, shuffle=False, seed=None,
+                     drop_last=False, prefetch=1):
+        """Iterates over the objects of a set in minibatches.
+
+        See SetLoader.iter_batches() for details.
+
+        Parameters
+        ----------
+        set_name : str
+            Name of the set.
+        fields : list/tuple, optional
+            Names of the fields to fetch. If None, all fields of
+            'object_fields' are fetched.
+        batch_size : int, optional
+            Number of objects per batch.
+        shuffle : bool, optional
+            Iterate over the objects in a random order (if True).
+        seed : int, optional
+            Seed of the random order of the objects.
+        drop_last : bool, optional
+            Drop the last batch if it has fewer than 'batch_size' objects.
+        prefetch : int, optional
+            Number of batches read ahead of the consumer.
+
+        Returns
+        -------
+        generator
+            Batches as OrderedDicts of arrays of each field.
+
+        Raises
+        ------
+        KeyError
+            If set name is not valid or does not exist.
+
+        """
+        assert set_name, 'Must input a valid set name.'
+        try:
+            set_loader = self.sets[set_name]
+        except KeyError:
+            self._raise_error_invalid_set_name(set_name)
+        return set_loader.iter_batches(fields, batch_size, shuffle, seed, drop_last, prefetch)
+
+    def shard(self, set_name, num_shards, shard_id, shuffle_seed=None, epoch=0):
+        """Returns a view of the objects of one shard of a set.
+
+        See SetLoader.shard() for details.
+
+        Parameters
+        ----------
+        set_name : str
+            Name of the set.
+        num_shards : int
+            Number of shards.
+        shard_id : int
+            Index of the shard (in the range [0, num_shards)).
+        shuffle_seed : int, optional
+            Seed to shuffle the blocks of objects before assigning them to the shards.
+        epoch : int, optional
+            Epoch number (combined with 'shuffle_seed').
+
+        Returns
+        -------
+        SetShard
+            View of the objects of the shard.
+
+        Raises
+        ------
+        KeyError
+            If set name is not valid or does not exist.
+
+        """
+        assert set_name, 'Must input a valid set name.'
+        try:
+            set_loader = self.sets[set_name]
+        except KeyError:
+            self._raise_error_invalid_set_name(set_name)
+        return set_loader.shard(num_shards, shard_id, shuffle_seed, epoch)
+
+    def where(self, set_name, field, op, value):
+        """Returns the rows of the objects of a set whose field satisfies a predicate.
+
+        See SetLoader.where() for details.
+
+        Parameters
+        ----------
+        set_name : str
+            Name of the set.
+        field : str
+            Name of a field of 'object_fields'.
+        op : str
+            Predicate operator ('==', '<', '<=', '>', '>=', 'in' or 'between').
+        value : int/float/str/list/tuple
+            Value of the predicate.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted rows of 'object_ids' of the objects that satisfy the predicate.
+
+        Raises
+        ------
+        KeyError
+            If set name is not valid or does not exist.
+
+        """
+        assert set_name, 'Must input a valid set name.'
+        try:
+            set_loader = self.sets[set_name]
+        except KeyError:
+            self._raise_error_invalid_set_name(set_name)
+        return set_loader.where(field, op, value)
+
+    def query(self, set_name, *predicates):
+        """Returns the rows of the objects of a set that satisfy all of a list of predicates.
+
+        See SetLoader.query() for details.
+
+        Parameters
+        ----------
+        set_name : str
+            Name of the set.
+        *predicates : tuple
+            Predicates as (field, op, value) tuples.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted rows of 'object_ids' of the objects that satisfy all predicates.
+
+        Raises
+        ------
+        KeyError
+            If set name is not valid or does not exist.
+
+        """
+        assert set_name, 'Must input a valid set name.'
+        try:
+            set_loader = self.sets[set_name]
+        except KeyError:
+            self._raise_error_invalid_set_name(set_name)
+        return set_loader.query(*predicates)
+
+    def to_dataframe(self, set_name, fields=None, rows=None, categorical_threshold=0.5):
+        """Returns the objects of a set as a pandas DataFrame.
+
+        Each row of the DataFrame corresponds to a row of 'object_ids' and
+        each column to a field of 'object_fields'. See SetLoader.to_dataframe()
+        for details about how the fields are stored in the columns.
+
+        Parameters
+        ----------
+        set_name : str
+            Name of the set.
+        fields : list/tuple, optional
+            Names of the fields of 'object_fields' to fetch. If None, all
+            fields are fetched.
+        rows : int/list/tuple/np.ndarray/slice, optional
+            Rows of 'object_ids' to fetch. If None, all rows are fetched.
+        categorical_threshold : float, optional
+            String fields are stored as categorical columns if their number of
+            distinct values is at most this fraction of the number of rows.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Objects of the set (indexed by their row in 'object_ids').
+
+        Raises
+        ------
+        KeyError
+            If set name is not valid or does not exist.
+
+        """
+        assert set_name, 'Must input a valid set name.'
+        try:
+            set_loader = self.sets[set_name]
+        except KeyError:
+            self._raise_error_invalid_set_name(set_name)
+        return set_loader.to_dataframe(fields, rows, categorical_threshold)
+
     def size(self, set_name=None, field='object_ids'):
         """Size of a field.
 
@@ -904,6 +2515,21 @@ class DataLoader(object):
         except KeyError:
             self._raise_error_invalid_set_name(set_name)
 
+    def __getstate__(self):
+        """Stores only the paths and options of the loader (hdf5 handles cannot be pickled)."""
+        return {
+            "name": self.db_name,
+            "task": self.task,
+            "data_dir": self.data_dir,
+            "hdf5_filepath": self.hdf5_filepath,
+            "cache_size": self.chunk_cache.max_bytes if self.chunk_cache is not None else 0,
+            "swmr": self.swmr
+        }
+
+    def __setstate__(self, state):
+        """Reopens the hdf5 file with the stored paths and options."""
+        self.__init__(**state)
+
     def __len__(self):
         return len(self.sets)
 
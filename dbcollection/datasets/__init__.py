@@ -9,12 +9,14 @@ and used to manually setup a dataset.
 
 from __future__ import print_function
 import os
+import multiprocessing
 import h5py
-import numpy as np
 
+from dbcollection.utils.file_load import load_json, json_cache, release_json
 from dbcollection.utils.hdf5 import HDF5Manager
+from dbcollection.utils.prefetch import prefetch
+from dbcollection.utils.query_index import QUERY_INDEX_GROUP, write_query_indexes
 from dbcollection.utils.url import download_extract_urls
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
 
 
 class BaseDataset(object):
@@ -49,6 +51,25 @@ class BaseDataset(object):
         Dataset's tasks for processing.
     default_task : str
         Default task name.
+    storage_profiles : dict
+        Storage profiles of the data fields which override the ones
+        defined by the tasks (e.g., {'images': 'lzf'}).
+    string_format : str
+        Encoding of the string fields which overrides the one defined
+        by the tasks (e.g., 'vlen'). If None, uses the task's encoding.
+    list_format : str
+        Layout of the list fields which overrides the one defined by the
+        tasks (e.g., 'ragged'). If None, uses the task's layout.
+    workers : int
+        Number of processes used to process the sets of a task which overrides
+        the one defined by the tasks. If None, uses the task's number of workers.
+    download_workers : int
+        Maximum number of urls downloaded at the same time.
+    max_bandwidth : int
+        Maximum total download rate (in bytes per second). If None, the
+        download rate is not limited.
+    download_segments : int
+        Number of byte ranges of each (large) url downloaded in parallel.
 
     """
 
@@ -56,6 +77,13 @@ class BaseDataset(object):
     keywords = ()  # List of keywords to classify/categorize datasets in the cache.
     tasks = {}  # dictionary of available tasks to process
     default_task = ''  # Defines the default class
+    storage_profiles = {}  # storage profiles overriding the ones of the tasks
+    string_format = None  # encoding of the string fields overriding the one of the tasks
+    list_format = None  # layout of the list fields overriding the one of the tasks
+    workers = None  # number of processes overriding the one of the tasks
+    download_workers = 4  # number of urls downloaded at the same time
+    max_bandwidth = None  # maximum download rate (bytes/s)
+    download_segments = 1  # number of byte ranges of each url downloaded in parallel
 
     def __init__(self, data_path, cache_path, extract_data=True, verbose=True):
         """Initialize class."""
@@ -79,7 +107,10 @@ class BaseDataset(object):
             urls=self.urls,
             save_dir=self.data_path,
             extract_data=self.extract_data,
-            verbose=self.verbose
+            verbose=self.verbose,
+            workers=self.download_workers,
+            max_bandwidth=self.max_bandwidth,
+            segments=self.download_segments
         )
 
     def process(self, task='default'):
@@ -87,8 +118,15 @@ class BaseDataset(object):
 
         Parameters
         ----------
-        task : str, optional
-            Name of the task.
+        task : str/list/tuple, optional
+            Name of the task. Several tasks can be processed at once by
+            passing a list of task names, in which case the annotation files
+            shared by the tasks (e.g., COCO's json files) are loaded only once
+            and kept in memory until the last task that uses them is processed.
+            The shared files are loaded before processing a task, so the sets
+            processed in parallel (see BaseTask.run_parallel()) also use them
+            when the worker processes are forked (default on Linux); otherwise,
+            each worker process loads its own copy.
 
         Returns
         -------
@@ -96,6 +134,15 @@ class BaseDataset(object):
             Returns a dictionary with the task name as key and the filename as value.
 
         """
+        if isinstance(task, (list, tuple)):
+            tasks_info = {}
+            with json_cache():
+                for i, task_name in enumerate(task):
+                    next_json_files = self.get_tasks_json_files(task[i + 1:])
+                    self.load_json_files(self.get_tasks_json_files([task_name]) & next_json_files)
+                    tasks_info.update(self.process(task_name))
+                    release_json(next_json_files)
+            return tasks_info
         task_ = self.parse_task_name(task)
         if self.verbose:
             print("\nProcessing '{}' task:".format(task_))
@@ -126,8 +173,51 @@ class BaseDataset(object):
         processer = constructor(data_path=self.data_path,
                                 cache_path=self.cache_path,
                                 verbose=self.verbose)
+        if any(self.storage_profiles):
+            processer.storage_profiles = dict(processer.storage_profiles, **self.storage_profiles)
+        if self.string_format is not None:
+            processer.string_format = self.string_format
+        if self.list_format is not None:
+            processer.list_format = self.list_format
+        if self.workers is not None:
+            processer.workers = self.workers
         return processer.run()
 
+    def get_tasks_json_files(self, tasks):
+        """Returns the json annotation files used by a list of tasks.
+
+        Parameters
+        ----------
+        tasks : list/tuple
+            Names of the tasks.
+
+        Returns
+        -------
+        set
+            File names + paths of the json files of the tasks' annotations.
+
+        """
+        json_files = set()
+        for task in tasks:
+            constructor = self.tasks.get(self.parse_task_name(task))
+            annotation_path = getattr(constructor, 'annotation_path', {})
+            json_files.update(os.path.join(self.data_path, path) for path in annotation_path.values()
+                              if path.endswith('.json'))
+        return json_files
+
+    def load_json_files(self, json_files):
+        """Loads json files into the cache of json_cache() (missing files are skipped).
+
+        Parameters
+        ----------
+        json_files : list/tuple/set
+            File names + paths of the json files.
+
+        """
+        for filename in sorted(json_files):
+            if os.path.exists(filename):
+                load_json(filename)
+
     def get_task_constructor(self, task):
         """Returns the class constructor for the input task.
 
@@ -170,10 +260,38 @@ class BaseTask(object):
         Name of the HDF5 file.
     hdf5_filepath : str
         File name + path of the HDF5 metadata file in disk.
+    mmap_fields : tuple
+        Names of the fields stored uncompressed and contiguous in the
+        HDF5 file, which allows them to be memory-mapped when loaded.
+    storage_profiles : dict
+        Storage profile (name or dictionary of options) of the data fields.
+        Fields not listed use the default profile for their type of data.
+    string_format : str
+        Encoding of the string fields (see dbcollection.utils.hdf5.STRING_FORMATS).
+        The 'ascii' format stores strings as zero-padded uint8 arrays.
+    list_format : str
+        Layout of the list fields (see dbcollection.utils.hdf5.LIST_FORMATS).
+        The 'padded' format stores lists as 2D arrays padded with -1.
+    prefetch_sets : bool
+        Loads the data of the next set partition in a background thread
+        while the current one is being stored to disk. Disabled by default,
+        since the data of two sets is then kept in memory at the same time.
+    workers : int
+        Number of processes used to load and store the set partitions in
+        parallel. Only used by tasks whose sets are known in advance
+        (see get_set_names()).
+    selected_sets : list
+        Names of the set partitions to process. If None, all sets are processed.
 
     """
 
     filename_h5 = ''  # name of the task file
+    mmap_fields = ()  # fields stored uncompressed + contiguous (memory-mappable)
+    storage_profiles = {}  # storage profiles of the fields (see dbcollection.utils.hdf5)
+    string_format = 'ascii'  # encoding of the string fields ('ascii', 'fixed' or 'vlen')
+    list_format = 'padded'  # layout of the list fields ('padded' or 'ragged')
+    prefetch_sets = False  # load the next set while the current one is stored
+    workers = 1  # number of processes used to process the sets
 
     def __init__(self, data_path, cache_path, verbose=True):
         """Initialize class."""
@@ -184,6 +302,7 @@ class BaseTask(object):
         self.verbose = verbose
         self.hdf5_filepath = self.get_hdf5_save_filename()
         self.hdf5_manager = None
+        self.selected_sets = None
 
     def get_hdf5_save_filename(self):
         """Builds the HDF5 file name + path on disk."""
@@ -198,22 +317,95 @@ class BaseTask(object):
         generator, retrieves the data fields obtained in the processing stage
         and saves them into an HDF5 file in disk.
 
+        If more than one worker is used, the sets are processed in parallel
+        and merged into the task's HDF5 file (see run_parallel()).
+
         Returns
         -------
         str
             File name + path of the task's HDF5 metadata file.
         """
+        set_names = self.get_set_names()
+        if self.workers > 1 and self.selected_sets is None and set_names and len(set_names) > 1:
+            return self.run_parallel(set_names)
         self.setup_hdf5_manager()
         data_generator = self.load_data()
         self.process_metadata(data_generator)
         self.teardown_hdf5_manager()
         return self.hdf5_filepath
 
+    def run_parallel(self, set_names):
+        """Runs the task metadata processing of each set in a separate process.
+
+        Each set is loaded, processed and stored into a temporary HDF5 file
+        by a pool of worker processes. The sets are then copied into the
+        task's HDF5 file and the temporary files are removed.
+
+        Parameters
+        ----------
+        set_names : list
+            Names of the sets of the task.
+
+        Returns
+        -------
+        str
+            File name + path of the task's HDF5 metadata file.
+        """
+        jobs = [(self, set_name, '{}.{}.tmp'.format(self.hdf5_filepath, set_name))
+                for set_name in set_names]
+        pool = multiprocessing.Pool(processes=min(self.workers, len(jobs)))
+        try:
+            filenames = pool.map(process_task_set, jobs)
+        finally:
+            pool.close()
+            pool.join()
+        self.setup_hdf5_manager()
+        for filename in filenames:
+            self.merge_set_file(filename)
+        self.teardown_hdf5_manager()
+        return self.hdf5_filepath
+
+    def merge_set_file(self, filename):
+        """Copies the groups of an HDF5 file into the task's file and removes it."""
+        with h5py.File(filename, 'r') as h5_file:
+            for group in h5_file:
+                if group == QUERY_INDEX_GROUP:
+                    index_group = self.hdf5_manager.file.require_group(group)
+                    for set_name in h5_file[group]:
+                        h5_file.copy(h5_file[group][set_name], index_group, name=set_name)
+                else:
+                    h5_file.copy(h5_file[group], self.hdf5_manager.file, name=group)
+        os.remove(filename)
+
+    def get_set_names(self):
+        """Returns the names of the sets loaded by load_data().
+
+        Returns
+        -------
+        list
+            Names of the sets. Returns None if the sets are not known before
+            loading the data, in which case they cannot be processed in parallel.
+        """
+        return None
+
+    def is_selected_set(self, set_name):
+        """Checks if a set is selected for processing (see the 'selected_sets' attribute)."""
+        return self.selected_sets is None or set_name in self.selected_sets
+
     def setup_hdf5_manager(self):
         """Sets up the metadata manager to store the processed data to disk."""
         if self.verbose:
             print('\n==> Storing metadata to file: {}'.format(self.hdf5_filepath))
         self.hdf5_manager = HDF5Manager(filename=self.hdf5_filepath)
+        self.hdf5_manager.set_storage_profiles(self.get_storage_profiles())
+        self.hdf5_manager.set_string_format(self.string_format)
+        self.hdf5_manager.set_list_format(self.list_format)
+
+    def get_storage_profiles(self):
+        """Returns the storage profiles of the task's data fields."""
+        storage_profiles = {field: 'contiguous' for field in self.mmap_fields}
+        storage_profiles.update(self.storage_profiles)
+        return storage_profiles
 
     def load_data(self):
         """Loads the dataset's (meta)data from disk (create a generator).
@@ -232,8 +424,12 @@ class BaseTask(object):
 
     def process_metadata(self, data_generator):
         """Processes the dataset's (meta)data and stores it into an HDF5 file."""
+        if self.prefetch_sets:
+            data_generator = prefetch(data_generator)
         for data in data_generator:
             for set_name in data:
+                if not self.is_selected_set(set_name):
+                    continue
                 if self.verbose:
                     print('\nSaving set metadata: {}'.format(set_name))
                 self.process_set_metadata(data[set_name], set_name)
@@ -256,13 +452,38 @@ class BaseTask(object):
         pass
 
     def teardown_hdf5_manager(self):
-        """Sets up the MetadataManager object to manage the metadata save process to disk."""
+        """Stores the query indexes of the sets and closes the HDF5 metadata file."""
+        for set_name in list(self.hdf5_manager.file):
+            if set_name != QUERY_INDEX_GROUP:
+                write_query_indexes(self.hdf5_manager.file[set_name])
         self.hdf5_manager.close()
 
 
+def process_task_set(job):
+    """Processes a set of a task and stores it into a separate HDF5 file.
+
+    Parameters
+    ----------
+    job : tuple
+        Task object, name of the set and file name + path of the HDF5 file.
+
+    Returns
+    -------
+    str
+        File name + path of the set's HDF5 metadata file.
+    """
+    task, set_name, filename = job
+    task.selected_sets = [set_name]
+    task.workers = 1
+    task.hdf5_filepath = filename
+    return task.run()
+
+
 class BaseField(object):
     """Base class for the dataset's data fields processor."""
 
+    storage = None  # storage profile of the fields saved by this processor
+
     def __init__(self, **kwargs):
         for key, value in kwargs.items():
             setattr(self, key, value)
@@ -280,6 +501,8 @@ class BaseField(object):
             Numpy ndarray of the field's data.
 
         """
+        if self.storage is not None and 'storage' not in kwargs:
+            kwargs['storage'] = self.storage
         self.hdf5_manager.add_field_to_group(
             group=set_name,
             field=field,
@@ -287,6 +510,84 @@ class BaseField(object):
             **kwargs
         )
 
+    def save_strings_to_hdf5(self, set_name, field, data, **kwargs):
+        """Saves a list of strings of a field into the HDF5 metadata file.
+
+        The strings are encoded with the string format of the HDF5 manager
+        (zero-padded uint8 arrays by default).
+
+        Parameters
+        ----------
+        set_name: str
+            Name of the set split.
+        field : str
+            Name of the data field.
+        data : list
+            List of strings of the field.
+
+        """
+        if self.storage is not None and 'storage' not in kwargs:
+            kwargs['storage'] = self.storage
+        self.hdf5_manager.add_strings_to_group(
+            group=set_name,
+            field=field,
+            data=data,
+            **kwargs
+        )
+
+    def save_lists_to_hdf5(self, set_name, field, data, **kwargs):
+        """Saves a list of lists of a field into the HDF5 metadata file.
+
+        The lists are stored with the list format of the HDF5 manager
+        (padded with -1 into a 2D array by default).
+
+        Parameters
+        ----------
+        set_name: str
+            Name of the set split.
+        field : str
+            Name of the data field.
+        data : list
+            List of lists of the field (e.g., ids per image).
+
+        """
+        if self.storage is not None and 'storage' not in kwargs:
+            kwargs['storage'] = self.storage
+        self.hdf5_manager.add_list_to_group(
+            group=set_name,
+            field=field,
+            data=data,
+            **kwargs
+        )
+
+    def save_rows_to_hdf5(self, set_name, field, rows, dtype, **kwargs):
+        """Saves the rows of a field from an iterable into the HDF5 metadata file.
+
+        The rows are written in batches as they are produced by the iterable
+        (e.g., a generator), so they never have to be fully loaded into memory.
+
+        Parameters
+        ----------
+        set_name: str
+            Name of the set split.
+        field : str
+            Name of the data field.
+        rows : iterable
+            Rows of the field (scalars, strings, lists or arrays).
+        dtype : np.dtype
+            Data type.
+
+        """
+        if self.storage is not None and 'storage' not in kwargs:
+            kwargs['storage'] = self.storage
+        self.hdf5_manager.add_rows_to_group(
+            group=set_name,
+            field=field,
+            rows=rows,
+            dtype=dtype,
+            **kwargs
+        )
+
 
 class BaseColumnField(BaseField):
     """Base class for the dataset's column data field processor."""
@@ -295,12 +596,10 @@ class BaseColumnField(BaseField):
 
     def process(self):
         """Processes and saves the columns metadata to hdf5."""
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='__COLUMNS__',
-            data=str2ascii(self.fields),
-            dtype=np.uint8,
-            fillvalue=0
+            data=self.fields
         )
 
 
@@ -316,20 +615,16 @@ class BaseMetadataField(BaseField):
 
     def save_fields_names(self):
         columns = [field['name'] for field in self.fields]
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='__COLUMNS__',
-            data=str2ascii(columns),
-            dtype=np.uint8,
-            fillvalue=0
+            data=columns
         )
 
     def save_fields_types(self):
         columns = [field['type'] for field in self.fields]
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='__TYPES__',
-            data=str2ascii(columns),
-            dtype=np.uint8,
-            fillvalue=0
+            data=columns
         )
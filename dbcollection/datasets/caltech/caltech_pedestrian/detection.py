@@ -11,8 +11,6 @@ import progressbar
 from dbcollection.datasets import BaseTask, BaseField, BaseColumnField
 from dbcollection.utils.decorators import display_message_processing
 from dbcollection.utils.file_load import load_json
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
-from dbcollection.utils.pad import pad_list
 from dbcollection.utils.db.caltech_pedestrian_extractor.converter import extract_data
 
 
@@ -260,19 +258,15 @@ class ClassLabelField(BaseFieldCustom):
     def process(self, classes):
         """Processes and saves the classes metadata to hdf5."""
         class_names, class_ids, class_unique_ids = self.get_class_labels_ids(classes)
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='classes',
-            data=str2ascii(class_names),
-            dtype=np.uint8,
-            fillvalue=0
+            data=class_names
         )
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='classes_unique',
-            data=str2ascii(classes),
-            dtype=np.uint8,
-            fillvalue=0
+            data=classes
         )
         return class_ids, class_unique_ids
 
@@ -296,19 +290,15 @@ class ImageFilenamesField(BaseFieldCustom):
         image_filenames_unique = self.get_image_filenames_from_data()
         image_filenames_unique_ids = self.get_image_filenames_obj_ids_from_data()
         image_filenames = [image_filenames_unique[id] for id in image_filenames_unique_ids]
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='image_filenames',
-            data=str2ascii(image_filenames),
-            dtype=np.uint8,
-            fillvalue=0
+            data=image_filenames
         )
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='image_filenames_unique',
-            data=str2ascii(image_filenames_unique),
-            dtype=np.uint8,
-            fillvalue=0
+            data=image_filenames_unique
         )
         image_filenames_ids = list(range(len(image_filenames_unique_ids)))
         return image_filenames_ids, image_filenames_unique_ids
@@ -480,12 +470,10 @@ class ImageFilenamesPerClassList(BaseField):
     def process(self, image_unique_ids, class_unique_ids):
         """Processes and saves the list ids metadata to hdf5."""
         image_filenames_per_class = self.get_image_filename_ids_per_class(image_unique_ids, class_unique_ids)
-        self.save_field_to_hdf5(
+        self.save_lists_to_hdf5(
             set_name=self.set_name,
             field='list_image_filenames_per_class',
-            data=np.array(pad_list(image_filenames_per_class, val=-1), dtype=np.int32),
-            dtype=np.int32,
-            fillvalue=-1
+            data=image_filenames_per_class
         )
 
     def get_image_filename_ids_per_class(self, image_unique_ids, class_unique_ids):
@@ -506,12 +494,10 @@ class BoundingBoxPerImageList(BaseField):
     def process(self, object_ids, image_unique_ids):
         """Processes and saves the list ids metadata to hdf5."""
         bboxes_per_image = self.get_bbox_ids_per_image(object_ids, image_unique_ids)
-        self.save_field_to_hdf5(
+        self.save_lists_to_hdf5(
             set_name=self.set_name,
             field='list_boxes_per_image',
-            data=np.array(pad_list(bboxes_per_image, val=-1), dtype=np.int32),
-            dtype=np.int32,
-            fillvalue=-1
+            data=bboxes_per_image
         )
 
     def get_bbox_ids_per_image(self, object_ids, image_unique_ids):
@@ -533,12 +519,10 @@ class BoundingBoxPerClassList(BaseField):
     def process(self, bbox_ids, classes_unique_ids):
         """Processes and saves the list ids metadata to hdf5."""
         bboxes_per_class = self.get_bbox_ids_per_class(bbox_ids, classes_unique_ids)
-        self.save_field_to_hdf5(
+        self.save_lists_to_hdf5(
             set_name=self.set_name,
             field='list_boxes_per_class',
-            data=np.array(pad_list(bboxes_per_class, val=-1), dtype=np.int32),
-            dtype=np.int32,
-            fillvalue=-1
+            data=bboxes_per_class
         )
 
     def get_bbox_ids_per_class(self, bbox_ids, class_unique_ids):
@@ -559,12 +543,10 @@ class BoundingBoxvPerImageList(BaseField):
     def process(self, object_ids, image_unique_ids):
         """Processes and saves the list ids metadata to hdf5."""
         bboxesv_per_image = self.get_bboxv_ids_per_image(object_ids, image_unique_ids)
-        self.save_field_to_hdf5(
+        self.save_lists_to_hdf5(
             set_name=self.set_name,
             field='list_boxesv_per_image',
-            data=np.array(pad_list(bboxesv_per_image, val=-1), dtype=np.int32),
-            dtype=np.int32,
-            fillvalue=-1
+            data=bboxesv_per_image
         )
 
     def get_bboxv_ids_per_image(self, object_ids, image_unique_ids):
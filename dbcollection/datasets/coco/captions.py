@@ -10,12 +10,10 @@ import numpy as np
 import progressbar
 
 from dbcollection.datasets import BaseTask
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
-from dbcollection.utils.pad import pad_list
 from dbcollection.utils.file_load import load_json
-from dbcollection.utils.hdf5 import hdf5_write_data
 
 from .load_data_test import load_data_test
+from .indexes import get_index, get_coco_images_ids
 
 
 class Caption2015(BaseTask):
@@ -97,11 +95,19 @@ class Caption2015(BaseTask):
         return {set_name: [OrderedDict(sorted(data.items())),
                            annotations]}
 
+    def get_set_names(self):
+        """
+        Return the names of the sets loaded by load_data().
+        """
+        return list(self.image_dir_path)
+
     def load_data(self):
         """
         Load data of the dataset (create a generator).
         """
         for set_name in self.image_dir_path:
+            if not self.is_selected_set(set_name):
+                continue
             if self.verbose:
                 print('\n> Loading data files for the set: ' + set_name)
 
@@ -120,7 +126,6 @@ class Caption2015(BaseTask):
         """
         Saves the metadata of a set.
         """
-        hdf5_handler = self.hdf5_manager.get_group(set_name)
         image_dir = os.path.join(self.data_path, self.image_dir_path[set_name])
         if "test" in set_name:
             is_test = True
@@ -201,69 +206,42 @@ class Caption2015(BaseTask):
 
         # set coco id lists
         if self.verbose:
-            print('> Processing coco lists:')
-            prgbar = progressbar.ProgressBar(max_value=len(annotations['images']))
-
-        for i, annot in enumerate(annotations['images']):
-            fname_id = image_filenames.index(os.path.join(image_dir, annot['file_name']))
-            coco_images_ids.append(fname_id)
-
-            # update progressbar
-            if self.verbose:
-                prgbar.update(i)
+            print('> Processing coco lists...')
 
-        # update progressbar
-        if self.verbose:
-            prgbar.finish()
+        coco_images_ids = get_coco_images_ids(annotations, image_dir, get_index(image_filenames))
 
         if is_test:
             coco_categories_ids = list(range(len(category)))
 
-        hdf5_write_data(hdf5_handler, 'image_filenames',
-                        str2ascii(image_filenames), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'coco_urls',
-                        str2ascii(coco_urls), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'width',
-                        np.array(width, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'height',
-                        np.array(height, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'image_id',
-                        np.array(image_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'coco_images_ids',
-                        np.array(coco_images_ids, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_ids',
-                        np.array(object_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_fields',
-                        str2ascii(object_fields), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'list_object_ids_per_image',
-                        np.array(pad_list(list_object_ids_per_image, -1), dtype=np.int32),
-                        fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'image_filenames', image_filenames)
+        self.hdf5_manager.add_strings_to_group(set_name, 'coco_urls', coco_urls)
+        self.hdf5_manager.add_field_to_group(set_name, 'width', np.array(width, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'height', np.array(height, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'image_id',
+                                             np.array(image_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'coco_images_ids',
+                                             np.array(coco_images_ids, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'object_ids',
+                                             np.array(object_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'object_fields', object_fields)
+        self.hdf5_manager.add_list_to_group(set_name, 'list_object_ids_per_image',
+                                            list_object_ids_per_image, fillvalue=-1)
 
         if not is_test:
-            hdf5_write_data(hdf5_handler, 'captions',
-                            str2ascii(caption), dtype=np.uint8,
-                            fillvalue=0)
-            hdf5_write_data(hdf5_handler, 'list_captions_per_image',
-                            np.array(pad_list(list_captions_per_image, -1), dtype=np.int32),
-                            fillvalue=-1)
+            self.hdf5_manager.add_strings_to_group(set_name, 'captions', caption)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_captions_per_image',
+                                                list_captions_per_image, fillvalue=-1)
         else:
-            hdf5_write_data(hdf5_handler, 'category',
-                            str2ascii(category), dtype=np.uint8,
-                            fillvalue=0)
-            hdf5_write_data(hdf5_handler, 'supercategory',
-                            str2ascii(supercategory), dtype=np.uint8,
-                            fillvalue=0)
-            hdf5_write_data(hdf5_handler, 'coco_categories_ids',
-                            np.array(coco_categories_ids, dtype=np.int32),
-                            fillvalue=-1)
+            self.hdf5_manager.add_strings_to_group(set_name, 'category', category)
+            self.hdf5_manager.add_strings_to_group(set_name, 'supercategory', supercategory)
+            self.hdf5_manager.add_field_to_group(set_name, 'coco_categories_ids',
+                                                 np.array(coco_categories_ids, dtype=np.int32),
+                                                 dtype=np.int32, fillvalue=-1)
 
 
 # ---------------------------------------------------------
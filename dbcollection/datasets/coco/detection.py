@@ -11,12 +11,18 @@ import progressbar
 
 from dbcollection.datasets import BaseTask
 
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
-from dbcollection.utils.pad import pad_list, squeeze_list
+from dbcollection.utils.pad import squeeze_list
 from dbcollection.utils.file_load import load_json
-from dbcollection.utils.hdf5 import hdf5_write_data
+from dbcollection.utils.inverted_list import get_inverted_lists
 
 from .load_data_test import load_data_test
+from .indexes import (
+    get_index,
+    get_coco_images_ids,
+    get_coco_annotations_ids,
+    parse_image_annotations,
+    parse_category_annotations
+)
 
 
 class Detection2015(BaseTask):
@@ -37,50 +43,6 @@ class Detection2015(BaseTask):
         "test": os.path.join('annotations', 'image_info_test2014.json')
     }
 
-    def parse_image_annotations(self, image_dir, annotations):
-        """
-        Parse image annotations data to a dictionary and  lists
-        """
-        filename_ids = {}
-        for i, annot in enumerate(annotations['images']):
-            filename_ids[annot['file_name']] = i
-
-        # order image data by file name
-        images_annot_by_fname = {}
-        for i, annot in enumerate(annotations['images']):
-            images_annot_by_fname[annot['file_name']] = {
-                "file_name": os.path.join(image_dir, annot['file_name']),
-                "width": annot['width'],
-                "height": annot['height'],
-                "id": annot['id'],
-                "coco_url": annot['coco_url'],
-            }
-        # order image data by file id
-        images_fname_by_id = {}
-        for i, annot in enumerate(annotations['images']):
-            images_fname_by_id[annot['id']] = annot['file_name']
-
-        return filename_ids, images_annot_by_fname, images_fname_by_id
-
-    def parse_category_annotations(self, annotations):
-        """
-        Parse category annotations data to a dictionary and  lists
-        """
-        categories = {}
-        category_list, supercategory_list, category_id = [], [], []
-        for i, annot in enumerate(annotations['categories']):
-            categories[annot['id']] = {
-                "name": annot['name'],
-                "supercategory": annot['supercategory'],
-                "id": annot['id']
-            }
-            category_id.append(annot['id'])
-            category_list.append(annot['name'])
-            supercategory_list.append(annot['supercategory'])
-        supercategory_list = list(set(supercategory_list))
-
-        return categories, category_list, supercategory_list, category_id
-
     def load_data_trainval(self, set_name, image_dir, annotation_path):
         """
         Load train+val data
@@ -103,12 +65,12 @@ class Detection2015(BaseTask):
         if self.verbose:
             print('  > Processing image annotations... ')
         # get all image filenames + ids into a list
-        filename_ids, images_annot_by_fname, images_fname_by_id = self.parse_image_annotations(
+        filename_ids, images_annot_by_fname, images_fname_by_id = parse_image_annotations(
             image_dir, annotations)
 
         if self.verbose:
             print('  > Processing category annotations... ')
-        parsed_annots = self.parse_category_annotations(annotations)
+        parsed_annots = parse_category_annotations(annotations)
         categories, category_list, supercategory_list, category_id = parsed_annots
 
         if self.verbose:
@@ -170,11 +132,19 @@ class Detection2015(BaseTask):
                            filename_ids,
                            images_fname_by_id]}
 
+    def get_set_names(self):
+        """
+        Return the names of the sets loaded by load_data().
+        """
+        return list(self.image_dir_path)
+
     def load_data(self):
         """
         Load data of the dataset (create a generator).
         """
         for set_name in self.image_dir_path:
+            if not self.is_selected_set(set_name):
+                continue
             if self.verbose:
                 print('\n> Loading data files for the set: ' + set_name)
 
@@ -193,7 +163,6 @@ class Detection2015(BaseTask):
         """
         Saves the metadata of a set.
         """
-        hdf5_handler = self.hdf5_manager.get_group(set_name)
         image_dir = os.path.join(self.data_path, self.image_dir_path[set_name])
         if 'test' in set_name:
             is_test = True
@@ -220,11 +189,7 @@ class Detection2015(BaseTask):
         height = []
         image_id = []
 
-        annotation_id = []
-        area = []
         iscrowd = [0, 1]
-        segmentation = []
-        bbox = []
         object_id = []
 
         # coco id lists
@@ -243,12 +208,20 @@ class Detection2015(BaseTask):
                              "iscrowd", "segmentation",
                              "image_id", "category_id", "annotation_id"]
 
-        list_image_filenames_per_category = []
-        list_image_filenames_per_supercategory = []
         list_boxes_per_image = []
         list_object_ids_per_image = []
-        list_objects_ids_per_category = []
-        list_objects_ids_per_supercategory = []
+
+        if not is_test:
+            # the largest per-object fields are written to disk in batches while they are parsed
+            # (the annotation file and the other fields are still fully loaded into memory)
+            annotation_id = self.hdf5_manager.create_stream_writer(set_name, 'annotation_id',
+                                                                   np.int32, fillvalue=-1)
+            area = self.hdf5_manager.create_stream_writer(set_name, 'area',
+                                                          np.int32, fillvalue=-1)
+            bbox = self.hdf5_manager.create_stream_writer(set_name, 'boxes',
+                                                          np.float, fillvalue=-1)
+            segmentation = self.hdf5_manager.create_stream_writer(set_name, 'segmentation',
+                                                                  np.float, fillvalue=-1)
 
         if self.verbose:
             print('> Adding data to default group:')
@@ -256,7 +229,9 @@ class Detection2015(BaseTask):
 
         counter = 0
         segmentation_t1_counter, segmentation_t2_counter = 0, 0
-        tmp_coco_annotations_ids = {}
+        tmp_coco_annotations_ids = {}  # annotation id -> object row
+        category_ids = get_index(category)
+        supercategory_ids = get_index(supercategory)
 
         for i, fname_idx in enumerate(data_):
             # fetch annotation
@@ -291,10 +266,10 @@ class Detection2015(BaseTask):
                         # bbox, area, iscrowd, segmentation,
                         # "image_id", "category_id", "annotation_id"]
                         object_id.append([i, i, i, i,
-                                          category.index(obj["category"]), supercategory.index(
-                                              obj["supercategory"]),
+                                          category_ids[obj["category"]],
+                                          supercategory_ids[obj["supercategory"]],
                                           counter, counter, obj["iscrowd"], counter,
-                                          i, category.index(obj["category"]), counter])
+                                          i, category_ids[obj["category"]], counter])
 
                         boxes_per_image.append(counter)
 
@@ -315,170 +290,82 @@ class Detection2015(BaseTask):
         if self.verbose:
             prgbar.finish()
 
-        if self.verbose:
-            print('> Processing coco lists:')
-            prgbar = progressbar.ProgressBar(max_value=len(annotations['images']))
-
-        # set coco id lists
-        for i, annot in enumerate(annotations['images']):
-            fname_id = image_filenames.index(os.path.join(image_dir, annot['file_name']))
-            coco_images_ids.append(fname_id)
-
-            # update progressbar
-            if self.verbose:
-                prgbar.update(i)
+        if not is_test:
+            for writer in (annotation_id, area, bbox, segmentation):
+                writer.close()
 
-        # update progressbar
         if self.verbose:
-            prgbar.finish()
+            print('> Processing coco lists...')
 
+        coco_images_ids = get_coco_images_ids(annotations, image_dir, get_index(image_filenames))
         coco_categories_ids = list(range(len(category)))
 
         if not is_test:
-            if self.verbose:
-                prgbar = progressbar.ProgressBar(max_value=len(annotations['annotations']))
-            for i, annot in enumerate(annotations['annotations']):
-                annot_id = tmp_coco_annotations_ids[annot['id']]
-                coco_annotations_ids.append(annot_id)
-
-                # update progressbar
-                if self.verbose:
-                    prgbar.update(i)
-
-            # update progressbar
-            if self.verbose:
-                prgbar.finish()
+            coco_annotations_ids = get_coco_annotations_ids(annotations, tmp_coco_annotations_ids)
 
         # process lists
         if not is_test:
             if self.verbose:
                 print('> Processing lists...')
 
-            for i in range(len(category)):
-                imgs_per_category = [val[0] for _, val in enumerate(object_id) if val[4] == i]
-                imgs_per_category = list(set(imgs_per_category))  # get unique values
-                imgs_per_category.sort()
-                list_image_filenames_per_category.append(imgs_per_category)
-
-            for i in range(len(supercategory)):
-                imgs_per_supercategory = [val[0] for _, val in enumerate(object_id) if val[5] == i]
-                imgs_per_supercategory = list(set(imgs_per_supercategory))  # get unique values
-                imgs_per_supercategory.sort()
-                list_image_filenames_per_supercategory.append(imgs_per_supercategory)
-
-            for i in range(len(category)):
-                obj_per_category = [j for j, val in enumerate(object_id) if val[4] == i]
-                obj_per_category = list(set(obj_per_category))  # get unique values
-                obj_per_category.sort()
-                list_objects_ids_per_category.append(obj_per_category)
-
-            for i in range(len(supercategory)):
-                obj_per_supercategory = [j for j, val in enumerate(object_id) if val[5] == i]
-                obj_per_supercategory = list(set(obj_per_supercategory))  # get unique values
-                obj_per_supercategory.sort()
-                list_objects_ids_per_supercategory.append(obj_per_supercategory)
+            objects = np.array(object_id, dtype=np.int32).reshape(-1, len(object_fields))
+            list_image_filenames_per_category = get_inverted_lists(objects[:, 4], len(category),
+                                                                   values=objects[:, 0])
+            list_image_filenames_per_supercategory = get_inverted_lists(objects[:, 5], len(supercategory),
+                                                                        values=objects[:, 0])
+            list_objects_ids_per_category = get_inverted_lists(objects[:, 4], len(category))
+            list_objects_ids_per_supercategory = get_inverted_lists(objects[:, 5], len(supercategory))
 
             if self.verbose:
                 print('> Done.')
 
-        hdf5_write_data(hdf5_handler, 'image_filenames',
-                        str2ascii(image_filenames), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'coco_urls',
-                        str2ascii(coco_urls), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'width',
-                        np.array(width, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'height',
-                        np.array(height, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'category',
-                        str2ascii(category), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'supercategory',
-                        str2ascii(supercategory), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'image_id',
-                        np.array(image_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'category_id',
-                        np.array(category_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_ids',
-                        np.array(object_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_fields',
-                        str2ascii(object_fields), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'coco_images_ids',
-                        np.array(coco_images_ids, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'coco_categories_ids',
-                        np.array(coco_categories_ids, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'list_object_ids_per_image',
-                        np.array(pad_list(list_object_ids_per_image, -1), dtype=np.int32),
-                        fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'image_filenames', image_filenames)
+        self.hdf5_manager.add_strings_to_group(set_name, 'coco_urls', coco_urls)
+        self.hdf5_manager.add_field_to_group(set_name, 'width', np.array(width, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'height', np.array(height, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'category', category)
+        self.hdf5_manager.add_strings_to_group(set_name, 'supercategory', supercategory)
+        self.hdf5_manager.add_field_to_group(set_name, 'image_id',
+                                             np.array(image_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'category_id',
+                                             np.array(category_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'object_ids',
+                                             np.array(object_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'object_fields', object_fields)
+        self.hdf5_manager.add_field_to_group(set_name, 'coco_images_ids',
+                                             np.array(coco_images_ids, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'coco_categories_ids',
+                                             np.array(coco_categories_ids, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_list_to_group(set_name, 'list_object_ids_per_image',
+                                            list_object_ids_per_image, fillvalue=-1)
 
         if not is_test:
-            hdf5_write_data(hdf5_handler, 'annotation_id',
-                            np.array(annotation_id, dtype=np.int32),
-                            fillvalue=-1)
-            hdf5_write_data(hdf5_handler, 'boxes',
-                            np.array(bbox, dtype=np.float),
-                            fillvalue=-1)
-            hdf5_write_data(hdf5_handler, 'iscrowd',
-                            np.array(iscrowd, dtype=np.uint8),
-                            fillvalue=0)
-
-            nrows = len(segmentation)
-            ncols = max([len(elem) for elem in segmentation])
-            dset = hdf5_handler.create_dataset('segmentation',
-                                               (nrows, ncols),
-                                               dtype=np.float,
-                                               chunks=True,
-                                               compression="gzip",
-                                               compression_opts=4,
-                                               fillvalue=-1)
-            if self.verbose:
-                print('   -- Saving segmentation masks to disk (this will take some time)')
-                prgbar = progressbar.ProgressBar(max_value=nrows)
-            for i in range(nrows):
-                dset[i, :len(segmentation[i])] = np.array(segmentation[i], dtype=np.float)
-                if self.verbose:
-                    prgbar.update(i)
-
-            if self.verbose:
-                prgbar.finish()
+            self.hdf5_manager.add_field_to_group(set_name, 'iscrowd',
+                                                 np.array(iscrowd, dtype=np.uint8),
+                                                 dtype=np.uint8, fillvalue=0)
 
-            hdf5_write_data(hdf5_handler, 'area',
-                            np.array(area, dtype=np.int32),
-                            fillvalue=-1)
-            hdf5_write_data(hdf5_handler, 'coco_annotations_ids',
-                            np.array(coco_annotations_ids, dtype=np.int32),
-                            fillvalue=-1)
+            self.hdf5_manager.add_field_to_group(set_name, 'coco_annotations_ids',
+                                                 np.array(coco_annotations_ids, dtype=np.int32),
+                                                 dtype=np.int32, fillvalue=-1)
 
             pad_value = -1
-            hdf5_write_data(hdf5_handler, 'list_image_filenames_per_category',
-                            np.array(pad_list(list_image_filenames_per_category,
-                                              pad_value), dtype=np.int32),
-                            fillvalue=pad_value)
-            hdf5_write_data(hdf5_handler, 'list_image_filenames_per_supercategory',
-                            np.array(pad_list(list_image_filenames_per_supercategory,
-                                              pad_value), dtype=np.int32),
-                            fillvalue=pad_value)
-            hdf5_write_data(hdf5_handler, 'list_boxes_per_image',
-                            np.array(pad_list(list_boxes_per_image, pad_value), dtype=np.int32),
-                            fillvalue=pad_value)
-            hdf5_write_data(hdf5_handler, 'list_objects_ids_per_category',
-                            np.array(pad_list(list_objects_ids_per_category,
-                                              pad_value), dtype=np.int32),
-                            fillvalue=pad_value)
-            hdf5_write_data(hdf5_handler, 'list_objects_ids_per_supercategory',
-                            np.array(pad_list(list_objects_ids_per_supercategory,
-                                              pad_value), dtype=np.int32),
-                            fillvalue=pad_value)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_image_filenames_per_category',
+                                                list_image_filenames_per_category, fillvalue=pad_value)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_image_filenames_per_supercategory',
+                                                list_image_filenames_per_supercategory, fillvalue=pad_value)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_boxes_per_image',
+                                                list_boxes_per_image, fillvalue=pad_value)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_objects_ids_per_category',
+                                                list_objects_ids_per_category, fillvalue=pad_value)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_objects_ids_per_supercategory',
+                                                list_objects_ids_per_supercategory, fillvalue=pad_value)
 
 
 # ---------------------------------------------------------
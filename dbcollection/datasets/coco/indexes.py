@@ -0,0 +1,136 @@
+"""
+Hash-map indexes (filename/annotation id/category -> row) shared by the COCO tasks.
+"""
+
+
+import os
+
+
+def get_index(values):
+    """Maps the values of a list to their row (first occurrence, like list.index()).
+
+    Parameters
+    ----------
+    values : list
+        List of (hashable) values.
+
+    Returns
+    -------
+    dict
+        Row of each value in the list.
+
+    """
+    index = {}
+    for row, value in enumerate(values):
+        index.setdefault(value, row)
+    return index
+
+
+def get_coco_images_ids(annotations, image_dir, filename_index):
+    """Returns the rows of the images in the order of the annotation file.
+
+    Parameters
+    ----------
+    annotations : dict
+        Data of the COCO annotation file.
+    image_dir : str
+        Path of the set's images directory.
+    filename_index : dict
+        Row of each image file name (+ path).
+
+    Returns
+    -------
+    list
+        Row of each image of the annotation file.
+
+    """
+    return [filename_index[os.path.join(image_dir, annot['file_name'])]
+            for annot in annotations['images']]
+
+
+def get_coco_annotations_ids(annotations, annotation_index):
+    """Returns the rows of the objects in the order of the annotation file.
+
+    Parameters
+    ----------
+    annotations : dict
+        Data of the COCO annotation file.
+    annotation_index : dict
+        Row of each annotation id.
+
+    Returns
+    -------
+    list
+        Row of each annotation (object) of the annotation file.
+
+    """
+    return [annotation_index[annot['id']] for annot in annotations['annotations']]
+
+
+def parse_image_annotations(image_dir, annotations):
+    """Indexes the images of an annotation file by file name and by id.
+
+    Parameters
+    ----------
+    image_dir : str
+        Path of the set's images directory.
+    annotations : dict
+        Data of the COCO annotation file.
+
+    Returns
+    -------
+    dict
+        Row of each image file name in the annotation file.
+    dict
+        Data (file name + path, size, id and url) of each image file name.
+    dict
+        File name of each image id.
+
+    """
+    filename_ids, images_annot_by_fname, images_fname_by_id = {}, {}, {}
+    for i, annot in enumerate(annotations['images']):
+        filename_ids[annot['file_name']] = i
+        images_annot_by_fname[annot['file_name']] = {
+            "file_name": os.path.join(image_dir, annot['file_name']),
+            "width": annot['width'],
+            "height": annot['height'],
+            "id": annot['id'],
+            "coco_url": annot['coco_url'],
+        }
+        images_fname_by_id[annot['id']] = annot['file_name']
+    return filename_ids, images_annot_by_fname, images_fname_by_id
+
+
+def parse_category_annotations(annotations):
+    """Indexes the categories of an annotation file by id.
+
+    Parameters
+    ----------
+    annotations : dict
+        Data of the COCO annotation file.
+
+    Returns
+    -------
+    dict
+        Data (name, supercategory and id) of each category id.
+    list
+        Names of the categories.
+    list
+        Names of the supercategories.
+    list
+        Ids of the categories.
+
+    """
+    categories = {}
+    category_list, supercategory_list, category_id = [], [], []
+    for annot in annotations['categories']:
+        categories[annot['id']] = {
+            "name": annot['name'],
+            "supercategory": annot['supercategory'],
+            "id": annot['id']
+        }
+        category_id.append(annot['id'])
+        category_list.append(annot['name'])
+        supercategory_list.append(annot['supercategory'])
+    supercategory_list = list(set(supercategory_list))
+    return categories, category_list, supercategory_list, category_id
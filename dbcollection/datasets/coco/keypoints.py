@@ -10,12 +10,18 @@ import numpy as np
 import progressbar
 
 from dbcollection.datasets import BaseTask
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
 from dbcollection.utils.pad import pad_list, squeeze_list
 from dbcollection.utils.file_load import load_json
-from dbcollection.utils.hdf5 import hdf5_write_data
+from dbcollection.utils.inverted_list import get_inverted_lists
 
 from .load_data_test import load_data_test
+from .indexes import (
+    get_index,
+    get_coco_images_ids,
+    get_coco_annotations_ids,
+    parse_image_annotations,
+    parse_category_annotations
+)
 
 
 class Keypoints2016(BaseTask):
@@ -60,51 +66,6 @@ class Keypoints2016(BaseTask):
         'right_ankle'  # -- 17
     }
 
-    def parse_image_annotations(self, image_dir, annotations):
-        """
-        Parse image annotations data to a dictionary and  lists
-        """
-        filename_ids = {}
-        for i, annot in enumerate(annotations['images']):
-            filename_ids[annot['file_name']] = i
-
-        # order image data by file name
-        images_annot_by_fname = {}
-        for i, annot in enumerate(annotations['images']):
-            images_annot_by_fname[annot['file_name']] = {
-                "file_name": os.path.join(image_dir, annot['file_name']),
-                "width": annot['width'],
-                "height": annot['height'],
-                "id": annot['id'],
-                "coco_url": annot['coco_url'],
-            }
-
-        # order image data by file id
-        images_fname_by_id = {}
-        for i, annot in enumerate(annotations['images']):
-            images_fname_by_id[annot['id']] = annot['file_name']
-
-        return filename_ids, images_annot_by_fname, images_fname_by_id
-
-    def parse_category_annotations(self, annotations):
-        """
-        Parse category annotations data to a dictionary and  lists
-        """
-        categories = {}
-        category_list, supercategory_list, category_id = [], [], []
-        for i, annot in enumerate(annotations['categories']):
-            categories[annot['id']] = {
-                "name": annot['name'],
-                "supercategory": annot['supercategory'],
-                "id": annot['id']
-            }
-            category_id.append(annot['id'])
-            category_list.append(annot['name'])
-            supercategory_list.append(annot['supercategory'])
-        supercategory_list = list(set(supercategory_list))
-
-        return categories, category_list, supercategory_list, category_id
-
     def load_data_trainval(self, set_name, image_dir, annotation_path):
         """
         Load train+val data
@@ -125,12 +86,12 @@ class Keypoints2016(BaseTask):
         if self.verbose:
             print('  > Processing image annotations... ')
         # get all image filenames + ids into a list
-        filename_ids, images_annot_by_fname, images_fname_by_id = self.parse_image_annotations(
+        filename_ids, images_annot_by_fname, images_fname_by_id = parse_image_annotations(
             image_dir, annotations)
 
         if self.verbose:
             print('  > Processing category annotations... ')
-        parsed_annots = self.parse_category_annotations(annotations)
+        parsed_annots = parse_category_annotations(annotations)
         categories, category_list, supercategory_list, category_id = parsed_annots
         skeleton = annotations['categories'][0]['skeleton']
         keypoints = annotations['categories'][0]['keypoints']
@@ -199,11 +160,19 @@ class Keypoints2016(BaseTask):
                            skeleton,
                            keypoints]}
 
+    def get_set_names(self):
+        """
+        Return the names of the sets loaded by load_data().
+        """
+        return list(self.image_dir_path)
+
     def load_data(self):
         """
         Load data of the dataset (create a generator).
         """
         for set_name in self.image_dir_path:
+            if not self.is_selected_set(set_name):
+                continue
             if self.verbose:
                 print('\n> Loading data files for the set: ' + set_name)
 
@@ -222,7 +191,6 @@ class Keypoints2016(BaseTask):
         """
         Saves the metadata of a set.
         """
-        hdf5_handler = self.hdf5_manager.get_group(set_name)
         image_dir = os.path.join(self.data_path, self.image_dir_path[set_name])
         if 'test' in set_name:
             is_test = True
@@ -245,25 +213,16 @@ class Keypoints2016(BaseTask):
             skeleton = data[8]
             keypoints = data[9]
 
-            keypoints_ = str2ascii(keypoints)
             skeleton_ = np.array(pad_list(skeleton, -1), dtype=np.uint8)
 
-        category_ = str2ascii(category)
-        supercategory_ = str2ascii(supercategory)
-
         image_filenames = []
         coco_urls = []
         width = []
         height = []
         image_id = []
 
-        annotation_id = []
-        area = []
         iscrowd = [0, 1]
-        segmentation = []
         num_keypoints = list(range(0, 17 + 1))
-        keypoints_list = []
-        bbox = []
         object_id = []
 
         # coco id lists
@@ -286,15 +245,30 @@ class Keypoints2016(BaseTask):
         list_boxes_per_image = []
         list_keypoints_per_image = []
         list_object_ids_per_image = []
-        list_image_filenames_per_num_keypoints = []
-        list_object_ids_per_keypoint = []  # body part
+
+        if not is_test:
+            # the largest per-object fields are written to disk in batches while they are parsed
+            # (the annotation file and the other fields are still fully loaded into memory)
+            annotation_id = self.hdf5_manager.create_stream_writer(set_name, 'annotation_id',
+                                                                   np.int32, fillvalue=-1)
+            area = self.hdf5_manager.create_stream_writer(set_name, 'area',
+                                                          np.int32, fillvalue=-1)
+            bbox = self.hdf5_manager.create_stream_writer(set_name, 'boxes',
+                                                          np.float, fillvalue=-1)
+            segmentation = self.hdf5_manager.create_stream_writer(set_name, 'segmentation',
+                                                                  np.float, fillvalue=-1)
+            keypoints_list = self.hdf5_manager.create_stream_writer(set_name, 'keypoints',
+                                                                    np.int32, fillvalue=0)
 
         if self.verbose:
             print('> Adding data to default group:')
             prgbar = progressbar.ProgressBar(max_value=len(data_))
 
         counter = 0
-        tmp_coco_annotations_ids = {}
+        tmp_coco_annotations_ids = {}  # annotation id -> object row
+        labeled_objs_ids, labeled_keypoints_ids = [], []  # objects with a labeled (x or y > 0) keypoint
+        category_ids = get_index(category)
+        supercategory_ids = get_index(supercategory)
 
         for i, key in enumerate(data_):
             annotation = data_[key]
@@ -320,6 +294,10 @@ class Keypoints2016(BaseTask):
                         annotation_id.append(obj["id"])
                         segmentation.append(obj["segmentation"])
                         keypoints_list.append(obj["keypoints"])
+                        for k in range(len(obj["keypoints"]) // 3):
+                            if obj["keypoints"][3 * k] > 0 or obj["keypoints"][3 * k + 1] > 0:
+                                labeled_objs_ids.append(counter)
+                                labeled_keypoints_ids.append(k)
 
                         # *** object_id ***
                         # [filename, coco_url, width, height,
@@ -328,10 +306,10 @@ class Keypoints2016(BaseTask):
                         # "image_id", "category_id", "annotation_id"
                         # "num_keypoints", "keypoints"]
                         object_id.append([i, i, i, i,
-                                          category.index(obj["category"]), supercategory.index(
-                                              obj["supercategory"]),
+                                          category_ids[obj["category"]],
+                                          supercategory_ids[obj["supercategory"]],
                                           counter, counter, obj["iscrowd"], counter,
-                                          i, category.index(obj["category"]), counter,
+                                          i, category_ids[obj["category"]], counter,
                                           obj["num_keypoints"], counter])
 
                         boxes_per_image.append(counter)
@@ -354,161 +332,78 @@ class Keypoints2016(BaseTask):
         if self.verbose:
             prgbar.finish()
 
-        if self.verbose:
-            print('> Processing coco lists:')
-            prgbar = progressbar.ProgressBar(max_value=len(annotations['images']))
-
-        # set coco id lists
-        for i, annot in enumerate(annotations['images']):
-            fname_id = image_filenames.index(os.path.join(image_dir, annot['file_name']))
-            coco_images_ids.append(fname_id)
-
-            # update progressbar
-            if self.verbose:
-                prgbar.update(i)
+        if not is_test:
+            for writer in (annotation_id, area, bbox, segmentation, keypoints_list):
+                writer.close()
 
-        # update progressbar
         if self.verbose:
-            prgbar.finish()
+            print('> Processing coco lists...')
 
+        coco_images_ids = get_coco_images_ids(annotations, image_dir, get_index(image_filenames))
         coco_categories_ids = list(range(len(category)))
 
         if not is_test:
-            if self.verbose:
-                prgbar = progressbar.ProgressBar(max_value=len(annotations['annotations']))
-            for i, annot in enumerate(annotations['annotations']):
-                annot_id = tmp_coco_annotations_ids[annot['id']]
-                coco_annotations_ids.append(annot_id)
-
-                # update progressbar
-                if self.verbose:
-                    prgbar.update(i)
-
-            # update progressbar
-            if self.verbose:
-                prgbar.finish()
+            coco_annotations_ids = get_coco_annotations_ids(annotations, tmp_coco_annotations_ids)
 
         # process lists
         if not is_test:
             if self.verbose:
                 print('> Processing lists...')
 
-            for i in range(len(keypoints)):
-                imgs_per_num = [val[0] for _, val in enumerate(object_id) if val[8] == i]
-                imgs_per_num = list(set(imgs_per_num))  # get unique values
-                imgs_per_num.sort()
-                list_image_filenames_per_num_keypoints.append(imgs_per_num)
-
-            for i in range(len(keypoints)):
-                objs_per_keypoint = [j for j, val in enumerate(
-                    keypoints_list) if val[i * 3] > 0 or val[i * 3 + 1] > 0]
-                objs_per_keypoint = list(set(objs_per_keypoint))  # get unique values
-                objs_per_keypoint.sort()
-                list_object_ids_per_keypoint.append(objs_per_keypoint)
-
-        hdf5_write_data(hdf5_handler, 'image_filenames',
-                        str2ascii(image_filenames), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'coco_urls',
-                        str2ascii(coco_urls), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'width',
-                        np.array(width, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'height',
-                        np.array(height, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'category',
-                        category_, dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'supercategory',
-                        supercategory_, dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'image_id',
-                        np.array(image_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'category_id',
-                        np.array(category_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_ids',
-                        np.array(object_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_fields',
-                        str2ascii(object_fields), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'coco_images_ids',
-                        np.array(coco_images_ids, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'coco_categories_ids',
-                        np.array(coco_categories_ids, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'list_object_ids_per_image',
-                        np.array(pad_list(list_object_ids_per_image, -1), dtype=np.int32),
-                        fillvalue=-1)
+            objects = np.array(object_id, dtype=np.int32).reshape(-1, len(object_fields))
+            list_image_filenames_per_num_keypoints = get_inverted_lists(objects[:, 8], len(keypoints),
+                                                                        values=objects[:, 0])
+            list_object_ids_per_keypoint = get_inverted_lists(labeled_keypoints_ids, len(keypoints),
+                                                              values=labeled_objs_ids)
+
+        self.hdf5_manager.add_strings_to_group(set_name, 'image_filenames', image_filenames)
+        self.hdf5_manager.add_strings_to_group(set_name, 'coco_urls', coco_urls)
+        self.hdf5_manager.add_field_to_group(set_name, 'width', np.array(width, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'height', np.array(height, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'category', category)
+        self.hdf5_manager.add_strings_to_group(set_name, 'supercategory', supercategory)
+        self.hdf5_manager.add_field_to_group(set_name, 'image_id',
+                                             np.array(image_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'category_id',
+                                             np.array(category_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'object_ids',
+                                             np.array(object_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'object_fields', object_fields)
+        self.hdf5_manager.add_field_to_group(set_name, 'coco_images_ids',
+                                             np.array(coco_images_ids, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'coco_categories_ids',
+                                             np.array(coco_categories_ids, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_list_to_group(set_name, 'list_object_ids_per_image',
+                                            list_object_ids_per_image, fillvalue=-1)
 
         if not is_test:
-            hdf5_write_data(hdf5_handler, 'annotation_id',
-                            np.array(annotation_id, dtype=np.int32),
-                            fillvalue=-1)
-            hdf5_write_data(hdf5_handler, 'keypoint_names',
-                            keypoints_, dtype=np.uint8,
-                            fillvalue=0)
-            hdf5_write_data(hdf5_handler, 'skeleton',
-                            skeleton_, dtype=np.uint8,
-                            fillvalue=0)
-            hdf5_write_data(hdf5_handler, 'boxes',
-                            np.array(bbox, dtype=np.float),
-                            fillvalue=-1)
-            hdf5_write_data(hdf5_handler, 'iscrowd',
-                            np.array(iscrowd, dtype=np.uint8),
-                            fillvalue=-1)
-
-            nrows = len(segmentation)
-            ncols = max([len(elem) for elem in segmentation])
-            dset = hdf5_handler.create_dataset('segmentation',
-                                               (nrows, ncols),
-                                               dtype=np.float,
-                                               chunks=True,
-                                               compression="gzip",
-                                               compression_opts=4,
-                                               fillvalue=-1)
-
-            if self.verbose:
-                print('   -- Saving segmentation masks to disk (this will take some time)')
-                prgbar = progressbar.ProgressBar(max_value=nrows)
-            for i in range(nrows):
-                dset[i, :len(segmentation[i])] = np.array(segmentation[i], dtype=np.float)
-                if self.verbose:
-                    prgbar.update(i)
-
-            if self.verbose:
-                prgbar.finish()
-
-            hdf5_write_data(hdf5_handler, 'area',
-                            np.array(area, dtype=np.int32),
-                            fillvalue=-1)
-            hdf5_write_data(hdf5_handler, 'num_keypoints',
-                            np.array(num_keypoints, dtype=np.uint8),
-                            fillvalue=0)
-            hdf5_write_data(hdf5_handler, 'keypoints',
-                            np.array(keypoints_list, dtype=np.int32),
-                            fillvalue=0)
-            hdf5_write_data(hdf5_handler, 'coco_annotations_ids',
-                            np.array(coco_annotations_ids, dtype=np.int32),
-                            fillvalue=-1)
+            self.hdf5_manager.add_strings_to_group(set_name, 'keypoint_names', keypoints)
+            self.hdf5_manager.add_field_to_group(set_name, 'skeleton', skeleton_,
+                                                 dtype=np.uint8, fillvalue=0)
+            self.hdf5_manager.add_field_to_group(set_name, 'iscrowd',
+                                                 np.array(iscrowd, dtype=np.uint8),
+                                                 dtype=np.uint8, fillvalue=-1)
+
+            self.hdf5_manager.add_field_to_group(set_name, 'num_keypoints',
+                                                 np.array(num_keypoints, dtype=np.uint8),
+                                                 dtype=np.uint8, fillvalue=0)
+            self.hdf5_manager.add_field_to_group(set_name, 'coco_annotations_ids',
+                                                 np.array(coco_annotations_ids, dtype=np.int32),
+                                                 dtype=np.int32, fillvalue=-1)
 
             pad_value = -1
-            hdf5_write_data(hdf5_handler, 'list_boxes_per_image',
-                            np.array(pad_list(list_boxes_per_image, pad_value), dtype=np.int32),
-                            fillvalue=pad_value)
-            hdf5_write_data(hdf5_handler, 'list_keypoints_per_image',
-                            np.array(pad_list(list_keypoints_per_image, pad_value), dtype=np.int32),
-                            fillvalue=pad_value)
-            hdf5_write_data(hdf5_handler, 'list_image_filenames_per_num_keypoints',
-                            np.array(pad_list(list_image_filenames_per_num_keypoints,
-                                              pad_value), dtype=np.int32),
-                            fillvalue=pad_value)
-            hdf5_write_data(hdf5_handler, 'list_object_ids_per_keypoint',
-                            np.array(pad_list(list_object_ids_per_keypoint,
-                                              pad_value), dtype=np.int32),
-                            fillvalue=pad_value)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_boxes_per_image',
+                                                list_boxes_per_image, fillvalue=pad_value)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_keypoints_per_image',
+                                                list_keypoints_per_image, fillvalue=pad_value)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_image_filenames_per_num_keypoints',
+                                                list_image_filenames_per_num_keypoints, fillvalue=pad_value)
+            self.hdf5_manager.add_list_to_group(set_name, 'list_object_ids_per_keypoint',
+                                                list_object_ids_per_keypoint, fillvalue=pad_value)
@@ -9,9 +9,7 @@ import numpy as np
 import progressbar
 
 from dbcollection.datasets import BaseTask
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
 from dbcollection.utils.file_load import load_matlab
-from dbcollection.utils.hdf5 import hdf5_write_data
 
 
 class Keypoints(BaseTask):
@@ -101,7 +99,6 @@ class Keypoints(BaseTask):
         """
         Saves the metadata of a set.
         """
-        hdf5_handler = self.hdf5_manager.get_group(set_name)
         image_filenames = []
         width = []
         height = []
@@ -135,30 +132,20 @@ class Keypoints(BaseTask):
         if self.verbose:
             prgbar.finish()
 
-        hdf5_write_data(hdf5_handler, 'image_filenames',
-                        str2ascii(image_filenames), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'movienames',
-                        str2ascii(movienames),
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'width',
-                        np.array(width, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'height',
-                        np.array(height, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'torso_boxes',
-                        np.array(torso_boxes, dtype=np.float).squeeze(),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'keypoints',
-                        np.array(keypoints, dtype=np.float),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'keypoint_names',
-                        str2ascii(self.keypoints_labels),
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'object_fields',
-                        str2ascii(object_fields),
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'object_ids',
-                        np.array(object_id, dtype=np.int32),
-                        fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'image_filenames', image_filenames)
+        self.hdf5_manager.add_strings_to_group(set_name, 'movienames', movienames)
+        self.hdf5_manager.add_field_to_group(set_name, 'width', np.array(width, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'height', np.array(height, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'torso_boxes',
+                                             np.array(torso_boxes, dtype=np.float).squeeze(),
+                                             dtype=np.float, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'keypoints',
+                                             np.array(keypoints, dtype=np.float),
+                                             dtype=np.float, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'keypoint_names', self.keypoints_labels)
+        self.hdf5_manager.add_strings_to_group(set_name, 'object_fields', object_fields)
+        self.hdf5_manager.add_field_to_group(set_name, 'object_ids',
+                                             np.array(object_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
@@ -5,17 +5,16 @@ ImageNet ILSVRC 2012 classification process functions.
 
 from __future__ import print_function, division
 import os
+import time
+import multiprocessing
 import numpy as np
-import PIL
 from PIL import Image
 import progressbar
 
 from dbcollection.datasets import BaseTask
 from dbcollection.utils.file_load import load_txt, load_matlab
 from dbcollection.utils.os_dir import construct_set_from_dir, dir_get_size
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
 from dbcollection.utils.pad import pad_list
-from dbcollection.utils.hdf5 import hdf5_write_data
 
 
 class Classification(BaseTask):
@@ -188,19 +187,15 @@ class Classification(BaseTask):
         classes.sort()
         label_list = [annotations[cname]['label'] for _, cname in enumerate(classes)]
         description_list = [annotations[cname]['description'] for _, cname in enumerate(classes)]
-        object_ids = []
         filenames = []
         list_image_filenames_per_class = []
 
         # cycle all classes
-        count_fname = 0
-        for class_id, cname in enumerate(classes):
+        for cname in classes:
             range_ini = len(filenames)
 
             for filename in data[cname]:
                 filenames.append(os.path.join(self.data_path, set_name, cname, filename))
-                object_ids.append([count_fname, class_id])
-                count_fname += 1
 
             # organize filenames by class id
             list_image_filenames_per_class.append(list(range(range_ini, len(filenames))))
@@ -209,42 +204,88 @@ class Classification(BaseTask):
         list_image_filenames_per_class = pad_list(list_image_filenames_per_class, -1)
 
         return {
-            "classes": str2ascii(classes),
-            "labels": str2ascii(label_list),
-            "image_filenames": str2ascii(filenames),
-            "descriptions": str2ascii(description_list),
-            "object_fields": str2ascii(['image_filenames', 'classes']),
-            "object_ids": np.array(object_ids, dtype=np.int32),
+            "classes": classes,
+            "labels": label_list,
+            "image_filenames": filenames,
+            "descriptions": description_list,
+            "object_fields": ['image_filenames', 'classes'],
+            "object_ids": self.get_object_ids(data, classes),
             "list_image_filenames_per_class": np.array(list_image_filenames_per_class,
                                                        dtype=np.int32)
         }
 
+    def get_object_ids(self, data, classes):
+        """
+        Yields the (filename id, class id) of each image, in the order of the filenames.
+        """
+        count_fname = 0
+        for class_id, cname in enumerate(classes):
+            for _ in data[cname]:
+                yield [count_fname, class_id]
+                count_fname += 1
+
     def process_set_metadata(self, data, set_name):
         """
         Saves the metadata of a set.
         """
-        hdf5_handler = self.hdf5_manager.get_group(set_name)
         data_array = self.convert_data_to_arrays(data, set_name)
-        hdf5_write_data(hdf5_handler, 'image_filenames',
-                        data_array["image_filenames"], dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'classes', data_array["classes"], dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'labels', data_array["labels"], dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'descriptions',
-                        data_array["descriptions"], dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'object_ids',
-                        data_array["object_ids"], dtype=np.int32, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_fields',
-                        data_array["object_fields"], dtype=np.uint8, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'list_image_filenames_per_class',
-                        data_array["list_image_filenames_per_class"], dtype=np.int32, fillvalue=-1)
+        for field in ('image_filenames', 'classes', 'labels', 'descriptions', 'object_fields'):
+            self.hdf5_manager.add_strings_to_group(set_name, field, data_array[field])
+        self.hdf5_manager.add_rows_to_group(set_name, 'object_ids', data_array["object_ids"],
+                                            dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_image_filenames_per_class',
+                                             data_array["list_image_filenames_per_class"],
+                                             dtype=np.int32, fillvalue=-1)
 
 
 # ---------------------------------------------------------
 #  Resized images to 256px
 # ---------------------------------------------------------
 
+def resize_image(job):
+    """Resizes an image so that its shortest side has a given size and saves it.
+
+    JPEG images are decoded at the smallest reduced scale (PIL's draft mode)
+    larger than the output size before being resized with a Lanczos filter.
+
+    Parameters
+    ----------
+    job : tuple
+        File name + path of the image, file name + path of the resized image
+        and size of the shortest side of the resized image.
+
+    Returns
+    -------
+    str
+        File name + path of the resized image.
+    int
+        Process id of the worker.
+    float
+        Time (in seconds) spent resizing the image.
+
+    """
+    img_filename, new_img_filename, base_size = job
+    start = time.time()
+    img = Image.open(img_filename)
+    width, height = img.size
+    if width > height:
+        new_size = (int(width * base_size / height), base_size)
+    else:
+        new_size = (base_size, int(height * base_size / width))
+    img.draft(img.mode, new_size)
+    img = img.resize(new_size, Image.LANCZOS)
+    img.save(new_img_filename)
+    return new_img_filename, os.getpid(), time.time() - start
+
+
 class Raw256(Classification):
-    """ImageNet ILSVRC 2012 Classification raw256 preprocessing functions."""
+    """ImageNet ILSVRC 2012 Classification raw256 preprocessing functions.
+
+    The images are resized by a pool of 'resize_workers' processes (unlike
+    'workers', which sets the number of processes used to process the sets).
+    The resized images are recorded in a manifest file in the new directories,
+    so an interrupted run resumes resizing the remaining images.
+    """
 
     # metadata filename
     filename_h5 = 'raw256'
@@ -255,57 +296,91 @@ class Raw256(Classification):
     dirnames_train = ['ILSVRC2012_img_train', 'train']
     dirnames_val = ['ILSVRC2012_img_val', 'val']
 
+    base_size = 256  # size of the shortest side of the resized images
+    manifest_filename = 'resize_manifest.txt'  # resized images of a directory
+    resize_workers = multiprocessing.cpu_count()  # number of processes used to resize images
+    manifest_flush_interval = 1.0  # seconds between writes of the manifest to disk
+
+    def load_manifest(self, new_data_dir):
+        """Returns the file names (relative to the new directory) of the resized images."""
+        manifest_filename = os.path.join(new_data_dir, self.manifest_filename)
+        if not os.path.exists(manifest_filename):
+            return set()
+        with open(manifest_filename, 'r') as f:
+            return set(line.rstrip('\n') for line in f)
+
+    def get_resize_jobs(self, new_data_dir, data_dir):
+        """Returns the (image, resized image, size) jobs of the images not resized yet."""
+        data_dir_ = self.get_dir_path(data_dir)
+        data = construct_set_from_dir(data_dir_, self.verbose)
+        resized = self.load_manifest(new_data_dir)
+        jobs = []
+        for cname in sorted(data):
+            save_dir = os.path.join(new_data_dir, cname)
+            if not os.path.exists(save_dir):
+                os.makedirs(save_dir)
+            for fname in data[cname]:
+                if os.path.join(cname, fname) in resized:
+                    continue
+                jobs.append((os.path.join(data_dir_, cname, fname),
+                             os.path.join(save_dir, fname),
+                             self.base_size))
+        return jobs, len(resized)
+
     def dir_resize_images(self, new_data_dir, data_dir):
         """
         Resize all images from the dir.
-        """
-        # fetch all files and folders of the original folder
-        data_dir_ = self.get_dir_path(data_dir)
-        data = construct_set_from_dir(data_dir_, self.verbose)
 
-        base_size = 256
+        The resized images are recorded in a manifest (written to disk at
+        least once every 'manifest_flush_interval' seconds), so an
+        interrupted run resumes from the images already resized. On an
+        error or interruption, the queued images are discarded.
+        """
+        jobs, num_resized = self.get_resize_jobs(new_data_dir, data_dir)
+        if self.verbose and num_resized > 0:
+            print(' > Resuming: {} images already resized'.format(num_resized))
+        if not jobs:
+            return
 
         # progress bar
         if self.verbose:
-            progbar = progressbar.ProgressBar(max_value=len(data)).start()
-            counter = 0
-
-        # cycle all folders and files + resize images + store to the new directory
-        for cname in data:
-            for fname in data[cname]:
-                save_dir = os.path.join(new_data_dir, cname)
-                if not os.path.exists(save_dir):
-                    os.makedirs(save_dir)
-
-                img_filename = os.path.join(data_dir_, cname, fname)
-                new_img_filename = os.path.join(save_dir, fname)
-
-                # load img
-                img = Image.open(img_filename)
-
-                # resize img
-                height, width = img.size[0], img.size[1]
-                if height > width:
-                    wsize = 256
-                    hsize = int(height * 256 / width)
-                else:
-                    hsize = 256
-                    wsize = int(width * 256 / height)
-
-                img = img.resize((hsize, wsize), PIL.Image.ANTIALIAS)
-
-                # save img
-                img.save(new_img_filename)
-
-            # update progress bar
-            if self.verbose:
-                counter += 1
-                progbar.update(counter)
+            progbar = progressbar.ProgressBar(max_value=len(jobs)).start()
+
+        workers_stats = {}
+        manifest_filename = os.path.join(new_data_dir, self.manifest_filename)
+        pool = multiprocessing.Pool(processes=max(1, min(self.resize_workers, len(jobs))))
+        try:
+            with open(manifest_filename, 'a') as manifest:
+                last_flush = time.time()
+                results = pool.imap_unordered(resize_image, jobs, chunksize=64)
+                for i, (new_img_filename, pid, elapsed) in enumerate(results):
+                    manifest.write(os.path.relpath(new_img_filename, new_data_dir) + '\n')
+                    count, total_time = workers_stats.get(pid, (0, 0.0))
+                    workers_stats[pid] = (count + 1, total_time + elapsed)
+                    if time.time() - last_flush >= self.manifest_flush_interval:
+                        manifest.flush()
+                        last_flush = time.time()
+                        if self.verbose:
+                            progbar.update(i + 1)
+        except BaseException:
+            # do not wait for the queued images (e.g., after Ctrl-C)
+            pool.terminate()
+            pool.join()
+            raise
+        pool.close()
+        pool.join()
 
         # force progressbar to 100%
         if self.verbose:
             progbar.finish()
-            print('')
+            self.print_workers_throughput(workers_stats)
+
+    def print_workers_throughput(self, workers_stats):
+        """Displays the number of images resized per second by each worker."""
+        for i, pid in enumerate(sorted(workers_stats)):
+            count, total_time = workers_stats[pid]
+            print(' > Worker {}: {} images ({:.1f} images/s)'
+                  .format(i, count, count / max(total_time, 1e-9)))
 
     def setup_dirs(self):
         """
@@ -324,10 +399,8 @@ class Raw256(Classification):
             new_data_dir = os.path.join(self.data_path, sets[set_name][0])
             if not os.path.exists(new_data_dir):
                 os.makedirs(new_data_dir)
-            else:
-                continue  # skip this set
 
-            # resize all images and save into the new directory
+            # resize all images (not resized yet) and save into the new directory
             if self.verbose:
                 print(' > Resizing images for the set: {}'.format(set_name))
             self.dir_resize_images(new_data_dir, sets[set_name][1])
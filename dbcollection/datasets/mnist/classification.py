@@ -9,8 +9,6 @@ import numpy as np
 
 from dbcollection.datasets import BaseTask, BaseField
 from dbcollection.utils.decorators import display_message_processing
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
-from dbcollection.utils.pad import pad_list
 
 
 class Classification(BaseTask):
@@ -19,6 +17,9 @@ class Classification(BaseTask):
     # metadata filename
     filename_h5 = 'classification'
 
+    # fields stored uncompressed (can be memory-mapped)
+    mmap_fields = ('images',)
+
     classes = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
 
     def load_data(self):
@@ -149,12 +150,10 @@ class ClassLabelField(BaseField):
     def process(self):
         """Processes and saves the classes metadata to hdf5."""
         class_names = self.get_class_names()
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='classes',
-            data=str2ascii(class_names),
-            dtype=np.uint8,
-            fillvalue=0
+            data=class_names
         )
 
     def get_class_names(self):
@@ -215,12 +214,10 @@ class ObjectFieldNamesField(BaseField):
 
     def process(self):
         """Processes and saves the labels metadata to hdf5."""
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='object_fields',
-            data=str2ascii(['images', 'labels']),
-            dtype=np.uint8,
-            fillvalue=0
+            data=['images', 'labels']
         )
 
 
@@ -230,11 +227,11 @@ class ObjectIdsField(BaseField):
     def process(self, image_ids, label_ids):
         """Processes and saves the object ids metadata to hdf5."""
         # images, labels
-        object_ids = [[image_ids[i], label_ids[i]] for i, _ in enumerate(label_ids)]
-        self.save_field_to_hdf5(
+        object_ids = ([image_ids[i], label_ids[i]] for i, _ in enumerate(label_ids))
+        self.save_rows_to_hdf5(
             set_name=self.set_name,
             field='object_ids',
-            data=np.array(object_ids, dtype=np.int32),
+            rows=object_ids,
             dtype=np.int32,
             fillvalue=-1
         )
@@ -251,13 +248,10 @@ class ImagesPerClassList(BaseField):
     def process(self):
         """Processes and saves the list ids metadata to hdf5."""
         images_per_class = self.get_image_ids_per_class()
-        images_per_class_array = self.convert_list_to_array(images_per_class)
-        self.save_field_to_hdf5(
+        self.save_lists_to_hdf5(
             set_name=self.set_name,
             field='list_images_per_class',
-            data=images_per_class_array,
-            dtype=np.int32,
-            fillvalue=-1
+            data=images_per_class
         )
 
     def get_image_ids_per_class(self):
@@ -269,8 +263,3 @@ class ImagesPerClassList(BaseField):
             images_idx = np.where(labels == label)[0].tolist()
             images_per_class.append(images_idx)
         return images_per_class
-
-    def convert_list_to_array(self, list_ids):
-        """Pads a list of lists and converts it into a numpy.ndarray."""
-        padded_list = pad_list(list_ids, val=-1)
-        return np.array(padded_list, dtype=np.int32)
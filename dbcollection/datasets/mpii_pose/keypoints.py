@@ -9,8 +9,6 @@ import numpy as np
 
 from dbcollection.datasets import BaseTask, BaseField
 from dbcollection.utils.decorators import display_message_processing, display_message_load_annotations
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
-from dbcollection.utils.pad import pad_list
 from dbcollection.utils.file_load import load_matlab
 
 
@@ -485,12 +483,10 @@ class ImageFilenamesField(CustomBaseField):
     def process(self):
         """Processes and saves the image filenames metadata to hdf5."""
         image_filenames, image_filename_ids = self.get_image_filenames()
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='image_filenames',
-            data=str2ascii(image_filenames),
-            dtype=np.uint8,
-            fillvalue=0
+            data=image_filenames
         )
         return image_filename_ids
 
@@ -598,12 +594,10 @@ class VideoNamesField(CustomBaseField):
     def process(self, video_ids):
         """Processes and saves the video names metadata to hdf5."""
         video_names = self.get_video_names(video_ids)
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='video_name',
-            data=str2ascii(video_names),
-            dtype=np.uint8,
-            fillvalue=0
+            data=video_names
         )
 
     def get_video_names(self, video_ids):
@@ -653,12 +647,10 @@ class KeypointLabelsField(CustomBaseField):
     def process(self):
         """Processes and saves the keypoint labels metadata to hdf5."""
         keypoint_labels = self.get_keypoint_labels()
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='keypoint_labels',
-            data=str2ascii(keypoint_labels),
-            dtype=np.uint8,
-            fillvalue=0
+            data=keypoint_labels
         )
 
     def get_keypoint_labels(self):
@@ -691,12 +683,10 @@ class CategoryNamesField(CustomBaseField):
     def process(self):
         """Processes and saves the category names metadata to hdf5."""
         category_name = self.get_category_name()
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='category_name',
-            data=str2ascii(category_name),
-            dtype=np.uint8,
-            fillvalue=0
+            data=category_name
         )
 
     def get_category_name(self):
@@ -719,12 +709,10 @@ class ActivityNamesField(CustomBaseField):
     def process(self):
         """Processes and saves the activity names metadata to hdf5."""
         activity_name = self.get_activity_name()
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='activity_name',
-            data=str2ascii(activity_name),
-            dtype=np.uint8,
-            fillvalue=0
+            data=activity_name
         )
 
     def get_activity_name(self):
@@ -811,12 +799,10 @@ class ObjectFieldNamesField(CustomBaseField):
     def process(self):
         """Processes and saves the object fields metadata to hdf5."""
         object_fields = self.get_object_fields()
-        self.save_field_to_hdf5(
+        self.save_strings_to_hdf5(
             set_name=self.set_name,
             field='object_fields',
-            data=str2ascii(object_fields),
-            dtype=np.uint8,
-            fillvalue=0
+            data=object_fields
         )
 
     def get_object_fields(self):
@@ -948,12 +934,10 @@ class SinglePersonPerImageList(CustomBaseField):
     def process(self):
         """Processes and saves the single persons per image metadata to hdf5."""
         single_person_per_image = self.get_list_single_person_per_image()
-        self.save_field_to_hdf5(
+        self.save_lists_to_hdf5(
             set_name=self.set_name,
             field='list_single_person_per_image',
-            data=np.array(pad_list(single_person_per_image, val=-1), dtype=np.int32),
-            dtype=np.int32,
-            fillvalue=-1
+            data=single_person_per_image
         )
 
     def get_list_single_person_per_image(self):
@@ -978,12 +962,10 @@ class KeypointsPerImageList(CustomBaseField):
     def process(self):
         """Processes and saves the keypoints per image metadata to hdf5."""
         keypoints_per_image = self.get_list_keypoints_per_image()
-        self.save_field_to_hdf5(
+        self.save_lists_to_hdf5(
             set_name=self.set_name,
             field='list_keypoints_per_image',
-            data=np.array(pad_list(keypoints_per_image, val=-1), dtype=np.int32),
-            dtype=np.int32,
-            fillvalue=-1
+            data=keypoints_per_image
         )
 
     def get_list_keypoints_per_image(self):
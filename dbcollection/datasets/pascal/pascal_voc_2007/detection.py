@@ -11,9 +11,7 @@ import progressbar
 from dbcollection.datasets import BaseTask
 
 from dbcollection.utils.file_load import load_xml
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
 from dbcollection.utils.pad import pad_list
-from dbcollection.utils.hdf5 import hdf5_write_data
 
 
 class Detection(BaseTask):
@@ -43,6 +41,12 @@ class Detection(BaseTask):
             'test': test_fnames
         }
 
+    def get_set_names(self):
+        """
+        Return the names of the sets loaded by load_data().
+        """
+        return list(self.get_set_filenames())
+
     def load_data(self):
         """
         Load data of the dataset.
@@ -55,6 +59,8 @@ class Detection(BaseTask):
         set_filenames = self.get_set_filenames()
 
         for set_name in set_filenames:
+            if not self.is_selected_set(set_name):
+                continue
 
             # index list
             filename_list = set_filenames[set_name]
@@ -95,7 +101,6 @@ class Detection(BaseTask):
         """
         Saves the metadata of a set.
         """
-        hdf5_handler = self.hdf5_manager.get_group(set_name)
         object_fields = ['image_filenames', 'classes', 'boxes', 'sizes', 'difficult', 'truncated']
         image_filenames = []
         size = []
@@ -205,54 +210,59 @@ class Detection(BaseTask):
         objs_truncated.sort()
         list_objects_ids_truncated = objs_truncated
 
-        hdf5_write_data(hdf5_handler, 'image_filenames', str2ascii(image_filenames),
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'id', np.array(obj_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'image_id', np.array(image_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'category_id', np.array(category_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'sizes', np.array(size, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'classes', str2ascii(self.classes), dtype=np.uint8,
-                        fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'boxes', np.array(bbox, dtype=np.float),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'truncated', np.array(truncated, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'difficult', np.array(difficult, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_ids', np.array(object_id, dtype=np.int32),
-                        fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_fields', str2ascii(object_fields), dtype=np.uint8,
-                        fillvalue=0)
+        self.hdf5_manager.add_strings_to_group(set_name, 'image_filenames', image_filenames)
+        self.hdf5_manager.add_field_to_group(set_name, 'id', np.array(obj_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'image_id',
+                                             np.array(image_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'category_id',
+                                             np.array(category_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'sizes', np.array(size, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'classes', self.classes)
+        self.hdf5_manager.add_field_to_group(set_name, 'boxes', np.array(bbox, dtype=np.float),
+                                             dtype=np.float, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'truncated',
+                                             np.array(truncated, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'difficult',
+                                             np.array(difficult, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'object_ids',
+                                             np.array(object_id, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'object_fields', object_fields)
 
         pad_value = -1
-        hdf5_write_data(hdf5_handler, 'list_image_filenames_per_class',
-                        np.array(pad_list(list_image_filenames_per_class, pad_value),
-                                 dtype=np.int32),
-                        fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_boxes_per_image',
-                        np.array(pad_list(list_boxes_per_image, pad_value), dtype=np.int32),
-                        fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_object_ids_per_image',
-                        np.array(pad_list(list_object_ids_per_image,
-                                          pad_value), dtype=np.int32),
-                        fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_object_ids_per_class',
-                        np.array(pad_list(list_objects_ids_per_class,
-                                          pad_value), dtype=np.int32),
-                        fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_object_ids_no_difficult',
-                        np.array(list_objects_ids_no_difficult, dtype=np.int32),
-                        fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_object_ids_difficult',
-                        np.array(list_objects_ids_difficult, dtype=np.int32),
-                        fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_object_ids_no_truncated',
-                        np.array(list_objects_ids_no_truncated, dtype=np.int32),
-                        fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_object_ids_truncated',
-                        np.array(list_objects_ids_truncated, dtype=np.int32),
-                        fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_image_filenames_per_class',
+                                             np.array(pad_list(list_image_filenames_per_class, pad_value),
+                                                      dtype=np.int32),
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_boxes_per_image',
+                                             np.array(pad_list(list_boxes_per_image, pad_value),
+                                                      dtype=np.int32),
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_object_ids_per_image',
+                                             np.array(pad_list(list_object_ids_per_image, pad_value),
+                                                      dtype=np.int32),
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_object_ids_per_class',
+                                             np.array(pad_list(list_objects_ids_per_class, pad_value),
+                                                      dtype=np.int32),
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_object_ids_no_difficult',
+                                             np.array(list_objects_ids_no_difficult,
+                                                      dtype=np.int32),
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_object_ids_difficult',
+                                             np.array(list_objects_ids_difficult, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_object_ids_no_truncated',
+                                             np.array(list_objects_ids_no_truncated,
+                                                      dtype=np.int32),
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_object_ids_truncated',
+                                             np.array(list_objects_ids_truncated, dtype=np.int32),
+                                             dtype=np.int32, fillvalue=pad_value)
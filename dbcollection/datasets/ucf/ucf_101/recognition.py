@@ -10,9 +10,6 @@ import progressbar
 
 from dbcollection.datasets import BaseTask
 from dbcollection.utils.file_load import load_txt
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
-from dbcollection.utils.pad import pad_list
-from dbcollection.utils.hdf5 import hdf5_write_data
 
 from .extract_frames import extract_video_frames
 
@@ -135,8 +132,8 @@ class Recognition(BaseTask):
 
                     # add image filenames to source
                     source_data[category][video_name] = {
-                        "images": str2ascii(images_fnames),
-                        "video": str2ascii(video_filenames[-1])
+                        "images": images_fnames,
+                        "video": video_filenames[-1]
                     }
 
                     # add to list of images per video
@@ -167,19 +164,17 @@ class Recognition(BaseTask):
             progbar.finish()
 
             out[set_name] = {
-                "object_fields": str2ascii(['videos', 'video_filenames',
-                                            'list_image_filenames_per_video',
-                                            'activities', 'total_frames']),
+                "object_fields": ['videos', 'video_filenames',
+                                  'list_image_filenames_per_video',
+                                  'activities', 'total_frames'],
                 "object_ids": np.array(object_ids, dtype=np.int32),
-                "videos": str2ascii(videos),
-                "video_filenames": str2ascii(video_filenames),
-                "activities": str2ascii(class_list),
-                "image_filenames": str2ascii(image_filenames),
+                "videos": videos,
+                "video_filenames": video_filenames,
+                "activities": class_list,
+                "image_filenames": image_filenames,
                 "total_frames": np.array(total_frames, dtype=np.int32),
-                "list_videos_per_activity": np.array(pad_list(list(list_videos_per_class.values()),
-                                                              -1), dtype=np.int32),
-                "list_image_filenames_per_video": np.array(pad_list(list_image_filenames_per_video,
-                                                                    -1), dtype=np.int32),
+                "list_videos_per_activity": list(list_videos_per_class.values()),
+                "list_image_filenames_per_video": list_image_filenames_per_video,
                 "source_data": source_data
             }
 
@@ -213,31 +208,16 @@ class Recognition(BaseTask):
         """
         Saves the metadata of a set.
         """
-        hdf5_handler = self.hdf5_manager.get_group(set_name)
-        hdf5_write_data(hdf5_handler, 'activities',
-                        data["activities"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'videos',
-                        data["videos"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'video_filenames',
-                        data["video_filenames"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'image_filenames',
-                        data["image_filenames"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'total_frames',
-                        data["total_frames"],
-                        dtype=np.int32, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_ids',
-                        data["object_ids"],
-                        dtype=np.int32, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_fields',
-                        data["object_fields"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'list_videos_per_activity',
-                        data["list_videos_per_activity"],
-                        dtype=np.int32, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'list_image_filenames_per_video',
-                        data["list_image_filenames_per_video"],
-                        dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'activities', data["activities"])
+        self.hdf5_manager.add_strings_to_group(set_name, 'videos', data["videos"])
+        self.hdf5_manager.add_strings_to_group(set_name, 'video_filenames', data["video_filenames"])
+        self.hdf5_manager.add_strings_to_group(set_name, 'image_filenames', data["image_filenames"])
+        self.hdf5_manager.add_field_to_group(set_name, 'total_frames', data["total_frames"],
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'object_ids', data["object_ids"],
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'object_fields', data["object_fields"])
+        self.hdf5_manager.add_list_to_group(set_name, 'list_videos_per_activity',
+                                            data["list_videos_per_activity"], fillvalue=-1)
+        self.hdf5_manager.add_list_to_group(set_name, 'list_image_filenames_per_video',
+                                            data["list_image_filenames_per_video"], fillvalue=-1)
@@ -12,9 +12,7 @@ import progressbar
 
 from dbcollection.datasets import BaseTask
 from dbcollection.utils.file_load import load_txt
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
 from dbcollection.utils.pad import pad_list
-from dbcollection.utils.hdf5 import hdf5_write_data
 
 
 class Detection(BaseTask):
@@ -274,15 +272,15 @@ class Detection(BaseTask):
                 count_video += 1
 
         return {
-            "object_fields": str2ascii(['videos', 'video_filenames',
-                                        'list_image_filenames_per_video',
-                                        'list_annotations_per_video',
-                                        'activities', 'total_frames']),
+            "object_fields": ['videos', 'video_filenames',
+                              'list_image_filenames_per_video',
+                              'list_annotations_per_video',
+                              'activities', 'total_frames'],
             "object_ids": np.array(object_ids, dtype=np.int32),
-            "videos": str2ascii(videos),
-            "video_filenames": str2ascii(video_filenames),
-            "activities": str2ascii(self.classes),
-            "image_filenames": str2ascii(image_filenames),
+            "videos": videos,
+            "video_filenames": video_filenames,
+            "activities": self.classes,
+            "image_filenames": image_filenames,
             "annotations": np.array(annotations, dtype=np.int32),
             "total_frames": np.array(total_frames, dtype=np.int32),
             "list_videos_per_activity": np.array(pad_list(list(list_videos_per_class.values()), -1),
@@ -297,40 +295,26 @@ class Detection(BaseTask):
         """
         Saves the metadata of a set.
         """
-        hdf5_handler = self.hdf5_manager.get_group(set_name)
         data_array = self.convert_data_to_arrays(data)
-        hdf5_write_data(hdf5_handler, 'videos',
-                        data_array["videos"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'video_filenames',
-                        data_array["video_filenames"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'activities',
-                        data_array["activities"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'image_filenames',
-                        data_array["image_filenames"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'annotations',
-                        data_array["annotations"],
-                        dtype=np.int32, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'total_frames',
-                        data_array["total_frames"],
-                        dtype=np.int32, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_ids',
-                        data_array["object_ids"],
-                        dtype=np.int32, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_fields',
-                        data_array["object_fields"],
-                        dtype=np.uint8, fillvalue=0)
+        self.hdf5_manager.add_strings_to_group(set_name, 'videos', data_array["videos"])
+        self.hdf5_manager.add_strings_to_group(set_name, 'video_filenames', data_array["video_filenames"])
+        self.hdf5_manager.add_strings_to_group(set_name, 'activities', data_array["activities"])
+        self.hdf5_manager.add_strings_to_group(set_name, 'image_filenames', data_array["image_filenames"])
+        self.hdf5_manager.add_field_to_group(set_name, 'annotations', data_array["annotations"],
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'total_frames', data_array["total_frames"],
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'object_ids', data_array["object_ids"],
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'object_fields', data_array["object_fields"])
 
         pad_value = -1
-        hdf5_write_data(hdf5_handler, 'list_videos_per_activity',
-                        data_array["list_videos_per_activity"], dtype=np.int32,
-                        fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_image_filenames_per_video',
-                        data_array["list_image_filenames_per_video"], dtype=np.int32,
-                        fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_annotations_per_video',
-                        data_array["list_annotations_per_video"], dtype=np.int32,
-                        fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_videos_per_activity',
+                                             data_array["list_videos_per_activity"],
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_image_filenames_per_video',
+                                             data_array["list_image_filenames_per_video"],
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_annotations_per_video',
+                                             data_array["list_annotations_per_video"],
+                                             dtype=np.int32, fillvalue=pad_value)
@@ -13,9 +13,7 @@ import progressbar
 from PIL import Image
 
 from dbcollection.datasets import BaseTask
-from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
 from dbcollection.utils.pad import pad_list
-from dbcollection.utils.hdf5 import hdf5_write_data
 
 
 class Recognition(BaseTask):
@@ -309,12 +307,12 @@ class Recognition(BaseTask):
             activity_video_ids.append(video_ids)
 
         return {
-            "activities": str2ascii(activities),
-            "videos": str2ascii(videos),
-            "image_filenames": str2ascii(image_filenames),
+            "activities": activities,
+            "videos": videos,
+            "image_filenames": image_filenames,
             "boxes": np.array(bboxes, dtype=np.int32),
             "object_ids": np.array(object_ids, dtype=np.int32),
-            "object_fields": str2ascii(object_fields),
+            "object_fields": object_fields,
 
             "list_object_ids_per_video": np.array(pad_list(video_filenames_ids, -1),
                                                   dtype=np.int32),
@@ -330,37 +328,26 @@ class Recognition(BaseTask):
         """
         Saves the metadata of a set.
         """
-        hdf5_handler = self.hdf5_manager.get_group(set_name)
         data_array = self.convert_data_to_arrays(data)
-        hdf5_write_data(hdf5_handler, 'activities',
-                        data_array["activities"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'videos',
-                        data_array["videos"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'image_filenames',
-                        data_array["image_filenames"],
-                        dtype=np.uint8, fillvalue=0)
-        hdf5_write_data(hdf5_handler, 'boxes',
-                        data_array["boxes"],
-                        dtype=np.int32, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_ids',
-                        data_array["object_ids"],
-                        dtype=np.int32, fillvalue=-1)
-        hdf5_write_data(hdf5_handler, 'object_fields',
-                        data_array["object_fields"],
-                        dtype=np.uint8, fillvalue=0)
+        self.hdf5_manager.add_strings_to_group(set_name, 'activities', data_array["activities"])
+        self.hdf5_manager.add_strings_to_group(set_name, 'videos', data_array["videos"])
+        self.hdf5_manager.add_strings_to_group(set_name, 'image_filenames', data_array["image_filenames"])
+        self.hdf5_manager.add_field_to_group(set_name, 'boxes', data_array["boxes"],
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_field_to_group(set_name, 'object_ids', data_array["object_ids"],
+                                             dtype=np.int32, fillvalue=-1)
+        self.hdf5_manager.add_strings_to_group(set_name, 'object_fields', data_array["object_fields"])
 
         pad_value = -1
-        hdf5_write_data(hdf5_handler, 'list_object_ids_per_video',
-                        data_array["list_object_ids_per_video"],
-                        dtype=np.int32, fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_filenames_per_video',
-                        data_array["list_filenames_per_video"],
-                        dtype=np.int32, fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_boxes_per_video',
-                        data_array["list_boxes_per_video"],
-                        dtype=np.int32, fillvalue=pad_value)
-        hdf5_write_data(hdf5_handler, 'list_videos_per_activity',
-                        data_array["list_videos_per_activity"],
-                        dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_object_ids_per_video',
+                                             data_array["list_object_ids_per_video"],
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_filenames_per_video',
+                                             data_array["list_filenames_per_video"],
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_boxes_per_video',
+                                             data_array["list_boxes_per_video"],
+                                             dtype=np.int32, fillvalue=pad_value)
+        self.hdf5_manager.add_field_to_group(set_name, 'list_videos_per_activity',
+                                             data_array["list_videos_per_activity"],
+                                             dtype=np.int32, fillvalue=pad_value)
@@ -3,8 +3,10 @@ Library to load different types of file into memory.
 """
 
 
+import os
 import sys
 import json
+from contextlib import contextmanager
 import scipy.io as scipy
 import xmltodict
 if sys.version_info[0] == 2:
@@ -13,6 +15,9 @@ else:
     import pickle
 
 
+_json_files = None  # json files cached by load_json() (see json_cache())
+
+
 def load_txt(fname, mode='r'):
     """Loads a .txt file to memory.
 
@@ -68,7 +73,66 @@ def load_json(fname):
 
     """
     assert fname, 'Must input a valid file name.'
-    return json.load(open(fname, mode='r'))
+    if _json_files is None:
+        return json.load(open(fname, mode='r'))
+    key = (os.path.abspath(fname), os.path.getmtime(fname))
+    if key not in _json_files:
+        _json_files[key] = json.load(open(fname, mode='r'))
+    return _json_files[key]
+
+
+@contextmanager
+def json_cache():
+    """Caches the json files loaded with load_json() inside the context.
+
+    Files loaded more than once (e.g., the annotation files shared by several
+    tasks of a dataset) are only parsed the first time. The cached data is
+    shared between the callers, so it must not be modified. The cache is
+    cleared when exiting the (outermost) context, and the files no longer
+    needed can be dropped before that with release_json().
+
+    Examples
+    --------
+    >>> with json_cache():
+    ...     annotations = load_json('instances_train2014.json')
+    ...     annotations is load_json('instances_train2014.json')
+    True
+
+    """
+    global _json_files
+    if _json_files is not None:
+        yield
+        return
+    _json_files = {}
+    try:
+        yield
+    finally:
+        _json_files = None
+
+
+def release_json(keep=()):
+    """Drops the json files cached by json_cache() which are not kept.
+
+    Parameters
+    ----------
+    keep : list/tuple/set, optional
+        File names + paths of the cached files to keep.
+
+    Examples
+    --------
+    >>> with json_cache():
+    ...     annotations = load_json('instances_train2014.json')
+    ...     release_json()
+    ...     annotations is load_json('instances_train2014.json')
+    False
+
+    """
+    if _json_files is None:
+        return
+    keep = set(os.path.abspath(fname) for fname in keep)
+    for key in list(_json_files):
+        if key[0] not in keep:
+            del _json_files[key]
 
 
 def load_pickle(fname):
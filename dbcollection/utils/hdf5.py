@@ -3,12 +3,220 @@ hdf5 utility functions.
 """
 
 
+import json
+import itertools
 import h5py
 import numpy as np
+import six
 
+from dbcollection.utils.pad import pad_list
+from dbcollection.utils.string_ascii import (
+    convert_ascii_to_str,
+    convert_str_to_ascii
+)
 
-def hdf5_write_data(h5_handler, field_name, data, dtype=None, chunks=True,
-                    compression="gzip", compression_opts=4, fillvalue=-1):
+
+FIELDS_INDEX_ATTR = '__fields_index__'
+RAGGED_OFFSETS_ATTR = '__offsets__'
+RAGGED_ROW_LENGTH_ATTR = '__row_length__'
+STRING_FORMAT_ATTR = '__string_format__'
+
+# Storage profiles (chunking, compression and filters) of the data fields.
+#
+# Chunks are sized either by a number of rows ('chunk_rows') or by a target
+# size in bytes ('chunk_bytes'), and always span whole rows so that reading
+# a row (or a batch of rows) never touches more chunks than needed.
+STORAGE_PROFILES = {
+    # general purpose: gzip compressed ~256KB chunks
+    "default": {"chunk_bytes": 256 * 1024, "compression": "gzip", "compression_opts": 4, "shuffle": False},
+    # zero-padded ascii strings: small chunks for fast random reads (compresses very well)
+    "ascii": {"chunk_bytes": 64 * 1024, "compression": "gzip", "compression_opts": 4, "shuffle": False},
+    # integer ids/lists: the byte shuffle filter groups the (mostly zero) high-order bytes
+    "ids": {"chunk_bytes": 256 * 1024, "compression": "gzip", "compression_opts": 4, "shuffle": True},
+    # dense image tensors: fast decompression with ~1MB chunks of whole images
+    "images": {"chunk_bytes": 1024 * 1024, "compression": "lzf", "compression_opts": None, "shuffle": False},
+    # hot fields: fast decompression
+    "lzf": {"chunk_bytes": 256 * 1024, "compression": "lzf", "compression_opts": None, "shuffle": False},
+    # chunked, but uncompressed
+    "none": {"chunk_bytes": 256 * 1024, "compression": None, "compression_opts": None, "shuffle": False},
+    # uncompressed and contiguous (no chunking): allows memory-mapping the field
+    "contiguous": {"chunk_bytes": None, "compression": None, "compression_opts": None, "shuffle": False},
+}
+
+# Encodings of string fields:
+#   - 'ascii': zero-padded uint8 arrays of char codes (readable by all versions of the loaders)
+#   - 'fixed': fixed-length utf-8 byte strings (HDF5 'S' type), one per row
+#   - 'vlen': variable-length utf-8 strings, one per row (no padding)
+STRING_FORMATS = ('ascii', 'fixed', 'vlen')
+
+# Layouts of list fields (lists of lists of ids, e.g., 'list_boxes_per_image'):
+#   - 'padded': 2D array padded with a fill value to the length of the longest list
+#   - 'ragged': 1D array with the values of all lists + a '<field>_offsets' array
+#     with the start of each list (CSR-style, no padding)
+LIST_FORMATS = ('padded', 'ragged')
+
+
+def get_storage_profile(storage):
+    """Returns the options of a storage profile.
+
+    Parameters
+    ----------
+    storage : str/dict
+        Name of a storage profile (see STORAGE_PROFILES) or a dictionary of
+        options ('chunk_rows', 'chunk_bytes', 'compression', 'compression_opts',
+        'shuffle'). A dictionary may extend an existing profile by setting
+        its name in the 'profile' key (uses the 'default' profile otherwise).
+
+    Returns
+    -------
+    dict
+        Options of the storage profile.
+
+    Raises
+    ------
+    KeyError
+        If the profile does not exist or has invalid options.
+
+    """
+    if isinstance(storage, dict):
+        options = dict(storage)
+        base_profile = options.pop("profile", "default")
+        invalid_options = set(options) - {"chunk_rows", "chunk_bytes", "compression",
+                                          "compression_opts", "shuffle"}
+        if any(invalid_options):
+            raise KeyError('Invalid storage options: {}'.format(sorted(invalid_options)))
+        profile = get_storage_profile(base_profile)
+        if "chunk_rows" in options:
+            profile["chunk_bytes"] = None
+        profile.update(options)
+        return profile
+    try:
+        return dict(STORAGE_PROFILES[storage])
+    except KeyError:
+        raise KeyError('Invalid storage profile \'{}\'. Available profiles: {}'
+                       .format(storage, sorted(STORAGE_PROFILES)))
+
+
+def get_default_storage_profile(shape, dtype):
+    """Returns the name of the default storage profile for a type of data.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of the data array.
+    dtype : np.dtype
+        Data type.
+
+    Returns
+    -------
+    str
+        Name of the storage profile.
+
+    """
+    dtype = np.dtype(dtype)
+    if dtype == np.uint8 and len(shape) >= 3:
+        return "images"
+    elif dtype == np.uint8 and len(shape) == 2:
+        return "ascii"
+    elif is_string_dtype(dtype):
+        return "ascii"
+    elif dtype.kind in 'iu':
+        return "ids"
+    else:
+        return "default"
+
+
+def get_chunk_shape(shape, dtype, chunk_rows=None, chunk_bytes=None):
+    """Computes the shape of the chunks of a data array.
+
+    Chunks always contain whole rows (i.e., they are only split along the
+    first dimension).
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of the data array.
+    dtype : np.dtype
+        Data type.
+    chunk_rows : int, optional
+        Number of rows per chunk.
+    chunk_bytes : int, optional
+        Target size (in bytes) of a chunk. Ignored if chunk_rows is set.
+
+    Returns
+    -------
+    tuple
+        Shape of a chunk. Returns None if the data should not be chunked.
+
+    """
+    if len(shape) == 0 or (chunk_rows is None and chunk_bytes is None):
+        return None
+    row_shape = tuple(max(1, dim) for dim in shape[1:])
+    if chunk_rows is None:
+        row_nbytes = int(np.prod(row_shape)) * np.dtype(dtype).itemsize
+        chunk_rows = chunk_bytes // max(1, row_nbytes)
+    chunk_rows = max(1, min(int(chunk_rows), shape[0]))
+    return (chunk_rows,) + row_shape
+
+
+def get_storage_options(shape, dtype, storage=None, chunks=None, compression=None,
+                        compression_opts=None, shuffle=None):
+    """Returns the h5py dataset creation options of a data field.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of the data array.
+    dtype : np.dtype
+        Data type.
+    storage : str/dict, optional
+        Storage profile. If None, uses the default profile for the type of data.
+    chunks : bool/tuple, optional
+        Overrides the chunks of the profile. If False, the data is not chunked.
+    compression : str/bool, optional
+        Overrides the compression algorithm of the profile. If False, the data
+        is not compressed.
+    compression_opts : int, optional
+        Overrides the compression option of the profile.
+    shuffle : bool, optional
+        Overrides the shuffle filter of the profile.
+
+    Returns
+    -------
+    dict
+        Chunks, compression, compression_opts and shuffle dataset options.
+
+    """
+    if storage is None:
+        storage = get_default_storage_profile(shape, dtype)
+    profile = get_storage_profile(storage)
+
+    options = {
+        "chunks": get_chunk_shape(shape, dtype, profile.get("chunk_rows"), profile.get("chunk_bytes")),
+        "compression": profile["compression"],
+        "compression_opts": profile["compression_opts"],
+        "shuffle": profile["shuffle"]
+    }
+    if chunks is not None:
+        options["chunks"] = chunks or None
+    if compression is not None:
+        options["compression"] = compression or None
+    if compression_opts is not None:
+        options["compression_opts"] = compression_opts
+    if shuffle is not None:
+        options["shuffle"] = shuffle
+
+    if len(shape) == 0 or 0 in shape:
+        # scalar/empty datasets cannot be chunked or compressed
+        options.update({"chunks": None, "compression": None, "shuffle": False})
+    if options["compression"] in (None, "lzf"):
+        options["compression_opts"] = None
+    return options
+
+
+def hdf5_write_data(h5_handler, field_name, data, dtype=None, chunks=None,
+                    compression=None, compression_opts=None, fillvalue=-1,
+                    shuffle=None, storage=None):
     """Write/store data into a hdf5 file.
 
     Parameters
@@ -21,14 +229,20 @@ def hdf5_write_data(h5_handler, field_name, data, dtype=None, chunks=True,
         Data array.
     dtype : np.dtype, optional
         Data type.
-    chunks : bool, optional
-        Store data as chunks if True.
+    chunks : bool/tuple, optional
+        Store data as chunks if True (or with the given chunk shape).
+        Overrides the storage profile.
     compression : str, optional
-        Compression algorithm type.
+        Compression algorithm type. Overrides the storage profile.
     compression_opts : int, optional
-        Compression option (range: [1,10])
+        Compression option (range: [1,10]). Overrides the storage profile.
     fillvalue : int/float, optional
         Value to pad the data.
+    shuffle : bool, optional
+        Use the shuffle filter. Overrides the storage profile.
+    storage : str/dict, optional
+        Storage profile of the field (see STORAGE_PROFILES). If None, uses
+        the default profile for the type of data.
 
     Returns
     -------
@@ -42,17 +256,447 @@ def hdf5_write_data(h5_handler, field_name, data, dtype=None, chunks=True,
     if dtype is None:
         dtype = data.dtype
 
+    options = get_storage_options(data.shape, dtype, storage, chunks, compression,
+                                  compression_opts, shuffle)
+
     h5_field = h5_handler.create_dataset(name=field_name,
                                          data=data,
                                          shape=data.shape,
                                          dtype=dtype,
-                                         chunks=chunks,
-                                         compression=compression,
-                                         compression_opts=compression_opts,
-                                         fillvalue=fillvalue)
+                                         fillvalue=fillvalue,
+                                         **options)
     return h5_field
 
 
+def is_string_dtype(dtype):
+    """Checks if a data type stores strings ('fixed' or 'vlen' string formats).
+
+    Parameters
+    ----------
+    dtype : np.dtype
+        Data type.
+
+    Returns
+    -------
+    bool
+        True if the data type is a fixed-length or a variable-length string.
+
+    """
+    dtype = np.dtype(dtype)
+    return dtype.kind == 'S' or h5py.check_dtype(vlen=dtype) in (bytes, six.text_type)
+
+
+def get_string_format(h5_object):
+    """Returns the string format stored in the attributes of a field/group (or None)."""
+    string_format = h5_object.attrs.get(STRING_FORMAT_ATTR)
+    if isinstance(string_format, bytes):
+        string_format = string_format.decode('utf-8')
+    return string_format
+
+
+def is_ascii_field(h5_field):
+    """Checks if a field stores strings as (zero-padded) arrays of ascii codes.
+
+    The HDF5Manager stores the string format of its string fields in their
+    attributes (and marks the groups it creates), so the fields of its files
+    are classified by their attributes. For files without these attributes
+    (written by older versions), fields stored with the 'ascii' string format
+    are detected as 2D uint8 arrays padded with zeros and whose values are
+    printable characters. Only the first rows of the field are checked.
+
+    Parameters
+    ----------
+    h5_field : h5py._hl.dataset.Dataset
+        hdf5 field object handler.
+
+    Returns
+    -------
+    bool
+        True if the field looks like an 'ascii' string field.
+
+    """
+    string_format = get_string_format(h5_field)
+    if string_format is not None:
+        return string_format == 'ascii'
+    if get_string_format(h5_field.parent) is not None:
+        return False
+    if h5_field.dtype != np.uint8 or h5_field.ndim != 2 or h5_field.fillvalue != 0:
+        return False
+    data = h5_field[:1024]
+    return bool(np.all((data == 0) | ((data >= 32) & (data < 127))))
+
+
+def get_field_string_format(h5_field):
+    """Returns the string format of a field (see STRING_FORMATS).
+
+    Parameters
+    ----------
+    h5_field : h5py._hl.dataset.Dataset
+        hdf5 field object handler.
+
+    Returns
+    -------
+    str
+        String format of the field. Returns None if the field does not
+        store strings.
+
+    """
+    if is_ascii_field(h5_field):
+        return 'ascii'
+    elif is_string_dtype(h5_field.dtype):
+        return 'fixed' if h5_field.dtype.kind == 'S' else 'vlen'
+    return None
+
+
+def encode_strings(data, string_format='ascii'):
+    """Encodes a string or list of strings into a numpy array.
+
+    Parameters
+    ----------
+    data : str/list/tuple
+        String or (nested) list of strings.
+    string_format : str, optional
+        Encoding of the strings (see STRING_FORMATS).
+
+    Returns
+    -------
+    np.ndarray
+        Array of encoded strings.
+    np.dtype
+        Data type to store the array in an hdf5 file.
+
+    Raises
+    ------
+    KeyError
+        If the string format does not exist.
+
+    """
+    if string_format == 'ascii':
+        return convert_str_to_ascii(data), np.uint8
+    elif string_format == 'fixed':
+        str_array = np.array(data)
+        if str_array.dtype.kind == 'U':
+            str_array = np.char.encode(str_array, 'utf-8')
+        return str_array, str_array.dtype
+    elif string_format == 'vlen':
+        str_array = np.array(data)
+        if str_array.dtype.kind == 'S':
+            str_array = np.char.decode(str_array, 'utf-8')
+        return str_array.astype(object), h5py.special_dtype(vlen=six.text_type)
+    else:
+        raise KeyError('Invalid string format \'{}\'. Available formats: {}'
+                       .format(string_format, list(STRING_FORMATS)))
+
+
+def decode_strings(data):
+    """Decodes the strings of a 'fixed' or 'vlen' string field.
+
+    Parameters
+    ----------
+    data : bytes/str/np.ndarray
+        String or array of (utf-8 encoded) strings.
+
+    Returns
+    -------
+    str/list
+        String or (nested) list of strings.
+
+    """
+    if isinstance(data, np.ndarray):
+        data = data.tolist()
+    if isinstance(data, list):
+        return [decode_strings(item) for item in data]
+    elif isinstance(data, bytes):
+        return data.decode('utf-8')
+    return data
+
+
+def read_strings(h5_field):
+    """Reads the strings of a string field of any string format.
+
+    Parameters
+    ----------
+    h5_field : h5py._hl.dataset.Dataset
+        hdf5 field object handler.
+
+    Returns
+    -------
+    str/list
+        String or list of strings.
+
+    """
+    data = h5_field[()]
+    if is_string_dtype(h5_field.dtype):
+        return decode_strings(data)
+    return convert_ascii_to_str(data)
+
+
+def get_ragged_list(data, dtype=np.int32):
+    """Converts a list of lists into a values + offsets pair of arrays.
+
+    Parameters
+    ----------
+    data : list
+        List of lists of numbers.
+    dtype : np.dtype, optional
+        Data type of the values.
+
+    Returns
+    -------
+    np.ndarray
+        1D array with the values of all lists.
+    np.ndarray
+        1D array of offsets (size: number of lists + 1). The values of the
+        i'th list are stored in values[offsets[i]:offsets[i+1]].
+
+    Examples
+    --------
+    >>> get_ragged_list([[0, 1, 2], [], [3]])
+    (array([0, 1, 2, 3], dtype=int32), array([0, 3, 3, 4]))
+
+    """
+    offsets = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in data], out=offsets[1:])
+    values = np.fromiter(itertools.chain.from_iterable(data), dtype=dtype, count=int(offsets[-1]))
+    return values, offsets
+
+
+def get_ragged_offsets_field(h5_field):
+    """Returns the name of the offsets field of a 'ragged' list field (or None)."""
+    offsets_field = h5_field.attrs.get(RAGGED_OFFSETS_ATTR)
+    if isinstance(offsets_field, bytes):
+        offsets_field = offsets_field.decode('utf-8')
+    return offsets_field
+
+
+def get_fields_index(h5_group):
+    """Builds an index with the shape and type of all fields of a group.
+
+    Parameters
+    ----------
+    h5_group : h5py._hl.group.Group
+        Handler for an HDF5 group object.
+
+    Returns
+    -------
+    dict
+        Shape and data type of each field (h5 dataset) of the group, as well
+        as the names of the fields composing the 'object_ids' list. The
+        offsets of 'ragged' list fields are not listed.
+
+    """
+    assert h5_group, "Must input a hdf5 group handler"
+    fields, offsets_fields = {}, set()
+    for field, h5_field in h5_group.items():
+        if isinstance(h5_field, h5py.Dataset):
+            shape = list(h5_field.shape)
+            offsets_field = get_ragged_offsets_field(h5_field)
+            if offsets_field is not None:
+                # ragged list fields are indexed by their (padded) shape
+                shape = [h5_group[offsets_field].shape[0] - 1,
+                         int(h5_field.attrs[RAGGED_ROW_LENGTH_ATTR])]
+                offsets_fields.add(offsets_field)
+            fields[field] = {"shape": shape, "dtype": h5_field.dtype.str}
+    for field in offsets_fields:
+        fields.pop(field, None)
+    if 'object_fields' in fields:
+        object_fields = read_strings(h5_group['object_fields'])
+        if isinstance(object_fields, str):
+            object_fields = [object_fields]
+    else:
+        object_fields = []
+    return {"fields": fields, "object_fields": object_fields}
+
+
+def load_fields_index(h5_group):
+    """Loads the fields index stored in the attributes of a group.
+
+    Parameters
+    ----------
+    h5_group : h5py._hl.group.Group
+        Handler for an HDF5 group object.
+
+    Returns
+    -------
+    dict
+        Fields index of the group (see get_fields_index()), or None if the
+        group does not contain an index (e.g., files created by older versions).
+
+    """
+    assert h5_group, "Must input a hdf5 group handler"
+    if FIELDS_INDEX_ATTR not in h5_group.attrs:
+        return None
+    index = h5_group.attrs[FIELDS_INDEX_ATTR]
+    if isinstance(index, bytes):
+        index = index.decode('utf-8')
+    return json.loads(index)
+
+
+class HDF5StreamWriter(object):
+    """Writes the rows of a field into a resizable HDF5 dataset in batches.
+
+    Rows are buffered and appended to the dataset every 'batch_size' rows,
+    so a field can be written while its data is being parsed without having
+    to hold all of it in memory. The dataset is resizable along all axes
+    (maxshape=None): rows wider than the previous ones (e.g., longer lists
+    or strings) widen the dataset and the remaining space is filled with
+    the fill value.
+
+    Parameters
+    ----------
+    h5_group : h5py._hl.group.Group
+        Handler for an HDF5 group object.
+    field : str
+        Name of the field (h5 dataset).
+    dtype : np.dtype
+        Data type.
+    fillvalue : int/float, optional
+        Value to pad the rows.
+    batch_size : int, optional
+        Number of rows appended to the dataset at once.
+    storage : str/dict, optional
+        Storage profile of the field (see STORAGE_PROFILES). If None, uses
+        the default profile for the type of data. Since resizable datasets
+        must be chunked, chunks of 'batch_size' rows are used for profiles
+        without chunking.
+    string_format : str, optional
+        Encoding of the rows of strings (see STRING_FORMATS). With the
+        'fixed' format, the dataset is rewritten with a wider string type
+        when a batch has longer strings than the previous ones.
+
+    Attributes
+    ----------
+    h5_field : h5py._hl.dataset.Dataset
+        Handler of the HDF5 dataset (None until the first batch is written).
+    nrows : int
+        Number of rows added to the writer.
+
+    Examples
+    --------
+    >>> writer = HDF5StreamWriter(h5_group, 'boxes', np.float32)
+    >>> for annotation in annotations:
+    ...     writer.append(annotation['bbox'])
+    >>> h5_field = writer.close()
+
+    """
+
+    def __init__(self, h5_group, field, dtype, fillvalue=-1, batch_size=1024, storage=None,
+                 string_format='ascii'):
+        """Initialize class."""
+        assert h5_group, "Must input a hdf5 group handler"
+        assert field, "Must input a valid field name."
+        assert isinstance(batch_size, int) and batch_size > 0, "Must input a positive batch size."
+        if string_format not in STRING_FORMATS:
+            raise KeyError('Invalid string format \'{}\'. Available formats: {}'
+                           .format(string_format, list(STRING_FORMATS)))
+        self.h5_group = h5_group
+        self.field = field
+        self.dtype = np.dtype(dtype)
+        self.fillvalue = fillvalue
+        self.batch_size = batch_size
+        self.storage = storage
+        self.string_format = string_format
+        self.h5_field = None
+        self.nrows = 0
+        self._rows = []
+
+    def append(self, row):
+        """Adds a row (scalar, string, list or array) to the field."""
+        self._rows.append(row)
+        self.nrows += 1
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def extend(self, rows):
+        """Adds the rows of an iterable (e.g., a generator) to the field."""
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        """Writes the buffered rows into the dataset."""
+        if not self._rows:
+            return
+        data = self._get_batch_array(self._rows)
+        is_string = isinstance(self._rows[0], six.string_types)
+        self._rows = []
+        self._write(data)
+        if is_string:
+            self.h5_field.attrs[STRING_FORMAT_ATTR] = self.string_format
+
+    def close(self):
+        """Writes the remaining rows and returns the HDF5 dataset.
+
+        Returns
+        -------
+        h5py._hl.dataset.Dataset
+            Handler of the HDF5 dataset.
+
+        """
+        self.flush()
+        if self.h5_field is None:
+            self._create_dataset(())
+        return self.h5_field
+
+    def _get_batch_array(self, rows):
+        """Converts a batch of rows into a (padded) numpy array."""
+        if isinstance(rows[0], six.string_types):
+            data, dtype = encode_strings(list(rows), self.string_format)
+            if self.string_format == 'ascii':
+                return data.reshape(len(rows), -1)
+            if self.h5_field is None:
+                self.dtype = np.dtype(dtype)
+            return data
+        if isinstance(rows[0], (list, tuple)) and len(set(len(row) for row in rows)) > 1:
+            rows = pad_list([list(row) for row in rows], self.fillvalue)
+        return np.array(rows, dtype=self.dtype)
+
+    def _create_dataset(self, row_shape):
+        """Creates a resizable dataset for rows of a given shape."""
+        row_shape = tuple(row_shape)
+        nominal_shape = (self.batch_size,) + tuple(max(1, dim) for dim in row_shape)
+        options = get_storage_options(nominal_shape, self.dtype, self.storage)
+        if options["chunks"] is None and len(nominal_shape) > 0:
+            options["chunks"] = get_chunk_shape(nominal_shape, self.dtype, chunk_rows=self.batch_size)
+        is_string = self.dtype.kind in ('S', 'O')
+        self.h5_field = self.h5_group.create_dataset(
+            name=self.field,
+            shape=(0,) + row_shape,
+            maxshape=(None,) * (len(row_shape) + 1),
+            dtype=self.dtype,
+            fillvalue=None if is_string else self.fillvalue,
+            **options
+        )
+
+    def _widen_strings(self, dtype):
+        """Rewrites the rows of a 'fixed' string dataset with a wider string type."""
+        old_name = self.field + '__narrow__'
+        self.h5_group.move(self.field, old_name)
+        old_field = self.h5_group[old_name]
+        self.dtype = np.dtype(dtype)
+        self._create_dataset(())
+        self.h5_field.resize((len(old_field),))
+        for i in range(0, len(old_field), self.batch_size):
+            self.h5_field[i:i + self.batch_size] = old_field[i:i + self.batch_size].astype(self.dtype)
+        del self.h5_group[old_name]
+
+    def _write(self, data):
+        """Appends an array of rows to the dataset (resizing it if needed)."""
+        if self.h5_field is None:
+            self._create_dataset(data.shape[1:])
+        if data.dtype.kind == 'S':
+            if data.dtype.itemsize > self.h5_field.dtype.itemsize:
+                self._widen_strings(data.dtype)
+            data = data.astype(self.h5_field.dtype)
+        shape = self.h5_field.shape
+        row_shape = tuple(max(dim, data_dim) for dim, data_dim in zip(shape[1:], data.shape[1:]))
+        if row_shape != data.shape[1:]:
+            padded = np.full((len(data),) + row_shape, self.fillvalue, dtype=self.dtype)
+            padded[(slice(None),) + tuple(slice(0, dim) for dim in data.shape[1:])] = data
+            data = padded
+        self.h5_field.resize((shape[0] + len(data),) + row_shape)
+        self.h5_field[shape[0]:] = data
+
+
 class HDF5Manager(object):
     """HDF5 metadata file manager.
 
@@ -65,12 +709,22 @@ class HDF5Manager(object):
     ---------
     filename : str
         File name + path of the HDF5 file.
+    storage_profiles : dict
+        Storage profile (name or dictionary of options) of each field.
+        Fields not listed use the default profile for their type of data.
+    string_format : str
+        Encoding of the string fields (see STRING_FORMATS).
+    list_format : str
+        Layout of the list fields (see LIST_FORMATS).
 
     """
     def __init__(self, filename):
         assert filename, "Must insert a valid file name."
         self.filename = filename
         self.file = self.open_file(filename)
+        self.storage_profiles = {}
+        self.string_format = 'ascii'
+        self.list_format = 'padded'
 
     def open_file(self, filename):
         """Opens/creates an HDF5 file in disk."""
@@ -78,20 +732,97 @@ class HDF5Manager(object):
         return h5py.File(filename, 'w', libver='latest')
 
     def close(self):
+        """Stores the fields index of all groups and closes the file."""
+        self.write_fields_index()
         self.file.close()
 
+    def write_fields_index(self):
+        """Stores an index of the fields of each group in the group's attributes.
+
+        This allows the data loaders to list the fields of a set and their
+        shapes without having to open every dataset of the file.
+        """
+        for group in self.file:
+            h5_group = self.file[group]
+            if isinstance(h5_group, h5py.Group):
+                h5_group.attrs[FIELDS_INDEX_ATTR] = json.dumps(get_fields_index(h5_group))
+
     def exists_group(self, group):
         """Checks if a group exists in the file."""
         assert group, "Must input a valid group name."
         return group in self.file
 
     def create_group(self, name):
-        """Creates a group in the file."""
+        """Creates a group in the file.
+
+        The string format of the manager is stored in the attributes of the
+        group, which marks its string fields as being identified by their
+        attributes (see is_ascii_field()).
+        """
         assert name, "Must input a name for the group."
-        return self.file.create_group(name)
+        h5_group = self.file.create_group(name)
+        h5_group.attrs[STRING_FORMAT_ATTR] = self.string_format
+        return h5_group
+
+    def set_storage_profiles(self, storage_profiles):
+        """Sets the storage profiles of the fields.
+
+        Parameters
+        ----------
+        storage_profiles : dict
+            Storage profile (name or dictionary of options) of each field.
+
+        Raises
+        ------
+        KeyError
+            If a storage profile does not exist or has invalid options.
+
+        """
+        assert isinstance(storage_profiles, dict), "Must input a dictionary of storage profiles."
+        for field in storage_profiles:
+            get_storage_profile(storage_profiles[field])
+        self.storage_profiles = dict(storage_profiles)
+
+    def set_string_format(self, string_format):
+        """Sets the encoding of the string fields.
+
+        Parameters
+        ----------
+        string_format : str
+            Encoding of the strings (see STRING_FORMATS).
+
+        Raises
+        ------
+        KeyError
+            If the string format does not exist.
+
+        """
+        if string_format not in STRING_FORMATS:
+            raise KeyError('Invalid string format \'{}\'. Available formats: {}'
+                           .format(string_format, list(STRING_FORMATS)))
+        self.string_format = string_format
+
+    def set_list_format(self, list_format):
+        """Sets the layout of the list fields.
+
+        Parameters
+        ----------
+        list_format : str
+            Layout of the lists (see LIST_FORMATS).
 
-    def add_field_to_group(self, group, field, data, dtype=None, fillvalue=-1, chunks=True,
-                           compression="gzip", compression_opts=4):
+        Raises
+        ------
+        KeyError
+            If the list format does not exist.
+
+        """
+        if list_format not in LIST_FORMATS:
+            raise KeyError('Invalid list format \'{}\'. Available formats: {}'
+                           .format(list_format, list(LIST_FORMATS)))
+        self.list_format = list_format
+
+    def add_field_to_group(self, group, field, data, dtype=None, fillvalue=-1, chunks=None,
+                           compression=None, compression_opts=None, shuffle=None, storage=None):
         """Writes the data of a field into an HDF5 file.
 
         Parameters
@@ -104,14 +835,22 @@ class HDF5Manager(object):
             Data array.
         dtype : np.dtype, optional
             Data type.
-        chunks : bool, optional
-            Stores the data as chunks if True.
+        chunks : bool/tuple, optional
+            Stores the data as chunks if True (or with the given chunk shape).
+            If False, the data is stored contiguously. Overrides the storage profile.
         compression : str, optional
-            Compression algorithm type.
+            Compression algorithm type. If False, no compression is used.
+            Overrides the storage profile.
         compression_opts : int, optional
-            Compression option (range: [1,10])
+            Compression option (range: [1,10]). Overrides the storage profile.
         fillvalue : int/float, optional
             Value to pad the data array.
+        shuffle : bool, optional
+            Use the shuffle filter. Overrides the storage profile.
+        storage : str/dict, optional
+            Storage profile of the field, used if no profile is set for the
+            field in 'storage_profiles'. If None, uses the default profile for
+            the type of data.
 
         Returns
         -------
@@ -124,24 +863,24 @@ class HDF5Manager(object):
         assert isinstance(data, np.ndarray), "Must input a valid numpy data array."
         assert dtype, "Must input a valid numpy data type."
         assert fillvalue is not None, "Must input a valid fill value to pad the array."
-        assert chunks is not None, "Must input a valid chunk size."
-        assert compression, "Must input a valid compression algorithm"
-        assert compression_opts, "Must input a valid compression value."
 
         h5_group = self.get_group(group)
 
         if dtype is None:
             dtype = data.dtype
 
+        storage = self.storage_profiles.get(field, storage)
+
+        options = get_storage_options(data.shape, dtype, storage, chunks, compression,
+                                      compression_opts, shuffle)
+
         h5_field = h5_group.create_dataset(
             name=field,
             data=data,
             shape=data.shape,
             dtype=dtype,
-            chunks=chunks,
-            compression=compression,
-            compression_opts=compression_opts,
-            fillvalue=fillvalue
+            fillvalue=fillvalue,
+            **options
         )
 
         return h5_field
@@ -151,3 +890,238 @@ class HDF5Manager(object):
             return self.file[group]
         else:
             return self.create_group(group)
+
+    def add_strings_to_group(self, group, field, data, string_format=None, chunks=None,
+                             compression=None, compression_opts=None, shuffle=None,
+                             storage=None):
+        """Writes a string or list of strings into an HDF5 file.
+
+        Parameters
+        ----------
+        group : str
+            Name of the group.
+        field : str
+            Name of the field (h5 dataset).
+        data : str/list/tuple
+            String or list of strings.
+        string_format : str, optional
+            Encoding of the strings (see STRING_FORMATS). If None, uses
+            the 'string_format' of the manager.
+        chunks : bool/tuple, optional
+            Stores the data as chunks if True (or with the given chunk shape).
+            If False, the data is stored contiguously. Overrides the storage profile.
+        compression : str, optional
+            Compression algorithm type. If False, no compression is used.
+            Overrides the storage profile.
+        compression_opts : int, optional
+            Compression option (range: [1,10]). Overrides the storage profile.
+        shuffle : bool, optional
+            Use the shuffle filter. Overrides the storage profile.
+        storage : str/dict, optional
+            Storage profile of the field, used if no profile is set for the
+            field in 'storage_profiles'. If None, uses the 'ascii' profile.
+
+        Returns
+        -------
+        h5py._hl.dataset.Dataset
+            Object handler of the created HDF5 dataset.
+
+        Raises
+        ------
+        KeyError
+            If the string format does not exist.
+
+        """
+        assert group, "Must input a valid group name."
+        assert field, "Must input a valid field name."
+        assert isinstance(data, (list, tuple, str)), "Must input a string or a list of strings."
+
+        if string_format is None:
+            string_format = self.string_format
+        str_array, dtype = encode_strings(data, string_format)
+
+        if string_format == 'ascii':
+            h5_field = self.add_field_to_group(group, field, str_array, dtype=dtype, fillvalue=0,
+                                               chunks=chunks, compression=compression,
+                                               compression_opts=compression_opts,
+                                               shuffle=shuffle, storage=storage)
+        else:
+            h5_group = self.get_group(group)
+
+            storage = self.storage_profiles.get(field, storage)
+
+            options = get_storage_options(str_array.shape, dtype, storage, chunks, compression,
+                                          compression_opts, shuffle)
+
+            h5_field = h5_group.create_dataset(
+                name=field,
+                data=str_array,
+                shape=str_array.shape,
+                dtype=dtype,
+                **options
+            )
+
+        h5_field.attrs[STRING_FORMAT_ATTR] = string_format
+        return h5_field
+
+    def add_list_to_group(self, group, field, data, dtype=np.int32, list_format=None,
+                          fillvalue=-1, chunks=None, compression=None, compression_opts=None,
+                          shuffle=None, storage=None):
+        """Writes a list of lists (e.g., ids per image) into an HDF5 file.
+
+        With the 'padded' format, the lists are padded with the fill value
+        into a 2D array. With the 'ragged' format, the values of all lists are
+        stored in a 1D array and the start of each list in a '<field>_offsets'
+        array, without any padding.
+
+        Parameters
+        ----------
+        group : str
+            Name of the group.
+        field : str
+            Name of the field (h5 dataset).
+        data : list
+            List of lists of numbers.
+        dtype : np.dtype, optional
+            Data type of the values.
+        list_format : str, optional
+            Layout of the lists (see LIST_FORMATS). If None, uses the
+            'list_format' of the manager.
+        fillvalue : int/float, optional
+            Value to pad the lists.
+        chunks : bool/tuple, optional
+            Stores the data as chunks if True (or with the given chunk shape).
+            If False, the data is stored contiguously. Overrides the storage profile.
+        compression : str, optional
+            Compression algorithm type. If False, no compression is used.
+            Overrides the storage profile.
+        compression_opts : int, optional
+            Compression option (range: [1,10]). Overrides the storage profile.
+        shuffle : bool, optional
+            Use the shuffle filter. Overrides the storage profile.
+        storage : str/dict, optional
+            Storage profile of the field, used if no profile is set for the
+            field in 'storage_profiles'. If None, uses the default profile for
+            the type of data.
+
+        Returns
+        -------
+        h5py._hl.dataset.Dataset
+            Object handler of the created HDF5 dataset.
+
+        Raises
+        ------
+        KeyError
+            If the list format does not exist.
+
+        """
+        assert isinstance(data, list), "Must input a list of lists."
+
+        if list_format is None:
+            list_format = self.list_format
+        if list_format not in LIST_FORMATS:
+            raise KeyError('Invalid list format \'{}\'. Available formats: {}'
+                           .format(list_format, list(LIST_FORMATS)))
+
+        storage_options = {"chunks": chunks, "compression": compression,
+                           "compression_opts": compression_opts, "shuffle": shuffle,
+                           "storage": storage}
+
+        if list_format == 'padded':
+            data = np.array(pad_list(data, fillvalue), dtype=dtype)
+            return self.add_field_to_group(group, field, data, dtype=dtype, fillvalue=fillvalue,
+                                           **storage_options)
+
+        values, offsets = get_ragged_list(data, dtype)
+        offsets_field = field + '_offsets'
+        h5_field = self.add_field_to_group(group, field, values, dtype=dtype, fillvalue=fillvalue,
+                                           **storage_options)
+        self.add_field_to_group(group, offsets_field, offsets, dtype=np.int64, fillvalue=0)
+        h5_field.attrs[RAGGED_OFFSETS_ATTR] = offsets_field
+        h5_field.attrs[RAGGED_ROW_LENGTH_ATTR] = int(np.max(np.diff(offsets), initial=0))
+        return h5_field
+
+    def create_stream_writer(self, group, field, dtype, fillvalue=-1, batch_size=1024,
+                             storage=None, string_format=None):
+        """Creates a writer to store the rows of a field in batches.
+
+        Parameters
+        ----------
+        group : str
+            Name of the group.
+        field : str
+            Name of the field (h5 dataset).
+        dtype : np.dtype
+            Data type.
+        fillvalue : int/float, optional
+            Value to pad the rows.
+        batch_size : int, optional
+            Number of rows appended to the dataset at once.
+        storage : str/dict, optional
+            Storage profile of the field, used if no profile is set for the
+            field in 'storage_profiles'. If None, uses the default profile for
+            the type of data.
+        string_format : str, optional
+            Encoding of the rows of strings (see STRING_FORMATS). If None,
+            uses the 'string_format' of the manager.
+
+        Returns
+        -------
+        HDF5StreamWriter
+            Writer of the field's rows. Must be closed after adding all rows.
+
+        Raises
+        ------
+        KeyError
+            If the string format does not exist.
+
+        """
+        assert group, "Must input a valid group name."
+        h5_group = self.get_group(group)
+        storage = self.storage_profiles.get(field, storage)
+        if string_format is None:
+            string_format = self.string_format
+        return HDF5StreamWriter(h5_group, field, dtype, fillvalue=fillvalue,
+                                batch_size=batch_size, storage=storage,
+                                string_format=string_format)
+
+    def add_rows_to_group(self, group, field, rows, dtype, fillvalue=-1, batch_size=1024,
+                          storage=None, string_format=None):
+        """Writes the rows of an iterable (e.g., a generator) into an HDF5 file.
+
+        The rows are consumed and written in batches, so the iterable never
+        has to be fully loaded into memory.
+
+        Parameters
+        ----------
+        group : str
+            Name of the group.
+        field : str
+            Name of the field (h5 dataset).
+        rows : iterable
+            Rows of the field (scalars, strings, lists or arrays).
+        dtype : np.dtype
+            Data type.
+        fillvalue : int/float, optional
+            Value to pad the rows.
+        batch_size : int, optional
+            Number of rows appended to the dataset at once.
+        storage : str/dict, optional
+            Storage profile of the field, used if no profile is set for the
+            field in 'storage_profiles'. If None, uses the default profile for
+            the type of data.
+        string_format : str, optional
+            Encoding of the rows of strings (see STRING_FORMATS). If None,
+            uses the 'string_format' of the manager.
+
+        Returns
+        -------
+        h5py._hl.dataset.Dataset
+            Object handler of the created HDF5 dataset.
+
+        """
+        writer = self.create_stream_writer(group, field, dtype, fillvalue=fillvalue,
+                                           batch_size=batch_size, storage=storage,
+                                           string_format=string_format)
+        writer.extend(rows)
+        return writer.close()
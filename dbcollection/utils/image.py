@@ -0,0 +1,149 @@
+"""
+Library of methods for decoding batches of image files into numpy arrays.
+"""
+
+
+import math
+import numpy as np
+from PIL import Image
+
+
+def get_crop_box(box, image_size):
+    """Returns the (left, upper, right, lower) pixel box of an image to crop.
+
+    Parameters
+    ----------
+    box : list/tuple/np.ndarray
+        Bounding box [xmin, ymin, xmax, ymax] (inclusive pixel coordinates).
+    image_size : tuple
+        Size (width, height) of the image.
+
+    Returns
+    -------
+    tuple
+        Box (left, upper, right, lower) clipped to the image (as used by
+        PIL.Image.crop()).
+
+    """
+    width, height = image_size
+    xmin, ymin, xmax, ymax = [float(v) for v in box[:4]]
+    left = min(max(int(math.floor(xmin)), 0), width - 1)
+    upper = min(max(int(math.floor(ymin)), 0), height - 1)
+    right = min(max(int(math.floor(xmax)) + 1, left + 1), width)
+    lower = min(max(int(math.floor(ymax)) + 1, upper + 1), height)
+    return left, upper, right, lower
+
+
+def load_image(filename, size=None, box=None, mode='RGB'):
+    """Loads an image file into a numpy array.
+
+    If an output size is given, JPEG images are decoded at a reduced scale
+    (PIL's draft mode) when possible, which is much faster than decoding
+    the full image and downscaling it afterwards.
+
+    Parameters
+    ----------
+    filename : str
+        File name + path of the image.
+    size : tuple, optional
+        Size (width, height) of the output image. If None, the image is not
+        resized.
+    box : list/tuple/np.ndarray, optional
+        Bounding box [xmin, ymin, xmax, ymax] (in pixel coordinates of the
+        image) to crop before resizing. If None, the image is not cropped.
+    mode : str, optional
+        PIL mode of the output image (e.g., 'RGB' or 'L').
+
+    Returns
+    -------
+    np.ndarray
+        Image pixels (uint8) with shape (height, width[, channels]).
+
+    """
+    assert filename, 'Must input a valid file name.'
+    with Image.open(filename) as img:
+        full_size = img.size
+        if size is not None:
+            assert len(size) == 2, 'Must input a valid (width, height) size.'
+            if box is None:
+                crop_size = full_size
+            else:
+                left, upper, right, lower = get_crop_box(box, full_size)
+                crop_size = (right - left, lower - upper)
+            # smallest image size whose crop is at least as large as the output size
+            draft_size = (int(math.ceil(size[0] * full_size[0] / float(crop_size[0]))),
+                          int(math.ceil(size[1] * full_size[1] / float(crop_size[1]))))
+            img.draft(mode, draft_size)
+        if box is not None:
+            scale = (img.size[0] / float(full_size[0]), img.size[1] / float(full_size[1]))
+            scaled_box = (box[0] * scale[0], box[1] * scale[1],
+                          (box[2] + 1) * scale[0] - 1, (box[3] + 1) * scale[1] - 1)
+            img = img.crop(get_crop_box(scaled_box, img.size))
+        if img.mode != mode:
+            img = img.convert(mode)
+        if size is not None and img.size != tuple(size):
+            img = img.resize(tuple(size), Image.BILINEAR)
+        return np.asarray(img, dtype=np.uint8)
+
+
+def _load_image_job(job):
+    """Loads an image from a (filename, size, box, mode) tuple (used by pools)."""
+    return load_image(*job)
+
+
+def load_images(filenames, size=None, boxes=None, mode='RGB', pool=None):
+    """Loads a batch of image files into a numpy array.
+
+    Parameters
+    ----------
+    filenames : list/tuple
+        File names + paths of the images.
+    size : tuple, optional
+        Size (width, height) of the output images. If None, all images must
+        have the same size (after cropping).
+    boxes : list/np.ndarray, optional
+        Bounding boxes [xmin, ymin, xmax, ymax] to crop from each image. The
+        images with a masked (or None) box are not cropped.
+    mode : str, optional
+        PIL mode of the output images (e.g., 'RGB' or 'L').
+    pool : multiprocessing.pool.Pool/multiprocessing.pool.ThreadPool, optional
+        Pool of workers to decode the images. If None, the images are
+        decoded sequentially in the current thread.
+
+    Returns
+    -------
+    np.ndarray
+        Images pixels (uint8) with shape (num_images, height, width[, channels]).
+
+    Raises
+    ------
+    ValueError
+        If the images have different sizes and no output size was given.
+
+    Examples
+    --------
+    >>> from multiprocessing.pool import ThreadPool
+    >>> from dbcollection.utils.image import load_images
+    >>> images = load_images(['a.jpg', 'b.jpg'], size=(224, 224), pool=ThreadPool(8))
+    >>> images.shape
+    (2, 224, 224, 3)
+
+    """
+    if boxes is None:
+        boxes = [None] * len(filenames)
+    assert len(boxes) == len(filenames), 'Must input one box per image.'
+    if size is not None:
+        size = tuple(int(v) for v in size)
+    jobs = []
+    for filename, box in zip(filenames, boxes):
+        if box is not None and np.ma.is_masked(box):
+            box = None
+        if box is not None:
+            box = [float(v) for v in box]
+        jobs.append((filename, size, box, mode))
+    images = pool.map(_load_image_job, jobs) if pool is not None else [_load_image_job(job) for job in jobs]
+    if not images:
+        return np.empty((0,), dtype=np.uint8)
+    if len(set(image.shape for image in images)) > 1:
+        raise ValueError('The images have different sizes. Input an output size to resize them.')
+    return np.stack(images)
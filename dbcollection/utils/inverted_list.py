@@ -0,0 +1,68 @@
+"""
+Library of methods for building inverted lists (i.e., the ids of the
+elements grouped by the value of one of their fields).
+"""
+
+
+import numpy as np
+
+
+def get_inverted_lists(keys, num_keys, values=None):
+    """Groups the values of a list by their keys.
+
+    Returns a list of 'num_keys' lists where the i-th list contains the
+    (unique and sorted) values whose key is equal to i. This is computed
+    with a single sort of all the (key, value) pairs, instead of scanning
+    all the values once per key.
+
+    Parameters
+    ----------
+    keys : list/np.ndarray
+        Keys (integers in the range [0, num_keys)) of the values.
+        Keys outside this range are ignored.
+    num_keys : int
+        Number of keys (i.e., number of inverted lists).
+    values : list/np.ndarray, optional
+        Values to group. If None, the positions of the keys are used
+        (i.e., the ids of the elements).
+
+    Returns
+    -------
+    list
+        List of lists of values (one for each key).
+
+    Examples
+    --------
+    Get the ids of the objects of each category.
+
+    >>> from dbcollection.utils.inverted_list import get_inverted_lists
+    >>> get_inverted_lists([1, 0, 1, 2], 3)
+    [[1], [0, 2], [3]]
+
+    Get the (unique) images of each category.
+
+    >>> get_inverted_lists([1, 0, 1, 2], 4, values=[5, 5, 5, 6])
+    [[5], [5], [6], []]
+
+    """
+    assert num_keys >= 0, 'Must input a valid number of keys.'
+    keys = np.asarray(keys, dtype=np.int64).ravel()
+    if values is None:
+        values = np.arange(len(keys))
+    else:
+        values = np.asarray(values).ravel()
+    assert len(keys) == len(values), 'The keys and values must have the same size.'
+
+    valid = (keys >= 0) & (keys < num_keys)
+    keys, values = keys[valid], values[valid]
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    if len(keys) > 0:
+        unique = np.ones(len(keys), dtype=bool)
+        unique[1:] = (keys[1:] != keys[:-1]) | (values[1:] != values[:-1])
+        keys, values = keys[unique], values[unique]
+
+    if num_keys == 0:
+        return []
+    counts = np.bincount(keys, minlength=num_keys)
+    return [group.tolist() for group in np.split(values, np.cumsum(counts)[:-1])]
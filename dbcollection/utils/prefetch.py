@@ -0,0 +1,129 @@
+"""
+Methods for prefetching the items of an iterable in background threads.
+"""
+
+
+import sys
+import threading
+import collections
+from multiprocessing.pool import ThreadPool
+import six
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue  # python 2
+
+
+_END = object()  # signals the end of the iterable
+
+
+def prefetch(iterable, size=1):
+    """Iterates over an iterable while its next items are fetched in a background thread.
+
+    This allows overlapping the work done to produce the items (e.g., parsing
+    annotation files) with the work done to consume them (e.g., writing data
+    to disk). Exceptions raised while fetching the items are re-raised when
+    the corresponding item is requested.
+
+    Parameters
+    ----------
+    iterable : iterable
+        Iterable (e.g., generator) to fetch items from.
+    size : int, optional
+        Maximum number of items fetched ahead of the consumer.
+
+    Returns
+    -------
+    generator
+        Items of the iterable (in the same order).
+
+    Examples
+    --------
+    >>> from dbcollection.utils.prefetch import prefetch
+    >>> for data in prefetch(load_sets()):
+    ...     save_set(data)  # the next set is loaded meanwhile
+
+    """
+    assert isinstance(size, int) and size > 0, 'Must input a positive number of items.'
+    items = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def producer():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException:
+            put((_END, sys.exc_info()))
+        else:
+            put((_END, None))
+
+    thread = threading.Thread(target=producer)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            item, exc_info = items.get()
+            if item is _END:
+                if exc_info is not None:
+                    six.reraise(*exc_info)
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def prefetch_map(function, iterable, size=1):
+    """Maps a function over an iterable while the next results are computed in a pool of threads.
+
+    Up to 'size' items ahead of the consumer are processed concurrently by a
+    pool of 'size' threads. The results are returned in the same order as
+    the items. This is useful for I/O bound functions that release the GIL
+    (e.g., reading data from disk). Exceptions raised by the function are
+    re-raised when the corresponding result is requested.
+
+    Parameters
+    ----------
+    function : function
+        Function to apply to each item.
+    iterable : iterable
+        Iterable (e.g., list) of items.
+    size : int, optional
+        Maximum number of items processed ahead of the consumer (and
+        number of threads of the pool).
+
+    Returns
+    -------
+    generator
+        Results of the function for each item (in the same order).
+
+    Examples
+    --------
+    >>> from dbcollection.utils.prefetch import prefetch_map
+    >>> for batch in prefetch_map(load_batch, batch_indexes, size=2):
+    ...     train_step(batch)  # the next 2 batches are loaded meanwhile
+
+    """
+    assert isinstance(size, int) and size > 0, 'Must input a positive number of items.'
+    pool = ThreadPool(size)
+    pending = collections.deque()
+    try:
+        for item in iterable:
+            pending.append(pool.apply_async(function, (item,)))
+            if len(pending) > size:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
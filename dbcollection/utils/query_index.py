@@ -0,0 +1,311 @@
+"""
+Library of methods for building and querying inverted indexes over the
+columns of the 'object_ids' field of a set.
+"""
+
+
+import h5py
+import numpy as np
+import six
+
+from dbcollection.utils.hdf5 import (
+    decode_strings,
+    get_field_string_format,
+    get_ragged_offsets_field,
+    hdf5_write_data,
+    is_ascii_field,
+    is_string_dtype,
+    read_strings
+)
+from dbcollection.utils.string_ascii import convert_str_to_ascii
+
+
+# Name of the top-level group where the query indexes are stored (one subgroup
+# per set), outside the sets' groups so that their fields are left unchanged.
+QUERY_INDEX_GROUP = '__query_index__'
+
+# Predicates supported by the query indexes:
+# - '==', '<', '<=', '>', '>=': compare the values of a field with a value.
+# - 'in': the value of a field is one of a list of values.
+# - 'between': the value of a field is in the (inclusive) range [min, max].
+# String fields only support the '==' and 'in' predicates.
+QUERY_OPERATORS = ('==', '<', '<=', '>', '>=', 'in', 'between')
+
+
+def is_value_field(h5_field):
+    """Checks if a field has scalar numeric rows (indexed by their values)."""
+    return h5_field.ndim == 1 and h5_field.dtype.kind in 'biuf' \
+        and get_ragged_offsets_field(h5_field) is None
+
+
+def is_string_field(h5_field):
+    """Checks if a field stores strings (indexed by their ids)."""
+    return is_string_dtype(h5_field.dtype) or is_ascii_field(h5_field)
+
+
+def get_query_index(ids, values=None):
+    """Builds an inverted index of the rows of a column of 'object_ids'.
+
+    The rows of the objects are grouped by their key (the id of the column
+    or, if the values of the field are given, the value of the field for
+    that id) with a single stable sort. Rows with undefined ids (-1) are
+    not indexed.
+
+    Parameters
+    ----------
+    ids : np.ndarray
+        Ids of a column of 'object_ids'.
+    values : np.ndarray, optional
+        Values of the field referenced by the column. If None, the rows
+        are indexed by their ids.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted unique keys.
+    np.ndarray
+        Offsets of the rows of each key (size: number of keys + 1). The rows
+        of the i'th key are stored in rows[offsets[i]:offsets[i+1]].
+    np.ndarray
+        Rows of the objects sorted by key (and by row for equal keys).
+
+    Examples
+    --------
+    >>> get_query_index(np.array([1, 0, 1, -1]))
+    (array([0, 1]), array([0, 1, 3]), array([1, 0, 2]))
+
+    """
+    ids = np.asarray(ids)
+    rows = np.flatnonzero(ids >= 0)
+    keys = ids[rows] if values is None else np.asarray(values)[ids[rows]]
+    order = np.argsort(keys, kind='mergesort')
+    keys, rows = keys[order], rows[order]
+    unique_keys, starts = np.unique(keys, return_index=True)
+    offsets = np.append(starts, len(keys)).astype(np.int64)
+    return unique_keys, offsets, rows
+
+
+def get_string_ids(h5_field, values, block_rows=65536):
+    """Returns the ids (rows) of a string field equal to any of a list of strings.
+
+    The field is read in blocks of rows. The rows of 'ascii' and 'fixed'
+    string fields are compared with the encoded values as byte strings,
+    without decoding them.
+
+    Parameters
+    ----------
+    h5_field : h5py._hl.dataset.Dataset
+        hdf5 field object handler.
+    values : list/tuple
+        Strings to search for.
+    block_rows : int, optional
+        Number of rows read at once.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted ids of the rows equal to any of the values.
+
+    """
+    values = [value for value in values if isinstance(value, six.string_types)]
+    string_format = get_field_string_format(h5_field)
+    if not values or h5_field.shape[0] == 0:
+        return np.empty(0, dtype=np.int64)
+    if string_format == 'ascii':
+        keys = [convert_str_to_ascii([value]).tobytes().rstrip(b'\0') if value else b''
+                for value in values]
+    elif string_format == 'fixed':
+        keys = [value.encode('utf-8') for value in values]
+    else:
+        keys = values
+    ids = []
+    for start in range(0, h5_field.shape[0], block_rows):
+        block = h5_field[start:start + block_rows]
+        if string_format == 'ascii':
+            block = np.ascontiguousarray(block).view('S{}'.format(block.shape[1])).reshape(-1)
+        elif string_format == 'vlen':
+            block = np.array(decode_strings(block), dtype=object)
+        ids.append(np.flatnonzero(np.isin(block, keys)) + start)
+    return np.concatenate(ids).astype(np.int64)
+
+
+def get_set_name(h5_group):
+    """Returns the name of the set of a group."""
+    return h5_group.name.split('/')[-1]
+
+
+def write_query_indexes(h5_group):
+    """Stores the query indexes of the object fields of a set in the file.
+
+    Fields with scalar numeric rows are indexed by their values and string
+    fields are indexed by their ids. The remaining fields (e.g., arrays or
+    lists) are not indexed. The indexes are stored in the '<set>' subgroup
+    of the top-level QUERY_INDEX_GROUP group. Groups without 'object_ids' or
+    whose indexes were already stored are skipped.
+
+    Parameters
+    ----------
+    h5_group : h5py._hl.group.Group
+        Handler for an HDF5 group object (set).
+
+    """
+    assert h5_group, "Must input a hdf5 group handler"
+    set_name = get_set_name(h5_group)
+    if 'object_ids' not in h5_group or 'object_fields' not in h5_group:
+        return
+    if QUERY_INDEX_GROUP in h5_group.file and set_name in h5_group.file[QUERY_INDEX_GROUP]:
+        return
+    object_fields = read_strings(h5_group['object_fields'])
+    if isinstance(object_fields, str):
+        object_fields = [object_fields]
+    object_ids = h5_group['object_ids'][()]
+    if object_ids.ndim != 2:
+        return
+    index_group = h5_group.file.require_group(QUERY_INDEX_GROUP).create_group(set_name)
+    for i, field in enumerate(object_fields):
+        if field not in h5_group or not isinstance(h5_group[field], h5py.Dataset):
+            continue
+        h5_field = h5_group[field]
+        if is_value_field(h5_field):
+            keys, offsets, rows = get_query_index(object_ids[:, i], h5_field[()])
+        elif is_string_field(h5_field):
+            keys, offsets, rows = get_query_index(object_ids[:, i])
+        else:
+            continue
+        field_group = index_group.create_group(field)
+        field_group.attrs['by_value'] = is_value_field(h5_field)
+        hdf5_write_data(field_group, 'keys', keys)
+        hdf5_write_data(field_group, 'offsets', offsets)
+        rows_dtype = np.int32 if len(object_ids) < np.iinfo(np.int32).max else np.int64
+        hdf5_write_data(field_group, 'rows', rows.astype(rows_dtype))
+
+
+def load_query_index(h5_group, field):
+    """Loads the stored query index of a field of a set.
+
+    Parameters
+    ----------
+    h5_group : h5py._hl.group.Group
+        Handler for an HDF5 group object (set).
+    field : str
+        Name of the field.
+
+    Returns
+    -------
+    QueryIndex
+        Query index of the field, or None if it was not stored in the file.
+
+    """
+    try:
+        field_group = h5_group.file[QUERY_INDEX_GROUP][get_set_name(h5_group)][field]
+    except KeyError:
+        return None
+    return QueryIndex(field_group['keys'][()],
+                      field_group['offsets'][()],
+                      field_group['rows'],
+                      by_value=bool(field_group.attrs['by_value']))
+
+
+class QueryIndex(object):
+    """Inverted index of the rows of the objects of a set by the key of a field.
+
+    The keys and offsets are kept in memory. The rows can be kept on disk
+    (as an hdf5 dataset): each lookup reads only the contiguous ranges of
+    rows of the matching keys.
+
+    Parameters
+    ----------
+    keys : np.ndarray
+        Sorted unique keys.
+    offsets : np.ndarray
+        Offsets of the rows of each key.
+    rows : np.ndarray/h5py._hl.dataset.Dataset
+        Rows of the objects sorted by key.
+    by_value : bool, optional
+        True if the keys are the values of the field, False if they are the
+        ids of the field.
+
+    Attributes
+    ----------
+    keys : np.ndarray
+        Sorted unique keys.
+    offsets : np.ndarray
+        Offsets of the rows of each key.
+    rows : np.ndarray/h5py._hl.dataset.Dataset
+        Rows of the objects sorted by key.
+    by_value : bool
+        True if the keys are the values of the field, False if they are the
+        ids of the field.
+
+    """
+
+    def __init__(self, keys, offsets, rows, by_value=True):
+        """Initialize class."""
+        self.keys = keys
+        self.offsets = offsets
+        self.rows = rows
+        self.by_value = by_value
+
+    def lookup(self, op, value):
+        """Returns the rows of the objects whose key satisfies a predicate.
+
+        Parameters
+        ----------
+        op : str
+            Predicate operator (see QUERY_OPERATORS).
+        value : int/float/list/tuple
+            Value of the predicate. A list of values for the 'in' operator
+            and a (min, max) pair for the 'between' operator.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted rows of the objects.
+
+        Raises
+        ------
+        KeyError
+            If the operator does not exist.
+
+        """
+        if op == '==':
+            return self.get_keys_rows([value])
+        elif op == 'in':
+            return self.get_keys_rows(value)
+        elif op == 'between':
+            low, high = value
+            return self.get_range_rows(np.searchsorted(self.keys, low, side='left'),
+                                       np.searchsorted(self.keys, high, side='right'))
+        elif op == '<':
+            return self.get_range_rows(0, np.searchsorted(self.keys, value, side='left'))
+        elif op == '<=':
+            return self.get_range_rows(0, np.searchsorted(self.keys, value, side='right'))
+        elif op == '>':
+            return self.get_range_rows(np.searchsorted(self.keys, value, side='right'), len(self.keys))
+        elif op == '>=':
+            return self.get_range_rows(np.searchsorted(self.keys, value, side='left'), len(self.keys))
+        else:
+            raise KeyError('Invalid query operator \'{}\'. Available operators: {}'
+                           .format(op, list(QUERY_OPERATORS)))
+
+    def get_keys_rows(self, keys):
+        """Returns the sorted rows of the objects of a list of keys."""
+        keys = np.unique(np.asarray(keys).reshape(-1))
+        positions = np.searchsorted(self.keys, keys)
+        found = positions < len(self.keys)
+        found[found] = self.keys[positions[found]] == keys[found]
+        positions = positions[found]
+        if len(positions) == 1:
+            return self._read_rows(positions[0], positions[0] + 1)
+        rows = [self._read_rows(i, i + 1) for i in positions]
+        return np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.int64)
+
+    def get_range_rows(self, start, stop):
+        """Returns the sorted rows of the objects of the keys in [start, stop)."""
+        if stop <= start:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(self._read_rows(start, stop))
+
+    def _read_rows(self, start, stop):
+        """Reads the rows of the keys in [start, stop) (sorted by key)."""
+        return np.asarray(self.rows[int(self.offsets[start]):int(self.offsets[stop])], dtype=np.int64)
@@ -50,15 +50,19 @@ def convert_str_to_ascii(input_str):
     if isinstance(input_str, str):
         input_str = [input_str]
 
-    # get max size of the list strings
-    max_size = max([len(a) for a in input_str])
+    # convert all strings at once into a zero padded array of char codes
+    str_array = np.array(input_str)
+    if str_array.dtype.kind == 'U':
+        char_codes = str_array.view(np.uint32)  # UCS4 code points
+    elif str_array.dtype.kind == 'S':
+        char_codes = str_array.view(np.uint8)
+    else:
+        raise TypeError('Must input a list of strings.')
+    max_size = char_codes.size // len(input_str)
 
     # allocate array
     ascii_array = np.zeros([len(input_str), max_size + 1], dtype=np.uint8)
-
-    # iteratively copy data to the array
-    for i, val in enumerate(input_str):
-        ascii_array[i, :len(val)] = str_to_ascii(val)
+    ascii_array[:, :max_size] = char_codes.reshape(len(input_str), max_size)
 
     if len(input_str) > 1:
         return ascii_array
@@ -91,7 +95,10 @@ def str_to_ascii(input_str):
     array([115, 116, 114, 105, 110, 103,  49], dtype=uint8)
 
     """
-    return np.array([ord(c) for c in input_str], dtype=np.uint8)
+    try:
+        return np.frombuffer(input_str.encode('latin-1'), dtype=np.uint8).copy()
+    except UnicodeError:
+        return np.array([ord(c) for c in input_str], dtype=np.uint8)
 
 
 def convert_ascii_to_str(input_array):
@@ -120,6 +127,39 @@ def convert_ascii_to_str(input_array):
 
     """
     assert isinstance(input_array, np.ndarray), "Must input a valid numpy array."
+    if input_array.ndim > 2:
+        return [convert_ascii_to_str(array) for array in input_array]
+    if input_array.size > 0 and input_array.max() > 255:
+        return _convert_ascii_to_str_slow(input_array)
+
+    mask = input_array > 0
+    if input_array.dtype == np.uint8:
+        array = input_array
+    else:
+        array = np.where(mask, input_array, 0).astype(np.uint8)
+    if input_array.ndim == 1:
+        return _decode(array[mask].tobytes())
+
+    if np.any(~mask[:, :-1] & mask[:, 1:]):
+        # move the chars after zeros in the middle of a string to the left
+        order = np.argsort(~mask, axis=1, kind='stable')
+        array = np.take_along_axis(array, order, axis=1)
+    num_chars = array.shape[1]
+    if num_chars == 0:
+        return [''] * array.shape[0]
+    strings = np.ascontiguousarray(array).view('S{}'.format(num_chars)).ravel()
+    return [_decode(str_) for str_ in strings.tolist()]
+
+
+def _decode(input_bytes):
+    """Decodes a byte string (on Python 2, 'str' is already a byte string)."""
+    if isinstance(input_bytes, str):
+        return input_bytes
+    return input_bytes.decode('latin-1')
+
+
+def _convert_ascii_to_str_slow(input_array):
+    """Converts char codes that do not fit into a byte one char at a time."""
     list_str = input_array.tolist()
     if input_array.ndim > 1:
         return [ascii_to_str(list(filter(lambda x: x > 0, str_))) for str_ in list_str]
@@ -150,4 +190,7 @@ def ascii_to_str(input_array):
     'string1'
 
     """
-    return "".join([chr(item) for item in input_array])
+    input_array = np.asarray(input_array)
+    if input_array.size > 0 and (input_array.min() < 0 or input_array.max() > 255):
+        return "".join([chr(item) for item in input_array])
+    return _decode(input_array.astype(np.uint8).tobytes())
@@ -5,24 +5,53 @@ Download functions.
 
 from __future__ import print_function, division
 import os
+import time
+import json
 import hashlib
 import shutil
-import tempfile
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 import requests
 import patoolib
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
 import progressbar
 
 from dbcollection.core.exceptions import (
     GoogleDriveFileIdDoesNotExist,
     InvalidURLDownloadSource,
     MD5HashNotEqual,
+    SHA256HashNotEqual,
     URLDoesNotExist,
 )
 
 
-def download_extract_urls(urls, save_dir, extract_data=True, verbose=True):
+# Checksum algorithms of the url files ('md5' and, if given by the url's metadata, 'sha256').
+CHECKSUM_ALGORITHMS = ('md5', 'sha256')
+
+# Name of the file (in a dataset's data directory) storing the checksums of the downloaded files.
+CHECKSUM_MANIFEST_FILENAME = 'checksums.json'
+
+HASH_CHUNK_SIZE = 2**20  # number of bytes read at once to hash a file
+
+MIN_DOWNLOAD_CHUNK_SIZE = 2**16  # minimum number of bytes read at once from a response
+MAX_DOWNLOAD_CHUNK_SIZE = 2**23  # maximum number of bytes read at once from a response
+DOWNLOAD_CHUNK_TIME = 0.25  # target number of seconds spent reading (+ storing) each chunk
+WRITE_BUFFER_SIZE = 2**22  # number of bytes buffered before writing them to disk
+
+PROGRESS_REFRESH_INTERVAL = 0.2  # minimum number of seconds between progress bar updates
+
+_checksum_manifest_lock = threading.Lock()  # serializes the updates of the manifest files
+
+
+def download_extract_urls(urls, save_dir, extract_data=True, verbose=True, workers=4, max_bandwidth=None,
+                          segments=1):
     """Download urls + extract files to disk.
 
+    The urls are downloaded concurrently (see DownloadScheduler) and each
+    downloaded archive is extracted while the remaining urls are still
+    being downloaded.
+
     Parameters
     ----------
     urls : list/tuple/dict
@@ -33,6 +62,18 @@ def download_extract_urls(urls, save_dir, extract_data=True, verbose=True):
         Extracts/unpacks the data files (if true).
     verbose : bool, optional
         Display messages on screen if set to True.
+    workers : int, optional
+        Maximum number of urls downloaded at the same time.
+    max_bandwidth : int, optional
+        Maximum total download rate (in bytes per second) of all urls.
+        If None, the download rate is not limited.
+    segments : int, optional
+        Number of byte ranges of each (large) url downloaded in parallel.
+
+    Returns
+    -------
+    list
+        File names + paths of the downloaded files.
 
     """
     if os.path.exists(save_dir):
@@ -41,14 +82,17 @@ def download_extract_urls(urls, save_dir, extract_data=True, verbose=True):
     else:
         os.makedirs(save_dir)
 
-    for url in urls:
-        filename = URL.download(url, save_dir, verbose)
-        if extract_data:
-            extract_archive_file(filename, save_dir)
+    scheduler = DownloadScheduler(save_dir,
+                                  workers=workers,
+                                  max_bandwidth=max_bandwidth,
+                                  extract_data=extract_data,
+                                  verbose=verbose,
+                                  segments=segments)
+    return scheduler.run(urls)
 
 
 def check_if_url_files_exist(urls, save_dir):
-    """Evaluates if all url filenames exist on disk.
+    """Evaluates if all url filenames exist on disk (and their checksums match).
 
     Parameters
     ----------
@@ -57,13 +101,17 @@ def check_if_url_files_exist(urls, save_dir):
     dir_save : str
         Directory to store the downloaded data.
 
+    Returns
+    -------
+    bool
+        True if the files of all urls exist. Otherwise, the missing files
+        (or partially downloaded ones) still need to be downloaded.
+
     """
     for url in urls:
-        filename = URL.get_url_filename(url)
-        filepath = os.path.join(save_dir, filename)
-        if os.path.exists(filepath):
-            return True
-    return False
+        if not URL().exists_url_file(url, save_dir):
+            return False
+    return True
 
 
 def extract_archive_file(filename, save_dir):
@@ -80,11 +128,251 @@ def extract_archive_file(filename, save_dir):
     patoolib.extract_archive(filename, outdir=save_dir)
 
 
+def iter_response_chunks(response, min_chunk_size=MIN_DOWNLOAD_CHUNK_SIZE,
+                         max_chunk_size=MAX_DOWNLOAD_CHUNK_SIZE, chunk_time=DOWNLOAD_CHUNK_TIME):
+    """Iterates over the data of a streamed response in chunks of adaptive size.
+
+    The chunk size is doubled while each chunk takes less than half the
+    target time to be read and consumed, and halved while it takes more than
+    twice the target time. Fast connections are read in chunks of several
+    MiB (few Python iterations and system calls per GiB), while slow
+    connections still report their progress regularly. The data is read
+    from the response's underlying stream (decoded), and its connection
+    errors are raised as the requests exceptions of Response.iter_content().
+
+    Parameters
+    ----------
+    response : requests.models.Response
+        Response of a request (with stream=True).
+    min_chunk_size : int, optional
+        Minimum number of bytes of a chunk (and size of the first chunk).
+    max_chunk_size : int, optional
+        Maximum number of bytes of a chunk.
+    chunk_time : float, optional
+        Target number of seconds between chunks.
+
+    Returns
+    -------
+    generator
+        Chunks (bytes) of the response's data.
+
+    """
+    chunk_size = min_chunk_size
+    last_time = time.time()
+    while True:
+        try:
+            data = response.raw.read(chunk_size, decode_content=True)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+        if not data:
+            if response.raw.closed:
+                return
+            continue  # no decoded data yet (e.g., buffered by the decompressor)
+        yield data
+        now = time.time()
+        elapsed, last_time = now - last_time, now
+        if elapsed < chunk_time / 2:
+            chunk_size = min(chunk_size * 2, max_chunk_size)
+        elif elapsed > chunk_time * 2:
+            chunk_size = max(chunk_size // 2, min_chunk_size)
+
+
+class FileHash(object):
+    """Computes the checksums of a stream of data incrementally.
+
+    Parameters
+    ----------
+    algorithms : list/tuple
+        Names of the hash algorithms (e.g., 'md5', 'sha256').
+
+    Attributes
+    ----------
+    algorithms : list/tuple
+        Names of the hash algorithms.
+    num_bytes : int
+        Number of bytes hashed.
+
+    """
+
+    def __init__(self, algorithms):
+        """Initialize class."""
+        self.algorithms = algorithms
+        self.reset()
+
+    def reset(self):
+        """Discards the hashed data."""
+        self._hashes = [hashlib.new(algorithm) for algorithm in self.algorithms]
+        self.num_bytes = 0
+
+    def update(self, data):
+        """Hashes a chunk of data."""
+        for file_hash in self._hashes:
+            file_hash.update(data)
+        self.num_bytes += len(data)
+
+    def update_from_file(self, filename, size=None):
+        """Hashes the data of a file (or its first 'size' bytes) in chunks."""
+        num_bytes = 0
+        with open(filename, 'rb') as f:
+            while size is None or num_bytes < size:
+                data = f.read(HASH_CHUNK_SIZE if size is None else min(HASH_CHUNK_SIZE, size - num_bytes))
+                if not data:
+                    break
+                self.update(data)
+                num_bytes += len(data)
+
+    def hexdigests(self):
+        """Returns the checksums (hex strings) of the hashed data for each algorithm."""
+        return dict((algorithm, file_hash.hexdigest())
+                    for algorithm, file_hash in zip(self.algorithms, self._hashes))
+
+
+def get_file_hashes(filename, algorithms=('md5',)):
+    """Computes the checksums of a file (read in chunks).
+
+    Parameters
+    ----------
+    filename : str
+        File name + path on disk.
+    algorithms : list/tuple, optional
+        Names of the hash algorithms (e.g., 'md5', 'sha256').
+
+    Returns
+    -------
+    dict
+        Checksum (hex string) of the file for each algorithm.
+
+    """
+    file_hash = FileHash(algorithms)
+    file_hash.update_from_file(filename)
+    return file_hash.hexdigests()
+
+
+def load_checksum_manifest(save_dir):
+    """Loads the checksums of the files downloaded into a directory.
+
+    Parameters
+    ----------
+    save_dir : str
+        Directory of the downloaded data.
+
+    Returns
+    -------
+    dict
+        Size, modification time and checksums of each file (by its path
+        relative to the directory). Empty if the manifest does not exist.
+
+    """
+    manifest_filename = os.path.join(save_dir, CHECKSUM_MANIFEST_FILENAME)
+    if not os.path.exists(manifest_filename):
+        return {}
+    with open(manifest_filename, 'r') as f:
+        return json.load(f)
+
+
+def update_checksum_manifest(save_dir, filename, hashes):
+    """Stores the checksums of a downloaded file in the directory's manifest.
+
+    The size and modification time of the file are stored with the
+    checksums, so files which were not modified since can be verified
+    without hashing them again.
+
+    Parameters
+    ----------
+    save_dir : str
+        Directory of the downloaded data.
+    filename : str
+        File name + path of the downloaded file.
+    hashes : dict
+        Checksum of the file for each algorithm.
+
+    """
+    with _checksum_manifest_lock:
+        manifest = load_checksum_manifest(save_dir)
+        stat = os.stat(filename)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime}
+        entry.update(hashes)
+        manifest[os.path.relpath(filename, save_dir)] = entry
+        manifest_filename = os.path.join(save_dir, CHECKSUM_MANIFEST_FILENAME)
+        with open(manifest_filename + '.tmp', 'w') as f:
+            json.dump(manifest, f, sort_keys=True, indent=2)
+        shutil.move(manifest_filename + '.tmp', manifest_filename)
+
+
+def verify_url_files(urls, save_dir, workers=4, verbose=True):
+    """Verifies the checksums of the downloaded files of a list of urls.
+
+    The files are hashed from scratch (in parallel) and compared with the
+    checksums given by the urls' metadata or, if none are given, with the
+    checksums stored in the directory's manifest when the files were
+    downloaded. The manifest is updated with the checksums of the valid files.
+
+    Parameters
+    ----------
+    urls : list/tuple
+        URL paths and/or metadata.
+    save_dir : str
+        Directory of the downloaded data.
+    workers : int, optional
+        Number of files hashed at the same time.
+    verbose : bool, optional
+        Display the status of each file on screen (if True).
+
+    Returns
+    -------
+    OrderedDict
+        Status of each file (by file name + path): 'ok' (checksums match),
+        'invalid' (checksums do not match), 'missing' (the file does not
+        exist) or 'unverified' (no checksums to compare with).
+
+    """
+    assert isinstance(workers, int) and workers > 0, 'Must input a positive number of workers.'
+    manifest = load_checksum_manifest(save_dir)
+    jobs = []
+    for url in urls:
+        url_metadata, _, filename = URL().get_url_metadata_and_dir_paths(url, save_dir)
+        expected = URL().get_expected_hashes(url_metadata)
+        if not expected:
+            entry = manifest.get(os.path.relpath(filename, save_dir), {})
+            expected = dict((algorithm, entry[algorithm]) for algorithm in CHECKSUM_ALGORITHMS
+                            if algorithm in entry)
+        jobs.append((filename, expected))
+
+    def verify(job):
+        filename, expected = job
+        if not os.path.exists(filename):
+            return 'missing', None
+        if not expected:
+            return 'unverified', None
+        hashes = get_file_hashes(filename, sorted(expected))
+        return ('ok' if hashes == expected else 'invalid'), hashes
+
+    pool = ThreadPool(max(1, min(workers, len(jobs))))
+    try:
+        results = pool.map(verify, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+    status = OrderedDict()
+    for (filename, _), (file_status, hashes) in zip(jobs, results):
+        status[filename] = file_status
+        if file_status == 'ok':
+            update_checksum_manifest(save_dir, filename, hashes)
+        if verbose:
+            print('{}: {}'.format(file_status, filename))
+    return status
+
+
 class URL:
     """URL manager class."""
 
     @classmethod
-    def download(self, url, save_dir, verbose=True):
+    def download(self, url, save_dir, verbose=True, session=None, callback=None, segments=1):
         """Downloads a single url into a file.
 
         Parameters
@@ -95,20 +383,58 @@ class URL:
             Directory path to save the downloaded file.
         verbose : bool, optional
             Display messages + progress bar on screen when downloading the file.
+        session : requests.sessions.Session, optional
+            Session used to request the url (reusing its pooled connections).
+            If None, a new connection is opened for each request.
+        callback : function, optional
+            Function called with the number of bytes of each downloaded chunk.
+        segments : int, optional
+            Number of byte ranges of the url downloaded in parallel.
 
         """
         if URL().exists_url_file(url, save_dir):
             if verbose:
                 print('File already exists in disk, skip downloading this url.')
-            _, _, filename = self.get_url_metadata_and_dir_paths(url, save_dir)
+            _, _, filename = URL().get_url_metadata_and_dir_paths(url, save_dir)
         else:
-            filename = URL().download_url(url, save_dir, verbose)
+            filename = URL().download_url(url, save_dir, verbose, session=session, callback=callback,
+                                          segments=segments)
         return filename
 
     def exists_url_file(self, url, save_dir):
-        """Checks if an url file already exists in a directory."""
-        _, _, filename = self.get_url_metadata_and_dir_paths(url, save_dir)
-        return os.path.exists(filename)
+        """Checks if an url file already exists in a directory (and its checksums match)."""
+        url_metadata, _, filename = self.get_url_metadata_and_dir_paths(url, save_dir)
+        return os.path.exists(filename) and self.is_valid_url_file(url_metadata, save_dir, filename)
+
+    def is_valid_url_file(self, url_metadata, save_dir, filename):
+        """Checks if the checksums of an existing url file match the ones of the url's metadata.
+
+        Files whose size, modification time and checksums are stored in the
+        directory's manifest are not hashed again. Otherwise, the file is
+        hashed and, if valid, added to the manifest.
+        """
+        expected = self.get_expected_hashes(url_metadata)
+        if not expected:
+            return True
+        entry = load_checksum_manifest(save_dir).get(os.path.relpath(filename, save_dir))
+        stat = os.stat(filename)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime \
+                and all(entry.get(algorithm) == value for algorithm, value in expected.items()):
+            return True
+        hashes = get_file_hashes(filename, sorted(expected))
+        if hashes != expected:
+            return False
+        update_checksum_manifest(save_dir, filename, hashes)
+        return True
+
+    def get_expected_hashes(self, url_metadata):
+        """Returns the checksums of the url's file given by its metadata (for each algorithm)."""
+        expected = {}
+        if url_metadata.get("md5hash"):
+            expected["md5"] = url_metadata["md5hash"]
+        if url_metadata.get("sha256"):
+            expected["sha256"] = url_metadata["sha256"]
+        return expected
 
     def get_url_metadata_and_dir_paths(self, url, save_dir):
         url_metadata = self.parse_url_metadata(url)
@@ -116,14 +442,19 @@ class URL:
         filename = os.path.join(download_dir, url_metadata["filename"])
         return url_metadata, download_dir, filename
 
-    def download_url(self, url, save_dir, verbose):
+    def download_url(self, url, save_dir, verbose, session=None, callback=None, segments=1):
         """Downloads an url to a file and returns its path in disk."""
         url_metadata, download_dir, filename = self.get_url_metadata_and_dir_paths(url, save_dir)
         if not os.path.exists(download_dir):
             os.makedirs(download_dir)
-        self.download_url_to_file(url_metadata, filename, verbose)
+        hashes = self.download_url_to_file(url_metadata, filename, verbose, session=session,
+                                           callback=callback, segments=segments)
         if url_metadata["md5hash"]:
-            self.md5_checksum(filename, url_metadata["md5hash"])
+            self.md5_checksum(filename, url_metadata["md5hash"], hashes.get("md5"))
+        if url_metadata.get("sha256"):
+            self.sha256_checksum(filename, url_metadata["sha256"], hashes.get("sha256"))
+        if hashes:
+            update_checksum_manifest(save_dir, filename, hashes)
         return filename
 
     def parse_url_metadata(self, url):
@@ -137,7 +468,7 @@ class URL:
         Returns
         -------
         dict
-            Metadata with URL's path, md5hash, filename, extract dir and method type.
+            Metadata with URL's path, md5hash, sha256 hash, filename, extract dir and method type.
 
         """
         assert isinstance(url, (str, dict)), 'Invalid url type: {}. Valid types: str, dict.'.format(type(url))
@@ -150,6 +481,7 @@ class URL:
         return {
             "url": url_,
             "md5hash": self.get_value_from_key(url, key='md5hash', default=None),
+            "sha256": self.get_value_from_key(url, key='sha256', default=None),
             "filename": self.get_value_from_key(url, key='save_name', default=os.path.basename(url_)),
             "extract_dir": self.get_value_from_key(url, key='extract_dir', default=''),
             "method": self.get_value_from_key(url, key='source', default='requests'),
@@ -164,7 +496,8 @@ class URL:
         except TypeError:
             return default
 
-    def download_url_to_file(self, url_metadata, filename, verbose=True):
+    def download_url_to_file(self, url_metadata, filename, verbose=True, session=None, callback=None,
+                             segments=1):
         """Downloads a single url to a file.
 
         Parameters
@@ -175,6 +508,18 @@ class URL:
             File name + path to save the url's data to disk.
         verbose : bool, optional
             Display messages + progress bar on screen when downloading the file.
+        session : requests.sessions.Session, optional
+            Session used to request the url.
+        callback : function, optional
+            Function called with the number of bytes of each downloaded chunk.
+        segments : int, optional
+            Number of byte ranges of the url downloaded in parallel.
+
+        Returns
+        -------
+        dict
+            Checksums of the file computed while downloading it (for each
+            algorithm). Empty if the checksums were not computed.
 
         Raises
         ------
@@ -182,14 +527,19 @@ class URL:
             If the input download method is invalid.
 
         """
-        # Create temporary file to store the downloaded data
+        # Temporary file to store the downloaded data (resumed if it exists)
         tmpfile = self.create_temp_file(filename)
 
         # download the file
         method = url_metadata['method']
         url = url_metadata['url']
+        hashes = {}
         if method == 'requests':
-            URLDownload().download(url, filename=tmpfile, verbose=verbose)
+            algorithms = ['md5'] + [algorithm for algorithm in CHECKSUM_ALGORITHMS[1:]
+                                    if url_metadata.get(algorithm)]
+            downloader = URLDownload(session, callback, segments=segments, hash_algorithms=algorithms)
+            downloader.download(url, filename=tmpfile, verbose=verbose)
+            hashes = downloader.hashes
         elif method == 'googledrive':
             URLDownloadGoogleDrive().download(url, filename=tmpfile)
         else:
@@ -197,9 +547,14 @@ class URL:
 
         # rename temporary file to final output file
         shutil.move(tmpfile, filename)
+        return hashes
 
     def create_temp_file(self, filename):
-        """Create a temporary file in the input filename's save directory.
+        """Returns the name of the temporary file to download an url in the filename's directory.
+
+        The temporary file has a fixed name (the filename with a '.part'
+        suffix), so the data downloaded by an interrupted run is resumed
+        by the next run.
 
         Parameters
         ----------
@@ -212,13 +567,9 @@ class URL:
             File name + path of the temporary file.
 
         """
-        filename_dir = os.path.dirname(filename)
-        (fd, tmpfile) = tempfile.mkstemp(".tmp", prefix=filename, dir=filename_dir)
-        os.close(fd)
-        os.unlink(tmpfile)
-        return tmpfile
+        return filename + '.part'
 
-    def md5_checksum(self, filename, md5hash):
+    def md5_checksum(self, filename, md5hash, file_hash=None):
         """Check file integrity using a checksum.
 
         Parameters
@@ -227,6 +578,9 @@ class URL:
             File path + name of the downloaded url.
         md5hash : str
             Md5 hash string.
+        file_hash : str, optional
+            Md5 hash of the file (e.g., computed while downloading it).
+            If None, the file is hashed.
 
         Raises
         ------
@@ -234,17 +588,46 @@ class URL:
             MD5 hash checksum do not match.
 
         """
-        file_hash = self.get_file_hash(filename)
+        if file_hash is None:
+            file_hash = self.get_file_hash(filename)
         if not file_hash == md5hash:
             raise MD5HashNotEqual("MD5 checksums do not match: {} != {}".format(md5hash, file_hash))
 
-    def get_file_hash(self, filename):
+    def sha256_checksum(self, filename, sha256hash, file_hash=None):
+        """Check file integrity using a SHA-256 checksum.
+
+        Parameters
+        ----------
+        filename : str
+            File path + name of the downloaded url.
+        sha256hash : str
+            SHA-256 hash string.
+        file_hash : str, optional
+            SHA-256 hash of the file (e.g., computed while downloading it).
+            If None, the file is hashed.
+
+        Raises
+        ------
+        SHA256HashNotEqual
+            SHA-256 hash checksum do not match.
+
+        """
+        if file_hash is None:
+            file_hash = self.get_file_hash(filename, algorithm='sha256')
+        if not file_hash == sha256hash:
+            raise SHA256HashNotEqual("SHA-256 checksums do not match: {} != {}".format(sha256hash, file_hash))
+
+    def get_file_hash(self, filename, algorithm='md5'):
         """Retrieves the checksum of a file.
 
+        The file is read in chunks, so it is never fully loaded into memory.
+
         Parameters
         ----------
         filename : str
             File name + path on disk.
+        algorithm : str, optional
+            Name of the hash algorithm (e.g., 'md5', 'sha256').
 
         Returns
         -------
@@ -252,7 +635,7 @@ class URL:
             Checksum string.
 
         """
-        return hashlib.md5(open(filename, 'rb').read()).hexdigest()
+        return get_file_hashes(filename, [algorithm])[algorithm]
 
     @classmethod
     def get_url_filename(self, url):
@@ -274,7 +657,71 @@ class URL:
 
 
 class URLDownload:
-    """Download an URL using the requests module."""
+    """Download an URL using the requests module.
+
+    Interrupted downloads are resumed from the data already stored in the
+    output file by requesting the remaining bytes (HTTP 'Range' requests),
+    both when retrying after a connection error and when downloading the
+    url again. The data is read in chunks of adaptive size (see
+    iter_response_chunks()) and written to disk through a large buffer.
+    Large files can also be downloaded as several byte ranges
+    in parallel, which are then joined into the output file. The checksums
+    of the file can be computed while it is downloaded, so it does not have
+    to be read again from disk to verify it.
+
+    Parameters
+    ----------
+    session : requests.sessions.Session, optional
+        Session used to request the urls (reusing its pooled connections).
+        If None, a new connection is opened for each request.
+    callback : function, optional
+        Function called with the number of bytes of each downloaded chunk
+        (e.g., to update a progress bar or to limit the download rate).
+    retries : int, optional
+        Number of times a download is resumed after a connection error.
+    segments : int, optional
+        Number of byte ranges of an url downloaded in parallel (if the
+        server supports range requests and the file is large enough).
+    hash_algorithms : list/tuple, optional
+        Names of the hash algorithms (e.g., 'md5', 'sha256') of the checksums
+        computed while downloading.
+
+    Attributes
+    ----------
+    session : requests.sessions.Session
+        Session used to request the urls.
+    callback : function
+        Function called with the number of bytes of each downloaded chunk.
+    retries : int
+        Number of times a download is resumed after a connection error.
+    segments : int
+        Number of byte ranges of an url downloaded in parallel.
+    hash_algorithms : list/tuple
+        Names of the hash algorithms of the checksums computed while downloading.
+    hashes : dict
+        Checksums (hex strings) of the last downloaded file for each algorithm.
+
+    """
+
+    min_segment_size = 16 * 2**20  # minimum number of bytes of a segment
+    retry_delay = 1.0  # seconds to wait before the first retry (doubled after each retry)
+
+    def __init__(self, session=None, callback=None, retries=3, segments=1, hash_algorithms=()):
+        """Initialize class."""
+        assert isinstance(retries, int) and retries >= 0, 'Must input a valid number of retries.'
+        assert isinstance(segments, int) and segments > 0, 'Must input a positive number of segments.'
+        self.session = session
+        self.callback = callback
+        self.retries = retries
+        self.segments = segments
+        self.hash_algorithms = hash_algorithms
+        self.hashes = {}
+
+    def get_session(self):
+        """Returns the session (or the requests module) used to request the urls."""
+        if self.session is None:
+            return requests
+        return self.session
 
     def download(self, url, filename, verbose=False):
         """Downloads an url data and stores it into a file.
@@ -312,31 +759,261 @@ class URLDownload:
             Returns True if the url request returns a 200 status code.
 
         """
-        request = requests.head(url, allow_redirects=True)
+        request = self.get_session().head(url, allow_redirects=True)
         return request.status_code == 200
 
     def download_url(self, url, filename, verbose):
         """Download an URL using the 'requests' module."""
-        CHUNK_SIZE = 1024
-        with requests.get(url, stream=True) as r:
-            with open(filename, 'wb') as f:
-                if verbose:
-                    total_length = int(r.headers.get('content-length'))
-                    if total_length is None:
-                        f.write(r.content)
-                    else:
-                        progbar_length = int(total_length / CHUNK_SIZE)
-                        progbar = progressbar.ProgressBar(maxval=progbar_length).start()
-                        i = 0
-                        for data in r.iter_content(chunk_size=CHUNK_SIZE):
-                            if data:
-                                f.write(data)
-                                f.flush()
-                                progbar.update(i)
-                                i += 1
-                        progbar.finish()
-                else:
-                    f.write(r.content)
+        size = self.get_segmented_size(url) if self.segments > 1 else None
+        progress = self.get_progress(size, verbose)
+        file_hash = FileHash(self.hash_algorithms)
+        try:
+            if size is None:
+                self.retry(self.download_range, url, filename, 0, None, progress, file_hash)
+            else:
+                self.download_segments(url, filename, size, progress, file_hash)
+        finally:
+            progress.finish()
+        self.remove_validator(filename)
+        if self.hash_algorithms and file_hash.num_bytes != os.path.getsize(filename):
+            # the file was already fully downloaded (no data was received)
+            file_hash.reset()
+            file_hash.update_from_file(filename)
+        self.hashes = file_hash.hexdigests()
+
+    def get_segmented_size(self, url):
+        """Returns the size of an url if it can be downloaded in segments (None otherwise)."""
+        response = self.get_session().head(url, allow_redirects=True)
+        size = response.headers.get('content-length')
+        if response.headers.get('accept-ranges', '').lower() != 'bytes' or size is None:
+            return None
+        if int(size) < 2 * self.min_segment_size:
+            return None
+        return int(size)
+
+    def get_progress(self, size, verbose):
+        """Returns a (thread-safe) progress tracker of the downloaded bytes."""
+        return DownloadProgress(size, verbose, self.callback)
+
+    def retry(self, function, *args):
+        """Calls a function and retries it after a connection error (with exponential backoff)."""
+        for attempt in range(self.retries + 1):
+            try:
+                return function(*args)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.retry_delay * 2 ** attempt)
+
+    def download_range(self, url, filename, start, end, progress, file_hash=None):
+        """Downloads the bytes [start, end] of an url into a file.
+
+        If the file already has data, only the remaining bytes are requested.
+        The data is only resumed if the url did not change since it was
+        first requested: its ETag (or Last-Modified date) is stored next to
+        the file and sent in an 'If-Range' header. If 'end' is None, the url
+        is downloaded until its end. If a FileHash is given, it is updated
+        with the data of the file (the data already stored on disk is only
+        hashed once, when resuming the download).
+        """
+        offset = os.path.getsize(filename) if os.path.exists(filename) else 0
+        validator = self.load_validator(filename)
+        if validator is None:
+            offset = 0  # the origin of the data is unknown, so it is downloaded again
+        if file_hash is not None and file_hash.num_bytes != offset:
+            file_hash.reset()
+            if offset > 0:
+                file_hash.update_from_file(filename, offset)
+        if end is not None and start + offset > end:
+            return  # already downloaded
+        headers = {}
+        if start + offset > 0 or end is not None:
+            headers['Range'] = 'bytes={}-{}'.format(start + offset, '' if end is None else end)
+        if offset > 0 and validator:
+            headers['If-Range'] = validator
+        with self.get_session().get(url, headers=headers, stream=True) as r:
+            if r.status_code == 416 and end is None and offset > 0:
+                if self.get_content_range_size(r) == offset:
+                    return  # the file was fully downloaded
+                self.remove_partial_file(filename)  # the file is larger than the url
+                return self.download_range(url, filename, start, end, progress, file_hash)
+            r.raise_for_status()
+            if headers and r.status_code != 206:
+                if start > 0 or end is not None:
+                    if offset > 0 and 'If-Range' in headers:
+                        # the url changed: download the whole segment again
+                        self.remove_partial_file(filename)
+                        return self.download_range(url, filename, start, end, progress, file_hash)
+                    raise requests.exceptions.HTTPError('The server does not support range requests: {}'
+                                                        .format(url))
+                offset = 0  # the server sent the whole file (or the url changed)
+                if file_hash is not None:
+                    file_hash.reset()
+            if offset == 0:
+                self.save_validator(filename, self.get_validator(r.headers))
+            progress.start(filename, offset, int(r.headers.get('content-length', 0)) + offset)
+            num_bytes = 0
+            with open(filename, 'ab' if offset > 0 else 'wb', WRITE_BUFFER_SIZE) as f:
+                for data in iter_response_chunks(r):
+                    f.write(data)
+                    if file_hash is not None:
+                        file_hash.update(data)
+                    progress.update(len(data))
+                    num_bytes += len(data)
+            self.check_response_length(r, num_bytes)
+
+    def check_response_length(self, response, num_bytes):
+        """Raises an error if a response ended before sending all its (Content-Length) bytes."""
+        size = response.headers.get('content-length')
+        if size is None or response.headers.get('content-encoding'):
+            return  # unknown size of the decoded data
+        if num_bytes != int(size):
+            raise requests.exceptions.ChunkedEncodingError('Response ended prematurely: received {} of {} bytes'
+                                                           .format(num_bytes, size))
+
+    def get_validator(self, headers):
+        """Returns the (strong) ETag or the Last-Modified date of an url's headers ('' if none)."""
+        etag = headers.get('etag', '')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return headers.get('last-modified', '')
+
+    def get_validator_filename(self, filename):
+        return filename + '.validator'
+
+    def load_validator(self, filename):
+        """Returns the validator of the url of a partial file (None if unknown)."""
+        validator_filename = self.get_validator_filename(filename)
+        if not os.path.exists(validator_filename):
+            return None
+        with open(validator_filename, 'r') as f:
+            return f.read()
+
+    def save_validator(self, filename, validator):
+        with open(self.get_validator_filename(filename), 'w') as f:
+            f.write(validator)
+
+    def remove_validator(self, filename):
+        validator_filename = self.get_validator_filename(filename)
+        if os.path.exists(validator_filename):
+            os.remove(validator_filename)
+
+    def remove_partial_file(self, filename):
+        """Removes a partially downloaded file (and its validator)."""
+        if os.path.exists(filename):
+            os.remove(filename)
+        self.remove_validator(filename)
+
+    def get_content_range_size(self, response):
+        """Returns the size of an url given by the 'Content-Range' header of a response (None if unknown)."""
+        content_range = response.headers.get('content-range', '')
+        try:
+            return int(content_range.rsplit('/', 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    def download_segments(self, url, filename, size, progress, file_hash=None):
+        """Downloads an url as several byte ranges in parallel and joins them into a file.
+
+        Segments downloaded before the url changed (different validator) are
+        discarded. If a FileHash is given, it is updated with the data of the
+        segments while they are joined.
+        """
+        bounds = [size * i // self.segments for i in range(self.segments + 1)]
+        segment_filenames = ['{}.{}'.format(filename, i) for i in range(self.segments)]
+        validator = self.get_validator(self.get_session().head(url, allow_redirects=True).headers)
+        for segment_filename in segment_filenames:
+            if self.load_validator(segment_filename) != validator:
+                self.remove_partial_file(segment_filename)
+        pool = ThreadPool(self.segments)
+        try:
+            results = [pool.apply_async(self.retry, (self.download_range, url, segment_filename,
+                                                     bounds[i], bounds[i + 1] - 1, progress))
+                       for i, segment_filename in enumerate(segment_filenames)]
+            for result in results:
+                result.get()
+        finally:
+            pool.terminate()
+            pool.join()
+        with open(filename, 'wb', WRITE_BUFFER_SIZE) as f:
+            for segment_filename in segment_filenames:
+                with open(segment_filename, 'rb') as segment:
+                    while True:
+                        data = segment.read(HASH_CHUNK_SIZE)
+                        if not data:
+                            break
+                        f.write(data)
+                        if file_hash is not None:
+                            file_hash.update(data)
+        for segment_filename in segment_filenames:
+            self.remove_partial_file(segment_filename)
+
+
+class DownloadProgress(object):
+    """Tracks the number of bytes downloaded by one or more threads.
+
+    Parameters
+    ----------
+    size : int
+        Total number of bytes to download (None if unknown).
+    verbose : bool
+        Display a progress bar on screen (if True).
+    callback : function
+        Function called with the number of bytes of each downloaded chunk.
+
+    Notes
+    -----
+    The progress bar is redrawn at most once every PROGRESS_REFRESH_INTERVAL
+    seconds.
+
+    """
+
+    def __init__(self, size, verbose, callback=None):
+        """Initialize class."""
+        self.size = size
+        self.verbose = verbose
+        self.callback = callback
+        self.downloaded_bytes = 0
+        self._lock = threading.Lock()
+        self._progbar = None
+        self._started = set()
+        self._last_refresh = 0
+
+    def start(self, filename, offset, size):
+        """Registers the bytes already downloaded into a file (and the size of the url if unknown)."""
+        with self._lock:
+            if filename not in self._started:
+                self._started.add(filename)
+                self.downloaded_bytes += offset
+            if self.size is None and size > 0:
+                self.size = size
+            if self.verbose and self._progbar is None:
+                max_value = self.size if self.size else progressbar.UnknownLength
+                self._progbar = progressbar.ProgressBar(max_value=max_value).start()
+
+    def update(self, num_bytes):
+        """Registers a downloaded chunk."""
+        if self.callback is not None:
+            self.callback(num_bytes)
+        with self._lock:
+            self.downloaded_bytes += num_bytes
+            now = time.time()
+            if self._progbar is not None and now - self._last_refresh >= PROGRESS_REFRESH_INTERVAL:
+                self._last_refresh = now
+                self.update_progbar()
+
+    def update_progbar(self):
+        """Redraws the progress bar with the number of downloaded bytes."""
+        self._progbar.update(min(self.downloaded_bytes, self._progbar.max_value or self.downloaded_bytes))
+
+    def finish(self):
+        """Closes the progress bar."""
+        if self._progbar is not None:
+            self.update_progbar()
+            self._progbar.finish()
+            self._progbar = None
 
 
 class URLDownloadGoogleDrive:
@@ -398,8 +1075,181 @@ class URLDownloadGoogleDrive:
             File name + path to store the downloaded data to disk.
 
         """
-        CHUNK_SIZE = 32768
-        with open(filename, "wb") as f:
-            for chunk in response.iter_content(CHUNK_SIZE):
-                if chunk:  # filter out keep-alive new chunks
-                    f.write(chunk)
+        with open(filename, "wb", WRITE_BUFFER_SIZE) as f:
+            for chunk in iter_response_chunks(response):
+                f.write(chunk)
+
+
+class BandwidthLimiter(object):
+    """Limits the total rate of data transferred by several threads.
+
+    Each thread reports the number of bytes it transferred and sleeps until
+    the total rate of all threads drops below the limit.
+
+    Parameters
+    ----------
+    max_bandwidth : int/float
+        Maximum rate (in bytes per second).
+
+    Attributes
+    ----------
+    max_bandwidth : int/float
+        Maximum rate (in bytes per second).
+
+    """
+
+    def __init__(self, max_bandwidth):
+        """Initialize class."""
+        assert max_bandwidth > 0, 'Must input a positive bandwidth.'
+        self.max_bandwidth = max_bandwidth
+        self._lock = threading.Lock()
+        self._next_time = time.time()
+
+    def consume(self, num_bytes):
+        """Reports the transfer of a number of bytes and waits for the rate to drop below the limit."""
+        with self._lock:
+            now = time.time()
+            self._next_time = max(self._next_time, now) + num_bytes / self.max_bandwidth
+            delay = self._next_time - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class DownloadScheduler(object):
+    """Downloads several urls concurrently and extracts them as they finish.
+
+    The urls are downloaded by a pool of threads which share a session
+    with a pool of connections per host. The total download rate can be
+    limited, and the progress of all downloads is displayed in a single
+    progress bar. Each downloaded archive is extracted (in a separate
+    thread) while the remaining urls are still being downloaded.
+
+    Parameters
+    ----------
+    save_dir : str
+        Directory to store the downloaded data.
+    workers : int, optional
+        Maximum number of urls downloaded at the same time.
+    max_bandwidth : int, optional
+        Maximum total download rate (in bytes per second). If None, the
+        download rate is not limited.
+    extract_data : bool, optional
+        Extracts/unpacks the data files (if true).
+    verbose : bool, optional
+        Display messages + progress bar on screen if set to True.
+    segments : int, optional
+        Number of byte ranges of each (large) url downloaded in parallel.
+
+    Attributes
+    ----------
+    save_dir : str
+        Directory to store the downloaded data.
+    workers : int
+        Maximum number of urls downloaded at the same time.
+    max_bandwidth : int
+        Maximum total download rate (in bytes per second).
+    extract_data : bool
+        Extracts/unpacks the data files (if true).
+    verbose : bool
+        Display messages + progress bar on screen if set to True.
+    segments : int
+        Number of byte ranges of each (large) url downloaded in parallel.
+    downloaded_bytes : int
+        Number of bytes downloaded.
+
+    Examples
+    --------
+    >>> from dbcollection.utils.url import DownloadScheduler
+    >>> scheduler = DownloadScheduler('/tmp/coco', workers=4, max_bandwidth=50 * 2**20)
+    >>> filenames = scheduler.run(urls)
+
+    """
+
+    def __init__(self, save_dir, workers=4, max_bandwidth=None, extract_data=True, verbose=True, segments=1):
+        """Initialize class."""
+        assert save_dir, 'Must input a valid directory.'
+        assert isinstance(workers, int) and workers > 0, 'Must input a positive number of workers.'
+        assert isinstance(segments, int) and segments > 0, 'Must input a positive number of segments.'
+        self.save_dir = save_dir
+        self.workers = workers
+        self.segments = segments
+        self.max_bandwidth = max_bandwidth
+        self.extract_data = extract_data
+        self.verbose = verbose
+        self.downloaded_bytes = 0
+        self._lock = threading.Lock()
+        self._limiter = None
+        self._progbar = None
+        self._last_refresh = 0
+
+    def create_session(self):
+        """Returns a session with a pool of connections for each download thread."""
+        session = requests.Session()
+        num_connections = self.workers * self.segments
+        adapter = requests.adapters.HTTPAdapter(pool_connections=num_connections, pool_maxsize=num_connections)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def update(self, num_bytes):
+        """Updates the number of downloaded bytes (called by the download threads)."""
+        if self._limiter is not None:
+            self._limiter.consume(num_bytes)
+        with self._lock:
+            self.downloaded_bytes += num_bytes
+            now = time.time()
+            if self._progbar is not None and now - self._last_refresh >= PROGRESS_REFRESH_INTERVAL:
+                self._last_refresh = now
+                self._progbar.update(self.downloaded_bytes)
+
+    def run(self, urls):
+        """Downloads (and extracts) a list of urls.
+
+        Parameters
+        ----------
+        urls : list/tuple
+            URL paths and/or metadata (see URL.parse_url_metadata()).
+
+        Returns
+        -------
+        list
+            File names + paths of the downloaded files (in the same order as the urls).
+
+        """
+        urls = list(urls)
+        if not urls:
+            return []
+        self.downloaded_bytes = 0
+        self._limiter = BandwidthLimiter(self.max_bandwidth) if self.max_bandwidth else None
+        if self.verbose:
+            print('Downloading {} urls ({} at a time)'.format(len(urls), min(self.workers, len(urls))))
+            self._progbar = progressbar.ProgressBar(max_value=progressbar.UnknownLength).start()
+        session = self.create_session()
+        download_pool = ThreadPool(min(self.workers, len(urls)))
+        extract_pool = ThreadPool(1)
+        try:
+            def download(job):
+                i, url = job
+                return i, URL.download(url, self.save_dir, False, session=session, callback=self.update,
+                                       segments=self.segments)
+
+            filenames = [None] * len(urls)
+            extractions = []
+            for i, filename in download_pool.imap_unordered(download, enumerate(urls)):
+                filenames[i] = filename
+                if self.extract_data:
+                    extractions.append(extract_pool.apply_async(extract_archive_file,
+                                                                (filename, self.save_dir)))
+            for extraction in extractions:
+                extraction.get()
+        finally:
+            download_pool.terminate()
+            extract_pool.close()
+            extract_pool.join()
+            download_pool.join()
+            session.close()
+            if self._progbar is not None:
+                self._progbar.update(self.downloaded_bytes)
+                self._progbar.finish()
+                self._progbar = None
+        return filenames
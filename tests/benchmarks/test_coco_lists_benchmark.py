@@ -0,0 +1,99 @@
+"""
+Benchmark the construction of the COCO per-category/supercategory lists.
+
+Run with: pytest tests/benchmarks --runslow -s
+"""
+
+
+import timeit
+import numpy as np
+import pytest
+
+from dbcollection.utils.inverted_list import get_inverted_lists
+
+
+# sizes of COCO's train2014 set
+NUM_IMAGES = 82783
+NUM_OBJECTS = 604907
+NUM_CATEGORIES = 80
+NUM_SUPERCATEGORIES = 12
+
+
+def get_lists_loop(object_id, num_categories, num_supercategories):
+    """Reference implementation (one scan of all objects per category)."""
+    lists = []
+    for col, num in ((4, num_categories), (5, num_supercategories)):
+        list_images = []
+        for i in range(num):
+            imgs = [val[0] for _, val in enumerate(object_id) if val[col] == i]
+            imgs = list(set(imgs))
+            imgs.sort()
+            list_images.append(imgs)
+        lists.append(list_images)
+    for col, num in ((4, num_categories), (5, num_supercategories)):
+        list_objects = []
+        for i in range(num):
+            objs = [j for j, val in enumerate(object_id) if val[col] == i]
+            objs = list(set(objs))
+            objs.sort()
+            list_objects.append(objs)
+        lists.append(list_objects)
+    return lists
+
+
+def get_lists_inverted(object_id, num_categories, num_supercategories):
+    objects = np.array(object_id, dtype=np.int32)
+    return [
+        get_inverted_lists(objects[:, 4], num_categories, values=objects[:, 0]),
+        get_inverted_lists(objects[:, 5], num_supercategories, values=objects[:, 0]),
+        get_inverted_lists(objects[:, 4], num_categories),
+        get_inverted_lists(objects[:, 5], num_supercategories)
+    ]
+
+
+@pytest.fixture(scope='module')
+def object_id():
+    """Synthetic object_id list with the layout used by the COCO detection task."""
+    rng = np.random.RandomState(0)
+    images = np.sort(rng.randint(0, NUM_IMAGES, NUM_OBJECTS))
+    categories = rng.randint(0, NUM_CATEGORIES, NUM_OBJECTS)
+    supercategories = categories * NUM_SUPERCATEGORIES // NUM_CATEGORIES
+    return [[img, img, img, img, cat, supercat, j, j, 0, j, img, cat, j]
+            for j, (img, cat, supercat) in enumerate(zip(images.tolist(), categories.tolist(),
+                                                         supercategories.tolist()))]
+
+
+@pytest.mark.slow
+def test_benchmark_coco_lists(object_id):
+    args = (object_id[:10000], NUM_CATEGORIES, NUM_SUPERCATEGORIES)
+    assert get_lists_inverted(*args) == get_lists_loop(*args)
+
+    args = (object_id, NUM_CATEGORIES, NUM_SUPERCATEGORIES)
+    time_new = min(timeit.repeat(lambda: get_lists_inverted(*args), number=1, repeat=3))
+    time_old = min(timeit.repeat(lambda: get_lists_loop(*args), number=1, repeat=1))
+
+    print('\nCOCO category lists ({} objects): {:.3f}s (loop: {:.3f}s, {:.1f}x)'
+          .format(NUM_OBJECTS, time_new, time_old, time_old / time_new))
+    assert time_new < time_old
+
+
+@pytest.mark.slow
+def test_benchmark_coco_category_lookup():
+    rng = np.random.RandomState(0)
+    category = ['category_{}'.format(i) for i in range(NUM_CATEGORIES)]
+    names = [category[i] for i in rng.randint(0, NUM_CATEGORIES, NUM_OBJECTS)]
+
+    def lookup_index():
+        return [category.index(name) for name in names]
+
+    def lookup_dict():
+        category_ids = {name: i for i, name in enumerate(category)}
+        return [category_ids[name] for name in names]
+
+    assert lookup_dict() == lookup_index()
+    time_new = min(timeit.repeat(lookup_dict, number=1, repeat=3))
+    time_old = min(timeit.repeat(lookup_index, number=1, repeat=3))
+
+    print('\nCOCO category lookup ({} objects): {:.3f}s (list.index: {:.3f}s, {:.1f}x)'
+          .format(NUM_OBJECTS, time_new, time_old, time_old / time_new))
+    assert time_new < time_old
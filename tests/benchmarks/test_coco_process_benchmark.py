@@ -0,0 +1,84 @@
+"""
+Benchmark the scaling of the COCO tasks' metadata processing with the number of images.
+
+Run with: pytest tests/benchmarks --runslow -s
+"""
+
+
+import os
+import json
+import timeit
+import pytest
+
+from dbcollection.datasets.coco.detection import Detection2015
+from dbcollection.datasets.coco.keypoints import Keypoints2016
+from dbcollection.datasets.coco.captions import Caption2015
+from dbcollection.utils.hdf5 import HDF5Manager
+
+
+NUM_IMAGES = 2000
+SCALE = 4  # the processing time must grow (at most) linearly with the number of images
+MAX_SLOWDOWN = 2  # tolerance over the linear growth (quadratic growth would be SCALE times)
+NUM_OBJECTS_PER_IMAGE = 3
+NUM_CATEGORIES = 80
+NUM_KEYPOINTS = 17
+
+
+def get_annotations(task, num_images):
+    """Synthetic COCO annotation file with the fields used by a task."""
+    images = [{"file_name": 'COCO_train2014_{:012d}.jpg'.format(i), "id": i, "width": 640,
+               "height": 480, "coco_url": 'http://images.cocodataset.org/{}.jpg'.format(i)}
+              for i in range(num_images)]
+    if task is Caption2015:
+        annotations = [{"id": i, "image_id": i // 5, "caption": 'A caption of image {}.'.format(i // 5)}
+                       for i in range(num_images * 5)]
+        return {"images": images, "annotations": annotations}
+
+    if task is Keypoints2016:
+        categories = [{"id": 1, "name": 'person', "supercategory": 'person',
+                       "keypoints": ['keypoint_{}'.format(i) for i in range(NUM_KEYPOINTS)],
+                       "skeleton": [[i, i + 1] for i in range(1, NUM_KEYPOINTS)]}]
+    else:
+        categories = [{"id": i + 1, "name": 'category_{}'.format(i),
+                       "supercategory": 'supercategory_{}'.format(i % 12)}
+                      for i in range(NUM_CATEGORIES)]
+    annotations = []
+    for i in range(num_images * NUM_OBJECTS_PER_IMAGE):
+        annotation = {"id": i, "image_id": i // NUM_OBJECTS_PER_IMAGE,
+                      "category_id": categories[i % len(categories)]["id"],
+                      "segmentation": [[10.0, 10.0, 20.0, 10.0, 20.0, 20.0]],
+                      "area": 50.0, "bbox": [10.0, 10.0, 10.0, 10.0], "iscrowd": 0}
+        if task is Keypoints2016:
+            annotation["num_keypoints"] = NUM_KEYPOINTS
+            annotation["keypoints"] = [15, 15, 2] * NUM_KEYPOINTS
+        annotations.append(annotation)
+    return {"images": images, "annotations": annotations, "categories": categories}
+
+
+def process_set(task, annotation_path, cache_path):
+    processer = task(data_path=cache_path, cache_path=cache_path, verbose=False)
+    processer.hdf5_manager = HDF5Manager(processer.hdf5_filepath)
+    image_dir = os.path.join(processer.data_path, processer.image_dir_path['train'])
+    data = processer.load_data_trainval('train', image_dir, annotation_path)
+    processer.process_set_metadata(data['train'], 'train')
+    processer.teardown_hdf5_manager()
+
+
+def time_process_set(task, num_images, tmpdir):
+    annotation_path = str(tmpdir.join('annotations_{}.json'.format(num_images)))
+    with open(annotation_path, 'w') as f:
+        json.dump(get_annotations(task, num_images), f)
+    return min(timeit.repeat(lambda: process_set(task, annotation_path, str(tmpdir)),
+                             number=1, repeat=3))
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("task", [Detection2015, Keypoints2016, Caption2015])
+def test_benchmark_coco_process_scales_linearly(tmpdir, task):
+    time_small = time_process_set(task, NUM_IMAGES, tmpdir)
+    time_large = time_process_set(task, NUM_IMAGES * SCALE, tmpdir)
+
+    print('\n{} ({} -> {} images): {:.3f}s -> {:.3f}s ({:.1f}x)'
+          .format(task.__name__, NUM_IMAGES, NUM_IMAGES * SCALE, time_small, time_large,
+                  time_large / time_small))
+    assert time_large < time_small * SCALE * MAX_SLOWDOWN
@@ -0,0 +1,96 @@
+"""
+Benchmark the download throughput of an url from a local HTTP server.
+
+Run with: pytest tests/benchmarks --runslow -s
+"""
+
+
+import os
+import threading
+import timeit
+import progressbar
+import pytest
+import requests
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+
+from dbcollection.utils.url import URLDownload
+
+
+FILE_SIZE = 256 * 2**20
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class DataRequestHandler(BaseHTTPRequestHandler):
+    """Serves the same data for any path."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.send_headers()
+
+    def do_GET(self):
+        self.send_headers()
+        view = memoryview(self.server.data)
+        for i in range(0, len(view), 2**20):
+            self.wfile.write(view[i:i + 2**20])
+
+    def send_headers(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(self.server.data)))
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DataRequestHandler)
+    server.data = os.urandom(FILE_SIZE)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,))
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:{}/data.bin'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def download_loop(url, filename):
+    """Reference implementation (1 KiB chunks, flush + progress bar update per chunk)."""
+    r = requests.get(url, stream=True)
+    progbar = progressbar.ProgressBar(max_value=int(r.headers['content-length'])).start()
+    downloaded_bytes = 0
+    with open(filename, 'wb') as f:
+        for data in r.iter_content(chunk_size=1024):
+            if data:
+                f.write(data)
+                f.flush()
+                downloaded_bytes += len(data)
+                progbar.update(downloaded_bytes)
+    progbar.finish()
+
+
+def download(url, filename):
+    if os.path.exists(filename):
+        os.remove(filename)  # do not resume the previous download
+    URLDownload().download(url, filename, verbose=True)
+
+
+@pytest.mark.slow
+def test_benchmark_download(url, tmpdir):
+    filename = str(tmpdir.join('data.bin'))
+    download(url, filename)
+    assert os.path.getsize(filename) == FILE_SIZE
+
+    time_new = min(timeit.repeat(lambda: download(url, filename), number=1, repeat=3))
+    time_old = min(timeit.repeat(lambda: download_loop(url, str(tmpdir.join('data_loop.bin'))),
+                                 number=1, repeat=1))
+
+    print('\nDownload ({} MiB): {:.3f}s, {:.0f} MiB/s (loop: {:.3f}s, {:.0f} MiB/s, {:.1f}x)'
+          .format(FILE_SIZE // 2**20, time_new, FILE_SIZE / 2**20 / time_new,
+                  time_old, FILE_SIZE / 2**20 / time_old, time_old / time_new))
+    assert time_new < time_old
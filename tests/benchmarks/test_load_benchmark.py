@@ -0,0 +1,79 @@
+"""
+Benchmark the construction time of the dataset's metadata loaders.
+
+Run with: pytest tests/benchmarks --runslow -s
+"""
+
+
+import timeit
+import numpy as np
+import pytest
+
+from dbcollection.core.loader import DataLoader
+from dbcollection.utils.hdf5 import HDF5Manager
+from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
+
+
+NUM_SETS = 8
+NUM_FIELDS = 50
+NUM_REPEATS = 5
+
+
+@pytest.fixture(scope='module')
+def hdf5_filepath(tmpdir_factory):
+    filename = str(tmpdir_factory.mktemp('benchmark').join('load.h5'))
+    fields = ['field_{}'.format(i) for i in range(NUM_FIELDS)]
+    hdf5_manager = HDF5Manager(filename)
+    for i in range(NUM_SETS):
+        set_name = 'set_{}'.format(i)
+        for field in fields:
+            hdf5_manager.add_field_to_group(set_name, field, np.zeros((100, 4)), dtype=np.float32)
+        hdf5_manager.add_field_to_group(set_name, 'object_fields', str2ascii(fields), dtype=np.uint8, fillvalue=0)
+        hdf5_manager.add_field_to_group(set_name, 'object_ids', np.zeros((100, NUM_FIELDS)), dtype=np.int32)
+    hdf5_manager.close()
+    return filename
+
+
+def load_data_loader(hdf5_filepath):
+    return DataLoader('benchmark', 'default', '/some/dir', hdf5_filepath)
+
+
+def load_data_loader_eager(hdf5_filepath):
+    """Builds all set + field loaders (the behaviour before lazy loading)."""
+    data_loader = load_data_loader(hdf5_filepath)
+    for set_name in data_loader.sets:
+        set_loader = data_loader.sets[set_name]
+        set_loader.object_fields
+        for field in set_loader.fields:
+            set_loader.fields[field]
+    return data_loader
+
+
+def best_time(fn, hdf5_filepath):
+    return min(timeit.repeat(lambda: fn(hdf5_filepath), number=1, repeat=NUM_REPEATS))
+
+
+@pytest.mark.slow
+def test_benchmark_load_lazy_vs_eager(hdf5_filepath):
+    time_lazy = best_time(load_data_loader, hdf5_filepath)
+    time_eager = best_time(load_data_loader_eager, hdf5_filepath)
+
+    print('\nDataLoader ({} sets x {} fields): lazy {:.2f} ms, eager {:.2f} ms ({:.1f}x)'
+          .format(NUM_SETS, NUM_FIELDS, time_lazy * 1000, time_eager * 1000, time_eager / time_lazy))
+    assert time_lazy < time_eager
+
+
+@pytest.mark.slow
+def test_benchmark_list_and_size(hdf5_filepath):
+    def list_and_size(hdf5_filepath):
+        data_loader = load_data_loader(hdf5_filepath)
+        data_loader.list()
+        data_loader.size(field='field_0')
+        return data_loader
+
+    time_index = best_time(list_and_size, hdf5_filepath)
+
+    print('\nDataLoader list() + size(): {:.2f} ms'.format(time_index * 1000))
+    data_loader = list_and_size(hdf5_filepath)
+    for set_name in data_loader.sets:
+        assert data_loader.sets[set_name].fields.loaded() == []
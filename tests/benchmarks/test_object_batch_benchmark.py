@@ -0,0 +1,70 @@
+"""
+Benchmark fetching the values of a batch of objects.
+
+Run with: pytest tests/benchmarks --runslow -s
+"""
+
+
+import timeit
+import h5py
+import numpy as np
+import pytest
+
+from dbcollection.core.loader import SetLoader
+from dbcollection.utils.hdf5 import HDF5Manager
+from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
+
+
+# layout of a COCO detection set (13 object fields)
+NUM_OBJECTS = 100000
+NUM_FIELDS = 13
+BATCH_SIZE = 256
+
+
+@pytest.fixture(scope='module')
+def set_loader(tmpdir_factory):
+    filename = str(tmpdir_factory.mktemp('benchmark').join('objects.h5'))
+    fields = ['field_{}'.format(i) for i in range(NUM_FIELDS)]
+    rng = np.random.RandomState(0)
+    hdf5_manager = HDF5Manager(filename)
+    for field in fields:
+        hdf5_manager.add_field_to_group('train', field, rng.rand(NUM_OBJECTS, 4), dtype=np.float32)
+    object_ids = np.tile(np.arange(NUM_OBJECTS)[:, None], (1, NUM_FIELDS))
+    object_ids[rng.rand(NUM_OBJECTS, NUM_FIELDS) < 0.1] = -1
+    hdf5_manager.add_field_to_group('train', 'object_fields', str2ascii(fields), dtype=np.uint8, fillvalue=0)
+    hdf5_manager.add_field_to_group('train', 'object_ids', object_ids, dtype=np.int32)
+    hdf5_manager.close()
+    h5obj = h5py.File(filename, 'r')
+    set_loader = SetLoader(h5obj['train'])
+    # the fields are kept in memory (as in a training loop), so the per-read
+    # overhead dominates instead of the decompression of the hdf5 chunks
+    for field in fields + ['object_ids']:
+        set_loader.fields[field].to_memory = True
+    yield set_loader
+    h5obj.close()
+
+
+def get_objects_loop(set_loader, index):
+    """Reference implementation (one read per object and field)."""
+    return [set_loader._convert_to_value_single_object(idx)
+            for idx in set_loader.get_batch('object_ids', index).tolist()]
+
+
+@pytest.mark.slow
+def test_benchmark_object_batch(set_loader):
+    # object() sorts the indexes, so a sorted batch is used to compare the outputs
+    index = np.sort(np.random.RandomState(1).choice(NUM_OBJECTS, BATCH_SIZE, replace=False))
+    expected = get_objects_loop(set_loader, index)
+    objects = set_loader.object(index.tolist(), convert_to_value=True)
+    assert all(np.array_equal(a, b) for obj_a, obj_b in zip(objects, expected) for a, b in zip(obj_a, obj_b))
+
+    time_loop = min(timeit.repeat(lambda: get_objects_loop(set_loader, index), number=1, repeat=3))
+    time_object = min(timeit.repeat(lambda: set_loader.object(index.tolist(), convert_to_value=True),
+                                    number=1, repeat=3))
+    time_batch = min(timeit.repeat(lambda: set_loader.object_batch(index), number=1, repeat=3))
+
+    print('\nObject values ({} objects x {} fields): object_batch {:.4f}s, object {:.4f}s '
+          '(loop: {:.4f}s, {:.1f}x / {:.1f}x)'
+          .format(BATCH_SIZE, NUM_FIELDS, time_batch, time_object, time_loop,
+                  time_loop / time_batch, time_loop / time_object))
+    assert time_batch < time_loop
@@ -0,0 +1,64 @@
+"""
+Benchmark the string <-> ascii conversion methods.
+
+Run with: pytest tests/benchmarks --runslow -s
+"""
+
+
+import timeit
+import numpy as np
+import pytest
+
+from dbcollection.utils.string_ascii import convert_str_to_ascii, convert_ascii_to_str
+
+
+NUM_ROWS = 1000000
+
+
+def convert_str_to_ascii_loop(input_str):
+    """Reference implementation (one string/char at a time)."""
+    max_size = max([len(a) for a in input_str])
+    ascii_array = np.zeros([len(input_str), max_size + 1], dtype=np.uint8)
+    for i, val in enumerate(input_str):
+        ascii_array[i, :len(val)] = np.array([ord(c) for c in val], dtype=np.uint8)
+    return ascii_array
+
+
+def convert_ascii_to_str_loop(input_array):
+    """Reference implementation (one string/char at a time)."""
+    return ["".join([chr(item) for item in filter(lambda x: x > 0, str_)])
+            for str_ in input_array.tolist()]
+
+
+@pytest.fixture(scope='module')
+def filenames():
+    return ['n{:08d}/n{:08d}_{}.JPEG'.format(i % 1000, i % 1000, i) for i in range(NUM_ROWS)]
+
+
+def best_time(fn, data, repeat=3):
+    return min(timeit.repeat(lambda: fn(data), number=1, repeat=repeat))
+
+
+@pytest.mark.slow
+def test_benchmark_convert_str_to_ascii(filenames):
+    assert np.array_equal(convert_str_to_ascii(filenames[:1000]), convert_str_to_ascii_loop(filenames[:1000]))
+
+    time_new = best_time(convert_str_to_ascii, filenames)
+    time_old = best_time(convert_str_to_ascii_loop, filenames, repeat=1)
+
+    print('\nconvert_str_to_ascii ({} rows): {:.3f}s (loop: {:.3f}s, {:.1f}x)'
+          .format(NUM_ROWS, time_new, time_old, time_old / time_new))
+    assert time_new < time_old
+
+
+@pytest.mark.slow
+def test_benchmark_convert_ascii_to_str(filenames):
+    ascii_array = convert_str_to_ascii(filenames)
+    assert convert_ascii_to_str(ascii_array[:1000]) == convert_ascii_to_str_loop(ascii_array[:1000])
+
+    time_new = best_time(convert_ascii_to_str, ascii_array)
+    time_old = best_time(convert_ascii_to_str_loop, ascii_array, repeat=1)
+
+    print('\nconvert_ascii_to_str ({} rows): {:.3f}s (loop: {:.3f}s, {:.1f}x)'
+          .format(NUM_ROWS, time_new, time_old, time_old / time_new))
+    assert time_new < time_old
@@ -1,10 +1,17 @@
 # content of conftest.py
 
 import pytest
+
+
 def pytest_addoption(parser):
     parser.addoption("--runslow", action="store_true",
                      default=False, help="run slow tests")
 
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: slow tests (e.g., benchmarks), need --runslow option to run")
+
+
 def pytest_collection_modifyitems(config, items):
     if config.getoption("--runslow"):
         # --runslow given in cli: do not skip slow tests
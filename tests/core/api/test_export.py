@@ -0,0 +1,133 @@
+"""
+Test dbcollection core API: export.
+"""
+
+
+import os
+import pytest
+
+from dbcollection.core.api.export import export, ExportAPI
+
+
+@pytest.fixture()
+def mocks_init_class(mocker):
+    mock_parse = mocker.patch.object(ExportAPI, "parse_task_name", return_value='taskA')
+    mock_cache = mocker.patch.object(ExportAPI, "get_cache_manager")
+    return [mock_parse, mock_cache]
+
+
+def assert_mock_init_class(mocks):
+    for mock in mocks:
+        assert mock.called
+
+
+@pytest.fixture()
+def test_data():
+    return {
+        "dataset": 'mnist',
+        "task": 'some_task',
+        "format": 'npz',
+        "output_dir": '/some/path/',
+        "batch_size": 128,
+        "verbose": True,
+    }
+
+
+class TestCallExport:
+    """Unit tests for the core api export method."""
+
+    def test_call_with_all_input_args(self, mocker, mocks_init_class, test_data):
+        mock_run = mocker.patch.object(ExportAPI, "run", return_value=['file.npz'])
+
+        filenames = export(test_data["dataset"],
+                           test_data["task"],
+                           test_data["format"],
+                           test_data["output_dir"],
+                           test_data["batch_size"],
+                           test_data["verbose"])
+
+        assert_mock_init_class(mocks_init_class)
+        assert mock_run.called
+        assert filenames == ['file.npz']
+
+    def test_call_without_optional_input_args(self, mocker, mocks_init_class):
+        mock_run = mocker.patch.object(ExportAPI, "run", return_value=[])
+
+        export('some_dataset')
+
+        assert_mock_init_class(mocks_init_class)
+        assert mock_run.called
+
+    def test_call__raises_error_invalid_format(self, mocker, mocks_init_class):
+        with pytest.raises(KeyError):
+            export('some_dataset', format='csv')
+
+    def test_call__raises_error_no_inputs(self, mocker):
+        with pytest.raises(TypeError):
+            export()
+
+
+@pytest.fixture()
+def export_api_cls(mocker, mocks_init_class, test_data):
+    return ExportAPI(
+        name=test_data["dataset"],
+        task=test_data["task"],
+        format=test_data["format"],
+        output_dir=test_data["output_dir"],
+        batch_size=test_data["batch_size"],
+        verbose=test_data["verbose"]
+    )
+
+
+class TestClassExportAPI:
+    """Unit tests for the ExportAPI class."""
+
+    def test_init_with_all_input_args(self, mocker, mocks_init_class, test_data):
+        export_api = ExportAPI(name=test_data["dataset"],
+                               task=test_data["task"],
+                               format=test_data["format"],
+                               output_dir=test_data["output_dir"],
+                               batch_size=test_data["batch_size"],
+                               verbose=test_data["verbose"])
+
+        assert_mock_init_class(mocks_init_class)
+        assert export_api.name == test_data["dataset"]
+        assert export_api.task == 'taskA'
+        assert export_api.format == test_data["format"]
+        assert export_api.batch_size == test_data["batch_size"]
+
+    @pytest.mark.parametrize("batch_size", [0, -1, 1.5])
+    def test_init__raises_error_invalid_batch_size(self, mocker, mocks_init_class, test_data, batch_size):
+        with pytest.raises(AssertionError):
+            ExportAPI(test_data["dataset"], test_data["task"], test_data["format"],
+                      test_data["output_dir"], batch_size, test_data["verbose"])
+
+    def test_run(self, mocker, export_api_cls):
+        mocker.patch.object(ExportAPI, "dataset_task_metadata_exists_in_cache", return_value=True)
+        mock_process = mocker.patch.object(ExportAPI, "process_dataset_task_metadata")
+        mocker.patch.object(ExportAPI, "get_hdf5_file_path_from_cache", return_value='/cache/mnist/classification.h5')
+        mock_export = mocker.patch('dbcollection.core.api.export.export_hdf5_file', return_value=['file.npz'])
+
+        filenames = export_api_cls.run()
+
+        assert not mock_process.called
+        mock_export.assert_called_once_with('/cache/mnist/classification.h5', '/some/path/',
+                                            file_format='npz', batch_size=128, verbose=True)
+        assert filenames == ['file.npz']
+
+    def test_run_processes_missing_task(self, mocker, export_api_cls):
+        mocker.patch.object(ExportAPI, "dataset_task_metadata_exists_in_cache", return_value=False)
+        mock_process = mocker.patch.object(ExportAPI, "process_dataset_task_metadata")
+        mocker.patch.object(ExportAPI, "get_hdf5_file_path_from_cache", return_value='/cache/mnist/classification.h5')
+        mocker.patch('dbcollection.core.api.export.export_hdf5_file', return_value=[])
+
+        export_api_cls.run()
+
+        assert mock_process.called
+
+    def test_get_output_dir_default(self, mocker, export_api_cls):
+        export_api_cls.output_dir = ''
+
+        output_dir = export_api_cls.get_output_dir(os.path.join('cache', 'mnist', 'classification.h5'))
+
+        assert output_dir == os.path.join('cache', 'mnist', 'export', 'taskA', 'npz')
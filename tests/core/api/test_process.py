@@ -58,6 +58,14 @@ class TestCallProcess:
         assert_mock_init_class(mocks_init_class)
         assert mock_run.called
 
+    def test_call_with_storage_profiles(self, mocker, mocks_init_class, test_data):
+        mock_run = mocker.patch.object(ProcessAPI, "run")
+
+        process('some_dataset', storage_profiles={'images': 'lzf'})
+
+        assert_mock_init_class(mocks_init_class)
+        assert mock_run.called
+
     def test_call__raises_error_no_inputs(self, mocker):
         with pytest.raises(TypeError):
             process()
@@ -89,6 +97,60 @@ class TestClassProcessAPI:
         assert process_api.task == test_data["task"]
         assert process_api.verbose == test_data["verbose"]
 
+    def test_init_with_storage_profiles(self, mocker, mocks_init_class, test_data):
+        process_api = ProcessAPI(name=test_data['dataset'],
+                                 task=test_data['task'],
+                                 verbose=test_data['verbose'],
+                                 storage_profiles={'images': 'lzf'})
+
+        assert process_api.storage_profiles == {'images': 'lzf'}
+
+    def test_init_with_string_format(self, mocker, mocks_init_class, test_data):
+        process_api = ProcessAPI(name=test_data['dataset'],
+                                 task=test_data['task'],
+                                 verbose=test_data['verbose'],
+                                 string_format='vlen')
+
+        assert process_api.string_format == 'vlen'
+
+    def test_init_with_list_format(self, mocker, mocks_init_class, test_data):
+        process_api = ProcessAPI(name=test_data['dataset'],
+                                 task=test_data['task'],
+                                 verbose=test_data['verbose'],
+                                 list_format='ragged')
+
+        assert process_api.list_format == 'ragged'
+
+    def test_init_with_workers(self, mocker, mocks_init_class, test_data):
+        process_api = ProcessAPI(name=test_data['dataset'],
+                                 task=test_data['task'],
+                                 verbose=test_data['verbose'],
+                                 workers=4)
+
+        assert process_api.workers == 4
+
+    @pytest.mark.parametrize("workers", [0, -1, 2.5, '4'])
+    def test_init__raises_error_invalid_workers(self, mocker, mocks_init_class, test_data, workers):
+        with pytest.raises(AssertionError):
+            ProcessAPI(name=test_data['dataset'],
+                       task=test_data['task'],
+                       verbose=test_data['verbose'],
+                       workers=workers)
+
+    def test_init_with_multiple_tasks(self, mocker, mocks_init_class, test_data):
+        process_api = ProcessAPI(name=test_data['dataset'],
+                                 task=['taskA', 'taskB'],
+                                 verbose=test_data['verbose'])
+
+        assert process_api.task == ['taskA', 'taskB']
+
+    def test_init__raises_error_invalid_keyword_args(self, mocker, mocks_init_class, test_data):
+        with pytest.raises(TypeError):
+            ProcessAPI(name=test_data['dataset'],
+                       task=test_data['task'],
+                       verbose=test_data['verbose'],
+                       invalid_option=True)
+
     def test_init__raises_error_no_input_args(self, mocker, mocks_init_class, test_data):
         with pytest.raises(TypeError):
             ProcessAPI()
@@ -145,6 +207,20 @@ class TestClassProcessAPI:
         assert mock_process_metadata.called
         assert result == {}
 
+    def test_process_dataset_multiple_tasks(self, mocker, process_api_cls):
+        mocker.patch.object(ProcessAPI, 'get_dataset_data_dir_path', return_value='/some/path/data/dir')
+        mocker.patch.object(ProcessAPI, 'get_dataset_cache_dir_path', return_value='/some/path/cache/dir')
+        mocker.patch.object(ProcessAPI, "get_default_task", return_value='taskA')
+        mock_check_exists = mocker.patch.object(ProcessAPI, "check_if_task_exists_in_database")
+        mock_process_metadata = mocker.patch.object(ProcessAPI, "process_dataset_metadata", return_value={})
+
+        process_api_cls.task = ['default', 'taskB']
+        process_api_cls.process_dataset()
+
+        assert mock_check_exists.call_count == 2
+        mock_process_metadata.assert_called_once_with('/some/path/data/dir', '/some/path/cache/dir',
+                                                      ['taskA', 'taskB'])
+
     def test_get_dataset_data_dir_path(self, mocker, process_api_cls):
         mock_get_metadata = mocker.patch.object(ProcessAPI, "get_dataset_metadata_from_cache", return_value={'data_dir': os.path.join('some', 'dir', 'path')})
 
@@ -194,3 +270,43 @@ class TestClassProcessAPI:
         result = process_api_cls.process_dataset_metadata('/some/path/data', '/some/path/cache', 'taskA')
 
         assert mock_constructor.called
+
+    def test_process_dataset_metadata_with_storage_profiles(self, mocker, process_api_cls):
+        mock_db = mocker.MagicMock()
+        mock_constructor = mocker.patch.object(ProcessAPI, "get_dataset_constructor", return_value=mock_db)
+
+        process_api_cls.storage_profiles = {'images': 'lzf'}
+        process_api_cls.process_dataset_metadata('/some/path/data', '/some/path/cache', 'taskA')
+
+        assert mock_constructor.called
+        assert mock_db.return_value.storage_profiles == {'images': 'lzf'}
+
+    def test_process_dataset_metadata_with_string_format(self, mocker, process_api_cls):
+        mock_db = mocker.MagicMock()
+        mock_constructor = mocker.patch.object(ProcessAPI, "get_dataset_constructor", return_value=mock_db)
+
+        process_api_cls.string_format = 'fixed'
+        process_api_cls.process_dataset_metadata('/some/path/data', '/some/path/cache', 'taskA')
+
+        assert mock_constructor.called
+        assert mock_db.return_value.string_format == 'fixed'
+
+    def test_process_dataset_metadata_with_list_format(self, mocker, process_api_cls):
+        mock_db = mocker.MagicMock()
+        mock_constructor = mocker.patch.object(ProcessAPI, "get_dataset_constructor", return_value=mock_db)
+
+        process_api_cls.list_format = 'ragged'
+        process_api_cls.process_dataset_metadata('/some/path/data', '/some/path/cache', 'taskA')
+
+        assert mock_constructor.called
+        assert mock_db.return_value.list_format == 'ragged'
+
+    def test_process_dataset_metadata_with_workers(self, mocker, process_api_cls):
+        mock_db = mocker.MagicMock()
+        mock_constructor = mocker.patch.object(ProcessAPI, "get_dataset_constructor", return_value=mock_db)
+
+        process_api_cls.workers = 2
+        process_api_cls.process_dataset_metadata('/some/path/data', '/some/path/cache', 'taskA')
+
+        assert mock_constructor.called
+        assert mock_db.return_value.workers == 2
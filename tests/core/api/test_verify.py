@@ -0,0 +1,99 @@
+"""
+Test dbcollection core API: verify.
+"""
+
+
+import os
+import pytest
+
+from dbcollection.core.api.verify import verify, VerifyAPI
+
+
+@pytest.fixture()
+def test_data():
+    return {
+        "dataset": 'mnist',
+        "data_dir": os.path.join('some', 'path', 'mnist'),
+        "workers": 2,
+        "verbose": True,
+    }
+
+
+@pytest.fixture()
+def verify_api_cls(mocker, test_data):
+    mocker.patch.object(VerifyAPI, "get_cache_manager")
+    return VerifyAPI(
+        name=test_data["dataset"],
+        data_dir=test_data["data_dir"],
+        workers=test_data["workers"],
+        verbose=test_data["verbose"]
+    )
+
+
+class TestCallVerify:
+    """Unit tests for the core api verify method."""
+
+    def test_call_with_all_input_args(self, mocker, test_data):
+        mock_cache = mocker.patch.object(VerifyAPI, "get_cache_manager")
+        mock_run = mocker.patch.object(VerifyAPI, "run", return_value={'file.zip': 'ok'})
+
+        status = verify(test_data["dataset"],
+                        test_data["data_dir"],
+                        test_data["workers"],
+                        test_data["verbose"])
+
+        assert mock_cache.called
+        assert mock_run.called
+        assert status == {'file.zip': 'ok'}
+
+    def test_call_without_optional_input_args(self, mocker):
+        mocker.patch.object(VerifyAPI, "get_cache_manager")
+        mock_run = mocker.patch.object(VerifyAPI, "run")
+
+        verify('some_dataset')
+
+        assert mock_run.called
+
+    def test_call__raises_error_no_inputs(self, mocker):
+        with pytest.raises(TypeError):
+            verify()
+
+
+class TestClassVerifyAPI:
+    """Unit tests for the VerifyAPI class."""
+
+    @pytest.mark.parametrize("workers", [0, -1, 1.5])
+    def test_init__raises_error_invalid_workers(self, mocker, test_data, workers):
+        mocker.patch.object(VerifyAPI, "get_cache_manager")
+        with pytest.raises(AssertionError):
+            VerifyAPI(test_data["dataset"], test_data["data_dir"], workers, test_data["verbose"])
+
+    def test_run(self, mocker, verify_api_cls, test_data):
+        mocker.patch.object(VerifyAPI, "get_dataset_urls", return_value=['http://url1.zip'])
+        mock_verify = mocker.patch('dbcollection.core.api.verify.verify_url_files',
+                                   return_value={'url1.zip': 'ok'})
+
+        status = verify_api_cls.run()
+
+        mock_verify.assert_called_once_with(['http://url1.zip'], test_data["data_dir"],
+                                            workers=2, verbose=True)
+        assert status == {'url1.zip': 'ok'}
+
+    def test_get_data_dir_appends_dataset_name(self, mocker, verify_api_cls):
+        verify_api_cls.data_dir = os.path.join('some', 'path')
+
+        assert verify_api_cls.get_data_dir() == os.path.join('some', 'path', 'mnist')
+
+    def test_get_data_dir_from_cache(self, mocker, verify_api_cls):
+        verify_api_cls.data_dir = ''
+        mocker.patch.object(VerifyAPI, "exists_dataset_in_cache", return_value=True)
+        verify_api_cls.cache_manager.dataset.get.return_value = {"data_dir": '/data/mnist'}
+
+        assert verify_api_cls.get_data_dir() == '/data/mnist'
+
+    def test_get_data_dir__raises_error_dataset_not_downloaded(self, mocker, verify_api_cls):
+        verify_api_cls.data_dir = ''
+        mocker.patch.object(VerifyAPI, "exists_dataset_in_cache", return_value=False)
+
+        with pytest.raises(KeyError):
+            verify_api_cls.get_data_dir()
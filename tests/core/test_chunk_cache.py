@@ -0,0 +1,97 @@
+"""
+Test dbcollection/core/chunk_cache.py.
+"""
+
+
+import numpy as np
+import pytest
+
+from dbcollection.core.chunk_cache import ChunkCache
+
+
+def read_block(value, size=10):
+    return lambda: np.full((size,), value, dtype=np.uint8)
+
+
+class TestChunkCache:
+    """Unit tests for the ChunkCache class."""
+
+    def test__init(self):
+        cache = ChunkCache(100)
+
+        assert cache.max_bytes == 100
+        assert cache.nbytes == 0
+        assert len(cache) == 0
+
+    @pytest.mark.parametrize("max_bytes", [0, -1, 1.5, None])
+    def test__init__raises_error_invalid_size(self, max_bytes):
+        with pytest.raises(AssertionError):
+            ChunkCache(max_bytes)
+
+    def test_get_miss_then_hit(self):
+        cache = ChunkCache(100)
+
+        block = cache.get('a', read_block(1))
+        block_cached = cache.get('a', read_block(2))
+
+        assert np.array_equal(block, block_cached)
+        assert cache.misses == 1
+        assert cache.hits == 1
+        assert cache.nbytes == 10
+
+    def test_get_evicts_least_recently_used(self):
+        cache = ChunkCache(20)
+
+        cache.get('a', read_block(1))
+        cache.get('b', read_block(2))
+        cache.get('a', read_block(1))
+        cache.get('c', read_block(3))
+
+        assert cache.evictions == 1
+        assert cache.nbytes == 20
+        cache.get('a', read_block(1))
+        assert cache.hits == 2
+        cache.get('b', read_block(2))
+        assert cache.misses == 4
+
+    def test_get_does_not_cache_blocks_bigger_than_the_cache(self):
+        cache = ChunkCache(5)
+
+        block = cache.get('a', read_block(1))
+
+        assert len(block) == 10
+        assert len(cache) == 0
+        assert cache.nbytes == 0
+
+    def test_clear(self):
+        cache = ChunkCache(100)
+        cache.get('a', read_block(1))
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.info() == {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "blocks": 0,
+            "nbytes": 0,
+            "max_bytes": 100
+        }
+
+    def test_info(self):
+        cache = ChunkCache(100)
+        cache.get('a', read_block(1))
+        cache.get('a', read_block(1))
+
+        info = cache.info()
+
+        assert info["hits"] == 1
+        assert info["misses"] == 1
+        assert info["blocks"] == 1
+        assert info["nbytes"] == 10
+
+    def test__str__(self):
+        cache = ChunkCache(100)
+
+        assert str(cache) == 'ChunkCache: 0/100 bytes, hits<0>, misses<0>, evictions<0>'
@@ -0,0 +1,78 @@
+"""
+Test exporting the metadata of a task to columnar file formats.
+"""
+
+
+import os
+import numpy as np
+import pytest
+
+from dbcollection.core.exporter import export_hdf5_file
+from dbcollection.utils.hdf5 import HDF5Manager
+
+
+CLASSES = ['cat', 'dog', 'horse']
+LISTS = [[0, 2], [], [1, 3, 4]]
+
+
+@pytest.fixture(params=['padded', 'ragged'])
+def hdf5_filepath(tmpdir, request):
+    filename = str(tmpdir.join('task.h5'))
+    hdf5_manager = HDF5Manager(filename)
+    hdf5_manager.set_list_format(request.param)
+    hdf5_manager.add_strings_to_group('train', 'classes', CLASSES)
+    hdf5_manager.add_strings_to_group('train', 'captions', ['a cat', 'ünïcode'], string_format='vlen')
+    hdf5_manager.add_field_to_group('train', 'labels', np.arange(5), dtype=np.int32)
+    hdf5_manager.add_field_to_group('train', 'images', np.arange(5 * 6).reshape(5, 3, 2), dtype=np.uint8)
+    hdf5_manager.add_field_to_group('train', 'skeleton', np.array([[1, 2], [3, 4]]), dtype=np.uint8, fillvalue=0)
+    hdf5_manager.add_list_to_group('train', 'list_labels_per_class', LISTS)
+    hdf5_manager.add_field_to_group('test', 'labels', np.arange(2), dtype=np.int32)
+    hdf5_manager.close()
+    return filename
+
+
+@pytest.mark.parametrize("file_format", ['parquet', 'arrow'])
+def test_export_hdf5_file_arrow(tmpdir, hdf5_filepath, file_format):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    output_dir = str(tmpdir.join('export'))
+
+    def read_column(set_name, field):
+        filename = os.path.join(output_dir, set_name, '{}.{}'.format(field, file_format))
+        if file_format == 'parquet':
+            table = pq.read_table(filename)
+        else:
+            table = pa.ipc.open_file(filename).read_all()
+        return table.column(field).to_pylist()
+
+    filenames = export_hdf5_file(hdf5_filepath, output_dir, file_format, batch_size=2, verbose=False)
+
+    assert sorted(os.path.basename(f) for f in filenames if '/train/' in f.replace(os.sep, '/')) == \
+        sorted('{}.{}'.format(field, file_format) for field in
+               ['classes', 'captions', 'labels', 'images', 'skeleton', 'list_labels_per_class'])
+    assert read_column('train', 'classes') == CLASSES
+    assert read_column('train', 'captions') == ['a cat', 'ünïcode']
+    assert read_column('train', 'labels') == list(range(5))
+    assert read_column('train', 'images')[1] == list(range(6, 12))
+    assert read_column('train', 'skeleton') == [[1, 2], [3, 4]]
+    assert read_column('train', 'list_labels_per_class') == LISTS
+    assert read_column('test', 'labels') == [0, 1]
+
+
+def test_export_hdf5_file_npz(tmpdir, hdf5_filepath):
+    output_dir = str(tmpdir.join('export'))
+
+    filenames = export_hdf5_file(hdf5_filepath, output_dir, 'npz', batch_size=2, verbose=False)
+
+    assert sorted(filenames) == [os.path.join(output_dir, 'test.npz'), os.path.join(output_dir, 'train.npz')]
+    with np.load(os.path.join(output_dir, 'train.npz')) as data:
+        assert data['classes'].tolist() == [b'cat', b'dog', b'horse']
+        assert [s.decode('utf-8') for s in data['captions']] == ['a cat', 'ünïcode']
+        assert np.array_equal(data['labels'], np.arange(5))
+        assert np.array_equal(data['images'], np.arange(5 * 6).reshape(5, 3, 2))
+
+
+def test_export_hdf5_file__raises_error_invalid_format(tmpdir, hdf5_filepath):
+    with pytest.raises(KeyError):
+        export_hdf5_file(hdf5_filepath, str(tmpdir), 'csv')
+
@@ -5,11 +5,18 @@ Test dbcollection/utils/loader.py.
 
 import os
 import sys
+import pickle
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import numpy as np
 import h5py
 import pytest
+from PIL import Image
 
+from dbcollection.core.chunk_cache import ChunkCache
 from dbcollection.core.loader import FieldLoader, SetLoader, DataLoader
+from dbcollection.utils.hdf5 import HDF5Manager
+from dbcollection.utils.query_index import QUERY_INDEX_GROUP, write_query_indexes
 from dbcollection.utils.string_ascii import convert_ascii_to_str as ascii_to_str
 from dbcollection.utils.string_ascii import convert_str_to_ascii as str_to_ascii
 
@@ -185,10 +192,88 @@ class HDF5DatasetMetadataGenerator:
 db_generator = HDF5DatasetMetadataGenerator()
 
 
+NUM_STRESS_ROWS = 20000
+NUM_STRESS_READS = 200
+
+_shared_data_loader = None  # data loader inherited by forked worker processes
+
+
+def read_random_rows(data_loader, seed):
+    """Reads random rows of the 'data' field and returns the sum of their values + the process id."""
+    rng = np.random.RandomState(seed)
+    total = 0
+    for _ in range(NUM_STRESS_READS):
+        index = rng.randint(0, NUM_STRESS_ROWS, 16)
+        total += int(data_loader.get_batch('train', 'data', index).sum())
+        total += int(data_loader.get('train', 'data', int(index[0])).sum())
+    return total, os.getpid()
+
+
+def read_random_rows_pickled(job):
+    data_loader, seed = job
+    return read_random_rows(data_loader, seed)
+
+
+def read_random_rows_inherited(seed):
+    return read_random_rows(_shared_data_loader, seed)
+
+
+def expected_random_rows_sum(data, seed):
+    rng = np.random.RandomState(seed)
+    total = 0
+    for _ in range(NUM_STRESS_READS):
+        index = rng.randint(0, NUM_STRESS_ROWS, 16)
+        total += int(data[index].sum()) + int(data[index[0]].sum())
+    return total
+
+
 # -----------------------------------------------------------
 # Tests
 # -----------------------------------------------------------
 
+@pytest.fixture()
+def objects_set_loader(tmpdir):
+    """SetLoader of a set with string, 2D and missing (-1) object fields."""
+    filename = str(tmpdir.join('objects.h5'))
+    hdf5_manager = HDF5Manager(filename)
+    hdf5_manager.add_strings_to_group('train', 'classes', ['cat', 'dog'])
+    hdf5_manager.add_strings_to_group('train', 'filenames', ['a.jpg', 'b.jpg', 'c.jpg'],
+                                      string_format='vlen')
+    hdf5_manager.add_field_to_group('train', 'boxes', np.arange(12).reshape(3, 4), dtype=np.float32)
+    hdf5_manager.add_field_to_group('train', 'area', np.array([10, 20, 30]), dtype=np.int32)
+    hdf5_manager.add_field_to_group('train', 'object_fields',
+                                    str_to_ascii(['filenames', 'classes', 'boxes', 'area']),
+                                    dtype=np.uint8, fillvalue=0)
+    object_ids = [[0, 0, 0, 0], [1, 1, 1, 1], [2, 0, 2, -1], [0, 1, -1, 2]]
+    hdf5_manager.add_field_to_group('train', 'object_ids', np.array(object_ids), dtype=np.int32)
+    hdf5_manager.close()
+    h5obj = h5py.File(filename, 'r')
+    yield SetLoader(h5obj['train'])
+    h5obj.close()
+
+
+@pytest.fixture()
+def images_data_loader(tmpdir):
+    """DataLoader of a set with image files (a red and a blue image) and boxes."""
+    tmpdir.mkdir('images')
+    for filename, color in (('red.png', (255, 0, 0)), ('blue.png', (0, 0, 255))):
+        data = np.zeros((20, 30, 3), dtype=np.uint8)
+        data[5:15, 10:20] = color
+        Image.fromarray(data).save(str(tmpdir.join('images', filename)))
+    filename = str(tmpdir.join('images.h5'))
+    hdf5_manager = HDF5Manager(filename)
+    hdf5_manager.add_strings_to_group('train', 'image_filenames', ['images/red.png', 'images/blue.png'])
+    hdf5_manager.add_field_to_group('train', 'boxes', np.array([[10, 5, 19, 14]]), dtype=np.float32)
+    hdf5_manager.add_field_to_group('train', 'object_fields', str_to_ascii(['image_filenames', 'boxes']),
+                                    dtype=np.uint8, fillvalue=0)
+    hdf5_manager.add_field_to_group('train', 'object_ids', np.array([[0, 0], [1, 0], [1, -1]]),
+                                    dtype=np.int32)
+    hdf5_manager.close()
+    data_loader = DataLoader('images', 'default', str(tmpdir), filename)
+    yield data_loader
+    data_loader.hdf5_file.close()
+
+
 class TestFieldLoader:
     """Unit tests for the FieldLoader class."""
 
@@ -429,6 +514,144 @@ class TestFieldLoader:
 
             assert np.array_equal(data, set_data['data'])
 
+    class TestGetBatch:
+        """Groups tests for the get_batch() method."""
+
+        @pytest.mark.parametrize("in_memory", [False, True])
+        def test_get_batch_unordered(self, in_memory):
+            field_loader, set_data = db_generator.get_test_data_FieldLoader('train')
+
+            field_loader.to_memory = in_memory
+            idx = [8, 2, 5, 1]
+            data = field_loader.get_batch(idx)
+
+            assert np.array_equal(data, set_data['data'][idx])
+
+        @pytest.mark.parametrize("in_memory", [False, True])
+        def test_get_batch_duplicates(self, in_memory):
+            field_loader, set_data = db_generator.get_test_data_FieldLoader('train')
+
+            field_loader.to_memory = in_memory
+            idx = [3, 0, 3, 9, 0]
+            data = field_loader.get_batch(idx)
+
+            assert np.array_equal(data, set_data['data'][idx])
+
+        def test_get_batch_sparse_indexes(self):
+            field_loader, set_data = db_generator.get_test_data_FieldLoader('train')
+
+            idx = np.array([9, 0])
+            data = field_loader.get_batch(idx)
+
+            assert np.array_equal(data, set_data['data'][idx])
+            assert data.flags['C_CONTIGUOUS']
+
+        def test_get_batch_negative_indexes(self):
+            field_loader, set_data = db_generator.get_test_data_FieldLoader('train')
+
+            idx = [-1, 0]
+            data = field_loader.get_batch(idx)
+
+            assert np.array_equal(data, set_data['data'][idx])
+
+        def test_get_batch_empty_list(self):
+            field_loader, set_data = db_generator.get_test_data_FieldLoader('train')
+
+            data = field_loader.get_batch([])
+
+            assert data.shape == (0,) + set_data['data'].shape[1:]
+
+        def test_get_batch_convert_to_string(self):
+            data_field = 'strings_list'
+            field_loader, set_data = db_generator.get_test_data_FieldLoader('train', data_field)
+
+            idx = [4, 1, 4]
+            data = field_loader.get_batch(idx, convert_to_str=True)
+
+            assert data == ascii_to_str(set_data[data_field][idx])
+
+        def test_get_batch_raises_error_out_of_range(self):
+            field_loader, _ = db_generator.get_test_data_FieldLoader('train')
+
+            with pytest.raises(IndexError):
+                field_loader.get_batch([0, 10])
+
+    class TestChunkCache:
+        """Groups tests for reading data through a chunk cache."""
+
+        @pytest.fixture()
+        def chunked_data(self, tmpdir):
+            data = np.arange(100 * 4).reshape(100, 4)
+            filename = str(tmpdir.join('chunked.h5'))
+            with h5py.File(filename, 'w') as f:
+                f.create_dataset('/train/data', data=data, chunks=(8, 4), compression='gzip')
+            h5obj = h5py.File(filename, 'r')
+            yield h5obj['/train/data'], data
+            h5obj.close()
+
+        def test_get_single_obj(self, chunked_data):
+            hdf5_field, data = chunked_data
+            cache = ChunkCache(10 ** 6)
+            field_loader = FieldLoader(hdf5_field, chunk_cache=cache)
+
+            assert np.array_equal(field_loader.get(3), data[3])
+            assert np.array_equal(field_loader.get(5), data[5])
+            assert np.array_equal(field_loader[9], data[9])
+            assert cache.misses == 2
+            assert cache.hits == 1
+
+        def test_get_multiple_objs(self, chunked_data):
+            hdf5_field, data = chunked_data
+            cache = ChunkCache(10 ** 6)
+            field_loader = FieldLoader(hdf5_field, chunk_cache=cache)
+
+            idx = [1, 7, 50, 99]
+            output = field_loader.get(idx)
+
+            assert np.array_equal(output, data[idx])
+            assert cache.misses == 3
+
+        def test_get_slice(self, chunked_data):
+            hdf5_field, data = chunked_data
+            cache = ChunkCache(10 ** 6)
+            field_loader = FieldLoader(hdf5_field, chunk_cache=cache)
+
+            assert np.array_equal(field_loader[4:20], data[4:20])
+
+        def test_get_batch(self, chunked_data):
+            hdf5_field, data = chunked_data
+            cache = ChunkCache(10 ** 6)
+            field_loader = FieldLoader(hdf5_field, chunk_cache=cache)
+
+            idx = [99, 0, 9, 0, -1]
+            output = field_loader.get_batch(idx)
+
+            assert np.array_equal(output, data[idx])
+            assert cache.misses == 3
+
+        def test_evicts_blocks_when_full(self, chunked_data):
+            hdf5_field, data = chunked_data
+            block_nbytes = data[:8].nbytes
+            cache = ChunkCache(2 * block_nbytes)
+            field_loader = FieldLoader(hdf5_field, chunk_cache=cache)
+
+            for i in range(0, 100, 8):
+                assert np.array_equal(field_loader.get(i), data[i])
+
+            assert len(cache) == 2
+            assert cache.nbytes <= cache.max_bytes
+            assert cache.evictions == 11
+
+        def test_in_memory_skips_cache(self, chunked_data):
+            hdf5_field, data = chunked_data
+            cache = ChunkCache(10 ** 6)
+            field_loader = FieldLoader(hdf5_field, chunk_cache=cache)
+
+            field_loader.to_memory = True
+            field_loader.get(0)
+
+            assert cache.misses == 0
+
     def test_size(self):
         field_loader, set_data = db_generator.get_test_data_FieldLoader('train')
 
@@ -473,6 +696,164 @@ class TestFieldLoader:
 
         assert isinstance(field_loader.data, h5py._hl.dataset.Dataset)
 
+    def test_to_mmap(self):
+        field_loader, set_data = db_generator.get_test_data_FieldLoader('train')
+
+        field_loader.to_mmap = True
+
+        assert isinstance(field_loader.data, np.memmap)
+        assert field_loader.to_mmap
+        assert np.array_equal(field_loader.get(), set_data['data'])
+        assert np.array_equal(field_loader.get(3), set_data['data'][3])
+        assert np.array_equal(field_loader.get_batch([5, 1, 5]), set_data['data'][[5, 1, 5]])
+        assert str(field_loader).startswith('FieldLoader: <numpy.memmap "data"')
+
+    def test_to_mmap_to_disk(self):
+        field_loader, _ = db_generator.get_test_data_FieldLoader('train')
+
+        field_loader.to_mmap = True
+        field_loader.to_mmap = False
+
+        assert isinstance(field_loader.data, h5py._hl.dataset.Dataset)
+        assert not field_loader.to_memory
+
+    def test_to_mmap_raises_error_compressed_field(self, tmpdir):
+        filename = str(tmpdir.join('compressed.h5'))
+        with h5py.File(filename, 'w') as f:
+            f.create_dataset('/train/data', data=np.zeros((10, 2)), compression='gzip')
+            field_loader = FieldLoader(f['/train/data'])
+
+            with pytest.raises(ValueError):
+                field_loader.to_mmap = True
+
+    def test_to_mmap_contiguous_field_from_hdf5_manager(self, tmpdir):
+        filename = str(tmpdir.join('contiguous.h5'))
+        data = np.random.randint(0, 255, (20, 4, 4)).astype(np.uint8)
+        hdf5_manager = HDF5Manager(filename)
+        hdf5_manager.set_storage_profiles({'images': 'contiguous'})
+        hdf5_manager.add_field_to_group('train', 'images', data, dtype=np.uint8, fillvalue=0)
+        hdf5_manager.close()
+
+        with h5py.File(filename, 'r') as f:
+            field_loader = FieldLoader(f['/train/images'])
+            field_loader.to_mmap = True
+
+            assert np.array_equal(field_loader[2:5], data[2:5])
+
+    class TestStringFields:
+        """Group tests for fields stored as fixed/variable-length strings."""
+
+        strings = ['cat', 'dog', 'a_long_class_name', u'caf\xe9']
+
+        @pytest.fixture(params=['fixed', 'vlen'])
+        def field_loader(self, request, tmpdir):
+            filename = str(tmpdir.join('strings.h5'))
+            hdf5_manager = HDF5Manager(filename)
+            hdf5_manager.set_string_format(request.param)
+            hdf5_manager.add_strings_to_group('train', 'classes', self.strings)
+            hdf5_manager.close()
+            h5obj = h5py.File(filename, 'r')
+            yield FieldLoader(h5obj['/train/classes'])
+            h5obj.close()
+
+        def test_is_string(self, field_loader):
+            assert field_loader.is_string
+
+        def test_get_all(self, field_loader):
+            assert field_loader.get() == self.strings
+
+        def test_get_single_obj(self, field_loader):
+            assert field_loader.get(3) == self.strings[3]
+
+        def test_get_ignores_convert_to_str(self, field_loader):
+            assert field_loader.get([0, 1], convert_to_str=True) == self.strings[:2]
+
+        def test_get_batch(self, field_loader):
+            assert field_loader.get_batch([2, 0, 2]) == [self.strings[2], self.strings[0], self.strings[2]]
+
+        def test__getitem__(self, field_loader):
+            assert field_loader[1] == 'dog'
+            assert field_loader[1:3] == self.strings[1:3]
+
+        def test_get_in_memory(self, field_loader):
+            field_loader.to_memory = True
+
+            assert field_loader.get(2) == self.strings[2]
+
+        def test_ascii_field_is_not_string(self):
+            field_loader, _ = db_generator.get_test_data_FieldLoader('train', 'strings_list')
+
+            assert not field_loader.is_string
+
+    class TestRaggedListFields:
+        """Group tests for list fields stored in the 'ragged' format."""
+
+        lists = [[0, 1, 2], [], [3], [4, 5, 6, 7, 8], [9]]
+
+        @pytest.fixture()
+        def field_loaders(self, tmpdir):
+            filename = str(tmpdir.join('lists.h5'))
+            hdf5_manager = HDF5Manager(filename)
+            hdf5_manager.add_list_to_group('train', 'list_padded', self.lists, list_format='padded')
+            hdf5_manager.add_list_to_group('train', 'list_ragged', self.lists, list_format='ragged')
+            hdf5_manager.close()
+            h5obj = h5py.File(filename, 'r')
+            yield FieldLoader(h5obj['/train/list_padded']), FieldLoader(h5obj['/train/list_ragged'])
+            h5obj.close()
+
+        def test_is_ragged(self, field_loaders):
+            padded, ragged = field_loaders
+
+            assert not padded.is_ragged
+            assert ragged.is_ragged
+            assert ragged.shape == padded.shape == (5, 5)
+            assert len(ragged) == 5
+
+        @pytest.mark.parametrize("index", [None, 2, [1], [0, 3], [4, 1, 1]])
+        def test_get_same_as_padded(self, field_loaders, index):
+            padded, ragged = field_loaders
+
+            assert np.array_equal(ragged.get(index), padded.get(index))
+
+        def test_get_batch_same_as_padded(self, field_loaders):
+            padded, ragged = field_loaders
+
+            assert np.array_equal(ragged.get_batch([3, 1, -1, 3]), padded.get_batch([3, 1, -1, 3]))
+
+        def test__getitem__same_as_padded(self, field_loaders):
+            padded, ragged = field_loaders
+
+            assert np.array_equal(ragged[3], padded[3])
+            assert np.array_equal(ragged[1:4], padded[1:4])
+
+        @pytest.mark.parametrize("index", [
+            [3, 0, 3],
+            np.array([4, 1]),
+            np.array([True, False, True, False, True]),
+            (slice(1, 4), 0),
+            (2, slice(0, 2)),
+            ([0, 2], slice(1, None)),
+            slice(None, None, -2),
+        ])
+        def test__getitem__array_indexes_same_as_padded(self, field_loaders, index):
+            padded, ragged = field_loaders
+
+            assert np.array_equal(ragged[index], padded.data[()][index])
+
+        @pytest.mark.parametrize("to_memory", [False, True])
+        def test_get_row(self, field_loaders, to_memory):
+            for field_loader in field_loaders:
+                field_loader.to_memory = to_memory
+                for i, row in enumerate(self.lists):
+                    assert field_loader.get_row(i).tolist() == row
+                assert field_loader.get_row(-2).tolist() == self.lists[-2]
+
+        def test_get_row_raises_error_out_of_range(self, field_loaders):
+            _, ragged = field_loaders
+
+            with pytest.raises(IndexError):
+                ragged.get_row(5)
+
     def test__len__(self):
         field_loader, set_data = db_generator.get_test_data_FieldLoader('train')
 
@@ -597,6 +978,32 @@ class TestSetLoader:
         assert set_loader.object_fields == ascii_to_str(dataset[set_name]['object_fields'])
         assert set_loader.nelems == 5
 
+    def test__init_loads_fields_on_first_access(self):
+        set_loader, set_data, set_fields = db_generator.get_test_dataset_SetLoader('train')
+
+        assert set_loader.fields.loaded() == []
+        assert sorted(set_loader.fields) == set_fields
+        assert 'data' in set_loader.fields
+        assert np.array_equal(set_loader.fields['data'].get(), set_data['data'])
+        assert set_loader.fields.loaded() == [set_loader.fields['data']]
+
+    def test_list_and_size_from_fields_index(self, tmpdir):
+        filename = str(tmpdir.join('indexed.h5'))
+        hdf5_manager = HDF5Manager(filename)
+        hdf5_manager.add_field_to_group('train', 'data', np.zeros((6, 3)), dtype=np.float32)
+        hdf5_manager.add_field_to_group('train', 'object_fields', str_to_ascii(['data']), dtype=np.uint8, fillvalue=0)
+        hdf5_manager.add_field_to_group('train', 'object_ids', np.arange(6).reshape(6, 1), dtype=np.int32)
+        hdf5_manager.close()
+
+        with h5py.File(filename, 'r') as h5obj:
+            set_loader = SetLoader(h5obj['train'])
+
+            assert set_loader.list() == ('data', 'object_fields', 'object_ids')
+            assert set_loader.size('data') == (6, 3)
+            assert set_loader.object_fields == ['data']
+            assert len(set_loader) == 6
+            assert set_loader.fields.loaded() == []
+
     class TestGet:
         """Group tests for the get() method."""
 
@@ -728,6 +1135,24 @@ class TestSetLoader:
 
             assert np.array_equal(data, set_data[field][idx])
 
+    class TestGetBatch:
+        """Group tests for the get_batch() method."""
+
+        def test_get_batch_unordered(self):
+            set_loader, set_data, _ = db_generator.get_test_dataset_SetLoader('train')
+
+            field = 'data'
+            idx = [7, 7, 1, 4]
+            data = set_loader.get_batch(field, idx)
+
+            assert np.array_equal(data, set_data[field][idx])
+
+        def test_get_batch_raises_keyerror_invalid_field(self):
+            set_loader, _, _ = db_generator.get_test_dataset_SetLoader('train')
+
+            with pytest.raises(KeyError):
+                set_loader.get_batch('data_invalid', [0, 1])
+
     class TestObject:
         """Group tests for the object() method."""
 
@@ -781,6 +1206,344 @@ class TestSetLoader:
 
             assert compare_lists(data, expected)
 
+    class TestObjectBatch:
+        """Group tests for the object_batch() method."""
+
+        def test_object_batch(self, objects_set_loader):
+            batch = objects_set_loader.object_batch([3, 2, 0])
+
+            assert list(batch.keys()) == ['filenames', 'classes', 'boxes', 'area']
+            assert batch['filenames'].tolist() == ['a.jpg', 'c.jpg', 'a.jpg']
+            assert ascii_to_str(batch['classes'].data) == ['dog', 'cat', 'cat']
+            assert batch['boxes'].shape == (3, 4)
+            assert batch['boxes'].mask[:, 0].tolist() == [True, False, False]
+            assert np.array_equal(batch['boxes'][1:], [[8, 9, 10, 11], [0, 1, 2, 3]])
+            assert batch['area'].tolist() == [30, None, 10]
+
+        def test_object_batch_matches_object_values(self, objects_set_loader):
+            batch = objects_set_loader.object_batch(range(4), fields=['boxes', 'area'])
+            objects = objects_set_loader.object(convert_to_value=True)
+
+            for i, obj in enumerate(objects):
+                for field, value in zip(['boxes', 'area'], obj[2:]):
+                    if batch[field].mask[i].any():
+                        assert value == []
+                    else:
+                        assert np.array_equal(batch[field][i], value)
+
+        def test_object_batch_reads_each_field_once(self, mocker, objects_set_loader):
+            spy = mocker.spy(FieldLoader, 'get_batch')
+
+            objects_set_loader.object_batch(range(4), fields=['boxes', 'area'])
+
+            assert spy.call_count == 3  # object_ids + one read per field
+
+        def test_object_batch_raises_error_invalid_field(self, objects_set_loader):
+            with pytest.raises(KeyError):
+                objects_set_loader.object_batch([0], fields=['object_ids'])
+
+    def test_object_values_reads_each_field_once(self, mocker, objects_set_loader):
+        spy = mocker.spy(FieldLoader, 'get_batch')
+
+        data = objects_set_loader.object([0, 2], convert_to_value=True)
+
+        assert spy.call_count == len(objects_set_loader.object_fields)
+        assert data[1][0] == 'c.jpg'
+        assert data[1][3] == []
+        assert np.array_equal(data[1][2], [8, 9, 10, 11])
+
+    class TestIterBatches:
+        """Group tests for the iter_batches() method."""
+
+        @pytest.mark.parametrize("prefetch", [0, 2])
+        def test_iter_batches(self, objects_set_loader, prefetch):
+            batches = list(objects_set_loader.iter_batches(['area', 'boxes'], batch_size=3, prefetch=prefetch))
+
+            assert [batch['index'].tolist() for batch in batches] == [[0, 1, 2], [3]]
+            assert batches[0]['area'].tolist() == [10, 20, None]
+            assert np.array_equal(batches[0]['boxes'][1], [4, 5, 6, 7])
+            assert batches[1]['boxes'].mask.all()
+
+        def test_iter_batches_matches_object_batch(self, objects_set_loader):
+            for batch in objects_set_loader.iter_batches(batch_size=2, shuffle=True, seed=0):
+                expected = objects_set_loader.object_batch(batch['index'])
+                for field in objects_set_loader.object_fields:
+                    assert np.ma.allequal(batch[field], expected[field])
+
+        def test_iter_batches_shuffle_is_deterministic(self, objects_set_loader):
+            def get_order(seed):
+                batches = objects_set_loader.iter_batches(['area'], batch_size=1, shuffle=True, seed=seed)
+                return [batch['index'][0] for batch in batches]
+
+            assert get_order(1) == get_order(1)
+            assert sorted(get_order(1)) == [0, 1, 2, 3]
+
+        def test_iter_batches_drop_last(self, objects_set_loader):
+            batches = list(objects_set_loader.iter_batches(['area'], batch_size=3, drop_last=True))
+
+            assert len(batches) == 1
+            assert len(batches[0]['area']) == 3
+
+        def test_iter_batches_field_not_in_object_fields(self, objects_set_loader):
+            batch = next(objects_set_loader.iter_batches(['object_ids'], batch_size=2))
+
+            assert batch['object_ids'].tolist() == [[0, 0, 0, 0], [1, 1, 1, 1]]
+
+        def test_iter_batches_raises_error_invalid_field(self, objects_set_loader):
+            with pytest.raises(KeyError):
+                objects_set_loader.iter_batches(['invalid_field'])
+
+    class TestImageBatch:
+        """Group tests for the image_batch() method."""
+
+        def test_image_batch(self, images_data_loader):
+            set_loader = images_data_loader.sets['train']
+
+            batch = set_loader.image_batch([1, 0], images_data_loader.data_dir)
+
+            assert batch['index'].tolist() == [1, 0]
+            assert batch['image_filenames'][0] == os.path.join(images_data_loader.data_dir, 'images/blue.png')
+            assert batch['images'].shape == (2, 20, 30, 3)
+            assert batch['images'].dtype == np.uint8
+            assert batch['images'][0, 10, 15].tolist() == [0, 0, 255]
+            assert batch['images'][1, 10, 15].tolist() == [255, 0, 0]
+            assert list(batch['timings']) == ['metadata', 'decode']
+
+        def test_image_batch_crop_and_resize(self, images_data_loader):
+            set_loader = images_data_loader.sets['train']
+
+            batch = set_loader.image_batch([0, 2], images_data_loader.data_dir, size=(5, 5), crop_field='boxes')
+
+            assert batch['images'].shape == (2, 5, 5, 3)
+            assert (batch['images'][0] == [255, 0, 0]).all()
+            assert batch['images'][1, 0, 0].tolist() == [0, 0, 0]
+            assert batch['boxes'].mask[1].all()
+
+        def test_image_batch_raises_error_field_not_in_object_fields(self, images_data_loader):
+            with pytest.raises(KeyError):
+                images_data_loader.sets['train'].image_batch([0], images_data_loader.data_dir, crop_field='area')
+
+    class TestShard:
+        """Group tests for the shard() method."""
+
+        @pytest.fixture()
+        def chunked_set_loader(self, tmpdir):
+            filename = str(tmpdir.join('chunked.h5'))
+            hdf5_manager = HDF5Manager(filename)
+            hdf5_manager.add_field_to_group('train', 'area', np.arange(100) * 10, dtype=np.int32, chunks=(16,))
+            hdf5_manager.add_field_to_group('train', 'object_fields', str_to_ascii(['area']),
+                                            dtype=np.uint8, fillvalue=0)
+            hdf5_manager.add_field_to_group('train', 'object_ids', np.arange(100).reshape(100, 1),
+                                            dtype=np.int32, chunks=(8, 1))
+            hdf5_manager.close()
+            h5obj = h5py.File(filename, 'r')
+            yield SetLoader(h5obj['train'])
+            h5obj.close()
+
+        @pytest.mark.parametrize("shuffle_seed", [None, 0])
+        def test_shards_are_disjoint_and_cover_all_objects(self, chunked_set_loader, shuffle_seed):
+            shards = [chunked_set_loader.shard(3, i, shuffle_seed=shuffle_seed) for i in range(3)]
+
+            rows = np.concatenate([shard.rows for shard in shards])
+            assert sorted(rows.tolist()) == list(range(100))
+            assert sorted(len(shard) for shard in shards) in ([32, 32, 36], [20, 32, 48])
+
+        def test_shard_blocks_are_aligned_with_chunks(self, chunked_set_loader):
+            for shard_id in range(3):
+                shard = chunked_set_loader.shard(3, shard_id, shuffle_seed=1)
+
+                blocks = np.unique(shard.rows // 16)
+                for block in blocks:
+                    assert np.isin(np.arange(16 * block, min(100, 16 * (block + 1))), shard.rows).all()
+
+        def get_set_loader(self, tmpdir, area_chunk_rows, ids_chunk_rows):
+            filename = str(tmpdir.join('mixed_chunks.h5'))
+            hdf5_manager = HDF5Manager(filename)
+            hdf5_manager.add_field_to_group('train', 'area', np.arange(200), dtype=np.int32,
+                                            chunks=(area_chunk_rows,))
+            hdf5_manager.add_field_to_group('train', 'object_fields', str_to_ascii(['area']),
+                                            dtype=np.uint8, fillvalue=0)
+            hdf5_manager.add_field_to_group('train', 'object_ids', np.arange(200).reshape(200, 1),
+                                            dtype=np.int32, chunks=(ids_chunk_rows, 1))
+            hdf5_manager.close()
+            return h5py.File(filename, 'r')
+
+        def test_shard_blocks_are_aligned_with_all_chunk_shapes(self, tmpdir):
+            with self.get_set_loader(tmpdir, 12, 16) as h5obj:
+                set_loader = SetLoader(h5obj['train'])
+
+                assert set_loader._get_shard_block_rows(2) == 48
+                shards = [set_loader.shard(2, i, shuffle_seed=3) for i in range(2)]
+                for chunk_rows in (12, 16):
+                    chunks = [set(shard.rows // chunk_rows) for shard in shards]
+                    assert not chunks[0] & chunks[1]
+
+        def test_shard_blocks_align_largest_chunks_if_multiple_too_large(self, tmpdir):
+            with self.get_set_loader(tmpdir, 7, 16) as h5obj:
+                set_loader = SetLoader(h5obj['train'])
+
+                assert set_loader._get_shard_block_rows(3) == 16
+
+        def test_shard_shuffle_depends_on_seed_and_epoch(self, chunked_set_loader):
+            def get_rows(epoch):
+                return chunked_set_loader.shard(2, 0, shuffle_seed=5, epoch=epoch).rows.tolist()
+
+            assert get_rows(0) == get_rows(0)
+            assert any(get_rows(0) != get_rows(epoch) for epoch in range(1, 5))
+
+        def test_shard_get(self, objects_set_loader):
+            shard = objects_set_loader.shard(2, 1)
+
+            assert shard.rows.tolist() == [2, 3]
+            assert shard.get('area', 1) == 30
+            assert shard.get('classes', convert_to_str=True) == ['cat', 'dog']
+            assert shard.get('object_ids').tolist() == [[2, 0, 2, -1], [0, 1, -1, 2]]
+
+        def test_shard_object(self, objects_set_loader):
+            shard = objects_set_loader.shard(2, 1)
+
+            assert shard.object(0).tolist() == [2, 0, 2, -1]
+            assert shard.object(1, convert_to_value=True)[0] == 'a.jpg'
+            assert np.ma.allequal(shard.object_batch([1, 0])['area'],
+                                  objects_set_loader.object_batch([3, 2])['area'])
+
+        def test_shard_iter_batches(self, chunked_set_loader):
+            shard = chunked_set_loader.shard(4, 2, shuffle_seed=0)
+
+            batches = list(shard.iter_batches(['area'], batch_size=5, shuffle=True, seed=0))
+
+            index = np.concatenate([batch['index'] for batch in batches])
+            assert sorted(index.tolist()) == sorted(shard.rows.tolist())
+            assert np.array_equal(np.concatenate([batch['area'] for batch in batches]), index * 10)
+
+        def test_shard_save(self, objects_set_loader, tmpdir):
+            shard = objects_set_loader.shard(2, 1)
+            filename = str(tmpdir.join('shard.h5'))
+
+            shard.save(filename)
+
+            data_loader = DataLoader('objects', 'shard', str(tmpdir), filename)
+            shard_loader = data_loader.sets['train']
+            assert shard_loader.object_fields == objects_set_loader.object_fields
+            assert shard_loader.get('object_ids').tolist() == [[1, 0, 0, -1], [0, 1, -1, 0]]
+            for i, row in enumerate(shard.rows):
+                assert compare_lists(shard_loader.object(i, convert_to_value=True),
+                                     objects_set_loader.object(int(row), convert_to_value=True))
+            assert shard_loader.where('classes', '==', 'dog').tolist() == [1]
+
+        @pytest.mark.parametrize("num_shards, shard_id", [(0, 0), (2, 2), (2, -1)])
+        def test_shard_raises_error_invalid_shard(self, objects_set_loader, num_shards, shard_id):
+            with pytest.raises(AssertionError):
+                objects_set_loader.shard(num_shards, shard_id)
+
+    class TestQuery:
+        """Group tests for the where() and query() methods."""
+
+        @pytest.mark.parametrize("field, op, value, expected", [
+            ('area', '>', 15, [1, 3]),
+            ('area', 'between', (10, 20), [0, 1]),
+            ('area', 'in', [10, 30], [0, 3]),
+            ('area', '==', 25, []),
+            ('classes', '==', 'dog', [1, 3]),
+            ('filenames', 'in', ['a.jpg', 'c.jpg'], [0, 2, 3]),
+            ('filenames', '==', 'z.jpg', []),
+        ])
+        def test_where(self, objects_set_loader, field, op, value, expected):
+            rows = objects_set_loader.where(field, op, value)
+
+            assert rows.tolist() == expected
+
+        def test_where_stored_query_index(self, objects_set_loader):
+            filename = objects_set_loader.hdf5_group.file.filename
+            objects_set_loader.hdf5_group.file.close()
+            with h5py.File(filename, 'a') as h5_file:
+                write_query_indexes(h5_file['train'])
+            with h5py.File(filename, 'r') as h5_file:
+                set_loader = SetLoader(h5_file['train'])
+
+                rows = set_loader.where('classes', '==', 'dog')
+
+                assert rows.tolist() == [1, 3]
+                assert isinstance(set_loader._query_indexes['classes'].rows, h5py.Dataset)
+                assert QUERY_INDEX_GROUP not in set_loader.list()
+            data_loader = DataLoader('objects', 'default', os.path.dirname(filename), filename)
+            assert list(data_loader.sets) == ['train']
+
+        def test_where_raises_error_invalid_operator(self, objects_set_loader):
+            with pytest.raises(KeyError):
+                objects_set_loader.where('area', '!=', 10)
+
+        def test_where_raises_error_range_on_strings(self, objects_set_loader):
+            with pytest.raises(TypeError):
+                objects_set_loader.where('classes', '>', 'cat')
+
+        def test_where_raises_error_field_not_indexable(self, objects_set_loader):
+            with pytest.raises(TypeError):
+                objects_set_loader.where('boxes', '==', 0)
+
+        def test_where_raises_error_invalid_field(self, objects_set_loader):
+            with pytest.raises(KeyError):
+                objects_set_loader.where('object_ids', '==', 0)
+
+        def test_query(self, objects_set_loader):
+            rows = objects_set_loader.query(('classes', '==', 'dog'), ('area', '>=', 30))
+
+            assert rows.tolist() == [3]
+
+        def test_query_matches_scan(self, objects_set_loader):
+            rows = objects_set_loader.query(('filenames', '==', 'a.jpg'), ('classes', 'in', ['cat', 'dog']))
+            df = objects_set_loader.to_dataframe()
+
+            assert rows.tolist() == df.index[df['filenames'] == 'a.jpg'].tolist()
+
+    class TestToDataframe:
+        """Group tests for the to_dataframe() method."""
+
+        def test_to_dataframe(self, objects_set_loader):
+            df = objects_set_loader.to_dataframe()
+
+            assert list(df.columns) == ['filenames', 'classes', 'boxes_0', 'boxes_1', 'boxes_2', 'boxes_3', 'area']
+            assert list(df.index) == [0, 1, 2, 3]
+            assert df['filenames'].tolist() == ['a.jpg', 'b.jpg', 'c.jpg', 'a.jpg']
+            assert df['classes'].dtype.name == 'category'
+            assert df['classes'].tolist() == ['cat', 'dog', 'cat', 'dog']
+            assert df['boxes_1'].tolist()[:3] == [1, 5, 9]
+            assert np.isnan(df['boxes_1'][3])
+            assert df['area'].isna().tolist() == [False, False, True, False]
+            assert df['area'][3] == 30
+
+        def test_to_dataframe_matches_object_values(self, objects_set_loader):
+            df = objects_set_loader.to_dataframe(fields=['boxes'])
+            objects = objects_set_loader.object(convert_to_value=True)
+
+            for i in range(3):
+                assert np.array_equal(df.loc[i, ['boxes_0', 'boxes_1', 'boxes_2', 'boxes_3']].values,
+                                      objects[i][2])
+
+        def test_to_dataframe_rows(self, objects_set_loader):
+            df = objects_set_loader.to_dataframe(fields=['area', 'classes'], rows=[3, 1])
+
+            assert list(df.index) == [3, 1]
+            assert df['area'].tolist() == [30, 20]
+            assert df['classes'].tolist() == ['dog', 'dog']
+
+        def test_to_dataframe_high_cardinality_strings(self, objects_set_loader):
+            df = objects_set_loader.to_dataframe(fields=['filenames'], rows=slice(0, 3))
+
+            assert df['filenames'].dtype == object
+            assert df['filenames'].tolist() == ['a.jpg', 'b.jpg', 'c.jpg']
+
+        def test_to_dataframe_in_memory_field_is_not_copied(self, objects_set_loader):
+            objects_set_loader.fields['boxes'].to_memory = True
+
+            df = objects_set_loader.to_dataframe(fields=['boxes'], rows=slice(0, 2))
+
+            assert np.shares_memory(df['boxes_0'].values, objects_set_loader.fields['boxes'].data)
+
+        def test_to_dataframe_raises_error_invalid_field(self, objects_set_loader):
+            with pytest.raises(KeyError):
+                objects_set_loader.to_dataframe(fields=['object_ids'])
+
     def test_size(self):
         set_loader, set_data, _ = db_generator.get_test_dataset_SetLoader('train')
 
@@ -854,6 +1617,15 @@ class TestDataLoader:
         assert data_loader.hdf5_filepath == hdf5_file
         assert 'train' in data_loader.sets
 
+    def test__init_loads_sets_on_first_access(self):
+        data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+        assert data_loader.sets.loaded() == []
+        assert sorted(data_loader.sets) == ['test', 'train']
+        assert len(data_loader) == 2
+        assert data_loader.sets['test'].set == 'test'
+        assert data_loader.sets.loaded() == [data_loader.sets['test']]
+
     class TestGet:
         """Group tests for the get() method."""
 
@@ -929,6 +1701,62 @@ class TestDataLoader:
 
             assert np.array_equal(data, dataset[set_name][field])
 
+    class TestGetBatch:
+        """Group tests for the get_batch() method."""
+
+        def test_get_batch_unordered(self):
+            data_loader, dataset, _ = db_generator.get_test_dataset_DataLoader()
+
+            set_name = 'test'
+            field = 'number'
+            idx = [4, 0, 2, 0]
+            data = data_loader.get_batch(set_name, field, idx)
+
+            assert np.array_equal(data, dataset[set_name][field][idx])
+
+        def test_get_batch_raise_error_invalid_set(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+            with pytest.raises(KeyError):
+                data_loader.get_batch('val', 'data', [0])
+
+    class TestChunkCache:
+        """Group tests for the chunk cache of the data loader."""
+
+        def test_disabled_by_default(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+            assert data_loader.chunk_cache is None
+            assert data_loader.cache_info() is None
+
+        def test_set_chunk_cache_shared_by_all_fields(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+            data_loader.set_chunk_cache(1024)
+
+            for set_name in data_loader.sets:
+                set_loader = data_loader.sets[set_name]
+                for field in set_loader.fields:
+                    assert set_loader.fields[field].chunk_cache is data_loader.chunk_cache
+            assert data_loader.cache_info()['max_bytes'] == 1024
+
+        def test_set_chunk_cache_disable(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+            data_loader.set_chunk_cache(1024)
+            data_loader.set_chunk_cache(0)
+
+            assert data_loader.chunk_cache is None
+            assert data_loader.sets['train'].fields['data'].chunk_cache is None
+
+        def test_init_with_cache_size(self):
+            test_info = db_generator.get_test_DataLoader_info()
+
+            data_loader = DataLoader(test_info["name"], test_info["task"], test_info["data_dir"],
+                                     test_info["hdf5_file"], cache_size=1024)
+
+            assert data_loader.cache_info()['max_bytes'] == 1024
+
     class TestObject:
         """Group tests for the object() method."""
 
@@ -978,6 +1806,121 @@ class TestDataLoader:
 
             assert np.array_equal(data, dataset[set_name]['object_ids'])
 
+    class TestObjectBatch:
+        """Group tests for the object_batch() method."""
+
+        def test_object_batch(self):
+            data_loader, dataset, _ = db_generator.get_test_dataset_DataLoader()
+
+            batch = data_loader.object_batch('train', [4, 1], fields=['data', 'number'])
+
+            assert np.array_equal(batch['data'], dataset['train']['data'][[4, 1]])
+            assert np.array_equal(batch['number'], dataset['train']['number'][[4, 1]])
+
+        def test_object_batch_raise_error_invalid_set(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+            with pytest.raises(KeyError):
+                data_loader.object_batch('val', [0])
+
+    class TestIterBatches:
+        """Group tests for the iter_batches() method."""
+
+        def test_iter_batches(self):
+            data_loader, dataset, _ = db_generator.get_test_dataset_DataLoader()
+
+            batches = list(data_loader.iter_batches('train', ['data', 'number'], batch_size=4,
+                                                    shuffle=True, seed=3, prefetch=2))
+
+            index = np.concatenate([batch['index'] for batch in batches])
+            assert sorted(index.tolist()) == list(range(len(dataset['train']['number'])))
+            assert np.array_equal(np.concatenate([batch['data'] for batch in batches]),
+                                  dataset['train']['data'][index])
+
+        def test_iter_batches_raise_error_invalid_set(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+            with pytest.raises(KeyError):
+                data_loader.iter_batches('val')
+
+    class TestImageBatch:
+        """Group tests for the image_batch() method."""
+
+        def test_image_batch(self, images_data_loader):
+            pool = ThreadPool(2)
+            try:
+                batch = images_data_loader.image_batch('train', [0, 1, 2], size=(15, 10), pool=pool)
+            finally:
+                pool.close()
+                pool.join()
+
+            assert batch['images'].shape == (3, 10, 15, 3)
+            assert batch['images'][2, 5, 7].tolist() == [0, 0, 255]
+
+        def test_image_batch_raise_error_invalid_set(self, images_data_loader):
+            with pytest.raises(KeyError):
+                images_data_loader.image_batch('val', [0])
+
+    class TestShard:
+        """Group tests for the shard() method."""
+
+        def test_shard(self):
+            data_loader, dataset, _ = db_generator.get_test_dataset_DataLoader()
+
+            shards = [data_loader.shard('train', 2, i, shuffle_seed=0) for i in range(2)]
+
+            assert sorted(np.concatenate([shard.rows for shard in shards]).tolist()) == \
+                list(range(len(dataset['train']['number'])))
+            assert np.array_equal(shards[0].get('number'), dataset['train']['number'][shards[0].rows])
+
+        def test_shard_raise_error_invalid_set(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+            with pytest.raises(KeyError):
+                data_loader.shard('val', 2, 0)
+
+    class TestQuery:
+        """Group tests for the where() and query() methods."""
+
+        def test_where(self):
+            data_loader, dataset, _ = db_generator.get_test_dataset_DataLoader()
+
+            rows = data_loader.where('train', 'number', '<', 3)
+
+            assert rows.tolist() == [0, 1, 2]
+
+        def test_query(self):
+            data_loader, dataset, _ = db_generator.get_test_dataset_DataLoader()
+
+            rows = data_loader.query('train', ('number', '>=', 3), ('strings_list', 'in', ['string_1', 'string_4']))
+
+            assert rows.tolist() == [4]
+
+        def test_query_raise_error_invalid_set(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+            with pytest.raises(KeyError):
+                data_loader.query('val', ('number', '==', 0))
+
+    class TestToDataframe:
+        """Group tests for the to_dataframe() method."""
+
+        def test_to_dataframe(self):
+            data_loader, dataset, _ = db_generator.get_test_dataset_DataLoader()
+
+            df = data_loader.to_dataframe('train', fields=['number', 'strings_list', 'data'])
+
+            assert len(df) == len(dataset['train']['object_ids'])
+            assert np.array_equal(df['number'].values, dataset['train']['number'])
+            assert df['strings_list'].tolist() == ascii_to_str(dataset['train']['strings_list'])
+            assert np.array_equal(df[['data_{}'.format(i) for i in range(10)]].values, dataset['train']['data'])
+
+        def test_to_dataframe_raise_error_invalid_set(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+
+            with pytest.raises(KeyError):
+                data_loader.to_dataframe('val')
+
     class TestSize:
         """Group tests for the size() method."""
 
@@ -1115,3 +2058,96 @@ class TestDataLoader:
         matching_str = "DataLoader: some_db ('task' task)"
 
         assert str(data_loader) == matching_str
+
+    class TestMultiProcess:
+        """Group tests for sharing a data loader with other processes."""
+
+        @pytest.fixture()
+        def stress_data(self, tmpdir):
+            filename = str(tmpdir.join('stress.h5'))
+            data = np.random.RandomState(0).randint(0, 100, (NUM_STRESS_ROWS, 8))
+            hdf5_manager = HDF5Manager(filename)
+            hdf5_manager.add_field_to_group('train', 'data', data, dtype=np.int32)
+            hdf5_manager.close()
+            return filename, data
+
+        def test_pickle_stores_only_paths_and_options(self):
+            data_loader, dataset, _ = db_generator.get_test_dataset_DataLoader()
+            data_loader.set_chunk_cache(1024)
+
+            state = data_loader.__getstate__()
+            new_data_loader = pickle.loads(pickle.dumps(data_loader))
+
+            assert state == {
+                "name": 'some_db',
+                "task": 'task',
+                "data_dir": './some/dir',
+                "hdf5_filepath": db_generator.get_test_hdf5_filepath_DataLoader(),
+                "cache_size": 1024,
+                "swmr": False
+            }
+            assert new_data_loader.hdf5_file is not data_loader.hdf5_file
+            assert new_data_loader.chunk_cache.max_bytes == 1024
+            assert np.array_equal(new_data_loader.get('train', 'data', 0), dataset['train']['data'][0])
+
+        def test_reopens_file_in_new_process(self, mocker):
+            data_loader, dataset, _ = db_generator.get_test_dataset_DataLoader()
+            data_loader.set_chunk_cache(1024)
+            hdf5_file = data_loader.hdf5_file
+            set_loader = data_loader.sets['train']
+            chunk_cache = data_loader.chunk_cache
+
+            mocker.patch('dbcollection.core.loader.os.getpid', return_value=os.getpid() + 1)
+
+            assert data_loader.hdf5_file is not hdf5_file
+            assert data_loader.sets['train'] is not set_loader
+            assert data_loader.chunk_cache is not chunk_cache
+            assert np.array_equal(data_loader.get('train', 'data', 1), dataset['train']['data'][1])
+
+        def test_does_not_reopen_file_in_same_process(self):
+            data_loader, _, _ = db_generator.get_test_dataset_DataLoader()
+            hdf5_file = data_loader.hdf5_file
+
+            data_loader.get('train', 'data', 0)
+
+            assert data_loader.hdf5_file is hdf5_file
+
+        def test_swmr(self, stress_data):
+            filename, data = stress_data
+
+            data_loader = DataLoader('some_db', 'task', './some/dir', filename, swmr=True)
+
+            assert data_loader.hdf5_file.swmr_mode
+            assert np.array_equal(data_loader.get('train', 'data', 5), data[5])
+
+        def test_random_reads_pickled_loader(self, stress_data):
+            filename, data = stress_data
+            data_loader = DataLoader('some_db', 'task', './some/dir', filename, cache_size=1024 ** 2)
+            data_loader.get('train', 'data', 0)  # opens the file handles in the parent
+
+            pool = multiprocessing.Pool(4)
+            try:
+                results = pool.map(read_random_rows_pickled, [(data_loader, seed) for seed in range(8)])
+            finally:
+                pool.close()
+                pool.join()
+
+            assert [total for total, _ in results] == [expected_random_rows_sum(data, seed) for seed in range(8)]
+
+        @pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires fork()")
+        def test_random_reads_forked_loader(self, stress_data):
+            global _shared_data_loader
+            filename, data = stress_data
+            _shared_data_loader = DataLoader('some_db', 'task', './some/dir', filename, cache_size=1024 ** 2)
+            _shared_data_loader.get('train', 'data', 0)  # opens the file handles in the parent
+
+            pool = multiprocessing.get_context('fork').Pool(4)
+            try:
+                results = pool.map(read_random_rows_inherited, range(8))
+            finally:
+                pool.close()
+                pool.join()
+                _shared_data_loader = None
+
+            assert [total for total, _ in results] == [expected_random_rows_sum(data, seed) for seed in range(8)]
+            assert all(pid != os.getpid() for _, pid in results)
@@ -4,6 +4,9 @@ Test the base classes for managing datasets and tasks.
 
 
 import os
+import json
+import multiprocessing
+import h5py
 import pytest
 import numpy as np
 
@@ -13,6 +16,11 @@ from dbcollection.datasets import (
     BaseField,
     BaseColumnField
 )
+from dbcollection.utils import file_load
+from dbcollection.utils.file_load import load_json
+from dbcollection.utils.hdf5 import HDF5Manager, load_fields_index
+from dbcollection.utils.query_index import QUERY_INDEX_GROUP
+from dbcollection.utils.string_ascii import convert_ascii_to_str as ascii2str
 
 
 @pytest.fixture()
@@ -108,6 +116,65 @@ class TestBaseDataset:
         assert mock_process_metadata.called
         assert result == {'taskA': {"filename": '/path/to/task/filename.h5', "categories": ()}}
 
+    def test_process_multiple_tasks(self, mocker, mock_dataset_class):
+        mock_process_metadata = mocker.patch.object(BaseDataset, "process_metadata",
+                                                    side_effect=lambda task: '/path/to/{}.h5'.format(task))
+
+        result = mock_dataset_class.process(['taskA', 'taskB'])
+
+        assert mock_process_metadata.call_count == 2
+        assert result == {'taskA': {"filename": '/path/to/taskA.h5', "categories": ()},
+                          'taskB': {"filename": '/path/to/taskB.h5', "categories": ()}}
+
+    def test_process_multiple_tasks_releases_json_files(self, mocker, mock_dataset_class):
+        mocker.patch.object(BaseDataset, "process_metadata", return_value='/path/to/task/filename.h5')
+        mocker.patch.object(BaseDataset, "get_tasks_json_files", side_effect=lambda tasks: set(tasks))
+        mock_release = mocker.patch('dbcollection.datasets.release_json')
+
+        mock_dataset_class.process(['taskA', 'taskB'])
+
+        assert mock_release.call_args_list == [mocker.call({'taskB'}), mocker.call(set())]
+
+    def test_process_multiple_tasks_loads_shared_json_files(self, mocker, mock_dataset_class):
+        json_files = {'taskA': {'a.json', 'ab.json'}, 'taskB': {'ab.json'}, 'taskC': {'a.json'}}
+        mocker.patch.object(BaseDataset, "process_metadata", return_value='/path/to/task/filename.h5')
+        mocker.patch.object(BaseDataset, "get_tasks_json_files",
+                            side_effect=lambda tasks: set().union(*[json_files[task] for task in tasks]))
+        mock_load = mocker.patch.object(BaseDataset, "load_json_files")
+
+        mock_dataset_class.process(['taskA', 'taskB', 'taskC'])
+
+        assert mock_load.call_args_list == [mocker.call({'a.json', 'ab.json'}), mocker.call(set()),
+                                            mocker.call(set())]
+
+    @pytest.mark.skipif(hasattr(multiprocessing, 'get_start_method') and
+                        multiprocessing.get_start_method() != 'fork',
+                        reason='the worker processes only share the json files when forked')
+    def test_process_multiple_tasks_shares_json_files_with_workers(self, tmpdir):
+        with open(str(tmpdir.join('annotations.json')), 'w') as f:
+            json.dump({'train': ['a', 'b'], 'val': ['c', 'd']}, f)
+        dataset = BaseDataset(data_path=str(tmpdir), cache_path=str(tmpdir), verbose=False)
+        dataset.tasks = {'taskA': SampleJsonTask, 'taskB': SampleJsonTask2}
+        dataset.workers = 2
+
+        dataset.process(['taskA', 'taskB'])
+
+        for filename in ('sample_json.h5', 'sample_json2.h5'):
+            with h5py.File(str(tmpdir.join(filename)), 'r') as f:
+                assert ascii2str(f['val/names'][()]) == ['c', 'd']
+                assert f['train/cached'][0] == 1 and f['val/cached'][0] == 1
+                assert os.getpid() not in [f['train/pid'][0], f['val/pid'][0]]
+
+    def test_get_tasks_json_files(self, mocker, mock_dataset_class):
+        class TaskA(object):
+            annotation_path = {"train": os.path.join('annotations', 'train.json'),
+                               "test": os.path.join('annotations', 'test.mat')}
+        mock_dataset_class.tasks = {'taskA': TaskA, 'taskB': object}
+
+        result = mock_dataset_class.get_tasks_json_files(['taskA', 'taskB'])
+
+        assert result == {os.path.join(mock_dataset_class.data_path, 'annotations', 'train.json')}
+
     def test_parse_task_name_with_valid_task_name(self, mocker, mock_dataset_class):
         task = 'taskA'
 
@@ -138,6 +205,46 @@ class TestBaseDataset:
 
         assert mock_get_constructor.called
 
+    def test_process_metadata_overrides_storage_profiles(self, mocker, mock_dataset_class):
+        mock_task = mocker.MagicMock()
+        mock_task.return_value.storage_profiles = {'images': 'images', 'labels': 'ids'}
+        mocker.patch.object(BaseDataset, "get_task_constructor", return_value=mock_task)
+
+        mock_dataset_class.storage_profiles = {'images': 'lzf'}
+        mock_dataset_class.process_metadata('some_task')
+
+        assert mock_task.return_value.storage_profiles == {'images': 'lzf', 'labels': 'ids'}
+
+    def test_process_metadata_overrides_string_format(self, mocker, mock_dataset_class):
+        mock_task = mocker.MagicMock()
+        mock_task.return_value.string_format = 'ascii'
+        mocker.patch.object(BaseDataset, "get_task_constructor", return_value=mock_task)
+
+        mock_dataset_class.string_format = 'vlen'
+        mock_dataset_class.process_metadata('some_task')
+
+        assert mock_task.return_value.string_format == 'vlen'
+
+    def test_process_metadata_overrides_list_format(self, mocker, mock_dataset_class):
+        mock_task = mocker.MagicMock()
+        mock_task.return_value.list_format = 'padded'
+        mocker.patch.object(BaseDataset, "get_task_constructor", return_value=mock_task)
+
+        mock_dataset_class.list_format = 'ragged'
+        mock_dataset_class.process_metadata('some_task')
+
+        assert mock_task.return_value.list_format == 'ragged'
+
+    def test_process_metadata_overrides_workers(self, mocker, mock_dataset_class):
+        mock_task = mocker.MagicMock()
+        mock_task.return_value.workers = 1
+        mocker.patch.object(BaseDataset, "get_task_constructor", return_value=mock_task)
+
+        mock_dataset_class.workers = 4
+        mock_dataset_class.process_metadata('some_task')
+
+        assert mock_task.return_value.workers == 4
+
     def test_get_task_constructor(self, mocker, mock_dataset_class):
         task = 'taskZ'
 
@@ -147,6 +254,54 @@ class TestBaseDataset:
         assert result == 'some_data'
 
 
+class SampleSetsTask(BaseTask):
+    """Task with known sets (used to test processing sets in parallel)."""
+
+    filename_h5 = 'sample'
+
+    def get_set_names(self):
+        return ['train', 'val', 'test']
+
+    def load_data(self):
+        for set_name in self.get_set_names():
+            if self.is_selected_set(set_name):
+                yield {set_name: [set_name + str(i) for i in range(5)]}
+
+    def process_set_metadata(self, data, set_name):
+        self.hdf5_manager.add_strings_to_group(set_name, 'names', data)
+        self.hdf5_manager.add_field_to_group(set_name, 'pid', np.array([os.getpid()]), dtype=np.int64)
+        self.hdf5_manager.add_strings_to_group(set_name, 'object_fields', ['names'])
+        self.hdf5_manager.add_field_to_group(set_name, 'object_ids', np.arange(5).reshape(5, 1), dtype=np.int32)
+
+
+class SampleJsonTask(SampleSetsTask):
+    """Task loading its sets from a json file (used to test sharing json files between tasks)."""
+
+    filename_h5 = 'sample_json'
+
+    annotation_path = {"train": 'annotations.json', "val": 'annotations.json'}
+
+    def get_set_names(self):
+        return ['train', 'val']
+
+    def load_data(self):
+        for set_name in self.get_set_names():
+            filename = os.path.abspath(os.path.join(self.data_path, self.annotation_path[set_name]))
+            cached = any(key[0] == filename for key in file_load._json_files or {})
+            yield {set_name: {"names": load_json(filename)[set_name], "cached": cached}}
+
+    def process_set_metadata(self, data, set_name):
+        self.hdf5_manager.add_strings_to_group(set_name, 'names', data["names"])
+        self.hdf5_manager.add_field_to_group(set_name, 'cached', np.array([data["cached"]]), dtype=np.uint8)
+        self.hdf5_manager.add_field_to_group(set_name, 'pid', np.array([os.getpid()]), dtype=np.int64)
+
+
+class SampleJsonTask2(SampleJsonTask):
+    """Second task loading the same json file."""
+
+    filename_h5 = 'sample_json2'
+
+
 @pytest.fixture()
 def mock_task_class(test_data):
     return BaseTask(
@@ -222,6 +377,32 @@ class TestBaseTask:
         assert mock_teardown_manager.called
         assert filename == mock_task_class.hdf5_filepath
 
+    def test_run_with_workers_and_unknown_sets(self, mocker, mock_task_class):
+        mocker.patch.object(BaseTask, "setup_hdf5_manager")
+        mocker.patch.object(BaseTask, "load_data", return_value={})
+        mocker.patch.object(BaseTask, "process_metadata")
+        mocker.patch.object(BaseTask, "teardown_hdf5_manager")
+        mock_run_parallel = mocker.patch.object(BaseTask, "run_parallel")
+        mock_task_class.workers = 4
+
+        mock_task_class.run()
+
+        assert not mock_run_parallel.called
+
+    def test_run_parallel(self, tmpdir):
+        task = SampleSetsTask(data_path=str(tmpdir), cache_path=str(tmpdir), verbose=False)
+        task.workers = 2
+
+        filename = task.run()
+
+        assert sorted(os.listdir(str(tmpdir))) == ['sample.h5']
+        with h5py.File(filename, 'r') as f:
+            assert sorted(f.keys()) == [QUERY_INDEX_GROUP, 'test', 'train', 'val']
+            assert sorted(f[QUERY_INDEX_GROUP]) == ['test', 'train', 'val']
+            assert ascii2str(f['val/names'][()]) == ['val' + str(i) for i in range(5)]
+            assert os.getpid() not in [f[set_name + '/pid'][0] for set_name in ('test', 'train', 'val')]
+            assert load_fields_index(f['train'])["fields"]["names"]["shape"] == [5, 7]
+
     def test_load_data(self, mocker, mock_task_class):
         mock_task_class.load_data()
 
@@ -237,12 +418,67 @@ class TestBaseTask:
 
         assert mock_process_metadata.called
 
+    def test_process_metadata_selected_sets(self, mocker, mock_task_class):
+        mock_process_metadata = mocker.patch.object(BaseTask, "process_set_metadata")
+        mock_task_class.selected_sets = ['test']
+
+        mock_task_class.process_metadata(iter([{'train': ['dummy']}, {'test': ['other']}]))
+
+        mock_process_metadata.assert_called_once_with(['other'], 'test')
+
+    def test_process_metadata_does_not_prefetch_sets_by_default(self, mocker, mock_task_class):
+        mocker.patch.object(BaseTask, "process_set_metadata")
+        mock_prefetch = mocker.patch('dbcollection.datasets.prefetch')
+
+        mock_task_class.process_metadata(iter([{'train': ['dummy']}]))
+
+        assert not mock_prefetch.called
+
+    @pytest.mark.parametrize("prefetch_sets", [True, False])
+    def test_process_metadata_set_order(self, mocker, mock_task_class, prefetch_sets):
+        mock_process_metadata = mocker.patch.object(BaseTask, "process_set_metadata")
+        mock_task_class.prefetch_sets = prefetch_sets
+
+        def sample_generator():
+            yield {'train': ['dummy', 'data']}
+            yield {'test': ['other', 'data']}
+        generator = sample_generator()
+
+        mock_task_class.process_metadata(generator)
+
+        assert mock_process_metadata.call_args_list == [
+            mocker.call(['dummy', 'data'], 'train'),
+            mocker.call(['other', 'data'], 'test')
+        ]
+
+    def test_setup_hdf5_manager(self, mocker, mock_task_class):
+        mock_open = mocker.patch.object(HDF5Manager, "open_file", return_value={})
+        mock_task_class.mmap_fields = ('images',)
+
+        mock_task_class.setup_hdf5_manager()
+
+        assert mock_open.called
+        assert mock_task_class.hdf5_manager.storage_profiles == {'images': 'contiguous'}
+        assert mock_task_class.hdf5_manager.string_format == 'ascii'
+        assert mock_task_class.hdf5_manager.list_format == 'padded'
+
+    def test_get_storage_profiles(self, mocker, mock_task_class):
+        mock_task_class.mmap_fields = ('images',)
+        mock_task_class.storage_profiles = {'images': 'lzf', 'labels': 'ids'}
+
+        storage_profiles = mock_task_class.get_storage_profiles()
+
+        assert storage_profiles == {'images': 'lzf', 'labels': 'ids'}
+
     def test_teardown_hdf5_manager(self, mocker, mock_task_class):
+        mock_write_indexes = mocker.patch("dbcollection.datasets.write_query_indexes")
         mock_add_field = mocker.Mock()
+        mock_add_field.file = {'train': 'train_group'}
         mock_task_class.hdf5_manager = mock_add_field
 
         mock_task_class.teardown_hdf5_manager()
 
+        mock_write_indexes.assert_called_once_with('train_group')
         mock_add_field.close.assert_called_once_with()
 
 
@@ -286,6 +522,21 @@ class TestBaseField:
             data=data
         )
 
+    def test_save_field_to_hdf5_with_storage_profile(self, mocker):
+        mock_hdf5_manager = mocker.Mock()
+        base_field = BaseField(set_name='train', hdf5_manager=mock_hdf5_manager)
+
+        base_field.storage = 'ids'
+        data = np.array(range(10))
+        base_field.save_field_to_hdf5('train', 'fieldA', data)
+
+        mock_hdf5_manager.add_field_to_group.assert_called_once_with(
+            group='train',
+            field='fieldA',
+            data=data,
+            storage='ids'
+        )
+
     def test_save_field_to_hdf5_all_args(self, mocker):
         mock_hdf5_manager = mocker.Mock()
 
@@ -318,6 +569,44 @@ class TestBaseField:
             compression_opts=4
         )
 
+    def test_save_strings_to_hdf5(self, mocker):
+        mock_hdf5_manager = mocker.Mock()
+        base_field = BaseField(set_name='train', hdf5_manager=mock_hdf5_manager)
+
+        base_field.save_strings_to_hdf5('train', 'classes', ['cat', 'dog'])
+
+        mock_hdf5_manager.add_strings_to_group.assert_called_once_with(
+            group='train',
+            field='classes',
+            data=['cat', 'dog']
+        )
+
+    def test_save_lists_to_hdf5(self, mocker):
+        mock_hdf5_manager = mocker.Mock()
+        base_field = BaseField(set_name='train', hdf5_manager=mock_hdf5_manager)
+
+        base_field.save_lists_to_hdf5('train', 'list_ids', [[0, 1], [2]])
+
+        mock_hdf5_manager.add_list_to_group.assert_called_once_with(
+            group='train',
+            field='list_ids',
+            data=[[0, 1], [2]]
+        )
+
+    def test_save_rows_to_hdf5(self, mocker):
+        mock_hdf5_manager = mocker.Mock()
+        base_field = BaseField(set_name='train', hdf5_manager=mock_hdf5_manager)
+        rows = iter([[0, 1], [2]])
+
+        base_field.save_rows_to_hdf5('train', 'boxes', rows, np.float32)
+
+        mock_hdf5_manager.add_rows_to_group.assert_called_once_with(
+            group='train',
+            field='boxes',
+            rows=rows,
+            dtype=np.float32
+        )
+
 
 class TestBaseColumnField:
     """Unit tests for the BaseColumnField class."""
@@ -327,8 +616,12 @@ class TestBaseColumnField:
         assert base_column_field.fields == []
 
     def test_process(self, mocker):
-        mock_save_field_to_hdf5 = mocker.patch.object(BaseColumnField, 'save_field_to_hdf5')
+        mock_save_strings_to_hdf5 = mocker.patch.object(BaseColumnField, 'save_strings_to_hdf5')
         base_column_field = BaseColumnField(set_name='train')
         base_column_field.fields = ['some', 'fields']
         base_column_field.process()
-        assert mock_save_field_to_hdf5.called
+        mock_save_strings_to_hdf5.assert_called_once_with(
+            set_name='train',
+            field='__COLUMNS__',
+            data=['some', 'fields']
+        )
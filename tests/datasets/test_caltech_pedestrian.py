@@ -372,7 +372,7 @@ class TestClassLabelField:
         dummy_ids = [0, 1, 2, 3, 4, 5]
         dummy_unique_ids = [0, 1, 1, 2, 2, 3]
         mock_get_class_ids = mocker.patch.object(ClassLabelField, "get_class_labels_ids", return_value=(dummy_names, dummy_ids, dummy_unique_ids))
-        mock_save_hdf5 = mocker.patch.object(ClassLabelField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ClassLabelField, "save_strings_to_hdf5")
 
         classes = ('person', 'person-fa', 'people', 'person?')
         class_ids, class_unique_ids = mock_classlabel_class.process(classes)
@@ -421,7 +421,7 @@ class TestImageFilenamesField:
         dummy_filenames_unique = ['image1.jpg', 'image2.jpg']
         mock_get_filenames = mocker.patch.object(ImageFilenamesField, "get_image_filenames_from_data", return_value=dummy_filenames_unique)
         mock_get_ids = mocker.patch.object(ImageFilenamesField, "get_image_filenames_obj_ids_from_data", return_value=dummy_unique_ids)
-        mock_save_hdf5 = mocker.patch.object(ImageFilenamesField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ImageFilenamesField, "save_strings_to_hdf5")
 
         img_ids, img_ids_unique = mock_imagefilename_class.process()
 
@@ -687,7 +687,7 @@ class TestImageFilenamesPerClassList:
     def test_process(self, mocker, mock_img_per_class_list):
         dummy_ids = [[0, 1], [2, 3], [4, 5]]
         mock_get_ids = mocker.patch.object(ImageFilenamesPerClassList, "get_image_filename_ids_per_class", return_value=dummy_ids)
-        mock_save_hdf5 = mocker.patch.object(ImageFilenamesPerClassList, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ImageFilenamesPerClassList, "save_lists_to_hdf5")
 
         object_ids = [[i, i, i, i] for i in range(6)]
         image_unique_ids = [0, 0, 1, 1, 2, 2]
@@ -722,7 +722,7 @@ class TestBoundingBoxPerImageList:
     def test_process(self, mocker, mock_bbox_per_img_list):
         dummy_ids = [[0, 1], [2, 3], [4, 5]]
         mock_get_ids = mocker.patch.object(BoundingBoxPerImageList, "get_bbox_ids_per_image", return_value=dummy_ids)
-        mock_save_hdf5 = mocker.patch.object(BoundingBoxPerImageList, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(BoundingBoxPerImageList, "save_lists_to_hdf5")
 
         object_ids = [[i, i, i, i] for i in range(6)]
         image_unique_ids = [0, 0, 1, 1, 2, 2]
@@ -763,7 +763,7 @@ class TestBoundingBoxvPerImageList:
     def test_process(self, mocker, mock_bboxv_per_img_list):
         dummy_ids = [[0, 1], [2, 3], [4, 5]]
         mock_get_ids = mocker.patch.object(BoundingBoxvPerImageList, "get_bboxv_ids_per_image", return_value=dummy_ids)
-        mock_save_hdf5 = mocker.patch.object(BoundingBoxvPerImageList, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(BoundingBoxvPerImageList, "save_lists_to_hdf5")
 
         object_ids = [[i, i, i, i] for i in range(6)]
         image_unique_ids = [0, 0, 1, 1, 2, 2]
@@ -804,7 +804,7 @@ class TestBoundingBoxPerClassList:
     def test_process(self, mocker, mock_object_per_class_list):
         dummy_ids = [[0, 1], [2, 3], [4, 5]]
         mock_get_ids = mocker.patch.object(BoundingBoxPerClassList, "get_bbox_ids_per_class", return_value=dummy_ids)
-        mock_save_hdf5 = mocker.patch.object(BoundingBoxPerClassList, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(BoundingBoxPerClassList, "save_lists_to_hdf5")
 
         bbox_ids = [[i, i, i, i] for i in range(6)]
         class_unique_ids = [0, 0, 1, 1, 2, 2]
@@ -10,7 +10,6 @@ import numpy as np
 from numpy.testing import assert_array_equal
 
 from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
-from dbcollection.utils.pad import pad_list
 from dbcollection.datasets.cifar.cifar10.classification import (
     Classification,
     DatasetAnnotationLoader,
@@ -260,7 +259,7 @@ class TestClassLabelField:
     def test_process(self, mocker, mock_classlabel_class):
         dummy_names = ['car']*10
         mock_get_class = mocker.patch.object(ClassLabelField, "get_class_names", return_value=dummy_names)
-        mock_save_hdf5 = mocker.patch.object(ClassLabelField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ClassLabelField, "save_strings_to_hdf5")
 
         mock_classlabel_class.process()
 
@@ -360,19 +359,15 @@ class TestObjectFieldNamesField:
         return ObjectFieldNamesField(**field_kwargs)
 
     def test_process(self, mocker, mock_objfields_class):
-        mock_save_hdf5 = mocker.patch.object(ObjectFieldNamesField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ObjectFieldNamesField, "save_strings_to_hdf5")
 
         mock_objfields_class.process()
 
-        assert mock_save_hdf5.called
-        # **disabled until I find a way to do assert calls with numpy arrays**
-        # mock_save_hdf5.assert_called_once_with(
-        #     set_name='train',
-        #     field='object_fields',
-        #     data=str2ascii(['images', 'labels']),
-        #     dtype=np.uint8,
-        #     fillvalue=0
-        # )
+        mock_save_hdf5.assert_called_once_with(
+            set_name='train',
+            field='object_fields',
+            data=['images', 'labels']
+        )
 
 
 class TestObjectIdsField:
@@ -384,7 +379,7 @@ class TestObjectIdsField:
         return ObjectIdsField(**field_kwargs)
 
     def test_process(self, mocker, mock_objfids_class):
-        mock_save_hdf5 = mocker.patch.object(ObjectIdsField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ObjectIdsField, "save_rows_to_hdf5")
 
         image_ids = [0, 1, 2, 3, 4, 5]
         label_ids = [1, 5, 9, 8, 3, 5]
@@ -393,15 +388,12 @@ class TestObjectIdsField:
             label_ids=label_ids
         )
 
-        assert mock_save_hdf5.called
-        # **disabled until I find a way to do assert calls with numpy arrays**
-        # mock_save_hdf5.assert_called_once_with(
-        #     set_name='train',
-        #     field='object_ids',
-        #     data=np.array([[0, 1], [1, 5], [2, 9], [3, 8], [4, 3], [5, 5]], dtype=np.int32),
-        #     dtype=np.int32,
-        #     fillvalue=-1
-        # )
+        _, kwargs = mock_save_hdf5.call_args
+        assert kwargs['set_name'] == 'train'
+        assert kwargs['field'] == 'object_ids'
+        assert kwargs['dtype'] == np.int32
+        assert kwargs['fillvalue'] == -1
+        assert list(kwargs['rows']) == [[0, 1], [1, 5], [2, 9], [3, 8], [4, 3], [5, 5]]
 
 
 class TestImagesPerClassList:
@@ -414,33 +406,19 @@ class TestImagesPerClassList:
 
     def test_process(self, mocker, mock_img_per_class_list):
         dummy_ids = [[0], [2, 3], [4, 5]]
-        dummy_array = np.array([[0, -1], [2, 3], [4, 5]])
         mock_get_ids = mocker.patch.object(ImagesPerClassList, "get_image_ids_per_class", return_value=dummy_ids)
-        mock_convert_array = mocker.patch.object(ImagesPerClassList, "convert_list_to_array", return_value=dummy_array)
-        mock_save_hdf5 = mocker.patch.object(ImagesPerClassList, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ImagesPerClassList, "save_lists_to_hdf5")
 
         mock_img_per_class_list.process()
 
         mock_get_ids.assert_called_once_with()
-        mock_convert_array.assert_called_once_with(dummy_ids)
-        assert mock_save_hdf5.called
-        # **disabled until I find a way to do assert calls with numpy arrays**
-        # mock_save_hdf5.assert_called_once_with(
-        #     set_name='train',
-        #     field='list_images_per_class',
-        #     data=dummy_array,
-        #     dtype=np.int32,
-        #     fillvalue=-1
-        # )
+        mock_save_hdf5.assert_called_once_with(
+            set_name='train',
+            field='list_images_per_class',
+            data=dummy_ids
+        )
 
     def test_get_image_ids_per_class(self, mocker, mock_img_per_class_list):
         images_per_class_ids = mock_img_per_class_list.get_image_ids_per_class()
 
         assert images_per_class_ids == [[0], [1], [2], [3], [4], [5], [6], [7], [8], [9]]
-
-    def test_convert_list_to_array(self, mocker, mock_img_per_class_list):
-        list_ids = [[0], [2, 3], [4, 5, 6]]
-        images_per_class_array = mock_img_per_class_list.convert_list_to_array(list_ids)
-
-        expected = np.array(pad_list([[0, -1, -1], [2, 3, -1], [4, 5, 6]], -1), dtype=np.int32)
-        assert_array_equal(images_per_class_array, expected)
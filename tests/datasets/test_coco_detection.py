@@ -0,0 +1,46 @@
+"""
+Test the COCO detection task.
+"""
+
+
+import os
+import json
+import h5py
+
+from dbcollection.datasets.coco.detection import Detection2015
+
+
+def get_annotations():
+    images = [{"file_name": 'COCO_train2014_{:012d}.jpg'.format(i), "id": i, "width": 640,
+               "height": 480, "coco_url": 'http://images.cocodataset.org/{}.jpg'.format(i)}
+              for i in range(4)]
+    categories = [{"id": i + 1, "name": 'category_{}'.format(i), "supercategory": 'animal'}
+                  for i in range(3)]
+    annotations = [{"id": i, "image_id": i // 2, "category_id": i % 3 + 1,
+                    "segmentation": [[10.0, 10.0, 20.0, 10.0, 20.0, 20.0]],
+                    "area": 50.0, "bbox": [10.0, 10.0, 10.0, 10.0], "iscrowd": 0}
+                   for i in range(8)]
+    return {"images": images, "annotations": annotations, "categories": categories}
+
+
+def test_process_set_metadata_uses_storage_profiles(tmpdir):
+    annotation_path = str(tmpdir.join('annotations.json'))
+    with open(annotation_path, 'w') as f:
+        json.dump(get_annotations(), f)
+    processer = Detection2015(data_path=str(tmpdir), cache_path=str(tmpdir), verbose=False)
+    processer.storage_profiles = {'object_ids': {'profile': 'lzf', 'chunk_rows': 2},
+                                  'list_object_ids_per_image': 'none'}
+    processer.mmap_fields = ('width',)
+    processer.setup_hdf5_manager()
+
+    image_dir = os.path.join(processer.data_path, processer.image_dir_path['train'])
+    data = processer.load_data_trainval('train', image_dir, annotation_path)
+    processer.process_set_metadata(data['train'], 'train')
+    processer.teardown_hdf5_manager()
+
+    with h5py.File(processer.hdf5_filepath, 'r') as h5_file:
+        assert h5_file['train/object_ids'].compression == 'lzf'
+        assert h5_file['train/object_ids'].chunks[0] == 2
+        assert h5_file['train/list_object_ids_per_image'].compression is None
+        assert h5_file['train/width'].chunks is None
+        assert h5_file['train/width'].compression is None
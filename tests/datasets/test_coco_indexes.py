@@ -0,0 +1,69 @@
+"""
+Test the indexes shared by the COCO tasks.
+"""
+
+
+import os
+import pytest
+
+from dbcollection.datasets.coco.indexes import (
+    get_index,
+    get_coco_images_ids,
+    get_coco_annotations_ids,
+    parse_image_annotations,
+    parse_category_annotations
+)
+
+
+@pytest.fixture()
+def annotations():
+    return {
+        "images": [
+            {"file_name": 'b.jpg', "id": 20, "width": 1, "height": 2, "coco_url": 'url_b'},
+            {"file_name": 'a.jpg', "id": 10, "width": 3, "height": 4, "coco_url": 'url_a'}
+        ],
+        "annotations": [{"id": 7}, {"id": 5}],
+        "categories": [
+            {"id": 1, "name": 'cat', "supercategory": 'animal'},
+            {"id": 3, "name": 'dog', "supercategory": 'animal'}
+        ]
+    }
+
+
+def test_get_index():
+    values = ['a', 'b', 'a', 'c']
+
+    index = get_index(values)
+
+    assert index == {'a': 0, 'b': 1, 'c': 3}
+    assert all(index[value] == values.index(value) for value in values)
+
+
+def test_get_coco_images_ids(annotations):
+    image_filenames = [os.path.join('dir', 'a.jpg'), os.path.join('dir', 'b.jpg')]
+
+    result = get_coco_images_ids(annotations, 'dir', get_index(image_filenames))
+
+    assert result == [1, 0]
+
+
+def test_get_coco_annotations_ids(annotations):
+    assert get_coco_annotations_ids(annotations, {5: 0, 7: 1}) == [1, 0]
+
+
+def test_parse_image_annotations(annotations):
+    filename_ids, images_annot_by_fname, images_fname_by_id = parse_image_annotations('dir', annotations)
+
+    assert filename_ids == {'b.jpg': 0, 'a.jpg': 1}
+    assert images_annot_by_fname['a.jpg'] == {"file_name": os.path.join('dir', 'a.jpg'), "width": 3,
+                                              "height": 4, "id": 10, "coco_url": 'url_a'}
+    assert images_fname_by_id == {20: 'b.jpg', 10: 'a.jpg'}
+
+
+def test_parse_category_annotations(annotations):
+    categories, category_list, supercategory_list, category_id = parse_category_annotations(annotations)
+
+    assert categories[3] == {"name": 'dog', "supercategory": 'animal', "id": 3}
+    assert category_list == ['cat', 'dog']
+    assert supercategory_list == ['animal']
+    assert category_id == [1, 3]
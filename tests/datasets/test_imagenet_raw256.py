@@ -0,0 +1,109 @@
+"""
+Test the ImageNet ILSVRC2012 raw256 image resizing.
+"""
+
+
+import os
+import multiprocessing
+import multiprocessing.pool
+import numpy as np
+import pytest
+from PIL import Image
+
+from dbcollection.datasets.imagenet.ilsvrc2012.classification import Raw256, resize_image
+
+
+@pytest.fixture()
+def image_dir(tmpdir):
+    """Directory with two classes of JPEG images."""
+    train_dir = tmpdir.mkdir('train')
+    for cname, sizes in (('n01', [(60, 40), (40, 80)]), ('n02', [(50, 50)])):
+        train_dir.mkdir(cname)
+        for i, size in enumerate(sizes):
+            data = np.random.RandomState(i).randint(0, 255, size=(size[1], size[0], 3)).astype(np.uint8)
+            Image.fromarray(data).save(str(tmpdir.join('train', cname, 'img{}.JPEG'.format(i))))
+    return tmpdir
+
+
+@pytest.fixture()
+def raw256_task(image_dir):
+    task = Raw256(data_path=str(image_dir), cache_path=str(image_dir), verbose=False)
+    task.base_size = 16
+    task.resize_workers = 2
+    return task
+
+
+def test_resize_image(image_dir):
+    new_img_filename = str(image_dir.join('resized.JPEG'))
+    job = (str(image_dir.join('train', 'n01', 'img1.JPEG')), new_img_filename, 16)
+
+    filename, pid, elapsed = resize_image(job)
+
+    assert filename == new_img_filename
+    assert pid == os.getpid()
+    assert elapsed >= 0
+    assert Image.open(new_img_filename).size == (16, 32)
+
+
+class TestRaw256DirResizeImages:
+    """Unit tests for the Raw256.dir_resize_images() method."""
+
+    def test_dir_resize_images(self, raw256_task, image_dir):
+        new_data_dir = str(image_dir.mkdir('train256'))
+
+        raw256_task.dir_resize_images(new_data_dir, ['train'])
+
+        assert Image.open(os.path.join(new_data_dir, 'n01', 'img0.JPEG')).size == (24, 16)
+        assert Image.open(os.path.join(new_data_dir, 'n02', 'img0.JPEG')).size == (16, 16)
+        assert raw256_task.load_manifest(new_data_dir) == set([os.path.join('n01', 'img0.JPEG'),
+                                                               os.path.join('n01', 'img1.JPEG'),
+                                                               os.path.join('n02', 'img0.JPEG')])
+
+    def test_dir_resize_images_resumes_from_manifest(self, raw256_task, image_dir):
+        new_data_dir = str(image_dir.mkdir('train256'))
+        with open(os.path.join(new_data_dir, raw256_task.manifest_filename), 'w') as f:
+            f.write(os.path.join('n01', 'img0.JPEG') + '\n')
+
+        jobs, num_resized = raw256_task.get_resize_jobs(new_data_dir, ['train'])
+
+        assert num_resized == 1
+        assert sorted(os.path.relpath(job[1], new_data_dir) for job in jobs) == \
+            [os.path.join('n01', 'img1.JPEG'), os.path.join('n02', 'img0.JPEG')]
+
+        raw256_task.dir_resize_images(new_data_dir, ['train'])
+
+        assert not os.path.exists(os.path.join(new_data_dir, 'n01', 'img0.JPEG'))
+        assert len(raw256_task.load_manifest(new_data_dir)) == 3
+        assert raw256_task.get_resize_jobs(new_data_dir, ['train'])[0] == []
+
+    def test_dir_resize_images_prints_workers_throughput(self, raw256_task, image_dir, capsys):
+        raw256_task.verbose = True
+        new_data_dir = str(image_dir.mkdir('train256'))
+
+        raw256_task.dir_resize_images(new_data_dir, ['train'])
+
+        out = capsys.readouterr().out
+        assert 'images/s' in out
+        assert '> Worker 0:' in out
+
+    def test_dir_resize_images_uses_resize_workers(self, raw256_task, image_dir, mocker):
+        mock_pool = mocker.spy(multiprocessing, 'Pool')
+        raw256_task.workers = 1
+        new_data_dir = str(image_dir.mkdir('train256'))
+
+        raw256_task.dir_resize_images(new_data_dir, ['train'])
+
+        assert mock_pool.call_args[1]["processes"] == 2
+
+    def test_dir_resize_images_terminates_pool_on_error(self, raw256_task, image_dir, mocker):
+        mock_terminate = mocker.spy(multiprocessing.pool.Pool, 'terminate')
+        with open(str(image_dir.join('train', 'n02', 'img_bad.JPEG')), 'wb') as f:
+            f.write(b'not an image')
+        new_data_dir = str(image_dir.mkdir('train256'))
+
+        with pytest.raises(Exception):
+            raw256_task.dir_resize_images(new_data_dir, ['train'])
+
+        assert mock_terminate.called
+        for filename in raw256_task.load_manifest(new_data_dir):
+            assert os.path.exists(os.path.join(new_data_dir, filename))
@@ -1163,7 +1163,7 @@ class TestImageFilenamesField:
 
     def test_process(self, mocker, mock_image_filenames_class):
         mock_get_images = mocker.patch.object(ImageFilenamesField, "get_image_filenames", return_value=(['image1.jpg', 'image2.jpg', 'image3.jpg'], [0, 1, 2]))
-        mock_save_hdf5 = mocker.patch.object(ImageFilenamesField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ImageFilenamesField, "save_strings_to_hdf5")
 
         image_filenames_ids = mock_image_filenames_class.process()
 
@@ -1312,7 +1312,7 @@ class TestVideoNamesField:
 
     def test_process(self, mocker, mock_videonames_class):
         mock_get_video_names = mocker.patch.object(VideoNamesField, "get_video_names", return_value=['video1', 'video2', 'video2', 'video3'])
-        mock_save_hdf5 = mocker.patch.object(VideoNamesField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(VideoNamesField, "save_strings_to_hdf5")
 
         mock_videonames_class.process([0, 1, 1, 2])
 
@@ -1384,7 +1384,7 @@ class TestKeypointLabelsField:
 
     def test_process(self, mocker, mock_kplbls_class):
         mock_get_kp_lbls = mocker.patch.object(KeypointLabelsField, "get_keypoint_labels", return_value=['right ankle', 'right knee', 'right hip'])
-        mock_save_hdf5 = mocker.patch.object(KeypointLabelsField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(KeypointLabelsField, "save_strings_to_hdf5")
 
         mock_kplbls_class.process()
 
@@ -1431,7 +1431,7 @@ class TestCategoryNamesField:
 
     def test_process(self, mocker, mock_category_names_class):
         mock_get_category_name = mocker.patch.object(CategoryNamesField, "get_category_name", return_value=['category1', 'category2', 'category3'])
-        mock_save_hdf5 = mocker.patch.object(CategoryNamesField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(CategoryNamesField, "save_strings_to_hdf5")
 
         mock_category_names_class.process()
 
@@ -1473,7 +1473,7 @@ class TestActivityNamesField:
 
     def test_process(self, mocker, mock_activity_names_class):
         mock_get_activity_name = mocker.patch.object(ActivityNamesField, "get_activity_name", return_value=['activity1', 'activity2', 'activity3'])
-        mock_save_hdf5 = mocker.patch.object(ActivityNamesField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ActivityNamesField, "save_strings_to_hdf5")
 
         mock_activity_names_class.process()
 
@@ -1680,20 +1680,16 @@ class TestObjectFieldNamesField:
 
     def test_process(self, mocker, mock_objfields_class):
         mock_get_object_fields = mocker.patch.object(ObjectFieldNamesField, "get_object_fields", return_value=['field1', 'field2', 'field3'])
-        mock_save_hdf5 = mocker.patch.object(ObjectFieldNamesField, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(ObjectFieldNamesField, "save_strings_to_hdf5")
 
         mock_objfields_class.process()
 
         mock_get_object_fields.assert_called_once_with()
-        assert mock_save_hdf5.called
-        # **disabled until I find a way to do assert calls with numpy arrays**
-        # mock_save_hdf5.assert_called_once_with(
-        #     set_name='train',
-        #     field='object_fields',
-        #     data=str2ascii(['field1', 'field2', 'field3']),
-        #     dtype=np.uint8,
-        #     fillvalue=0
-        # )
+        mock_save_hdf5.assert_called_once_with(
+            set_name='train',
+            field='object_fields',
+            data=['field1', 'field2', 'field3']
+        )
 
     def test_get_keypoints__train_set(self, mocker, mock_objfields_class, test_data_loaded):
         assert mock_objfields_class.get_object_fields() == [
@@ -1789,7 +1785,7 @@ class TestSinglePersonPerImageList:
 
     def test_process(self, mocker, mock_single_per_image_class):
         mock_get_single = mocker.patch.object(SinglePersonPerImageList, "get_list_single_person_per_image", return_value=[[1], [2, 3, 4], [5, 6]])
-        mock_save_hdf5 = mocker.patch.object(SinglePersonPerImageList, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(SinglePersonPerImageList, "save_lists_to_hdf5")
 
         mock_single_per_image_class.process()
 
@@ -1823,7 +1819,7 @@ class TestKeypointsPerImageList:
 
     def test_process(self, mocker, mock_keypoints_per_image_class):
         mock_get_keypoints = mocker.patch.object(KeypointsPerImageList, "get_list_keypoints_per_image", return_value=[[1], [2, 4], [5, 6]])
-        mock_save_hdf5 = mocker.patch.object(KeypointsPerImageList, "save_field_to_hdf5")
+        mock_save_hdf5 = mocker.patch.object(KeypointsPerImageList, "save_lists_to_hdf5")
 
         mock_keypoints_per_image_class.process()
 
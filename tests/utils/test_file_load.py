@@ -0,0 +1,44 @@
+"""
+Test dbcollection/utils/file_load.py.
+"""
+
+
+import json
+
+from dbcollection.utils.file_load import load_json, json_cache, release_json
+
+
+def test_load_json(tmpdir):
+    filename = str(tmpdir.join('annotations.json'))
+    with open(filename, 'w') as f:
+        json.dump({'images': [1, 2, 3]}, f)
+
+    assert load_json(filename) == {'images': [1, 2, 3]}
+    assert load_json(filename) is not load_json(filename)
+
+
+def test_json_cache(tmpdir):
+    filename = str(tmpdir.join('annotations.json'))
+    with open(filename, 'w') as f:
+        json.dump({'images': [1, 2, 3]}, f)
+
+    with json_cache():
+        annotations = load_json(filename)
+        with json_cache():
+            assert load_json(filename) is annotations
+        assert load_json(filename) is annotations
+
+    assert load_json(filename) is not annotations
+
+
+def test_release_json(tmpdir):
+    filenames = [str(tmpdir.join(name)) for name in ('train.json', 'val.json')]
+    for filename in filenames:
+        with open(filename, 'w') as f:
+            json.dump({'images': [1, 2, 3]}, f)
+
+    with json_cache():
+        train, val = [load_json(filename) for filename in filenames]
+        release_json(keep=[filenames[1]])
+        assert load_json(filenames[0]) is not train
+        assert load_json(filenames[1]) is val
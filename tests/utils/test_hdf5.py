@@ -4,10 +4,29 @@ Test the HDF5 metadata manager class.
 
 
 import os
+import h5py
 import numpy as np
 import pytest
 
-from dbcollection.utils.hdf5 import HDF5Manager
+from dbcollection.utils.hdf5 import (
+    HDF5Manager,
+    hdf5_write_data,
+    load_fields_index,
+    get_storage_profile,
+    get_default_storage_profile,
+    get_chunk_shape,
+    get_storage_options,
+    encode_strings,
+    decode_strings,
+    is_string_dtype,
+    is_ascii_field,
+    get_field_string_format,
+    read_strings,
+    get_ragged_list,
+    HDF5StreamWriter,
+    STRING_FORMAT_ATTR
+)
+from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
 
 
 @pytest.fixture()
@@ -82,3 +101,347 @@ class TestHDF5Manager:
     def test_add_field_to_group__raises_error_no_input_args(self, mocker, mock_hdf5manager):
         with pytest.raises(TypeError):
             mock_hdf5manager.add_field_to_group()
+
+    def test_close_writes_fields_index(self, tmpdir):
+        filename = str(tmpdir.join('file.h5'))
+        hdf5_manager = HDF5Manager(filename=filename)
+        hdf5_manager.add_field_to_group('train', 'data', np.zeros((4, 2)), dtype=np.float32)
+        hdf5_manager.add_field_to_group('train', 'object_fields', str2ascii(['data']), dtype=np.uint8, fillvalue=0)
+
+        hdf5_manager.close()
+
+        with h5py.File(filename, 'r') as f:
+            index = load_fields_index(f['train'])
+        assert index == {
+            "fields": {
+                "data": {"shape": [4, 2], "dtype": '<f4'},
+                "object_fields": {"shape": [5], "dtype": '|u1'},
+            },
+            "object_fields": ['data']
+        }
+
+
+def test_load_fields_index_returns_none_if_missing(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    with h5py.File(filename, 'w') as f:
+        f.create_dataset('/train/data', data=np.zeros((4, 2)))
+
+        index = load_fields_index(f['train'])
+
+    assert index is None
+
+
+def test_add_field_to_group_contiguous_field(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    hdf5_manager = HDF5Manager(filename=filename)
+    hdf5_manager.set_storage_profiles({'images': 'contiguous'})
+
+    images = hdf5_manager.add_field_to_group('train', 'images', np.zeros((4, 2)), dtype=np.uint8)
+    labels = hdf5_manager.add_field_to_group('train', 'labels', np.zeros((4,)), dtype=np.uint8)
+
+    assert images.chunks is None
+    assert images.compression is None
+    assert labels.chunks is not None
+    assert labels.compression == 'gzip'
+    hdf5_manager.close()
+
+
+@pytest.mark.parametrize("shape, dtype, profile", [
+    ((10, 28, 28), np.uint8, 'images'),
+    ((10, 20), np.uint8, 'ascii'),
+    ((10, 4), np.int32, 'ids'),
+    ((10,), np.uint8, 'ids'),
+    ((10, 4), np.float32, 'default'),
+    ((10,), 'S20', 'ascii'),
+    ((10,), h5py.special_dtype(vlen=str), 'ascii'),
+])
+def test_get_default_storage_profile(shape, dtype, profile):
+    assert get_default_storage_profile(shape, dtype) == profile
+
+
+@pytest.mark.parametrize("shape, dtype, chunk_rows, chunk_bytes, expected", [
+    ((1000, 10), np.int32, None, 400, (10, 10)),
+    ((1000, 10), np.int32, 64, None, (64, 10)),
+    ((1000, 10), np.int32, 64, 400, (64, 10)),
+    ((5, 10), np.int32, 64, None, (5, 10)),
+    ((1000, 1000), np.float64, None, 400, (1, 1000)),
+    ((0, 10), np.int32, None, 400, (1, 10)),
+    ((), np.int32, None, 400, None),
+    ((1000, 10), np.int32, None, None, None),
+])
+def test_get_chunk_shape(shape, dtype, chunk_rows, chunk_bytes, expected):
+    assert get_chunk_shape(shape, dtype, chunk_rows, chunk_bytes) == expected
+
+
+def test_get_storage_profile_extends_profile():
+    profile = get_storage_profile({"profile": 'ids', "chunk_rows": 128})
+
+    assert profile["chunk_rows"] == 128
+    assert profile["chunk_bytes"] is None
+    assert profile["shuffle"] is True
+
+
+@pytest.mark.parametrize("storage", ['invalid_profile', {"invalid_option": 1}])
+def test_get_storage_profile__raises_error_invalid_profile(storage):
+    with pytest.raises(KeyError):
+        get_storage_profile(storage)
+
+
+def test_get_storage_options_explicit_args_override_profile():
+    options = get_storage_options((100, 4), np.int32, 'ids', chunks=False, compression='lzf')
+
+    assert options == {"chunks": None, "compression": 'lzf', "compression_opts": None, "shuffle": True}
+
+
+def test_add_field_to_group_storage_profiles(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    hdf5_manager = HDF5Manager(filename=filename)
+    hdf5_manager.set_storage_profiles({'labels': {'profile': 'lzf', 'chunk_rows': 2}})
+
+    images = hdf5_manager.add_field_to_group('train', 'images', np.zeros((4, 8, 8)), dtype=np.uint8)
+    labels = hdf5_manager.add_field_to_group('train', 'labels', np.zeros((4,)), dtype=np.int32, storage='none')
+    ids = hdf5_manager.add_field_to_group('train', 'object_ids', np.zeros((4, 2)), dtype=np.int32)
+
+    assert images.compression == 'lzf'
+    assert images.chunks == (4, 8, 8)
+    assert labels.compression == 'lzf'
+    assert labels.chunks == (2,)
+    assert ids.compression == 'gzip'
+    assert ids.shuffle
+    hdf5_manager.close()
+
+
+def test_hdf5_write_data_storage_profile(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    with h5py.File(filename, 'w') as f:
+        h5_field = hdf5_write_data(f, 'data', np.zeros((100, 4)), dtype=np.float32, storage='none')
+
+        assert h5_field.compression is None
+        assert h5_field.chunks is not None
+
+
+@pytest.mark.parametrize("string_format", ['ascii', 'fixed', 'vlen'])
+def test_add_strings_to_group(tmpdir, string_format):
+    filename = str(tmpdir.join('file.h5'))
+    strings = ['cat', 'a_very_long_name', u'caf\xe9']
+    hdf5_manager = HDF5Manager(filename=filename)
+    hdf5_manager.set_string_format(string_format)
+
+    h5_field = hdf5_manager.add_strings_to_group('train', 'classes', strings)
+
+    if string_format == 'ascii':
+        assert h5_field.dtype == np.uint8
+        assert h5_field.shape == (3, 17)
+    else:
+        assert is_string_dtype(h5_field.dtype)
+        assert h5_field.shape == (3,)
+        assert decode_strings(h5_field[()]) == strings
+    assert h5_field.compression == 'gzip'
+    hdf5_manager.close()
+
+
+def test_add_strings_to_group_string_format_overrides_manager(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    hdf5_manager = HDF5Manager(filename=filename)
+
+    h5_field = hdf5_manager.add_strings_to_group('train', 'classes', ['cat', 'dog'], string_format='vlen')
+
+    assert h5py.check_dtype(vlen=h5_field.dtype) is str
+    hdf5_manager.close()
+
+
+def test_set_string_format__raises_error_invalid_format(mocker, mock_hdf5manager):
+    with pytest.raises(KeyError):
+        mock_hdf5manager.set_string_format('utf-32')
+
+
+def test_encode_strings_fixed():
+    str_array, dtype = encode_strings(['cat', 'horse'], 'fixed')
+
+    assert np.array_equal(str_array, np.array([b'cat', b'horse']))
+    assert dtype == np.dtype('S5')
+
+
+def test_encode_strings_ascii():
+    str_array, dtype = encode_strings(['cat', 'horse'], 'ascii')
+
+    assert np.array_equal(str_array, str2ascii(['cat', 'horse']))
+    assert dtype == np.uint8
+
+
+def test_decode_strings():
+    assert decode_strings(b'cat') == 'cat'
+    assert decode_strings(np.array([b'cat', b'dog'])) == ['cat', 'dog']
+    assert decode_strings(np.array([[b'a', b'b'], [b'c', b'd']])) == [['a', 'b'], ['c', 'd']]
+
+
+@pytest.mark.parametrize("string_format", ['ascii', 'fixed', 'vlen'])
+def test_read_strings(tmpdir, string_format):
+    hdf5_manager = HDF5Manager(filename=str(tmpdir.join('file.h5')))
+
+    h5_field = hdf5_manager.add_strings_to_group('train', 'object_fields', ['images', 'labels'],
+                                                 string_format=string_format)
+
+    assert read_strings(h5_field) == ['images', 'labels']
+    hdf5_manager.close()
+
+
+
+def test_is_ascii_field(tmpdir):
+    filename = str(tmpdir.join('test.h5'))
+    with h5py.File(filename, 'w') as f:
+        f.create_dataset('classes', data=str2ascii(['cat', 'dog']), dtype=np.uint8, fillvalue=0)
+        f.create_dataset('skeleton', data=np.array([[1, 2], [3, 4]]), dtype=np.uint8, fillvalue=0)
+        f.create_dataset('labels', data=np.arange(5), dtype=np.uint8, fillvalue=0)
+        assert is_ascii_field(f['classes'])
+        assert not is_ascii_field(f['skeleton'])
+        assert not is_ascii_field(f['labels'])
+
+
+def test_is_ascii_field_uses_string_format_attribute(tmpdir):
+    hdf5_manager = HDF5Manager(filename=str(tmpdir.join('file.h5')))
+    bytes_field = hdf5_manager.add_field_to_group('train', 'bytes', str2ascii(['abc', 'de']),
+                                                  dtype=np.uint8, fillvalue=0)
+    ascii_field = hdf5_manager.add_strings_to_group('train', 'classes', ['cat', 'dog'])
+    vlen_field = hdf5_manager.add_strings_to_group('train', 'names', ['cat', 'dog'], string_format='vlen')
+    stream_field = hdf5_manager.add_rows_to_group('train', 'filenames', iter(['a.jpg', 'b.jpg']), np.uint8,
+                                                  fillvalue=0)
+
+    assert not is_ascii_field(bytes_field)
+    assert is_ascii_field(ascii_field)
+    assert not is_ascii_field(vlen_field)
+    assert is_ascii_field(stream_field)
+    hdf5_manager.close()
+
+
+@pytest.mark.parametrize("string_format", ['ascii', 'fixed', 'vlen'])
+def test_get_field_string_format(tmpdir, string_format):
+    hdf5_manager = HDF5Manager(filename=str(tmpdir.join('file.h5')))
+
+    h5_field = hdf5_manager.add_strings_to_group('train', 'classes', ['cat', 'dog'],
+                                                 string_format=string_format)
+
+    assert get_field_string_format(h5_field) == string_format
+    assert get_field_string_format(hdf5_manager.add_field_to_group('train', 'ids', np.arange(2),
+                                                                   dtype=np.int32)) is None
+    hdf5_manager.close()
+
+
+def test_get_ragged_list():
+    values, offsets = get_ragged_list([[0, 1, 2], [], [3]])
+
+    assert np.array_equal(values, [0, 1, 2, 3])
+    assert values.dtype == np.int32
+    assert np.array_equal(offsets, [0, 3, 3, 4])
+
+
+def test_get_storage_options_empty_data():
+    options = get_storage_options((0,), np.int32, 'ids')
+
+    assert options["chunks"] is None
+    assert options["compression"] is None
+
+
+@pytest.mark.parametrize("list_format, shape", [('padded', (3, 3)), ('ragged', (4,))])
+def test_add_list_to_group(tmpdir, list_format, shape):
+    filename = str(tmpdir.join('file.h5'))
+    hdf5_manager = HDF5Manager(filename=filename)
+    hdf5_manager.set_list_format(list_format)
+
+    h5_field = hdf5_manager.add_list_to_group('train', 'list_ids', [[0, 1, 2], [], [3]])
+
+    assert h5_field.shape == shape
+    assert h5_field.dtype == np.int32
+    assert h5_field.fillvalue == -1
+    hdf5_manager.close()
+
+
+def test_add_list_to_group_ragged_fields_index(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    hdf5_manager = HDF5Manager(filename=filename)
+    hdf5_manager.add_list_to_group('train', 'list_ids', [[0, 1, 2], [], [3]], list_format='ragged')
+    hdf5_manager.close()
+
+    with h5py.File(filename, 'r') as f:
+        index = load_fields_index(f['train'])
+        offsets = f['train/list_ids_offsets'][()]
+
+    assert index["fields"] == {"list_ids": {"shape": [3, 3], "dtype": np.dtype(np.int32).str}}
+    assert np.array_equal(offsets, [0, 3, 3, 4])
+
+
+def test_set_list_format__raises_error_invalid_format(mocker, mock_hdf5manager):
+    with pytest.raises(KeyError):
+        mock_hdf5manager.set_list_format('sparse')
+
+
+def test_stream_writer_writes_rows_in_batches(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    with h5py.File(filename, 'w') as f:
+        writer = HDF5StreamWriter(f, 'list_ids', np.int32, batch_size=2)
+        writer.extend([[0], [1, 2]])
+        assert writer.h5_field.shape == (2, 2)
+        writer.extend([[3, 4, 5], [6]])
+
+        h5_field = writer.close()
+
+        assert writer.nrows == 4
+        assert h5_field.maxshape == (None, None)
+        assert np.array_equal(h5_field[()], [[0, -1, -1], [1, 2, -1], [3, 4, 5], [6, -1, -1]])
+
+
+def test_stream_writer_strings(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    with h5py.File(filename, 'w') as f:
+        writer = HDF5StreamWriter(f, 'classes', np.uint8, fillvalue=0, batch_size=2)
+        writer.extend(iter(['cat', 'horse', 'ox']))
+        h5_field = writer.close()
+
+        assert np.array_equal(h5_field[()], str2ascii(['cat', 'horse', 'ox']))
+
+
+@pytest.mark.parametrize("string_format", ['fixed', 'vlen'])
+def test_stream_writer_string_formats(tmpdir, string_format):
+    filename = str(tmpdir.join('file.h5'))
+    with h5py.File(filename, 'w') as f:
+        writer = HDF5StreamWriter(f, 'classes', np.uint8, batch_size=2, string_format=string_format)
+        writer.extend(iter(['cat', 'ox', 'horse', 'dog', 'hippopotamus']))
+        h5_field = writer.close()
+
+        assert get_field_string_format(h5_field) == string_format
+        assert read_strings(h5_field) == ['cat', 'ox', 'horse', 'dog', 'hippopotamus']
+        assert list(f.keys()) == ['classes']
+
+
+def test_add_rows_to_group_uses_string_format(tmpdir):
+    hdf5_manager = HDF5Manager(filename=str(tmpdir.join('file.h5')))
+    hdf5_manager.set_string_format('vlen')
+
+    h5_field = hdf5_manager.add_rows_to_group('train', 'filenames', iter(['a.jpg', 'b.jpg']), np.uint8)
+
+    assert h5_field.attrs[STRING_FORMAT_ATTR] == 'vlen'
+    assert read_strings(h5_field) == ['a.jpg', 'b.jpg']
+    hdf5_manager.close()
+
+
+def test_stream_writer_no_rows(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    with h5py.File(filename, 'w') as f:
+        h5_field = HDF5StreamWriter(f, 'area', np.float32).close()
+
+        assert h5_field.shape == (0,)
+        assert h5_field.dtype == np.float32
+
+
+def test_add_rows_to_group_storage_profiles(tmpdir):
+    filename = str(tmpdir.join('file.h5'))
+    hdf5_manager = HDF5Manager(filename=filename)
+    hdf5_manager.set_storage_profiles({'labels': 'contiguous'})
+    rows = (i for i in range(10))
+
+    h5_field = hdf5_manager.add_rows_to_group('train', 'labels', rows, np.int32, batch_size=4)
+
+    assert np.array_equal(h5_field[()], np.arange(10))
+    assert h5_field.chunks == (4,)
+    assert h5_field.compression is None
+    hdf5_manager.close()
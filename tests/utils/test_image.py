@@ -0,0 +1,101 @@
+"""
+Test the image loading methods.
+"""
+
+
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+import numpy as np
+import pytest
+from PIL import Image, JpegImagePlugin
+
+from dbcollection.utils.image import get_crop_box, load_image, load_images
+
+
+@pytest.fixture()
+def image_file(tmpdir):
+    """JPEG image (width: 400, height: 300) with a bright top-left quadrant."""
+    data = np.zeros((300, 400, 3), dtype=np.uint8)
+    data[:150, :200] = 255
+    filename = str(tmpdir.join('image.jpg'))
+    Image.fromarray(data).save(filename, quality=95)
+    return filename
+
+
+class TestGetCropBox:
+    """Unit tests for the get_crop_box() method."""
+
+    def test_get_crop_box(self):
+        assert get_crop_box([10, 20, 29, 39], (400, 300)) == (10, 20, 30, 40)
+
+    def test_get_crop_box_clips_to_image(self):
+        assert get_crop_box([-5, -5, 500, 500], (400, 300)) == (0, 0, 400, 300)
+
+
+class TestLoadImage:
+    """Unit tests for the load_image() method."""
+
+    def test_load_image(self, image_file):
+        image = load_image(image_file)
+
+        assert image.shape == (300, 400, 3)
+        assert image.dtype == np.uint8
+
+    def test_load_image_resized(self, image_file):
+        image = load_image(image_file, size=(100, 75))
+
+        assert image.shape == (75, 100, 3)
+        assert image[10, 10].min() > 200
+        assert image[60, 90].max() < 50
+
+    def test_load_image_uses_draft_mode(self, image_file, mocker):
+        mock_draft = mocker.spy(JpegImagePlugin.JpegImageFile, 'draft')
+
+        load_image(image_file, size=(100, 75))
+
+        assert mock_draft.call_args[0][1:] == ('RGB', (100, 75))
+
+    def test_load_image_cropped(self, image_file):
+        image = load_image(image_file, box=[150, 100, 249, 199])
+
+        assert image.shape == (100, 100, 3)
+        assert image[10, 10].min() > 200
+        assert image[90, 90].max() < 50
+
+    def test_load_image_cropped_and_resized(self, image_file):
+        image = load_image(image_file, size=(20, 20), box=[150, 100, 249, 199])
+
+        assert image.shape == (20, 20, 3)
+        assert image[2, 2].min() > 200
+        assert image[18, 18].max() < 50
+
+    def test_load_image_grayscale(self, image_file):
+        image = load_image(image_file, mode='L')
+
+        assert image.shape == (300, 400)
+
+
+class TestLoadImages:
+    """Unit tests for the load_images() method."""
+
+    def test_load_images(self, image_file):
+        images = load_images([image_file] * 3, size=(40, 30))
+
+        assert images.shape == (3, 30, 40, 3)
+
+    @pytest.mark.parametrize("pool_class", [ThreadPool, Pool])
+    def test_load_images_with_pool(self, image_file, pool_class):
+        boxes = np.ma.masked_array([[0, 0, 199, 149], [0, 0, 0, 0]], mask=[[0] * 4, [1] * 4])
+        pool = pool_class(2)
+        try:
+            images = load_images([image_file] * 2, size=(40, 30), boxes=boxes, pool=pool)
+        finally:
+            pool.close()
+            pool.join()
+
+        assert np.array_equal(images[0], load_image(image_file, size=(40, 30), box=[0, 0, 199, 149]))
+        assert np.array_equal(images[1], load_image(image_file, size=(40, 30)))
+
+    def test_load_images_raises_error_different_sizes(self, image_file):
+        with pytest.raises(ValueError):
+            load_images([image_file] * 2, boxes=[[0, 0, 9, 9], [0, 0, 19, 19]])
@@ -0,0 +1,36 @@
+"""
+Test dbcollection/utils/inverted_list.py.
+"""
+
+
+import numpy as np
+import pytest
+
+from dbcollection.utils.inverted_list import get_inverted_lists
+
+
+@pytest.mark.parametrize("keys, num_keys, values, expected", [
+    ([1, 0, 1, 2], 3, None, [[1], [0, 2], [3]]),
+    ([1, 0, 1, 2], 4, [5, 5, 5, 6], [[5], [5], [6], []]),
+    ([2, 2, 2], 3, [9, 1, 9], [[], [], [1, 9]]),
+    ([0, -1, 5, 1], 2, None, [[0], [3]]),
+    ([], 2, None, [[], []]),
+    ([], 0, None, []),
+])
+def test_get_inverted_lists(keys, num_keys, values, expected):
+    assert get_inverted_lists(keys, num_keys, values=values) == expected
+
+
+def test_get_inverted_lists_matches_loop():
+    rng = np.random.RandomState(0)
+    keys = rng.randint(0, 10, 500)
+    values = rng.randint(0, 50, 500)
+
+    result = get_inverted_lists(keys, 10, values=values)
+
+    assert result == [sorted(set(values[keys == i].tolist())) for i in range(10)]
+
+
+def test_get_inverted_lists__raises_error_different_sizes():
+    with pytest.raises(AssertionError):
+        get_inverted_lists([0, 1], 2, values=[0])
@@ -0,0 +1,87 @@
+"""
+Test dbcollection/utils/prefetch.py.
+"""
+
+
+import threading
+import pytest
+
+from dbcollection.utils.prefetch import prefetch, prefetch_map
+
+
+def test_prefetch_keeps_order():
+    assert list(prefetch(iter(range(100)), size=3)) == list(range(100))
+
+
+def test_prefetch_empty_iterable():
+    assert list(prefetch([])) == []
+
+
+def test_prefetch_reraises_errors():
+    def sample_generator():
+        yield 1
+        raise ValueError('invalid data')
+
+    items = prefetch(sample_generator())
+
+    assert next(items) == 1
+    with pytest.raises(ValueError):
+        next(items)
+
+
+def test_prefetch_stops_fetching_when_closed():
+    fetched = []
+
+    def sample_generator():
+        for i in range(1000):
+            fetched.append(i)
+            yield i
+
+    items = prefetch(sample_generator(), size=1)
+    assert next(items) == 0
+    items.close()
+
+    assert len(fetched) < 1000
+
+
+def test_prefetch__raises_error_invalid_size():
+    with pytest.raises(AssertionError):
+        list(prefetch([1, 2], size=0))
+
+
+def test_prefetch_map_keeps_order():
+    assert list(prefetch_map(lambda x: x * 2, range(100), size=4)) == [x * 2 for x in range(100)]
+
+
+def test_prefetch_map_empty_iterable():
+    assert list(prefetch_map(lambda x: x, [])) == []
+
+
+def test_prefetch_map_reraises_errors():
+    def sample_function(x):
+        if x == 1:
+            raise ValueError('invalid data')
+        return x
+
+    results = prefetch_map(sample_function, [0, 1, 2])
+
+    assert next(results) == 0
+    with pytest.raises(ValueError):
+        next(results)
+
+
+def test_prefetch_map_processes_at_most_size_items_ahead():
+    processed = []
+    lock = threading.Lock()
+
+    def sample_function(x):
+        with lock:
+            processed.append(x)
+        return x
+
+    results = prefetch_map(sample_function, range(100), size=2)
+    assert next(results) == 0
+    results.close()
+
+    assert 0 in processed
+    assert max(processed) <= 2  # at most 'size' items ahead of the consumer
@@ -0,0 +1,109 @@
+"""
+Test dbcollection/utils/query_index.py.
+"""
+
+
+import h5py
+import numpy as np
+import pytest
+
+from dbcollection.utils.hdf5 import HDF5Manager
+from dbcollection.utils.query_index import (
+    QUERY_INDEX_GROUP,
+    QueryIndex,
+    get_query_index,
+    get_string_ids,
+    load_query_index,
+    write_query_indexes
+)
+from dbcollection.utils.string_ascii import convert_str_to_ascii as str2ascii
+
+
+def test_get_query_index_by_id():
+    keys, offsets, rows = get_query_index(np.array([1, 0, 1, -1]))
+
+    assert keys.tolist() == [0, 1]
+    assert offsets.tolist() == [0, 1, 3]
+    assert rows.tolist() == [1, 0, 2]
+
+
+def test_get_query_index_by_value():
+    keys, offsets, rows = get_query_index(np.array([0, 1, 2, 0, -1]), np.array([640, 480, 640]))
+
+    assert keys.tolist() == [480, 640]
+    assert offsets.tolist() == [0, 1, 4]
+    assert rows.tolist() == [1, 0, 2, 3]
+
+
+@pytest.fixture()
+def query_index():
+    values = np.array([5, 3, 8, 3, 1, 9, 5])
+    return QueryIndex(*get_query_index(np.arange(len(values)), values))
+
+
+@pytest.mark.parametrize("op, value, expected", [
+    ('==', 3, [1, 3]),
+    ('==', 4, []),
+    ('==', 10, []),
+    ('in', [5, 1, 7], [0, 4, 6]),
+    ('in', [], []),
+    ('<', 5, [1, 3, 4]),
+    ('<=', 5, [0, 1, 3, 4, 6]),
+    ('>', 5, [2, 5]),
+    ('>=', 8, [2, 5]),
+    ('>', 9, []),
+    ('between', (3, 5), [0, 1, 3, 6]),
+    ('between', (6, 4), []),
+])
+def test_query_index_lookup(query_index, op, value, expected):
+    assert query_index.lookup(op, value).tolist() == expected
+
+
+def test_query_index_lookup__raises_error_invalid_operator(query_index):
+    with pytest.raises(KeyError):
+        query_index.lookup('!=', 3)
+
+
+def test_write_query_indexes(tmpdir):
+    filename = str(tmpdir.join('test.h5'))
+    hdf5_manager = HDF5Manager(filename)
+    hdf5_manager.add_strings_to_group('train', 'classes', ['cat', 'dog'])
+    hdf5_manager.add_field_to_group('train', 'width', np.array([640, 480]), dtype=np.int32)
+    hdf5_manager.add_field_to_group('train', 'boxes', np.zeros((3, 4)), dtype=np.float32)
+    hdf5_manager.add_field_to_group('train', 'object_fields', str2ascii(['classes', 'width', 'boxes']),
+                                    dtype=np.uint8, fillvalue=0)
+    hdf5_manager.add_field_to_group('train', 'object_ids', np.array([[0, 1, 0], [1, 0, 1], [1, 1, 2]]),
+                                    dtype=np.int32)
+    hdf5_manager.close()
+
+    with h5py.File(filename, 'a') as h5_file:
+        write_query_indexes(h5_file['train'])
+
+        assert sorted(h5_file[QUERY_INDEX_GROUP]['train']) == ['classes', 'width']
+        assert sorted(h5_file['train']) == ['boxes', 'classes', 'object_fields', 'object_ids', 'width']
+        classes_index = load_query_index(h5_file['train'], 'classes')
+        width_index = load_query_index(h5_file['train'], 'width')
+        assert not classes_index.by_value
+        assert classes_index.lookup('==', 1).tolist() == [1, 2]
+        assert width_index.by_value
+        assert width_index.lookup('>', 500).tolist() == [1]
+        assert load_query_index(h5_file['train'], 'boxes') is None
+
+
+def test_load_query_index_returns_none_if_missing(tmpdir):
+    with h5py.File(str(tmpdir.join('test.h5')), 'w') as h5_file:
+        h5_group = h5_file.create_group('train')
+
+        assert load_query_index(h5_group, 'classes') is None
+
+
+@pytest.mark.parametrize("string_format", ['ascii', 'fixed', 'vlen'])
+def test_get_string_ids(tmpdir, string_format):
+    hdf5_manager = HDF5Manager(str(tmpdir.join('test.h5')))
+    strings = ['cat', 'dog', 'cat', 'horse', u'caf\xe9', 'dog']
+    h5_field = hdf5_manager.add_strings_to_group('train', 'classes', strings, string_format=string_format)
+
+    assert get_string_ids(h5_field, ['cat'], block_rows=4).tolist() == [0, 2]
+    assert get_string_ids(h5_field, ['dog', u'caf\xe9'], block_rows=4).tolist() == [1, 4, 5]
+    assert get_string_ids(h5_field, ['ca', 'horses', 1], block_rows=4).tolist() == []
+    hdf5_manager.close()
@@ -74,3 +74,31 @@ def test_convert_ascii_to_str_multiple_strings(sample, output):
 def test_convert_ascii_to_str__raises_error__empty_input():
     with pytest.raises(AssertionError):
         convert_ascii_to_str([])
+
+def test_convert_str_to_ascii__raises_error__not_strings():
+    with pytest.raises(TypeError):
+        convert_str_to_ascii([1, 2, 3])
+
+@pytest.mark.parametrize("sample, output", [
+    ([[97, 0, 98, 0], [0, 0, 0, 0], [99, 100, 0, 0]], ['ab', '', 'cd']),
+    ([[97, 98, -1], [99, -1, -1]], ['ab', 'c']),
+    ([[97, 300], [98, 0]], ['a' + chr(300), 'b']),
+])
+def test_convert_ascii_to_str_removes_all_zeros(sample, output):
+    res = convert_ascii_to_str(np.array(sample))
+    assert(output == res)
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.int32, np.int64])
+def test_convert_ascii_to_str_dtypes(dtype):
+    sample = ['string1', 'a', 'str3']
+    res = convert_ascii_to_str(convert_str_to_ascii(sample).astype(dtype))
+    assert(sample == res)
+
+def test_convert_ascii_to_str_empty_rows():
+    assert(convert_ascii_to_str(np.zeros((0, 5), dtype=np.uint8)) == [])
+    assert(convert_ascii_to_str(np.zeros((2, 0), dtype=np.uint8)) == ['', ''])
+
+def test_convert_str_to_ascii_non_ascii_chars():
+    sample = ['caf\xe9', 'na\xefve']
+    res = convert_ascii_to_str(convert_str_to_ascii(sample))
+    assert(sample == res)
@@ -4,18 +4,36 @@ Test dbcollection utils.
 
 
 import os
+import json
+import time
+import itertools
+import hashlib
+import threading
 import pytest
+import requests
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.socketserver import ThreadingMixIn
 
 from dbcollection.core.exceptions import (
     GoogleDriveFileIdDoesNotExist,
     InvalidURLDownloadSource,
     MD5HashNotEqual,
+    SHA256HashNotEqual,
     URLDoesNotExist
 )
 from dbcollection.utils.url import (
     check_if_url_files_exist,
     download_extract_urls,
     extract_archive_file,
+    get_file_hashes,
+    iter_response_chunks,
+    load_checksum_manifest,
+    update_checksum_manifest,
+    verify_url_files,
+    CHECKSUM_MANIFEST_FILENAME,
+    BandwidthLimiter,
+    DownloadProgress,
+    DownloadScheduler,
     URL,
     URLDownload,
     URLDownloadGoogleDrive
@@ -52,7 +70,8 @@ def test_download_extract_urls__download_files_and_savedir_does_not_exist(mocker
     mock_path_exists.assert_called_once_with(save_dir)
     assert not mock_check_urls.called
     mock_makedirs.assert_called_once_with(save_dir)
-    mock_download.assert_called_once_with(urls[0], save_dir, True)
+    mock_download.assert_called_once_with(urls[0], save_dir, False, session=mocker.ANY, callback=mocker.ANY,
+                                          segments=1)
     mock_extract_files.assert_called_once_with('filename.zip', save_dir)
 
 
@@ -70,7 +89,8 @@ def test_download_extract_urls__download_files_and_savedir_exists(mocker):
     mock_path_exists.assert_called_once_with(save_dir)
     mock_check_urls.assert_called_once_with(urls, save_dir)
     assert not mock_makedirs.called
-    mock_download.assert_called_once_with(urls[0], save_dir, True)
+    mock_download.assert_called_once_with(urls[0], save_dir, False, session=mocker.ANY, callback=mocker.ANY,
+                                          segments=1)
     mock_extract_files.assert_called_once_with('filename.zip', save_dir)
 
 
@@ -88,26 +108,22 @@ def test_download_extract_urls__download_files_and_savedir_does_not_exist_and_sk
     mock_path_exists.assert_called_once_with(save_dir)
     assert not mock_check_urls.called
     mock_makedirs.assert_called_once_with(save_dir)
-    mock_download.assert_called_once_with(urls[0], save_dir, True)
+    mock_download.assert_called_once_with(urls[0], save_dir, False, session=mocker.ANY, callback=mocker.ANY,
+                                          segments=1)
     assert not mock_extract_files.called
 
 def test_check_if_url_files_exist__files_exist(mocker):
-    dummy_filename = 'some_filename.zip'
-    mock_get_filename = mocker.patch.object(URL, "get_url_filename", return_value=dummy_filename)
-    mock_exists = mocker.patch('os.path.exists', return_value=True)
+    mock_exists_file = mocker.patch.object(URL, "exists_url_file", return_value=True)
 
     urls = ['http://url1.zip', 'http://url.2zip']
     save_dir = os.path.join('path', 'to', 'save', 'dir')
     result = check_if_url_files_exist(urls, save_dir)
 
-    mock_get_filename.assert_called_once_with(urls[0])
-    mock_exists.assert_called_once_with(os.path.join(save_dir, dummy_filename))
+    assert mock_exists_file.call_args_list == [mocker.call(url, save_dir) for url in urls]
     assert result == True
 
-def test_check_if_url_files_exist__files_dont_exist(mocker):
-    dummy_filename = 'some_filename.zip'
-    mock_get_filename = mocker.patch.object(URL, "get_url_filename", return_value=dummy_filename)
-    mock_exists = mocker.patch('os.path.exists', return_value=False)
+def test_check_if_url_files_exist__some_files_dont_exist(mocker):
+    mock_exists_file = mocker.patch.object(URL, "exists_url_file", side_effect=[True, False])
 
     urls = ['http://url1.zip', 'http://url.2zip']
     save_dir = os.path.join('path', 'to', 'save', 'dir')
@@ -116,10 +132,19 @@ def test_check_if_url_files_exist__files_dont_exist(mocker):
         save_dir=save_dir
     )
 
-    assert mock_get_filename.call_count == 2
-    assert mock_exists.call_count == 2
+    assert mock_exists_file.call_count == 2
     assert result == False
 
+def test_check_if_url_files_exist__with_local_files(tmpdir):
+    save_dir = str(tmpdir)
+    with open(os.path.join(save_dir, 'url1.zip'), 'wb') as f:
+        f.write(b'data')
+    with open(os.path.join(save_dir, 'url2.zip.part'), 'wb') as f:
+        f.write(b'partial data')
+
+    assert check_if_url_files_exist(['http://url1.zip'], save_dir) == True
+    assert check_if_url_files_exist(['http://url1.zip', 'http://url2.zip'], save_dir) == False
+
 def test_extract_archive_file(mocker):
     mock_patoolib = mocker.patch('patoolib.extract_archive')
 
@@ -170,7 +195,7 @@ class TestURL:
 
         mock_exists_file.assert_called_once_with(url, save_dir)
         assert not mock_get_metadata.called
-        mock_download_url.assert_called_once_with(url, save_dir, True)
+        mock_download_url.assert_called_once_with(url, save_dir, True, session=None, callback=None, segments=1)
         assert filename == dummy_filename
 
     @pytest.mark.parametrize("file_exists", [True, False])
@@ -211,8 +236,9 @@ class TestURL:
         mock_get_metadata = mocker.patch.object(URL, "get_url_metadata_and_dir_paths", return_value=(dummy_metadata, dummy_download_dir, dummy_filename))
         mock_exists = mocker.patch("os.path.exists", return_value=False)
         mock_create_dir = mocker.patch("os.makedirs")
-        mock_download = mocker.patch.object(URL, "download_url_to_file")
+        mock_download = mocker.patch.object(URL, "download_url_to_file", return_value={'md5': 'dummy_hash'})
         mock_md5_checksum = mocker.patch.object(URL, "md5_checksum")
+        mock_update_manifest = mocker.patch("dbcollection.utils.url.update_checksum_manifest")
 
         url = 'http://url1.zip'
         save_dir = os.path.join('path', 'to', 'data', 'dir')
@@ -226,8 +252,10 @@ class TestURL:
         mock_get_metadata.assert_called_once_with(url, save_dir)
         mock_exists.assert_called_once_with(dummy_download_dir)
         mock_create_dir.assert_called_once_with(dummy_download_dir)
-        mock_download.assert_called_once_with(dummy_metadata, dummy_filename, verbose)
-        mock_md5_checksum.assert_called_once_with(dummy_filename, dummy_metadata['md5hash'])
+        mock_download.assert_called_once_with(dummy_metadata, dummy_filename, verbose, session=None, callback=None,
+                                              segments=1)
+        mock_md5_checksum.assert_called_once_with(dummy_filename, dummy_metadata['md5hash'], 'dummy_hash')
+        mock_update_manifest.assert_called_once_with(save_dir, dummy_filename, {'md5': 'dummy_hash'})
         assert filename == dummy_filename
 
     def test_parse_url_metadata__string(self, mocker):
@@ -237,6 +265,7 @@ class TestURL:
         assert url_metadata == {
             "url": url,
             "md5hash": None,
+            "sha256": None,
             "filename": 'url1.zip',
             "extract_dir": '',
             "method": 'requests'
@@ -254,6 +283,7 @@ class TestURL:
         assert url_metadata == {
             "url": url['url'],
             "md5hash": url['md5hash'],
+            "sha256": None,
             "filename": url['save_name'],
             "extract_dir": url['extract_dir'],
             "method": 'requests'
@@ -270,6 +300,7 @@ class TestURL:
         assert url_metadata == {
             "url": url['url'],
             "md5hash": None,
+            "sha256": None,
             "filename": url['save_name'],
             "extract_dir": url['extract_dir'],
             "method": 'googledrive'
@@ -356,20 +387,11 @@ class TestURL:
             )
 
     def test_create_temp_file(self, mocker):
-        dummy_file = mocker.MagicMock()
-        dummy_filename = "filename.tmp"
-        mock_create_file = mocker.patch("tempfile.mkstemp", return_value=(dummy_file, dummy_filename))
-        mock_close = mocker.patch("os.close")
-        mock_unlink = mocker.patch("os.unlink")
-
         filename_dir = os.path.join('some', 'path', 'to', 'data')
         filename = os.path.join(filename_dir, 'filename1.zip')
         tmpfile = URL().create_temp_file(filename)
 
-        assert tmpfile == dummy_filename
-        mock_create_file.assert_called_once_with(".tmp", prefix=filename, dir=filename_dir)
-        mock_close.assert_called_once_with(dummy_file)
-        mock_unlink.assert_called_once_with(dummy_filename)
+        assert tmpfile == filename + '.part'
 
     def test_md5_checksum(self, mocker):
         dummy_hash = 'a5s6dea9s8rtqw1s1g45jk4s4dfg49'
@@ -390,6 +412,21 @@ class TestURL:
             md5hash = '87897asd98f74asd4fas6d4as8v46t'
             URL().md5_checksum(filename=filename, md5hash=md5hash)
 
+    def test_md5_checksum__with_file_hash(self, mocker):
+        mock_get_hash = mocker.patch.object(URL, "get_file_hash")
+
+        URL().md5_checksum(filename='filename1.zip', md5hash='a5s6dea9', file_hash='a5s6dea9')
+
+        assert not mock_get_hash.called
+
+    def test_sha256_checksum__raises_error(self, mocker):
+        mock_get_hash = mocker.patch.object(URL, "get_file_hash", return_value='a5s6dea9s8rtqw1s1g45')
+
+        with pytest.raises(SHA256HashNotEqual):
+            URL().sha256_checksum(filename='filename1.zip', sha256hash='87897asd98f74asd4fas')
+
+        mock_get_hash.assert_called_once_with('filename1.zip', algorithm='sha256')
+
     def test_get_url_filename(self, mocker):
         dummy_extract_dir = os.path.join('some', 'dir', 'to', 'extract')
         dummy_filename = 'filename1.zip'
@@ -451,6 +488,19 @@ class TestURLDownload:
         assert response == False
 
 
+    def test_check_exists_url__with_session(self, mocker):
+        session = mocker.MagicMock()
+        session.head.return_value.status_code = 200
+        mock_requests = mocker.patch("requests.head")
+
+        url = 'http://dummy_url.html'
+        response = URLDownload(session=session).check_exists_url(url)
+
+        session.head.assert_called_once_with(url, allow_redirects=True)
+        assert not mock_requests.called
+        assert response == True
+
+
 class TestURLDownloadGoogleDrive:
     """Unit tests for the URLDownloadGoogleDrive class."""
 
@@ -511,3 +561,600 @@ class TestURLDownloadGoogleDrive:
                 file_id=file_id
             )
 
+
+
+# -----------------------------------------------------------
+# Local HTTP server
+# -----------------------------------------------------------
+
+def get_etag(data):
+    return '"{}"'.format(hashlib.md5(data).hexdigest())
+
+
+def write_partial_file(filename, data, etag=None):
+    """Writes the data of a partially downloaded file (and the ETag of its url)."""
+    with open(filename, 'wb') as f:
+        f.write(data)
+    if etag is not None:
+        with open(filename + '.validator', 'w') as f:
+            f.write(etag)
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FileRequestHandler(BaseHTTPRequestHandler):
+    """Serves the files of the server (with a delay per request, range requests and chunked encoding)."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.send_file_headers()
+
+    def do_GET(self):
+        data = self.send_file_headers()
+        if data is None:
+            return
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            fail_after = server.fail_after.pop(self.path, None)
+        try:
+            time.sleep(server.delays.get(self.path, 0))
+            if fail_after is not None:
+                self.write_body(data[:fail_after], end=False)
+                self.close_connection = True
+                return
+            self.write_body(data)
+        finally:
+            with server.lock:
+                server.active -= 1
+                server.finished[self.path] = time.time()
+
+    def write_body(self, data, end=True):
+        """Writes the data of a response (in 1000 byte chunks if the server uses chunked encoding)."""
+        if not self.server.chunked:
+            self.wfile.write(data)
+            return
+        for i in range(0, len(data), 1000):
+            chunk = data[i:i + 1000]
+            self.wfile.write('{:x}\r\n'.format(len(chunk)).encode('ascii') + chunk + b'\r\n')
+        if end:
+            self.wfile.write(b'0\r\n\r\n')
+
+    def send_file_headers(self):
+        """Sends the headers of a (range of a) file and returns its data (None if it does not exist)."""
+        if self.path not in self.server.files:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+        data = self.server.files[self.path]
+        etag = get_etag(data)
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        self.server.ranges.append((self.command, self.path, range_header))
+        if if_range is not None and if_range != etag:
+            range_header = None  # the file changed: send all of it
+        if range_header and self.server.accept_ranges:
+            start, end = range_header.split('=')[1].split('-')
+            start, end = int(start), int(end) if end else len(data) - 1
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', 'bytes */{}'.format(len(data)))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return None
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, end, len(data)))
+            data = data[start:end + 1]
+        else:
+            self.send_response(200)
+        if self.server.accept_ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        if self.server.chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        return data
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def http_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FileRequestHandler)
+    server.files = {'/file{}.bin'.format(i): os.urandom(100000 * (i + 1)) for i in range(3)}
+    server.delays = {}
+    server.lock = threading.Lock()
+    server.active = server.max_active = 0
+    server.finished = {}
+    server.fail_after = {}
+    server.ranges = []
+    server.accept_ranges = True
+    server.chunked = False
+    server.base_url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,))
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestDownloadScheduler:
+    """Unit tests for the DownloadScheduler class (with a local HTTP server)."""
+
+    def test_run(self, http_server, tmpdir, mocker):
+        mock_extract_files = mocker.patch("dbcollection.utils.url.extract_archive_file")
+        urls = [http_server.base_url + path for path in sorted(http_server.files)]
+        save_dir = str(tmpdir)
+
+        scheduler = DownloadScheduler(save_dir, workers=3, verbose=False)
+        filenames = scheduler.run(urls)
+
+        assert filenames == [os.path.join(save_dir, path[1:]) for path in sorted(http_server.files)]
+        for filename, path in zip(filenames, sorted(http_server.files)):
+            with open(filename, 'rb') as f:
+                assert f.read() == http_server.files[path]
+        assert scheduler.downloaded_bytes == sum(len(data) for data in http_server.files.values())
+        assert sorted(call[0][0] for call in mock_extract_files.call_args_list) == sorted(filenames)
+
+    def test_run_downloads_urls_concurrently(self, http_server, tmpdir, mocker):
+        mocker.patch("dbcollection.utils.url.extract_archive_file")
+        http_server.delays = {path: 0.3 for path in http_server.files}
+        urls = [http_server.base_url + path for path in sorted(http_server.files)]
+
+        DownloadScheduler(str(tmpdir), workers=3, verbose=False).run(urls)
+
+        assert http_server.max_active == 3
+
+    def test_run_extracts_while_downloading(self, http_server, tmpdir, mocker):
+        extracted = {}
+        mocker.patch("dbcollection.utils.url.extract_archive_file",
+                     side_effect=lambda filename, save_dir: extracted.update({filename: time.time()}))
+        http_server.delays = {'/file0.bin': 1.0}
+        urls = [http_server.base_url + path for path in sorted(http_server.files)]
+
+        DownloadScheduler(str(tmpdir), workers=3, verbose=False).run(urls)
+
+        assert extracted[str(tmpdir.join('file1.bin'))] < http_server.finished['/file0.bin']
+
+    def test_run_limits_bandwidth(self, http_server, tmpdir):
+        urls = [http_server.base_url + '/file0.bin', http_server.base_url + '/file1.bin']
+
+        start = time.time()
+        DownloadScheduler(str(tmpdir), workers=2, max_bandwidth=1000000, extract_data=False,
+                          verbose=False).run(urls)
+
+        assert time.time() - start >= 0.25
+
+    def test_run_raises_error_url_not_exists(self, http_server, tmpdir):
+        with pytest.raises(URLDoesNotExist):
+            DownloadScheduler(str(tmpdir), verbose=False).run([http_server.base_url + '/missing.bin'])
+
+    def test_download_extract_urls(self, http_server, tmpdir, mocker):
+        mocker.patch("dbcollection.utils.url.extract_archive_file")
+        save_dir = str(tmpdir.join('data'))
+
+        filenames = download_extract_urls([http_server.base_url + '/file2.bin'], save_dir, verbose=True)
+
+        assert filenames == [os.path.join(save_dir, 'file2.bin')]
+
+    def test_download_extract_urls_resumes_partial_files(self, http_server, tmpdir, mocker):
+        mocker.patch("dbcollection.utils.url.extract_archive_file")
+        save_dir = str(tmpdir)
+        urls = [http_server.base_url + '/file0.bin', http_server.base_url + '/file2.bin']
+        data = http_server.files['/file2.bin']
+        URL.download(urls[0], save_dir, verbose=False)  # finished before the interruption
+        write_partial_file(os.path.join(save_dir, 'file2.bin.part'), data[:1000], get_etag(data))
+        http_server.ranges = []
+
+        filenames = download_extract_urls(urls, save_dir, verbose=False)
+
+        assert filenames == [os.path.join(save_dir, 'file0.bin'), os.path.join(save_dir, 'file2.bin')]
+        with open(filenames[1], 'rb') as f:
+            assert f.read() == data
+        assert [(path, r) for method, path, r in http_server.ranges if method == 'GET'] == \
+            [('/file2.bin', 'bytes=1000-')]
+
+
+class TestBandwidthLimiter:
+    """Unit tests for the BandwidthLimiter class."""
+
+    def test_consume(self, mocker):
+        mock_sleep = mocker.patch("time.sleep")
+        limiter = BandwidthLimiter(1000)
+
+        limiter.consume(500)
+        limiter.consume(500)
+
+        assert mock_sleep.call_args_list[-1][0][0] == pytest.approx(1.0, abs=0.05)
+
+
+class RawStream(object):
+    """Stub of the underlying stream of a response (records the size of each read)."""
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+        self.chunk_sizes = []
+
+    @property
+    def closed(self):
+        return self.position >= len(self.data)
+
+    def read(self, amt, decode_content=False):
+        self.chunk_sizes.append(amt)
+        data = self.data[self.position:self.position + amt]
+        self.position += len(data)
+        return data
+
+
+class ChunkedResponse(object):
+    """Response stub with a raw stream."""
+
+    def __init__(self, data):
+        self.raw = RawStream(data)
+
+
+class TestIterResponseChunks:
+    """Unit tests for the iter_response_chunks() method."""
+
+    def test_iter_response_chunks_grows_chunk_size(self):
+        data = os.urandom(20000)
+        response = ChunkedResponse(data)
+
+        chunks = list(iter_response_chunks(response, min_chunk_size=1000, max_chunk_size=4000, chunk_time=10))
+
+        assert b''.join(chunks) == data
+        assert response.raw.chunk_sizes[:5] == [1000, 2000, 4000, 4000, 4000]
+
+    def test_iter_response_chunks_shrinks_chunk_size(self, mocker):
+        times = itertools.chain([0, 0.01, 0.02], itertools.count(5, 5))  # 2 fast chunks, then slow ones
+        mocker.patch("time.time", side_effect=lambda: next(times))
+        response = ChunkedResponse(os.urandom(20000))
+
+        list(iter_response_chunks(response, min_chunk_size=1000, max_chunk_size=8000, chunk_time=1))
+
+        assert response.raw.chunk_sizes[:6] == [1000, 2000, 4000, 2000, 1000, 1000]
+
+    def test_iter_response_chunks_chunked_encoding(self, http_server):
+        data = os.urandom(3 * 2**20)
+        http_server.files['/big.bin'] = data
+        http_server.chunked = True
+
+        with requests.get(http_server.base_url + '/big.bin', stream=True) as r:
+            chunks = list(iter_response_chunks(r))
+
+        assert b''.join(chunks) == data
+        assert max(len(chunk) for chunk in chunks) > 2**16
+
+    def test_iter_response_chunks_raises_error_truncated_chunked_response(self, http_server):
+        http_server.chunked = True
+        http_server.fail_after = {'/file2.bin': 150500}
+
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            with requests.get(http_server.base_url + '/file2.bin', stream=True) as r:
+                list(iter_response_chunks(r))
+
+
+class TestDownloadProgress:
+    """Unit tests for the DownloadProgress class."""
+
+    def test_update_throttles_progress_bar(self, mocker):
+        progbar = mocker.MagicMock()
+        progbar.max_value = 100
+        progbar.start.return_value = progbar
+        mocker.patch("progressbar.ProgressBar", return_value=progbar)
+        callback = mocker.MagicMock()
+        progress = DownloadProgress(100, True, callback)
+        progress.start('file.bin', 0, 100)
+
+        for _ in range(10):
+            progress.update(10)
+        progress.finish()
+
+        assert callback.call_count == 10
+        assert progress.downloaded_bytes == 100
+        assert progbar.update.call_count == 2
+        progbar.update.assert_called_with(100)
+
+
+class TestURLDownloadResume:
+    """Unit tests for the resumable/segmented downloads of URLDownload (with a local HTTP server)."""
+
+    def test_download_resumes_partial_file(self, http_server, tmpdir):
+        data = http_server.files['/file1.bin']
+        filename = str(tmpdir.join('file1.bin.part'))
+        write_partial_file(filename, data[:1000], get_etag(data))
+
+        URLDownload().download(http_server.base_url + '/file1.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+        assert ('GET', '/file1.bin', 'bytes=1000-') in http_server.ranges
+        assert not os.path.exists(filename + '.validator')
+
+    def test_download_restarts_partial_file_without_validator(self, http_server, tmpdir):
+        data = http_server.files['/file1.bin']
+        filename = str(tmpdir.join('file1.bin.part'))
+        write_partial_file(filename, b'x' * 1000)
+
+        URLDownload().download(http_server.base_url + '/file1.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+        assert [r for method, _, r in http_server.ranges if method == 'GET'] == [None]
+
+    def test_download_restarts_if_url_changed(self, http_server, tmpdir):
+        data = http_server.files['/file1.bin']
+        filename = str(tmpdir.join('file1.bin.part'))
+        write_partial_file(filename, b'x' * 1000, get_etag(b'old data'))
+
+        URLDownload().download(http_server.base_url + '/file1.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+
+    def test_download_restarts_if_partial_file_larger_than_url(self, http_server, tmpdir):
+        data = http_server.files['/file0.bin']
+        filename = str(tmpdir.join('file0.bin.part'))
+        write_partial_file(filename, data + b'x' * 1000, get_etag(data))
+
+        URLDownload().download(http_server.base_url + '/file0.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+
+    def test_download_complete_partial_file(self, http_server, tmpdir):
+        data = http_server.files['/file0.bin']
+        filename = str(tmpdir.join('file0.bin.part'))
+        write_partial_file(filename, data, get_etag(data))
+
+        URLDownload().download(http_server.base_url + '/file0.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+        assert [r for method, _, r in http_server.ranges if method == 'GET'] == ['bytes=100000-']
+
+    def test_download_retries_from_last_byte(self, http_server, tmpdir):
+        data = http_server.files['/file2.bin']
+        http_server.fail_after = {'/file2.bin': 150000}
+        filename = str(tmpdir.join('file2.bin'))
+        downloader = URLDownload(retries=2)
+        downloader.retry_delay = 0
+
+        downloader.download(http_server.base_url + '/file2.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+        get_ranges = [r for method, path, r in http_server.ranges if method == 'GET']
+        assert get_ranges[0] is None
+        assert 0 < int(get_ranges[1][len('bytes='):-1]) <= 150000
+
+    def test_download_chunked_encoding(self, http_server, tmpdir):
+        data = os.urandom(3 * 2**20)
+        http_server.files['/big.bin'] = data
+        http_server.chunked = True
+        filename = str(tmpdir.join('big.bin'))
+
+        URLDownload(retries=0).download(http_server.base_url + '/big.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+
+    def test_download_retries_truncated_chunked_response(self, http_server, tmpdir):
+        data = http_server.files['/file2.bin']
+        http_server.chunked = True
+        http_server.fail_after = {'/file2.bin': 150500}
+        filename = str(tmpdir.join('file2.bin'))
+        downloader = URLDownload(retries=2)
+        downloader.retry_delay = 0
+
+        downloader.download(http_server.base_url + '/file2.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+
+    def test_download_raises_error_after_retries(self, http_server, tmpdir):
+        http_server.fail_after = {'/file2.bin': 5000}
+        downloader = URLDownload(retries=0)
+
+        with pytest.raises(requests.exceptions.RequestException):
+            downloader.download(http_server.base_url + '/file2.bin', str(tmpdir.join('file2.bin')))
+
+    def test_download_restarts_if_server_does_not_support_ranges(self, http_server, tmpdir):
+        http_server.accept_ranges = False
+        data = http_server.files['/file0.bin']
+        filename = str(tmpdir.join('file0.bin'))
+        write_partial_file(filename, b'x' * 1000, get_etag(data))
+
+        URLDownload(segments=4).download(http_server.base_url + '/file0.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+
+    def test_download_segments(self, http_server, tmpdir, mocker):
+        mocker.patch.object(URLDownload, 'min_segment_size', 1000)
+        data = http_server.files['/file2.bin']
+        filename = str(tmpdir.join('file2.bin'))
+        callback = mocker.MagicMock()
+
+        URLDownload(callback=callback, segments=3).download(http_server.base_url + '/file2.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+        assert sorted(r for method, _, r in http_server.ranges if method == 'GET') == \
+            ['bytes=0-99999', 'bytes=100000-199999', 'bytes=200000-299999']
+        assert sum(call[0][0] for call in callback.call_args_list) == len(data)
+        assert sorted(os.listdir(str(tmpdir))) == ['file2.bin']
+
+    def test_download_segments_resumes_segments(self, http_server, tmpdir, mocker):
+        mocker.patch.object(URLDownload, 'min_segment_size', 1000)
+        data = http_server.files['/file1.bin']
+        filename = str(tmpdir.join('file1.bin'))
+        write_partial_file(filename + '.0', data[:100000], get_etag(data))  # first segment complete
+        write_partial_file(filename + '.1', data[100000:100500], get_etag(data))
+
+        URLDownload(segments=2).download(http_server.base_url + '/file1.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+        assert [r for method, _, r in http_server.ranges if method == 'GET'] == ['bytes=100500-199999']
+        assert sorted(os.listdir(str(tmpdir))) == ['file1.bin']
+
+    def test_download_segments_discards_segments_if_url_changed(self, http_server, tmpdir, mocker):
+        mocker.patch.object(URLDownload, 'min_segment_size', 1000)
+        data = http_server.files['/file1.bin']
+        filename = str(tmpdir.join('file1.bin'))
+        write_partial_file(filename + '.0', b'x' * 100000, get_etag(b'old data'))  # first segment complete
+        write_partial_file(filename + '.1', b'x' * 500, get_etag(b'old data'))
+
+        URLDownload(segments=2).download(http_server.base_url + '/file1.bin', filename)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+        assert sorted(r for method, _, r in http_server.ranges if method == 'GET') == \
+            ['bytes=0-99999', 'bytes=100000-199999']
+
+    def test_url_download_resumes_part_file(self, http_server, tmpdir):
+        data = http_server.files['/file0.bin']
+        write_partial_file(str(tmpdir.join('file0.bin.part')), data[:50000], get_etag(data))
+
+        filename = URL.download(http_server.base_url + '/file0.bin', str(tmpdir), verbose=False)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == data
+        assert not os.path.exists(filename + '.part')
+
+
+class TestChecksums:
+    """Unit tests for the checksums computed while downloading and the checksum manifest."""
+
+    def get_url(self, http_server, path, sha256=False):
+        data = http_server.files[path]
+        url = {"url": http_server.base_url + path, "md5hash": hashlib.md5(data).hexdigest()}
+        if sha256:
+            url["sha256"] = hashlib.sha256(data).hexdigest()
+        return url
+
+    def test_get_file_hashes(self, tmpdir, mocker):
+        mocker.patch("dbcollection.utils.url.HASH_CHUNK_SIZE", 1000)
+        data = os.urandom(4500)
+        filename = str(tmpdir.join('file.bin'))
+        with open(filename, 'wb') as f:
+            f.write(data)
+
+        hashes = get_file_hashes(filename, ['md5', 'sha256'])
+
+        assert hashes == {'md5': hashlib.md5(data).hexdigest(), 'sha256': hashlib.sha256(data).hexdigest()}
+
+    @pytest.mark.parametrize("segments", [1, 3])
+    def test_download_computes_hashes(self, http_server, tmpdir, mocker, segments):
+        mocker.patch.object(URLDownload, 'min_segment_size', 1000)
+        data = http_server.files['/file2.bin']
+        downloader = URLDownload(segments=segments, hash_algorithms=['md5', 'sha256'])
+
+        downloader.download(http_server.base_url + '/file2.bin', str(tmpdir.join('file2.bin')))
+
+        assert downloader.hashes == {'md5': hashlib.md5(data).hexdigest(),
+                                     'sha256': hashlib.sha256(data).hexdigest()}
+
+    def test_download_computes_hashes_of_resumed_file(self, http_server, tmpdir):
+        data = http_server.files['/file2.bin']
+        http_server.fail_after = {'/file2.bin': 150000}
+        filename = str(tmpdir.join('file2.bin'))
+        write_partial_file(filename, data[:1000], get_etag(data))
+        downloader = URLDownload(retries=2, hash_algorithms=['md5'])
+        downloader.retry_delay = 0
+
+        downloader.download(http_server.base_url + '/file2.bin', filename)
+
+        assert downloader.hashes == {'md5': hashlib.md5(data).hexdigest()}
+
+    def test_url_download_does_not_read_downloaded_file(self, http_server, tmpdir, mocker):
+        mock_get_hash = mocker.spy(URL, "get_file_hash")
+        url = self.get_url(http_server, '/file1.bin', sha256=True)
+
+        filename = URL.download(url, str(tmpdir), verbose=False)
+
+        assert not mock_get_hash.called
+        manifest = load_checksum_manifest(str(tmpdir))
+        assert manifest['file1.bin']['md5'] == url['md5hash']
+        assert manifest['file1.bin']['sha256'] == url['sha256']
+        assert manifest['file1.bin']['size'] == os.path.getsize(filename)
+
+    def test_url_download_raises_error_sha256_not_equal(self, http_server, tmpdir):
+        url = self.get_url(http_server, '/file0.bin')
+        url["sha256"] = '0' * 64
+
+        with pytest.raises(SHA256HashNotEqual):
+            URL.download(url, str(tmpdir), verbose=False)
+
+    def test_url_download_skips_files_in_manifest_without_hashing(self, http_server, tmpdir, mocker):
+        url = self.get_url(http_server, '/file0.bin')
+        URL.download(url, str(tmpdir), verbose=False)
+        mock_get_hashes = mocker.patch("dbcollection.utils.url.get_file_hashes")
+        num_requests = len(http_server.ranges)
+
+        URL.download(url, str(tmpdir), verbose=False)
+
+        assert not mock_get_hashes.called
+        assert len(http_server.ranges) == num_requests
+
+    def test_url_download_downloads_again_modified_files(self, http_server, tmpdir):
+        url = self.get_url(http_server, '/file0.bin')
+        filename = URL.download(url, str(tmpdir), verbose=False)
+        with open(filename, 'r+b') as f:
+            f.write(b'corrupted')
+
+        URL.download(url, str(tmpdir), verbose=False)
+
+        with open(filename, 'rb') as f:
+            assert f.read() == http_server.files['/file0.bin']
+
+    def test_update_checksum_manifest(self, tmpdir):
+        save_dir = str(tmpdir)
+        filename = str(tmpdir.mkdir('dir').join('file.bin'))
+        with open(filename, 'wb') as f:
+            f.write(b'data')
+
+        update_checksum_manifest(save_dir, filename, {'md5': 'dummy_hash'})
+
+        with open(os.path.join(save_dir, CHECKSUM_MANIFEST_FILENAME), 'r') as f:
+            manifest = json.load(f)
+        assert manifest == {os.path.join('dir', 'file.bin'): {'size': 4,
+                                                               'mtime': os.path.getmtime(filename),
+                                                               'md5': 'dummy_hash'}}
+
+    def test_verify_url_files(self, http_server, tmpdir):
+        save_dir = str(tmpdir)
+        urls = [self.get_url(http_server, '/file0.bin'),
+                http_server.base_url + '/file1.bin',
+                self.get_url(http_server, '/file2.bin')]
+        for url in urls[:2]:
+            URL.download(url, save_dir, verbose=False)
+        with open(os.path.join(save_dir, 'file2.bin'), 'wb') as f:
+            f.write(b'corrupted')
+        missing_url = http_server.base_url + '/file3.bin'
+
+        status = verify_url_files(urls + [missing_url], save_dir, workers=2, verbose=False)
+
+        assert list(status.items()) == [(os.path.join(save_dir, 'file0.bin'), 'ok'),
+                                        (os.path.join(save_dir, 'file1.bin'), 'ok'),
+                                        (os.path.join(save_dir, 'file2.bin'), 'invalid'),
+                                        (os.path.join(save_dir, 'file3.bin'), 'missing')]
+
+    def test_verify_url_files_unverified_without_checksums(self, tmpdir):
+        with open(str(tmpdir.join('file.bin')), 'wb') as f:
+            f.write(b'data')
+
+        status = verify_url_files(['http://some_url/file.bin'], str(tmpdir), verbose=False)
+
+        assert status[str(tmpdir.join('file.bin'))] == 'unverified'